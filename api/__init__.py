@@ -1,5 +1,6 @@
 from fastapi import FastAPI  # , Request, HTTPException, status, Depends  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
+from fastapi.responses import ORJSONResponse  # type: ignore
 from fastapi.staticfiles import StaticFiles  # type: ignore
 from fastapi.templating import Jinja2Templates  # type: ignore
 
@@ -12,6 +13,8 @@ from .church_admin.routes import (
     church_adm_router,
     churchleads_router,
     churchleads_adm_router,
+    stats_router,
+    stats_adm_router,
 )
 from .membership_mgmt.routes import (
     members_router,
@@ -20,9 +23,23 @@ from .membership_mgmt.routes import (
     member_branch_adm_router,
 )
 from .user_mgmt.routes import user_route, user_adm_route
+from .system_admin.routes import (
+    jobs_adm_router,
+    profiling_adm_router,
+    permissions_adm_router,
+)
+from .common.cache import ResponseCacheMiddleware
 from .common.config import settings
+from .common.jobs import job_runner
+from .common.mail_queue import mail_queue
+from .common.metrics import MetricsMiddleware, metrics
+from .common.permissions import permissions
+from .common.tracing import tracer
+from .common.profiling import ProfilerMiddleware
 from .swagger_doc import get_swagger_params
 from .common.database import (
+    engine,
+    engine1,
     create_audit_log_triggers,
     create_change_track_triggers,
     get_all_endpoints,
@@ -47,7 +64,15 @@ def create_app(prefix=settings.dev_prefix):
     swagger_params = get_swagger_params(prefix)
 
     # Init app
-    app = FastAPI(**swagger_params)
+    app = FastAPI(**swagger_params, default_response_class=ORJSONResponse)
+
+    # Enable response cache middleware (added before CORS, so cached responses get CORS headers)
+    if settings.response_cache_enabled:
+        app.add_middleware(ResponseCacheMiddleware)
+
+    # Enable per-request profiling (added after the cache, so cached responses can be profiled too)
+    if settings.profiling_enabled:
+        app.add_middleware(ProfilerMiddleware)
 
     # Enable CORS middleware
     app.add_middleware(
@@ -55,9 +80,18 @@ def create_app(prefix=settings.dev_prefix):
         allow_origins=origins,
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "PATCH"],
-        allow_headers=["Authorization", "Content-Type"],
+        allow_headers=["Authorization", "Content-Type", "If-None-Match"],
+        expose_headers=["ETag"],
     )
 
+    # Enable metrics middleware (added last, so it measures the whole request)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+
+    # Enable request tracing (added last, so the root span covers the whole request)
+    if settings.tracing_enabled:
+        tracer.init_app(app, engines=(engine, engine1))
+
     # include routers to app
     app.include_router(auth_router, prefix=prefix)
     app.include_router(hierarchy_router, prefix=prefix)
@@ -67,12 +101,28 @@ def create_app(prefix=settings.dev_prefix):
     app.include_router(church_adm_router, prefix=prefix)
     app.include_router(churchleads_router, prefix=prefix)
     app.include_router(churchleads_adm_router, prefix=prefix)
+    app.include_router(stats_router, prefix=prefix)
+    app.include_router(stats_adm_router, prefix=prefix)
     app.include_router(members_router, prefix=prefix)
     app.include_router(members_adm_router, prefix=prefix)
     app.include_router(member_branch_router, prefix=prefix)
     app.include_router(member_branch_adm_router, prefix=prefix)
     app.include_router(user_route, prefix=prefix)
     app.include_router(user_adm_route, prefix=prefix)
+    app.include_router(jobs_adm_router, prefix=prefix)
+    app.include_router(profiling_adm_router, prefix=prefix)
+    app.include_router(permissions_adm_router, prefix=prefix)
+
+    # Route permissions, by route code (api/common/permissions.py)
+    permissions.init_app(app)
+
+    # Background jobs (api/common/jobs.py)
+    job_runner.init_app(app)
+    # Outbound mail queue (api/common/mail_queue.py)
+    mail_queue.init_app(app)
+    # Request metrics on GET /metrics (api/common/metrics.py)
+    if settings.metrics_enabled:
+        metrics.init_app(app)
 
     # Perform DB Operations
     """Create Triggers, Insert into Endpoints Table"""
@@ -1,6 +1,6 @@
-from typing import List, Optional, Union
+from typing import List, NamedTuple, Optional, Union
 
-from pydantic import BaseModel, EmailStr, SecretStr  # type: ignore
+from pydantic import BaseModel, EmailStr, Field, SecretStr  # type: ignore
 
 
 class TokenData(BaseModel):
@@ -55,10 +55,23 @@ class TokenLevelResponse(BaseModel):
     user_access: Union[list[UserLevel], UserLevel, None] = None
 
 
+class UserGrant(NamedTuple):
+    """A user's grant (one per role submodule access), as returned by get_user_access."""
+
+    Role_Code: str
+    Hierarchy_Code: str
+    Level_Code: Optional[str]
+    Level_No: int
+    Level_Name: Optional[str]
+    Church_Code: Optional[str]
+    Group_Code: Optional[str]
+    Module_Code: str
+    SubModule_Code: str
+    Access_Type: str
+    Head_Code: str
+
+
 class UserAccess(BaseModel):
-    Usercode: str
-    Email: Optional[EmailStr] = None
-    Is_Member: Optional[bool] = False
     Role_Code: str
     Hierarchy_Code: str
     Level_No: int
@@ -70,10 +83,10 @@ class UserAccess(BaseModel):
     Module_Code: str
     SubModule_Code: str
     Access_Type: str
-    Title: Optional[str] = None
-    Titl2: Optional[str] = None
-    First_Name: Optional[str] = None
-    Last_Name: Optional[str] = None
+
+
+class UserAccessMe(User):
+    grants: list[UserAccess] = []
 
 
 # class TokenAccessResponse(BaseModel):
@@ -89,6 +102,34 @@ class UserLevels(BaseModel):
     Level_Name: Optional[str] = None
 
 
+class UserBootstrap(BaseModel):
+    user: User
+    levels: list[UserLevels] = []
+    church_level: Optional[str] = None
+    # grants as rows of grant_fields values (the fields are not repeated per grant)
+    grant_fields: list[str] = list(UserGrant._fields)
+    grants: list[list] = []
+    # Member (api/membership_mgmt/models/members.py); None if the user is not an active member
+    member: Optional[dict] = None
+
+
+class UserBootstrapResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Optional[UserBootstrap] = None
+
+
+class UserActivationIn(BaseModel):
+    Token: str
+    Password: SecretStr = Field(..., min_length=8)
+
+
+class UserActivationResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Optional[str] = None
+
+
 # class UserPassword(BaseModel):
 #     password: SecretStr
 
@@ -1,25 +1,39 @@
-from typing import Annotated
+from time import monotonic
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, status, Depends, Path  # type: ignore
+from fastapi import APIRouter, status, Depends, Header, Path, Request  # type: ignore
 from fastapi.security import OAuth2PasswordRequestForm  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
-from ...common.database import get_db
+from ...common.cache import AUTH_NAMESPACE, CachedResponse, entry_response, response_cache
+from ...common.config import settings
+from ...common.database import get_db, run_in_session
 from ...common.dependencies import (
     get_current_user,
     get_current_user_access,
     get_route_code,
+    oauth2_scheme,
 )
+from ...common.responses import RowSchema, dumps
 from ...authentication.services.auth import AuthService
 from ...authentication.models.auth import (
     TokenLevelResponse,
     TokenResponse,
     User,
-    UserAccess,
+    UserActivationIn,
+    UserActivationResponse,
+    UserAccessMe,
+    UserBootstrapResponse,
+    UserGrant,
     UserLevels,
 )
+from ...membership_mgmt.models.members import Member
 from ...swagger_doc import tags
 
+user_schema = RowSchema(User)
+user_levels_schema = RowSchema(UserLevels)
+member_schema = RowSchema(Member)
+
 auth_router = APIRouter(
     prefix="/auth", tags=[f"{tags['auth']['module']}: {tags['auth']['submodule']}"]
 )
@@ -27,10 +41,12 @@ auth_router = APIRouter(
 """
 #### Authentication Routes
 - Authenticate User
+- Activate User
 - Re-Authenticate With Church Level
 - Get Current User
 - Get Current User Access
 - Get Current User Levels
+- Bootstrap Current User
 """
 
 
@@ -71,6 +87,37 @@ async def login(
     return response
 
 
+# User Activation Route
+@auth_router.post(
+    "/activate",
+    status_code=status.HTTP_200_OK,
+    name="Activate User",
+    summary="Activate User With Activation Token",
+    description="## Activate User - set the password with the single-use token from the welcome email",
+    response_model=UserActivationResponse,
+)
+async def activate_user(
+    activation: UserActivationIn,
+    db: Annotated[Session, Depends(get_db)],
+):
+    activated = AuthService().activate_user(
+        activation.Token,
+        activation.Password.get_secret_value(),
+        db,
+    )
+    usercode = activated.Usercode
+    # the user's status changed
+    response_cache.invalidate("bootstrap", activated.Head_Code)
+    response_cache.invalidate(AUTH_NAMESPACE, activated.Head_Code)
+    # set response body
+    response = dict(
+        data=usercode,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully activated user: '{usercode}'. You can now log in",
+    )
+    return response
+
+
 # User Select Church Level/Re-authenticate
 @auth_router.post(
     "/select_level/{level_code}",
@@ -132,14 +179,19 @@ async def read_users_me(
     name="Get Current User Access",
     summary="Get Current Active User Access",
     description="## Get Current Active User Access",
-    response_model=list[UserAccess],
+    response_model=UserAccessMe,
 )
 async def read_users_access_me(
-    current_user: Annotated[User, Depends(get_current_user_access)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    current_user_access: Annotated[list[UserGrant], Depends(get_current_user_access)],
     route_code: Annotated[str, Depends(get_route_code)],
 ):
     print(route_code)
-    return current_user
+    # identity once, with the grants
+    return dict(
+        current_user._mapping,
+        grants=[grant._asdict() for grant in current_user_access],
+    )
 
 
 @auth_router.get(
@@ -158,3 +210,66 @@ async def get_user_levels_me(
     print(route_code)
     user_levels = AuthService().get_user_levels(current_user.Usercode, db)
     return user_levels
+
+
+@auth_router.get(
+    "/bootstrap",
+    status_code=status.HTTP_200_OK,
+    name="Bootstrap Current User",
+    summary="Get Current User, Levels, Access and Member",
+    description="## Everything the client loads after login in one request: the current user, the user's church levels, the grants of the selected church level and the user's member profile. Cached per token (ETag, `If-None-Match`)",
+    response_model=UserBootstrapResponse,
+)
+async def bootstrap(
+    request: Request,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    # the token is decoded once (also on a cache hit: signature and expiry)
+    token_data = AuthService().re_verify_access_token(token)
+    cache_key = response_cache.make_token_key("bootstrap", token)
+    entry = response_cache.get(cache_key) if settings.response_cache_enabled else None
+    # the user's status is re-checked every RESPONSE_CACHE_IDENTITY_TTL seconds on the cache hits
+    # (as the memoised identities of the cached routes); in-app changes invalidate "bootstrap" at once
+    if entry is not None and entry.checked + response_cache.identity_ttl < monotonic():
+        user = await run_in_session(AuthService().get_user, token_data.username)
+        if user is None or not user.Is_Active or user.Head_Code != entry.head_code:
+            response_cache.delete(cache_key)
+            entry = None
+        else:
+            entry.checked = monotonic()
+    if entry is None:
+        # version taken before the bootstrap reads: a write committed meanwhile makes the entry stale
+        bootstrap = await AuthService().get_bootstrap(
+            token_data,
+            on_user=lambda user: response_cache.version("bootstrap", user.Head_Code),
+        )
+        body = dumps(
+            dict(
+                status_code=status.HTTP_200_OK,
+                message="Successfully retrieved current user",
+                data=dict(
+                    user=user_schema.dump(bootstrap["user"]),
+                    levels=user_levels_schema.dump(bootstrap["levels"]),
+                    church_level=bootstrap["church_level"],
+                    grant_fields=UserGrant._fields,
+                    grants=[list(grant) for grant in bootstrap["grants"]],
+                    member=member_schema.dump(bootstrap["member"]),
+                ),
+            )
+        )
+        entry = CachedResponse(
+            body=body,
+            etag=response_cache.make_etag(body),
+            media_type="application/json",
+            namespace="bootstrap",
+            head_code=bootstrap["user"].Head_Code,
+            expires=monotonic() + response_cache.ttl,
+            version=bootstrap["before"],
+            checked=monotonic(),
+        )
+        if settings.response_cache_enabled:
+            response_cache.set(cache_key, entry)
+    # head church label of the request metrics (api/common/metrics.py)
+    request.state.head_code = entry.head_code
+    return entry_response(entry, if_none_match)
@@ -1,13 +1,18 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from typing import Callable, Optional
 
 from fastapi import HTTPException, status  # type: ignore
 from passlib.context import CryptContext  # type: ignore
 from jose import JWTError, jwt  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
-from sqlalchemy import text  # type: ignore
 
 from ...common.config import settings
-from ...authentication.models.auth import TokenLevelData, TokenData, User
+from ...common.database import run_in_session
+from ...authentication.models.auth import TokenLevelData, TokenData, User, UserGrant
+from ...common.queries import register_query
+from ...common.tracing import traced_services
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -25,6 +30,104 @@ auth_credentials_exception = HTTPException(
 )
 
 
+GET_USER = register_query(
+    "auth.GET_USER",
+    f"""
+        SELECT A.Usercode, A.Password, A.Email, A.Head_Code, A.Is_Active, B.Title, B.Title2, B.First_Name, B.Last_Name, A.Is_Member, C.Name AS Head_Name
+        FROM {db_schema_headchu}.tblUsers A
+        LEFT JOIN {db_schema_headchu}.tblMembers B ON B.Code = A.Usercode
+        LEFT JOIN {db_schema_generic}.tblChurchHeads C ON C.Code = A.Head_Code
+        WHERE A.Usercode = :Usercode;
+    """,
+)
+
+GET_USER_LEVEL = register_query(
+    "auth.GET_USER_LEVEL",
+    f"""
+        SELECT DISTINCT A.Usercode, Password, Email, A.Level_Code, C.Level_Name, A.Church_Code, E.Name AS Church_Name, A.Head_Code, D.Title, D.Title2, D.First_Name, D.Last_Name
+        FROM {db_schema_headchu}.tblUserRole A
+        LEFT JOIN {db_schema_headchu}.tblUsers B ON B.Usercode = A.Usercode
+        LEFT JOIN {db_schema_headchu}.tblChurchLevels C ON C.Code = A.Level_Code
+        LEFT JOIN {db_schema_headchu}.tblMembers D ON D.Code = A.Usercode
+        LEFT JOIN {db_schema_headchu}.tblChurches E ON E.Code = A.Church_Code
+        WHERE A.Is_Active = :Is_Active AND B.Is_Active = :Is_Active AND A.Status = :Status
+            AND A.Usercode = :Usercode AND A.Level_Code = :Level_Code;
+    """,
+)
+
+GET_USER_LEVELS = register_query(
+    "auth.GET_USER_LEVELS",
+    f"""
+        SELECT A.Level_Code, B.Level_Name
+        FROM {db_schema_headchu}.tblUserRole A
+        LEFT JOIN {db_schema_headchu}.tblChurchLevels B ON B.Code = A.Level_Code AND B.Head_Code = A.Head_Code
+        WHERE A.Is_Active = :Is_Active AND B.Is_Active = :Is_Active AND A.Status = :Status
+        AND Usercode = :Usercode;
+    """,
+)
+
+GET_USER_ACCESS = register_query(
+    "auth.GET_USER_ACCESS",
+    f"""
+        SELECT A.Role_Code, E.Hierarchy_Code, A.Level_Code, F.Level_No, E.Level_Name, A.Church_Code, A.Group_Code, C.Module_Code, C.SubModule_Code, C.Access_Type, A.Head_Code
+        FROM {db_schema_headchu}.tblUserRole A
+        LEFT JOIN {db_schema_headchu}.tblRoleSubModules B ON B.Role_Code = A.Role_Code
+        LEFT JOIN {db_schema_generic}.tblSubModuleAccess C ON C.Code = B.SubModuleAccess_Code
+        LEFT JOIN {db_schema_headchu}.tblChurchLevels E ON E.Code = A.Level_Code
+        LEFT JOIN {db_schema_generic}.tblHierarchy F ON F.Code = E.Hierarchy_Code
+        WHERE A.Is_Active = :Is_Active AND B.Is_Active = :Is_Active AND C.Is_Active = :Is_Active
+            AND A.Status = :Status AND B.Status = :Status
+            AND A.Usercode = :Usercode AND A.Level_Code = :Level_Code;
+    """,
+)
+
+# the current member profile (as GET_CURRENT_USER_MEMBER), by the usercode only: the head church comes from the user
+GET_BOOTSTRAP_MEMBER = register_query(
+    "auth.GET_BOOTSTRAP_MEMBER",
+    f"""
+        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note
+        FROM tblMember M
+        JOIN {db_schema_headchu}.tblUsers U ON U.Usercode = M.Code AND U.Head_Code = M.Head_Code
+        LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
+        WHERE M.Code = :Code AND M.Is_Active = :Is_Active AND MC.Is_Active = :Is_Active;
+    """,
+)
+
+GET_USER_ACTIVATION = register_query(
+    "auth.GET_USER_ACTIVATION",
+    f"""
+        SELECT A.Id, A.Usercode, A.Expires_Date, A.Used_Date, A.Head_Code
+        FROM {db_schema_headchu}.tblUserActivation A
+        WHERE A.Token_Hash = :Token_Hash
+        FOR UPDATE;
+    """,
+)
+
+USE_USER_ACTIVATION = register_query(
+    "auth.USE_USER_ACTIVATION",
+    f"""
+        UPDATE {db_schema_headchu}.tblUserActivation
+        SET Used_Date = NOW()
+        WHERE Id = :Id AND Used_Date IS NULL;
+    """,
+)
+
+ACTIVATE_USER = register_query(
+    "auth.ACTIVATE_USER",
+    f"""
+        UPDATE {db_schema_headchu}.tblUsers
+        SET Password = :Password, Is_Active = :Is_Active
+        WHERE Usercode = :Usercode;
+    """,
+)
+
+
+def hash_activation_token(token: str) -> str:
+    """Only the sha256 of an activation token is stored (tblUserActivation.Token_Hash)."""
+    return sha256(token.encode()).hexdigest()
+
+
+@traced_services
 class AuthService:
     """
     Authentication Services
@@ -38,6 +141,8 @@ class AuthService:
     - Re-Authenticate User Access
     - Re-verify Access Token
     - Get User Access
+    - Activate User
+    - Get Bootstrap
     """
 
     # Hash Password
@@ -52,15 +157,7 @@ class AuthService:
     def get_user(self, username: str, db: Session):
         try:
             user = db.execute(
-                text(
-                    f"""
-                    SELECT A.Usercode, A.Password, A.Email, A.Head_Code, A.Is_Active, B.Title, B.Title2, B.First_Name, B.Last_Name, A.Is_Member, C.Name AS Head_Name
-                    FROM {db_schema_headchu}.tblUsers A
-                    LEFT JOIN {db_schema_headchu}.tblMembers B ON B.Code = A.Usercode
-                    LEFT JOIN {db_schema_generic}.tblChurchHeads C ON C.Code = A.Head_Code
-                    WHERE A.Usercode = :Usercode;
-                    """
-                ),
+                GET_USER,
                 dict(
                     Usercode=username,
                 ),
@@ -110,6 +207,12 @@ class AuthService:
     def authenticate_user(self, username: str, password: str, db: Session):
         try:
             user = self.get_user(username, db)
+            # users provisioned in bulk have no password until activated
+            if user.Password is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Oops! Account not activated. Please use the link in your welcome email",
+                )
             if not self.verify_password(password, user.Password):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -129,18 +232,7 @@ class AuthService:
     def get_user_level(self, username: str, level_code: str, db: Session):
         try:
             user_level = db.execute(
-                text(
-                    f"""
-                    SELECT DISTINCT A.Usercode, Password, Email, A.Level_Code, C.Level_Name, A.Church_Code, E.Name AS Church_Name, A.Head_Code, D.Title, D.Title2, D.First_Name, D.Last_Name
-                    FROM {db_schema_headchu}.tblUserRole A
-                    LEFT JOIN {db_schema_headchu}.tblUsers B ON B.Usercode = A.Usercode
-                    LEFT JOIN {db_schema_headchu}.tblChurchLevels C ON C.Code = A.Level_Code
-                    LEFT JOIN {db_schema_headchu}.tblMembers D ON D.Code = A.Usercode
-                    LEFT JOIN {db_schema_headchu}.tblChurches E ON E.Code = A.Church_Code
-                    WHERE A.Is_Active = :Is_Active AND B.Is_Active = :Is_Active AND A.Status = :Status
-                        AND A.Usercode = :Usercode AND A.Level_Code = :Level_Code;
-                    """
-                ),
+                GET_USER_LEVEL,
                 dict(
                     Usercode=username,
                     Level_Code=level_code,
@@ -163,15 +255,7 @@ class AuthService:
     def get_user_levels(self, username: str, db: Session):
         try:
             user_levels = db.execute(
-                text(
-                    f"""
-                    SELECT A.Level_Code, B.Level_Name
-                    FROM {db_schema_headchu}.tblUserRole A
-                    LEFT JOIN {db_schema_headchu}.tblChurchLevels B ON B.Code = A.Level_Code AND B.Head_Code = A.Head_Code
-                    WHERE A.Is_Active = :Is_Active AND B.Is_Active = :Is_Active AND A.Status = :Status
-                    AND Usercode = :Usercode;
-                    """
-                ),
+                GET_USER_LEVELS,
                 dict(Usercode=username, Is_Active=1, Status="APR"),
             ).all()
             if not user_levels:
@@ -255,23 +339,13 @@ class AuthService:
             raise auth_credentials_exception
 
     def get_user_access(self, username: str, level_code: str, db: Session):
+        """
+        Returns the user's grants for the church level as compact UserGrant tuples.
+        The identity (name, email etc.) is not repeated per grant: see get_user.
+        """
         try:
             user_access = db.execute(
-                text(
-                    f"""
-                    SELECT A.Usercode, D.Password, D.Email, A.Role_Code, E.Hierarchy_Code, A.Level_Code, F.Level_No, E.Level_Name, A.Church_Code, A.Group_Code, C.Module_Code, C.SubModule_Code, C.Access_Type, A.Head_Code, G.First_Name, G.Last_Name, G.Title, G.Title2, D.Is_Member
-                    FROM {db_schema_headchu}.tblUserRole A
-                    LEFT JOIN {db_schema_headchu}.tblRoleSubModules B ON B.Role_Code = A.Role_Code
-                    LEFT JOIN {db_schema_generic}.tblSubModuleAccess C ON C.Code = B.SubModuleAccess_Code
-                    LEFT JOIN {db_schema_headchu}.tblUsers D ON D.Usercode = A.Usercode
-                    LEFT JOIN {db_schema_headchu}.tblChurchLevels E ON E.Code = A.Level_Code
-                    LEFT JOIN {db_schema_generic}.tblHierarchy F ON F.Code = E.Hierarchy_Code
-                    LEFT JOIN {db_schema_headchu}.tblMembers G ON G.Code = A.Usercode
-                    WHERE A.Is_Active = :Is_Active AND B.Is_Active = :Is_Active AND C.Is_Active = :Is_Active 
-                        AND A.Status = :Status AND B.Status = :Status
-                        AND A.Usercode = :Usercode AND A.Level_Code = :Level_Code;
-                    """
-                ),
+                GET_USER_ACCESS,
                 dict(
                     Usercode=username,
                     Level_Code=level_code,
@@ -285,9 +359,88 @@ class AuthService:
                     detail="User access denied. Select a valid Church Level.",
                 )
             # print("user access fetched")
-            return user_access
+            return [UserGrant._make(grant) for grant in user_access]
         except Exception as err:
             db.rollback()
             # print(err)
             # print("user access not fetched")
             raise err
+
+    def activate_user(self, token: str, password: str, db: Session):
+        """
+        Activates a user with a single-use activation token (see create_users_from_members):
+        sets the user's password (the only password hash of the provisioning) and uses up the token.
+        Returns the activation (Usercode, Head_Code).
+        """
+        try:
+            activation = db.execute(
+                GET_USER_ACTIVATION,
+                dict(Token_Hash=hash_activation_token(token)),
+            ).first()
+            if (
+                activation is None
+                or activation.Used_Date is not None
+                or activation.Expires_Date < datetime.now()
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid or expired activation token",
+                )
+            db.execute(
+                ACTIVATE_USER,
+                dict(
+                    Usercode=activation.Usercode,
+                    Password=self.get_password_hash(password),
+                    Is_Active=1,
+                ),
+            )
+            db.execute(USE_USER_ACTIVATION, dict(Id=activation.Id))
+            db.commit()
+            return activation
+        except Exception as err:
+            db.rollback()
+            raise err
+
+    def get_bootstrap_member(self, username: str, db: Session):
+        return db.execute(GET_BOOTSTRAP_MEMBER, dict(Code=username, Is_Active=1)).first()
+
+    async def get_bootstrap(
+        self, token_data: TokenLevelData, on_user: Optional[Callable] = None
+    ):
+        """
+        Everything the client loads after login, for an already decoded token: the user, the user's
+        church levels, the grants of the selected level (if any) and the user's member profile.
+        - the user is read first, then on_user(user) is called (e.g. to take the version of a cache namespace)
+        - the reads then run concurrently, each on its own pooled connection (see run_in_session);
+          the user is read again with them, so a change committed after on_user is never missed
+        """
+        username = token_data.username
+        user = await run_in_session(self.get_user, username)
+        if user is None:
+            raise auth_credentials_exception
+        before = on_user(user) if on_user else None
+        reads = [
+            run_in_session(self.get_user, username),
+            run_in_session(self.get_user_levels, username),
+            run_in_session(self.get_bootstrap_member, username),
+        ]
+        if token_data.church_level:
+            reads.append(
+                run_in_session(self.get_user_access, username, token_data.church_level)
+            )
+        user, levels, member, *grants = await asyncio.gather(*reads)
+        if user is None:
+            raise auth_credentials_exception
+        if not user.Is_Active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Inactive user",
+            )
+        return dict(
+            user=user,
+            levels=levels,
+            church_level=token_data.church_level,
+            grants=grants[0] if grants else [],
+            member=member,
+            before=before,
+        )
@@ -70,6 +70,11 @@ class HeadChurch(HeadChurchBase, HeadChurchCode):
     Modified_By: Optional[str] = None
     Id: Optional[int] = None
 
+    # response model: the stored numbers are not re-checked (see normalise_phonenumber)
+    @validator("Contact_No", "Contact_No2")
+    def get_phone_numbers(cls, v):
+        return get_phonenumber(v, strict=False) if v else None
+
 
 class HeadChurchResponse(BaseModel):
     status_code: int
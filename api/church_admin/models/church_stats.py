@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional, Union
+
+from pydantic import BaseModel  # type: ignore
+
+
+class ChurchStats(BaseModel):
+    Church_Code: str
+    Church_Name: Optional[str] = None
+    Level_Code: Optional[str] = None
+    Active_Members: int
+    Active_Clergy: int
+    Refreshed_Date: Optional[datetime] = None
+    Modified_Date: Optional[datetime] = None
+
+
+class ChurchStatsResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Union[list[ChurchStats], ChurchStats, None] = None
+
+
+class ChurchStatsRefreshOut(BaseModel):
+    Head_Code: str
+    Churches: int
+
+
+class ChurchStatsRefreshResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Optional[ChurchStatsRefreshOut] = None
@@ -2,3 +2,4 @@ from .hierarchy import hierarchy_router
 from .church_heads import head_chu_router, head_chu_adm_router
 from .churches import church_router, church_adm_router
 from .church_leads import churchleads_router, churchleads_adm_router
+from .church_stats import stats_router, stats_adm_router
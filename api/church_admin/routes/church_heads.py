@@ -13,6 +13,8 @@ from ..models.church_heads import (
     HeadChurchResponse,
     HeadChurchUpdateIn,
 )
+from ...common.cache import cached_response
+from ...common.permissions import PermissionSpec, requires
 from ...swagger_doc import tags
 
 head_chu_router = APIRouter(
@@ -41,6 +43,28 @@ Head Church Admin Routes
 """
 
 
+# route permissions, checked before any query of the services (see common/permissions.py)
+HEAD_CHURCH_VIEW = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HCHM"],
+    submodule_code=["ALLS", "HEAD"],
+    access_type=["RD", "UP"],
+)
+HEAD_CHURCH_UPDATE = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HCHM"],
+    submodule_code=["ALLS", "HEAD"],
+    access_type=["UP"],
+)
+HEAD_CHURCH_ADMIN = PermissionSpec(
+    role_code=["SAD"],
+    module_code=["ALLM", "HCHM"],
+    submodule_code=["ALLS", "HEAD"],
+    access_type=["UP"],
+    head_code="ALL",
+)
+
+
 # Create New Head Church
 @head_chu_router.post(
     "/create",
@@ -72,6 +96,7 @@ async def create_new_head_church(
     summary="Get Head Church by Code",
     description="## Retrieve Head Church by Code",
     response_model=HeadChurchResponse,
+    dependencies=[Depends(requires(HEAD_CHURCH_VIEW)), Depends(cached_response("head_church"))],
 )
 async def get_head_church_by_code(
     code: Annotated[
@@ -99,6 +124,7 @@ async def get_head_church_by_code(
     summary="Update Head Church by Code",
     description="## Update Head Church by Code",
     response_model=HeadChurchResponse,
+    dependencies=[Depends(requires(HEAD_CHURCH_UPDATE))],
 )
 async def update_head_church_by_code(
     code: Annotated[
@@ -129,6 +155,7 @@ async def update_head_church_by_code(
     summary="Activate Head Church by Code",
     description="## Activate Head Church by Code",
     response_model=HeadChurchResponse,
+    dependencies=[Depends(requires(HEAD_CHURCH_ADMIN))],
 )
 async def activate_head_church_by_code(
     code: Annotated[
@@ -158,6 +185,7 @@ async def activate_head_church_by_code(
     summary="Deactivate Head Church by Code",
     description="## Deactivate Head Church by Code",
     response_model=HeadChurchResponse,
+    dependencies=[Depends(requires(HEAD_CHURCH_ADMIN))],
 )
 async def deactivate_head_church_by_code(
     code: Annotated[
@@ -13,6 +13,7 @@ from ...church_admin.models.church_leads import (
     ChurchLeadsResponse,
 )
 from ..models.churches import ChurchResponse
+from ...common.permissions import PermissionSpec, requires
 from ...swagger_doc import tags
 
 churchleads_router = APIRouter(
@@ -39,6 +40,23 @@ churchleads_adm_router = APIRouter(
 """
 
 
+# route permissions, checked before any query of the services (see common/permissions.py)
+CHURCH_LEAD_VIEW = PermissionSpec(
+    module_code=["ALLM", "HRCH"],
+    access_type=["VW"],
+)
+CHURCH_LEAD_EDIT = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HRCH"],
+    access_type=["ED"],
+)
+CHURCH_LEAD_UNMAP = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HRCH"],
+    access_type=["ED", "VW"],
+)
+
+
 # Get church lead by code
 @churchleads_router.get(
     "/{church_code}",
@@ -47,6 +65,7 @@ churchleads_adm_router = APIRouter(
     summary="Get Church Lead by Code",
     description="## Retrieve Church Lead by Code",
     response_model=ChurchLeadsResponse,
+    dependencies=[Depends(requires(CHURCH_LEAD_VIEW))],
 )
 async def get_church_leads_by_church_code(
     church_code: Annotated[str, Path(..., description="code of the church mapped")],
@@ -83,6 +102,7 @@ async def get_church_leads_by_church_code(
     summary="Approve Church Lead by Code",
     description="## Approve Church Lead by Code",
     response_model=ChurchLeadsResponse,
+    dependencies=[Depends(requires(CHURCH_LEAD_EDIT))],
 )
 async def approve_church_lead_by_code(
     church_code: Annotated[str, Path(..., description="code of the church mapped")],
@@ -111,6 +131,7 @@ async def approve_church_lead_by_code(
     summary="Get Churches by Leads Code",
     description="## Retrieve Churches by Leads Code",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_LEAD_VIEW))],
 )
 async def get_all_churches_by_lead_code(
     lead_code: Annotated[str, Path(..., description="code of the lead church")],
@@ -158,6 +179,7 @@ async def get_all_churches_by_lead_code(
     summary="Get Branches by Church Lead Code",
     description="## Retrieve Branches by Church Lead Code",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_LEAD_VIEW))],
 )
 async def get_branches_by_church(
     church_code: Annotated[
@@ -196,6 +218,7 @@ async def get_branches_by_church(
     summary="Unmap Church Lead by Church Code",
     description="## Unmap Church Leads by Church code",
     response_model=ChurchLeadsResponse,
+    dependencies=[Depends(requires(CHURCH_LEAD_UNMAP))],
 )
 async def unmap_church_leads_by_church(
     church_code: Annotated[
@@ -227,6 +250,7 @@ async def unmap_church_leads_by_church(
     summary="Map Church Lead",
     description="## Map Church Leads",
     response_model=ChurchLeadsResponse,
+    dependencies=[Depends(requires(CHURCH_LEAD_EDIT))],
 )
 async def map_church_to_lead_by_code(
     church_code: Annotated[
@@ -0,0 +1,124 @@
+from typing import Annotated
+
+from fastapi import APIRouter, status, Depends, Path  # type: ignore
+
+from ...church_admin.services import ChurchStatsServices, get_church_stats_services
+from ...church_admin.models.church_stats import (
+    ChurchStatsRefreshResponse,
+    ChurchStatsResponse,
+)
+from ...common.permissions import PermissionSpec, requires
+from ...swagger_doc import tags
+
+stats_router = APIRouter(
+    prefix="/stats",
+    tags=[f"{tags['church_stats']['module']}: {tags['church_stats']['submodule']}"],
+)
+"""
+#### Church Stats Routes
+- Get Church Stats by Code
+- Get Church Stats by Level
+"""
+
+stats_adm_router = APIRouter(
+    prefix="/admin/stats",
+    tags=[
+        f"{tags['church_stats']['module']}: {tags['church_stats']['submodule']}: Admin only"
+    ],
+)
+"""
+#### Church Stats Admin Routes
+- Refresh Church Stats
+"""
+
+
+# route permissions, checked before any query of the services (see common/permissions.py)
+CHURCH_STATS_VIEW = PermissionSpec(
+    role_code=["ADM", "SAD", "EXC"],
+    module_code=["ALLM", "HRCH"],
+    access_type=["VW", "ED", "CR"],
+)
+CHURCH_STATS_REFRESH = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HRCH"],
+    access_type=["ED"],
+)
+
+
+# Get church stats by code
+@stats_router.get(
+    "/church/{church_code}",
+    status_code=status.HTTP_200_OK,
+    name="Get Church Stats",
+    summary="Get Church Stats by Code",
+    description="## Retrieve the active members and clergy of a Church (including all the branches under it)",
+    response_model=ChurchStatsResponse,
+    dependencies=[Depends(requires(CHURCH_STATS_VIEW))],
+)
+async def get_church_stats_by_code(
+    church_code: Annotated[str, Path(..., description="code of the church")],
+    church_stats_services: Annotated[
+        ChurchStatsServices, Depends(get_church_stats_services)
+    ],
+):
+    church_stats = await church_stats_services.get_church_stats_by_code(church_code)
+    # set response body
+    response = dict(
+        data=church_stats,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully retrieved the stats of Church: '{church_stats.Church_Name} ({church_stats.Church_Code})'",
+    )
+    return response
+
+
+# Get church stats by level
+@stats_router.get(
+    "/level/{level_code}",
+    status_code=status.HTTP_200_OK,
+    name="Get Church Stats by Level",
+    summary="Get Church Stats by Level",
+    description="## Retrieve the active members and clergy of all the Churches of a Level",
+    response_model=ChurchStatsResponse,
+    dependencies=[Depends(requires(CHURCH_STATS_VIEW))],
+)
+async def get_church_stats_by_level(
+    level_code: Annotated[str, Path(..., description="code of the church level")],
+    church_stats_services: Annotated[
+        ChurchStatsServices, Depends(get_church_stats_services)
+    ],
+):
+    church_stats = await church_stats_services.get_church_stats_by_level(level_code)
+    # set response body
+    response = dict(
+        data=church_stats,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully retrieved the stats of {len(church_stats)} Church(es) of Level: '{level_code.upper()}'",
+    )
+    return response
+
+
+# Refresh church stats
+@stats_adm_router.post(
+    "/refresh",
+    status_code=status.HTTP_200_OK,
+    name="Refresh Church Stats",
+    summary="Refresh Church Stats",
+    description="## Rebuild the Branch Ancestry and Church Stats of the Head Church",
+    response_model=ChurchStatsRefreshResponse,
+    dependencies=[Depends(requires(CHURCH_STATS_REFRESH))],
+)
+async def refresh_church_stats(
+    church_stats_services: Annotated[
+        ChurchStatsServices, Depends(get_church_stats_services)
+    ],
+):
+    refreshed = await church_stats_services.refresh_church_stats()
+    # set response body
+    response = dict(
+        data=dict(
+            Head_Code=church_stats_services.current_user.Head_Code, Churches=refreshed
+        ),
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully refreshed the stats of {refreshed} Church(es)",
+    )
+    return response
@@ -3,9 +3,19 @@ from typing import Annotated, Optional
 from fastapi import APIRouter, status, Depends, Query, Path  # type: ignore
 
 from ...church_admin.services import ChurchServices, get_church_services
-from ...church_admin.models.churches import ChurchBase, ChurchResponse, ChurchUpdate
+from ...church_admin.models.churches import (
+    Church,
+    ChurchBase,
+    ChurchResponse,
+    ChurchUpdate,
+)
+from ...common.responses import RowSchema, fast_response
+from ...common.cache import cached_response
+from ...common.permissions import PermissionSpec, requires
 from ...swagger_doc import tags
 
+church_schema = RowSchema(Church)
+
 church_router = APIRouter(
     prefix=f"/church",
     tags=[f"{tags['churches']['module']}: {tags['churches']['submodule']}"],
@@ -32,6 +42,32 @@ church_adm_router = APIRouter(
 """
 
 
+# route permissions, checked before any query of the services (see common/permissions.py)
+CHURCH_VIEW = PermissionSpec(
+    module_code=["ALLM", "HRCH"],
+    access_type=["VW"],
+)
+CHURCH_READ = PermissionSpec(
+    module_code=["ALLM", "HRCH"],
+    access_type=["VW", "ED", "AR"],
+)
+CHURCH_CREATE = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HRCH"],
+    access_type=["CR"],
+)
+CHURCH_EDIT = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HRCH"],
+    access_type=["ED"],
+)
+CHURCH_APPROVE = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HRCH"],
+    access_type=["AR"],
+)
+
+
 # Create New Church
 @church_router.post(
     "/create/{level_code}",
@@ -40,6 +76,7 @@ church_adm_router = APIRouter(
     summary="Create New Church",
     description="## Create New Church",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_CREATE))],
 )
 async def create_new_church(
     level_code: Annotated[
@@ -66,6 +103,7 @@ async def create_new_church(
     summary="Activate Church by Code",
     description="## Activate Church by Code",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_EDIT))],
 )
 async def activate_church_by_code(
     code: Annotated[str, Path(..., description="code of the church to be activated")],
@@ -89,6 +127,7 @@ async def activate_church_by_code(
     summary="Deactivate Church by Code",
     description="## Deactivate Church by Code",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_EDIT))],
 )
 async def deactivate_church_by_code(
     code: Annotated[str, Path(..., description="code of the church to be deactivated")],
@@ -112,6 +151,7 @@ async def deactivate_church_by_code(
     summary="Approve Church by Id or Code",
     description="## Approve Church by Id or Code",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_APPROVE))],
 )
 async def approve_church_by_code(
     id_code: Annotated[str, Path(..., description="code of the church to be approved")],
@@ -135,6 +175,7 @@ async def approve_church_by_code(
     summary="Get All Churches",
     description="## Retrieve All Churches",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_VIEW)), Depends(cached_response("churches"))],
 )
 async def get_all_churches(
     church_services: Annotated[ChurchServices, Depends(get_church_services)],
@@ -144,17 +185,16 @@ async def get_all_churches(
     ),
 ):
     churches = await church_services.get_all_churches(status_code)
-    # set response body
-    response = dict(
-        data=churches,
-        status_code=status.HTTP_200_OK,
+    # serialise rows straight to the response body
+    return fast_response(
+        church_schema,
+        churches,
         message=(
             f"Successfully retrieved {len(churches)} "
             + ("Churches" if len(churches) > 1 else "Church")
             + ("" if status_code is None else f", with Status: '{status_code.upper()}'")
         ),
     )
-    return response
 
 
 # Get Churches by Level
@@ -165,6 +205,7 @@ async def get_all_churches(
     summary="Get Churches by Church Level",
     description="## Retrieve Churches by Hierarchical Church Level",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_VIEW)), Depends(cached_response("churches"))],
 )
 async def get_churches_by_level(
     level_code: str,
@@ -196,6 +237,7 @@ async def get_churches_by_level(
     summary="Get Church by Id or Code",
     description="## Retrieve Church by Id or Code",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_READ))],
 )
 async def get_church_by_id_code(
     id_code: str,
@@ -219,6 +261,7 @@ async def get_church_by_id_code(
     summary="Update Church by Code",
     description="## Update Church by Code",
     response_model=ChurchResponse,
+    dependencies=[Depends(requires(CHURCH_EDIT))],
 )
 async def update_church_by_code(
     code: str,
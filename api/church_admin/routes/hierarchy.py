@@ -8,6 +8,8 @@ from ...church_admin.services.hierarchy import (
     get_hierarchy_services,
 )
 
+from ...common.cache import cached_response
+from ...common.permissions import PermissionSpec, requires
 from ...swagger_doc import tags
 
 hierarchy_router = APIRouter(
@@ -25,6 +27,25 @@ Hierarchy Routes
 """
 
 
+# route permissions, checked before any query of the services (see common/permissions.py)
+HIERARCHY_VIEW = PermissionSpec(
+    module_code=["ALLM", "HCHM"],
+    access_type=["RD"],
+)
+HIERARCHY_READ = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HCHM"],
+    submodule_code=["ALLS", "HEAD", "HCHL"],
+    access_type=["RD", "UP"],
+)
+HIERARCHY_UPDATE = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "HCHM"],
+    submodule_code=["ALLS", "HEAD", "HCHL"],
+    access_type=["UP"],
+)
+
+
 # Get All Hierarchies
 @hierarchy_router.get(
     "/",
@@ -33,6 +54,7 @@ Hierarchy Routes
     summary="Get All Hierarchies",
     description="## Retrieve All Hierarchies",
     response_model=HierarchyResponse,
+    dependencies=[Depends(requires(HIERARCHY_VIEW)), Depends(cached_response("hierarchy"))],
 )
 async def get_all_hierarchies(
     hierarchy_services: Annotated[HierarchyService, Depends(get_hierarchy_services)],
@@ -56,6 +78,7 @@ async def get_all_hierarchies(
     summary="Get Hierarchy by Code",
     description="## Retrieve Hierarchy by Code",
     response_model=HierarchyResponse,
+    dependencies=[Depends(requires(HIERARCHY_READ))],
 )
 async def get_hierarchy_by_code(
     code: Annotated[
@@ -81,6 +104,7 @@ async def get_hierarchy_by_code(
     summary="Activate Hierarchy by Code",
     description="## Activate Hierarchy by Code",
     response_model=HierarchyResponse,
+    dependencies=[Depends(requires(HIERARCHY_UPDATE))],
 )
 async def activate_hierarchy_by_code(
     code: Annotated[
@@ -107,6 +131,7 @@ async def activate_hierarchy_by_code(
     summary="Deactivate Hierarchy by Code",
     description="## Deactivate Hierarchy by Code",
     response_model=HierarchyResponse,
+    dependencies=[Depends(requires(HIERARCHY_UPDATE))],
 )
 async def deactivate_hierarchy_by_code(
     code: Annotated[
@@ -132,6 +157,7 @@ async def deactivate_hierarchy_by_code(
     summary="Update Hierarchy by Code",
     description="## Update Hierarchy by Code",
     response_model=HierarchyResponse,
+    dependencies=[Depends(requires(HIERARCHY_UPDATE))],
 )
 async def update_hierarchy_by_code(
     code: Annotated[str, Path(..., description="Code of the hierarchy to be updated")],
@@ -1,2 +1,3 @@
 from .churches import ChurchServices, get_church_services
 from .church_leads import ChurchLeadsServices, get_church_lead_services
+from .church_stats import ChurchStatsServices, get_church_stats_services
@@ -0,0 +1,210 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session  # type: ignore
+
+from ...common.queries import register_query
+
+# number of lead churches kept per branch (as in vwMemberChurchHierarchy)
+ANCESTRY_DEPTH = 10
+LEAD_COLUMNS = [
+    f"{column}_{level}"
+    for level in range(1, ANCESTRY_DEPTH + 1)
+    for column in ("LeadCode", "LeadName", "LeadLevel")
+]
+
+
+GET_HEAD_CHURCH_CHURCHES = register_query(
+    "branch_ancestry.GET_HEAD_CHURCH_CHURCHES",
+    """
+        SELECT `Code`, Name, Level_Code FROM tblChurches
+        WHERE Head_Code = :Head_Code;
+    """,
+)
+
+GET_ACTIVE_CHURCH_LEADS = register_query(
+    "branch_ancestry.GET_ACTIVE_CHURCH_LEADS",
+    """
+        SELECT Church_Code, LeadChurch_Code FROM tblChurchLeads
+        WHERE Head_Code = :Head_Code AND Is_Active = :Is_Active
+        ORDER BY Start_Date;
+    """,
+)
+
+DELETE_BRANCH_ANCESTRY = register_query(
+    "branch_ancestry.DELETE_BRANCH_ANCESTRY",
+    """
+        DELETE FROM tblBranchAncestry
+        WHERE Head_Code = :Head_Code;
+    """,
+)
+
+DELETE_BRANCH_ANCESTRY_BY_CODES = register_query(
+    "branch_ancestry.DELETE_BRANCH_ANCESTRY_BY_CODES",
+    """
+        DELETE FROM tblBranchAncestry
+        WHERE Branch_Code IN :Branch_Codes;
+    """,
+    expanding=("Branch_Codes",),
+)
+
+INSERT_BRANCH_ANCESTRY = register_query(
+    "branch_ancestry.INSERT_BRANCH_ANCESTRY",
+    f"""
+        INSERT INTO tblBranchAncestry
+            (Branch_Code, Branch_Name, Branch_Level, Head_Code, {", ".join(LEAD_COLUMNS)})
+        VALUES
+            (:Branch_Code, :Branch_Name, :Branch_Level, :Head_Code, {", ".join(f":{column}" for column in LEAD_COLUMNS)});
+    """,
+)
+
+DELETE_CHURCH_CLOSURE = register_query(
+    "branch_ancestry.DELETE_CHURCH_CLOSURE",
+    """
+        DELETE FROM tblChurchClosure
+        WHERE Head_Code = :Head_Code;
+    """,
+)
+
+DELETE_CHURCH_CLOSURE_BY_CODES = register_query(
+    "branch_ancestry.DELETE_CHURCH_CLOSURE_BY_CODES",
+    """
+        DELETE FROM tblChurchClosure
+        WHERE Church_Code IN :Church_Codes;
+    """,
+    expanding=("Church_Codes",),
+)
+
+INSERT_CHURCH_CLOSURE = register_query(
+    "branch_ancestry.INSERT_CHURCH_CLOSURE",
+    """
+        INSERT INTO tblChurchClosure
+            (Ancestor_Code, Church_Code, Head_Code, Depth)
+        VALUES
+            (:Ancestor_Code, :Church_Code, :Head_Code, :Depth);
+    """,
+)
+
+GET_BRANCH_ANCESTRY = register_query(
+    "branch_ancestry.GET_BRANCH_ANCESTRY",
+    """
+        SELECT * FROM tblBranchAncestry
+        WHERE Branch_Code = :Branch_Code;
+    """,
+)
+
+GET_CHURCH_LEAD_CHAIN = register_query(
+    "branch_ancestry.GET_CHURCH_LEAD_CHAIN",
+    """
+        SELECT CC.Ancestor_Code, CC.Depth, C.Name, C.Level_Code
+        FROM tblChurchClosure CC
+        LEFT JOIN tblChurches C ON C.`Code` = CC.Ancestor_Code
+        WHERE CC.Church_Code = :Church_Code AND CC.Head_Code = :Head_Code AND CC.Depth <= :Depth
+        ORDER BY CC.Depth;
+    """,
+)
+
+
+def refresh_branch_ancestry(
+    db: Session, head_code: str, church_code: Optional[str] = None
+) -> int:
+    """
+    Rebuilds the materialised lead chain (tblBranchAncestry) of every branch of a head church
+    from the active church-lead mappings: LeadCode_1 is the branch's lead church, LeadCode_2 its lead, etc.
+    The closure of the lead hierarchy (tblChurchClosure: every church under each church) is rebuilt with it.
+    - church_code: only the rows of that church and the churches under it are rewritten
+      (the church's lead mapping, name or status changed)
+    - 2 reads and 2 DELETEs + 2 executemany INSERTs, in the caller's transaction (the caller commits)
+    - called by the services changing church-lead mappings, church names/levels or church status
+    Returns the number of branches refreshed.
+    """
+    churches = {
+        church.Code: church
+        for church in db.execute(GET_HEAD_CHURCH_CHURCHES, dict(Head_Code=head_code))
+    }
+    # church -> lead church (latest active mapping wins)
+    leads = {
+        church_lead.Church_Code: church_lead.LeadChurch_Code
+        for church_lead in db.execute(
+            GET_ACTIVE_CHURCH_LEADS, dict(Head_Code=head_code, Is_Active=1)
+        )
+    }
+
+    rows = []
+    closure = []
+    scope = []
+    for church in churches.values():
+        # the church's lead chain: stop at the top of the chain (or on a mapping cycle)
+        chain = []
+        lead_code = leads.get(church.Code)
+        while lead_code is not None and lead_code != church.Code and lead_code not in chain:
+            if len(chain) == ANCESTRY_DEPTH:
+                break
+            chain.append(lead_code)
+            lead_code = leads.get(lead_code)
+        if church_code is not None and church_code.upper() not in (
+            code.upper() for code in [church.Code, *chain]
+        ):
+            continue
+        scope.append(church.Code)
+        closure.append(
+            dict(Ancestor_Code=church.Code, Church_Code=church.Code, Head_Code=head_code, Depth=0)
+        )
+        closure.extend(
+            dict(Ancestor_Code=lead_code, Church_Code=church.Code, Head_Code=head_code, Depth=level)
+            for level, lead_code in enumerate(chain, 1)
+        )
+        if church.Level_Code == "BRN":
+            row = dict(
+                Branch_Code=church.Code,
+                Branch_Name=church.Name,
+                Branch_Level=church.Level_Code,
+                Head_Code=head_code,
+                **dict.fromkeys(LEAD_COLUMNS),
+            )
+            for level, lead_code in enumerate(chain, 1):
+                lead = churches.get(lead_code)
+                row[f"LeadCode_{level}"] = lead_code
+                row[f"LeadName_{level}"] = lead.Name if lead else None
+                row[f"LeadLevel_{level}"] = lead.Level_Code if lead else None
+            rows.append(row)
+
+    if church_code is None:
+        db.execute(DELETE_BRANCH_ANCESTRY, dict(Head_Code=head_code))
+        db.execute(DELETE_CHURCH_CLOSURE, dict(Head_Code=head_code))
+    elif scope:
+        db.execute(DELETE_BRANCH_ANCESTRY_BY_CODES, dict(Branch_Codes=scope))
+        db.execute(DELETE_CHURCH_CLOSURE_BY_CODES, dict(Church_Codes=scope))
+    if rows:
+        db.execute(INSERT_BRANCH_ANCESTRY, rows)
+    if closure:
+        db.execute(INSERT_CHURCH_CLOSURE, closure)
+    return len(rows)
+
+
+def get_branch_ancestry(db: Session, branch_code: str, head_code: str) -> Optional[dict]:
+    """
+    Returns the materialised lead chain of a branch (primary-key read), as a dict of tblBranchAncestry's columns.
+    Only BRN churches have a row: the chain of any other church is read from tblChurchClosure, without writing.
+    Returns None if the church is in neither (the tables are rebuilt by the write paths only).
+    """
+    branch_ancestry = db.execute(
+        GET_BRANCH_ANCESTRY, dict(Branch_Code=branch_code)
+    ).first()
+    if branch_ancestry is not None:
+        return dict(branch_ancestry._mapping)
+    chain = db.execute(
+        GET_CHURCH_LEAD_CHAIN,
+        dict(Church_Code=branch_code, Head_Code=head_code, Depth=ANCESTRY_DEPTH),
+    ).all()
+    if not chain:
+        return None
+    row = dict(Branch_Code=branch_code, Branch_Name=None, Branch_Level=None, Head_Code=head_code)
+    row.update(dict.fromkeys(LEAD_COLUMNS))
+    for church in chain:
+        if church.Depth == 0:
+            row.update(Branch_Name=church.Name, Branch_Level=church.Level_Code)
+        else:
+            row[f"LeadCode_{church.Depth}"] = church.Ancestor_Code
+            row[f"LeadName_{church.Depth}"] = church.Name
+            row[f"LeadLevel_{church.Depth}"] = church.Level_Code
+    return row
@@ -2,12 +2,12 @@ from datetime import datetime
 from typing import Annotated
 
 from fastapi import HTTPException, status, Depends, Request  # type: ignore
-from sqlalchemy import text  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
 from ...authentication.models.auth import User, UserAccess
 from ..models.church_heads import HeadChurchCreate, HeadChurchUpdateIn
 from ...common.config import settings
+from ...common.cache import response_cache
 from ...common.database import get_db
 from ...common.dependencies import (
     get_current_user,
@@ -19,11 +19,81 @@ from ...common.utils import (
     check_if_new_code_name_exist,
     set_user_access,
 )
+from ...common.queries import register_query
+from ...common.tracing import traced_services
 
 db_schema_headchu = settings.db_schema_headchu
 db_schema_generic = settings.db_schema_generic
 
 
+CREATE_HEAD_CHURCH_INSERT = register_query(
+    "church_heads.CREATE_HEAD_CHURCH_INSERT",
+    f"""
+        INSERT INTO {db_schema_generic}.tblChurchHeads
+            (Code, Name, Alt_Name, Address, Founding_Date, About, Mission, Vision, Motto, Contact_No, Contact_No2, Contact_Email, Contact_Email2, Town_Code, State_Code, Region_Code, Country_Code, Created_By)
+        VALUES
+            (:Code, :Name, :Alt_Name, :Address, :Founding_Date, :About, :Mission, :Vision, :Motto, :Contact_No, :Contact_No2, :Contact_Email, :Contact_Email2, :Town_Code, :State_Code, :Region_Code, :Country_Code, :Created_By);
+    """,
+)
+
+CREATE_HEAD_CHURCH_SELECT = register_query(
+    "church_heads.CREATE_HEAD_CHURCH_SELECT",
+    f"SELECT * FROM {db_schema_generic}.tblChurchHeads WHERE Id = LAST_INSERT_ID();",
+)
+
+GET_HEAD_CHURCH_BY_CODE = register_query(
+    "church_heads.GET_HEAD_CHURCH_BY_CODE",
+    f"SELECT * FROM {db_schema_generic}.tblChurchHeads WHERE Code = :Code;",
+)
+
+UPDATE_HEAD_CHURCH_BY_CODE = register_query(
+    "church_heads.UPDATE_HEAD_CHURCH_BY_CODE",
+    f"""
+        UPDATE {db_schema_generic}.tblChurchHeads
+        SET
+            Code = :Code, Name = :Name, Alt_Name = :Alt_Name, Address = :Address, Founding_Date = :Founding_Date, About = :About, Mission = :Mission, Vision = :Vision, Motto = :Motto, Contact_No = :Contact_No, Contact_No2 = :Contact_No2, Contact_Email = :Contact_Email, Contact_Email2 = :Contact_Email2, Town_Code = :Town_Code, State_Code = :State_Code, Region_Code = :Region_Code, Country_Code = :Country_Code, Modified_By = :Modified_By
+        WHERE Code = :Code2;
+    """,
+)
+
+ACTIVATE_HEAD_CHURCH_BY_CODE_1 = register_query(
+    "church_heads.ACTIVATE_HEAD_CHURCH_BY_CODE_1",
+    f"""
+        UPDATE {db_schema_generic}.tblChurchHeads
+        SET Is_Active = :Is_Active, Modified_By = :Modified_By
+        WHERE Code = :Code;
+    """,
+)
+
+ACTIVATE_HEAD_CHURCH_BY_CODE_2 = register_query(
+    "church_heads.ACTIVATE_HEAD_CHURCH_BY_CODE_2",
+    """
+        UPDATE tblChurches
+        SET Is_Active = :Is_Active, Modified_By = :Modified_By, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date
+        WHERE Code = :Code;
+    """,
+)
+
+DEACTIVATE_HEAD_CHURCH_BY_CODE_1 = register_query(
+    "church_heads.DEACTIVATE_HEAD_CHURCH_BY_CODE_1",
+    f"""
+        UPDATE {db_schema_generic}.tblChurchHeads
+        SET Is_Active = :Is_Active, Modified_By = :Modified_By
+        WHERE Code = :Code;
+    """,
+)
+
+DEACTIVATE_HEAD_CHURCH_BY_CODE_2 = register_query(
+    "church_heads.DEACTIVATE_HEAD_CHURCH_BY_CODE_2",
+    f"""
+        UPDATE {db_schema_generic}.tblChurches
+        SET Is_Active = :Is_Active, Modified_By = :Modified_By, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date
+        WHERE Code = :Code;
+    """,
+)
+
+
+@traced_services
 class HeadChurchServices:
     """
     ## Head Church Services
@@ -59,14 +129,7 @@ class HeadChurchServices:
             )
             # insert new head church
             db.execute(
-                text(
-                    f"""
-                    INSERT INTO {db_schema_generic}.tblChurchHeads
-                        (Code, Name, Alt_Name, Address, Founding_Date, About, Mission, Vision, Motto, Contact_No, Contact_No2, Contact_Email, Contact_Email2, Town_Code, State_Code, Region_Code, Country_Code, Created_By)
-                    VALUES
-                        (:Code, :Name, :Alt_Name, :Address, :Founding_Date, :About, :Mission, :Vision, :Motto, :Contact_No, :Contact_No2, :Contact_Email, :Contact_Email2, :Town_Code, :State_Code, :Region_Code, :Country_Code, :Created_By);
-                    """
-                ),
+                CREATE_HEAD_CHURCH_INSERT,
                 dict(
                     Code=head_church.Code,
                     Name=head_church.Name,
@@ -89,11 +152,7 @@ class HeadChurchServices:
                 ),
             )
             db.commit()
-            new_head_church = db.execute(
-                text(
-                    f"SELECT * FROM {db_schema_generic}.tblChurchHeads WHERE Id = LAST_INSERT_ID();"
-                )
-            ).first()
+            new_head_church = db.execute(CREATE_HEAD_CHURCH_SELECT).first()
             return new_head_church
         except Exception as err:
             db.rollback()
@@ -115,9 +174,7 @@ class HeadChurchServices:
             )
             # fetch data from self.db
             head_church = self.db.execute(
-                text(
-                    f"SELECT * FROM {db_schema_generic}.tblChurchHeads WHERE Code = :Code;"
-                ),
+                GET_HEAD_CHURCH_BY_CODE,
                 dict(Code=code),
             ).first()
             # check if data exists
@@ -173,14 +230,7 @@ class HeadChurchServices:
 
             # update the data
             self.db.execute(
-                text(
-                    f"""
-                    UPDATE {db_schema_generic}.tblChurchHeads
-                    SET
-                        Code = :Code, Name = :Name, Alt_Name = :Alt_Name, Address = :Address, Founding_Date = :Founding_Date, About = :About, Mission = :Mission, Vision = :Vision, Motto = :Motto, Contact_No = :Contact_No, Contact_No2 = :Contact_No2, Contact_Email = :Contact_Email, Contact_Email2 = :Contact_Email2, Town_Code = :Town_Code, State_Code = :State_Code, Region_Code = :Region_Code, Country_Code = :Country_Code, Modified_By = :Modified_By
-                    WHERE Code = :Code2;
-                    """
-                ),
+                UPDATE_HEAD_CHURCH_BY_CODE,
                 dict(
                     Code=(
                         head_church.Code if head_church.Code else old_head_church.Code
@@ -270,6 +320,10 @@ class HeadChurchServices:
             self.db.commit()
             # fetch the updated data
             h_code = head_church.Code if head_church.Code else old_head_church.Code
+            # the cached responses of the head church's users, under its old and new code
+            for head_code in {old_head_church.Code.upper(), h_code.upper()}:
+                response_cache.invalidate("head_church", head_code)
+                response_cache.invalidate("churches", head_code)
             updated_data = await self.get_head_church_by_code(h_code)
             return updated_data
         except Exception as err:
@@ -292,13 +346,7 @@ class HeadChurchServices:
             await self.get_head_church_by_code(code)
             # update head church data
             self.db.execute(
-                text(
-                    f"""
-                    UPDATE {db_schema_generic}.tblChurchHeads 
-                    SET Is_Active = :Is_Active, Modified_By = :Modified_By 
-                    WHERE Code = :Code;
-                    """
-                ),
+                ACTIVATE_HEAD_CHURCH_BY_CODE_1,
                 dict(
                     Is_Active=1,
                     Modified_By=self.current_user.Usercode,
@@ -308,13 +356,7 @@ class HeadChurchServices:
             self.db.commit()
             # update it in tblChurches
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblChurches 
-                    SET Is_Active = :Is_Active, Modified_By = :Modified_By, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date 
-                    WHERE Code = :Code;
-                    """
-                ),
+                ACTIVATE_HEAD_CHURCH_BY_CODE_2,
                 dict(
                     Is_Active=1,
                     Modified_By=self.current_user.Usercode,
@@ -325,6 +367,9 @@ class HeadChurchServices:
                 ),
             )
             self.db.commit()
+            # the cached responses of the target head church's users
+            response_cache.invalidate("head_church", code.upper())
+            response_cache.invalidate("churches", code.upper())
             return await self.get_head_church_by_code(code)
         except Exception as err:
             self.db.rollback()
@@ -346,13 +391,7 @@ class HeadChurchServices:
             await self.get_head_church_by_code(code)
             # update head church data
             self.db.execute(
-                text(
-                    f"""
-                    UPDATE {db_schema_generic}.tblChurchHeads 
-                    SET Is_Active = :Is_Active, Modified_By = :Modified_By 
-                    WHERE Code = :Code;
-                    """
-                ),
+                DEACTIVATE_HEAD_CHURCH_BY_CODE_1,
                 dict(
                     Is_Active=0,
                     Modified_By=self.current_user.Usercode,
@@ -362,13 +401,7 @@ class HeadChurchServices:
             self.db.commit()
             # update it in tblChurches
             self.db.execute(
-                text(
-                    f"""
-                    UPDATE {db_schema_generic}.tblChurches 
-                    SET Is_Active = :Is_Active, Modified_By = :Modified_By, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date 
-                    WHERE Code = :Code;
-                    """
-                ),
+                DEACTIVATE_HEAD_CHURCH_BY_CODE_2,
                 dict(
                     Is_Active=0,
                     Modified_By=self.current_user.Usercode,
@@ -379,6 +412,9 @@ class HeadChurchServices:
                 ),
             )
             self.db.commit()
+            # the cached responses of the target head church's users
+            response_cache.invalidate("head_church", code.upper())
+            response_cache.invalidate("churches", code.upper())
             return await self.get_head_church_by_code(code)
         except Exception as err:
             self.db.rollback()
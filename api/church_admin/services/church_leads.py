@@ -2,11 +2,12 @@ from datetime import datetime
 from typing import Annotated, Optional
 
 from fastapi import HTTPException, status, Depends  # type: ignore
-from sqlalchemy import text  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
 from ...church_admin.services.churches import ChurchServices, get_church_services
+from ...church_admin.services.church_stats import refresh_church_rollups
 from ...authentication.models.auth import User, UserAccess
+from ...common.cache import response_cache
 from ...common.database import get_db
 from ...common.utils import get_level, set_user_access
 from ...common.dependencies import (
@@ -14,6 +15,9 @@ from ...common.dependencies import (
     get_current_user_access,
     set_db_current_user,
 )
+from ...common.queries import register_query
+from ...common.tracing import traced_services
+from ...common.query_builder import FilterQuery
 
 church_recursive_cte = """
                 WITH RECURSIVE ChurchHierarchy AS (
@@ -50,6 +54,127 @@ church_recursive_cte = """
                 """
 
 
+CHURCH_LEADS_BY_CHURCH_CODE = FilterQuery(
+    "church_leads.CHURCH_LEADS_BY_CHURCH_CODE",
+    columns=["CL.*", "C.Name AS Church_Name", "L.Name AS LeadChurch_Name"],
+    from_clause="""
+        tblChurchLeads CL
+        LEFT JOIN tblChurches C ON C.Code = CL.Church_Code
+        LEFT JOIN tblChurches L ON L.Code = CL.LeadChurch_Code
+    """,
+    where=["Church_Code = :Church_Code", "CL.Head_Code = :Head_Code"],
+    filters=dict(Status="CL.Status = :Status"),
+    order_by=["Start_Date DESC"],
+)
+
+GET_CURRENT_CHURCH_LEAD_BY_CODE = register_query(
+    "church_leads.GET_CURRENT_CHURCH_LEAD_BY_CODE",
+    """
+        SELECT CL.*, C.Name AS Church_Name, L.Name AS LeadChurch_Name
+        FROM tblChurchLeads CL
+        LEFT JOIN tblChurches C ON C.Code = CL.Church_Code
+        LEFT JOIN tblChurches L ON L.Code = CL.LeadChurch_Code
+        WHERE CL.Head_Code = :Head_Code AND CL.Status = :Status
+            AND Church_Code = :Church_Code
+        ORDER BY Start_Date DESC;
+    """,
+)
+
+CHURCHES_BY_LEAD_CODE = FilterQuery(
+    "church_leads.CHURCHES_BY_LEAD_CODE",
+    columns=["LeadChurch_Code", "B.*"],
+    from_clause="""
+        tblChurchLeads A
+        LEFT JOIN tblChurches B ON B.Code = A.Church_Code
+    """,
+    where=["LeadChurch_Code = :LeadChurch_Code", "A.Head_Code = :Head_Code"],
+    filters=dict(
+        Status="B.Status = :Status",
+        Level_Code="B.Level_Code = :Level_Code",
+    ),
+)
+
+GET_BRANCHES_BY_CHURCH_LEAD_1 = register_query(
+    "church_leads.GET_BRANCHES_BY_CHURCH_LEAD_1",
+    f"""
+        {church_recursive_cte}
+        SELECT * FROM tblChurches
+        WHERE Head_Code = :Head_Code
+            AND `Code` IN (
+                SELECT Church FROM ChurchHierarchy
+                WHERE Church_Level = 'BRN'
+            )
+        ORDER BY `Code`;
+    """,
+)
+
+GET_BRANCHES_BY_CHURCH_LEAD_2 = register_query(
+    "church_leads.GET_BRANCHES_BY_CHURCH_LEAD_2",
+    f"""
+        {church_recursive_cte}
+        SELECT * FROM tblChurches
+        WHERE Head_Code = :Head_Code
+            AND `Code` IN (
+                SELECT Church FROM ChurchHierarchy
+                WHERE Church_Level = 'BRN'
+            )
+            AND Status = :Status
+        ORDER BY `Code`;
+    """,
+)
+
+UNMAP_CHURCH_LEADS_BY_CHURCH_CODE = register_query(
+    "church_leads.UNMAP_CHURCH_LEADS_BY_CHURCH_CODE",
+    """
+        UPDATE tblChurchLeads
+        SET End_Date = :End_Date, Is_Active = :Is_Active, Modified_By = :Modified_By, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date
+        WHERE Church_Code = :Church_Code AND End_Date IS NULL;
+    """,
+)
+
+MAP_CHURCH_LEAD_BY_CODE_INSERT = register_query(
+    "church_leads.MAP_CHURCH_LEAD_BY_CODE_INSERT",
+    """
+        INSERT INTO tblChurchLeads
+            (Church_Code, Level_Code, LeadChurch_Code, LeadChurch_Level, Start_Date, Head_Code, Created_By)
+        VALUES
+            (:Church_Code, :Level_Code, :LeadChurch_Code, :LeadChurch_Level, :Start_Date, :Head_Code, :Created_By);
+    """,
+)
+
+MAP_CHURCH_LEAD_BY_CODE_SELECT = register_query(
+    "church_leads.MAP_CHURCH_LEAD_BY_CODE_SELECT",
+    """
+        SELECT CL.*, C.Name AS Church_Name, L.Name AS LeadChurch_Name
+        FROM tblChurchLeads CL
+        LEFT JOIN tblChurches C ON C.Code = CL.Church_Code
+        LEFT JOIN tblChurches L ON L.Code = CL.LeadChurch_Code
+        WHERE CL.Id = LAST_INSERT_ID();
+    """,
+)
+
+APPROVE_CHURCH_LEAD_BY_CODE = register_query(
+    "church_leads.APPROVE_CHURCH_LEAD_BY_CODE",
+    """
+        UPDATE tblChurchLeads
+        SET Status = :Status, Status_Date = :Status_Date, Status_By = :Status_By, Modified_By = :Modified_By
+        WHERE Church_Code = :Church_Code
+        AND LeadChurch_Code = :LeadChurch_Code
+        AND Head_Code = :Head_Code
+        AND Is_Active = :Is_Active;
+    """,
+)
+
+GET_CHURCH_LEAD_HIERARCHY_BY_CHURCH_CODE = register_query(
+    "church_leads.GET_CHURCH_LEAD_HIERARCHY_BY_CHURCH_CODE",
+    """
+        SELECT * FROM vwChurchLeadHierarchy
+        WHERE Church_Code = :Church_Code;
+    """,
+)
+
+
+@traced_services
 class ChurchLeadsServices:
     """
     #### Church Leads Service methods
@@ -75,6 +200,13 @@ class ChurchLeadsServices:
         self, church_code: str, status_code: Optional[str] = None
     ):
         try:
+            # set user access
+            set_user_access(
+                self.current_user_access,
+                head_code=self.current_user.Head_Code,
+                module_code=["ALLM", "HRCH"],
+                access_type=["VW"],
+            )
             # fetch church data
             church = await self.church_services.get_church_by_id_code(church_code)
             # check if church is active/approved
@@ -83,49 +215,14 @@ class ChurchLeadsServices:
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Church: '{church.Name} ({church.Code})' is not active or approved.",
                 )
-            set_user_access(
-                self.current_user_access,
-                head_code=self.current_user.Head_Code,
-                module_code=["ALLM", "HRCH"],
-                access_type=["VW"],
-            )
-            church_leads = (
-                self.db.execute(
-                    text(
-                        """
-                    SELECT CL.*, C.Name AS Church_Name, L.Name AS LeadChurch_Name
-                    FROM tblChurchLeads CL
-                    LEFT JOIN tblChurches C ON C.Code = CL.Church_Code
-                    LEFT JOIN tblChurches L ON L.Code = CL.LeadChurch_Code
-                    WHERE Church_Code = :Church_Code AND CL.Head_Code = :Head_Code
-                    ORDER BY Start_Date DESC;
-                    """
-                    ),
-                    dict(
-                        Church_Code=church_code,
-                        Head_Code=self.current_user.Head_Code,
-                    ),
-                ).all()
-                if status_code is None
-                else self.db.execute(
-                    text(
-                        """
-                    SELECT CL.*, C.Name AS Church_Name, L.Name AS LeadChurch_Name
-                    FROM tblChurchLeads CL
-                    LEFT JOIN tblChurches C ON C.Code = CL.Church_Code
-                    LEFT JOIN tblChurches L ON L.Code = CL.LeadChurch_Code
-                    WHERE Church_Code = :Church_Code AND CL.Head_Code = :Head_Code 
-                        AND CL.Status = :Status 
-                    ORDER BY Start_Date DESC;
-                    """
-                    ),
-                    dict(
-                        Church_Code=church_code,
-                        Head_Code=self.current_user.Head_Code,
-                        Status=status_code,
-                    ),
-                ).all()
-            )
+            church_leads = CHURCH_LEADS_BY_CHURCH_CODE.execute(
+                self.db,
+                dict(
+                    Church_Code=church_code,
+                    Head_Code=self.current_user.Head_Code,
+                    Status=status_code,
+                ),
+            ).all()
             return church_leads
         except Exception as err:
             raise err
@@ -133,6 +230,13 @@ class ChurchLeadsServices:
     async def get_current_church_lead_by_code(self, church_code: str):
         """Get Church Lead by Code (by Both Church and Lead Church Code)"""
         try:
+            # set user access
+            set_user_access(
+                self.current_user_access,
+                head_code=self.current_user.Head_Code,
+                module_code=["ALLM", "HRCH"],
+                access_type=["VW"],
+            )
             # fetch and check church and lead church data
             church = await self.church_services.get_church_by_id_code(church_code)
             # lead_church = await self.church_services.get_church_by_id_code(lead_code)
@@ -142,24 +246,8 @@ class ChurchLeadsServices:
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Church: '{church.Name} ({church.Code})' is not active or approved.",
                 )
-            set_user_access(
-                self.current_user_access,
-                head_code=self.current_user.Head_Code,
-                module_code=["ALLM", "HRCH"],
-                access_type=["VW"],
-            )
             church_lead = self.db.execute(
-                text(
-                    """
-                    SELECT CL.*, C.Name AS Church_Name, L.Name AS LeadChurch_Name
-                    FROM tblChurchLeads CL
-                    LEFT JOIN tblChurches C ON C.Code = CL.Church_Code
-                    LEFT JOIN tblChurches L ON L.Code = CL.LeadChurch_Code
-                    WHERE CL.Head_Code = :Head_Code AND CL.Status = :Status
-                        AND Church_Code = :Church_Code
-                    ORDER BY Start_Date DESC;
-                    """
-                ),
+                GET_CURRENT_CHURCH_LEAD_BY_CODE,
                 dict(
                     Head_Code=self.current_user.Head_Code,
                     Status="APR",
@@ -190,61 +278,16 @@ class ChurchLeadsServices:
                 access_type=["VW"],
             )
             lead_church = await self.church_services.get_church_by_id_code(lead_code)
-            churches = (
-                # fetch all with no status and level filter
-                self.db.execute(
-                    text(
-                        """
-                        SELECT LeadChurch_Code, B.* FROM tblChurchLeads A
-                        LEFT JOIN tblChurches B ON B.Code = A.Church_Code
-                        WHERE LeadChurch_Code = :LeadChurch_Code
-                            AND A.Head_Code = :Head_Code;
-                        """
-                    ),
-                    dict(
-                        LeadChurch_Code=lead_church.Code,
-                        Head_Code=self.current_user.Head_Code,
-                    ),
-                ).all()
-                if status_code is None and level_code is None
-                else (
-                    # fetch all with status filter
-                    self.db.execute(
-                        text(
-                            """
-                        SELECT LeadChurch_Code, B.* FROM tblChurchLeads A
-                        LEFT JOIN tblChurches B ON B.Code = A.Church_Code
-                        WHERE LeadChurch_Code = :LeadChurch_Code
-                            AND A.Head_Code = :Head_Code 
-                            AND B.Status = :Status;
-                        """
-                        ),
-                        dict(
-                            LeadChurch_Code=lead_church.Code,
-                            Head_Code=self.current_user.Head_Code,
-                            Status=status_code,
-                        ),
-                    ).all()
-                    if level_code is None
-                    # fetch all with church level filter
-                    else self.db.execute(
-                        text(
-                            """
-                        SELECT LeadChurch_Code, B.* FROM tblChurchLeads A
-                        LEFT JOIN tblChurches B ON B.Code = A.Church_Code
-                        WHERE LeadChurch_Code = :LeadChurch_Code
-                            AND A.Head_Code = :Head_Code 
-                            AND B.Level_Code = :Level_Code;
-                        """
-                        ),
-                        dict(
-                            LeadChurch_Code=lead_church.Code,
-                            Head_Code=self.current_user.Head_Code,
-                            Level_Code=level_code,
-                        ),
-                    ).all()
-                )
-            )
+            # fetch all, filtered by status and/or church level if given
+            churches = CHURCHES_BY_LEAD_CODE.execute(
+                self.db,
+                dict(
+                    LeadChurch_Code=lead_church.Code,
+                    Head_Code=self.current_user.Head_Code,
+                    Status=status_code,
+                    Level_Code=level_code,
+                ),
+            ).all()
             return churches
         except Exception as err:
             raise err
@@ -254,12 +297,6 @@ class ChurchLeadsServices:
     ):
         """Get Branches by Church: accessible to all logged in user member."""
         try:
-            level = get_level(church_code, self.current_user.Head_Code, self.db)
-            if level.Level_No == 8:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="This church is a branch and does not have any branches.",
-                )
             # set user access
             set_user_access(
                 self.current_user_access,
@@ -267,21 +304,16 @@ class ChurchLeadsServices:
                 module_code=["ALLM", "HRCH"],
                 access_type=["VW"],
             )
+            level = get_level(church_code, self.current_user.Head_Code, self.db)
+            if level.Level_No == 8:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="This church is a branch and does not have any branches.",
+                )
             # fetch churches by level
             branches = (
                 self.db.execute(
-                    text(
-                        f"""
-                        {church_recursive_cte}
-                        SELECT * FROM tblChurches 
-                        WHERE Head_Code = :Head_Code 
-                            AND `Code` IN (
-                                SELECT Church FROM ChurchHierarchy
-                                WHERE Church_Level = 'BRN'
-                            )
-                        ORDER BY `Code`;
-                        """
-                    ),
+                    GET_BRANCHES_BY_CHURCH_LEAD_1,
                     dict(
                         Head_Code=self.current_user.Head_Code,
                         Church_Code=church_code.upper(),
@@ -289,19 +321,7 @@ class ChurchLeadsServices:
                 ).all()
                 if status_code is None
                 else self.db.execute(
-                    text(
-                        f"""
-                        {church_recursive_cte}
-                        SELECT * FROM tblChurches 
-                        WHERE Head_Code = :Head_Code 
-                            AND `Code` IN (
-                                SELECT Church FROM ChurchHierarchy
-                                WHERE Church_Level = 'BRN' 
-                            )
-                            AND Status = :Status 
-                        ORDER BY `Code`;
-                        """
-                    ),
+                    GET_BRANCHES_BY_CHURCH_LEAD_2,
                     dict(
                         Head_Code=self.current_user.Head_Code,
                         Church_Code=church_code.upper(),
@@ -341,13 +361,7 @@ class ChurchLeadsServices:
             )
             # ummap church from any active church lead
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblChurchLeads 
-                    SET End_Date = :End_Date, Is_Active = :Is_Active, Modified_By = :Modified_By, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date 
-                    WHERE Church_Code = :Church_Code AND End_Date IS NULL;
-                    """
-                ),
+                UNMAP_CHURCH_LEADS_BY_CHURCH_CODE,
                 dict(
                     End_Date=datetime.now(),
                     Is_Active=0,
@@ -358,7 +372,9 @@ class ChurchLeadsServices:
                     Church_Code=church_code,
                 ),
             )
+            refresh_church_rollups(self.db, self.current_user.Head_Code, church.Code)
             self.db.commit()
+            response_cache.invalidate("churches", self.current_user.Head_Code)
             return await self.get_church_leads_by_church_code(church_code)
         except Exception as err:
             self.db.rollback()
@@ -424,14 +440,7 @@ class ChurchLeadsServices:
             )
             # assign church leads
             self.db.execute(
-                text(
-                    """
-                    INSERT INTO tblChurchLeads
-                        (Church_Code, Level_Code, LeadChurch_Code, LeadChurch_Level, Start_Date, Head_Code, Created_By)
-                    VALUES 
-                        (:Church_Code, :Level_Code, :LeadChurch_Code, :LeadChurch_Level, :Start_Date, :Head_Code, :Created_By);
-                    """
-                ),
+                MAP_CHURCH_LEAD_BY_CODE_INSERT,
                 dict(
                     Church_Code=church.Code,
                     Level_Code=church.Level_Code,
@@ -442,18 +451,10 @@ class ChurchLeadsServices:
                     Created_By=self.current_user.Usercode,
                 ),
             )
+            refresh_church_rollups(self.db, self.current_user.Head_Code, church.Code)
             self.db.commit()
-            new_church_lead = self.db.execute(
-                text(
-                    """
-                    SELECT CL.*, C.Name AS Church_Name, L.Name AS LeadChurch_Name
-                    FROM tblChurchLeads CL
-                    LEFT JOIN tblChurches C ON C.Code = CL.Church_Code
-                    LEFT JOIN tblChurches L ON L.Code = CL.LeadChurch_Code
-                    WHERE CL.Id = LAST_INSERT_ID();
-                    """
-                )
-            ).first()
+            response_cache.invalidate("churches", self.current_user.Head_Code)
+            new_church_lead = self.db.execute(MAP_CHURCH_LEAD_BY_CODE_SELECT).first()
             return new_church_lead
         except Exception as err:
             self.db.rollback()
@@ -506,16 +507,7 @@ class ChurchLeadsServices:
             )
             # approve church leads
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblChurchLeads
-                    SET Status = :Status, Status_Date = :Status_Date, Status_By = :Status_By, Modified_By = :Modified_By
-                    WHERE Church_Code = :Church_Code 
-                    AND LeadChurch_Code = :LeadChurch_Code
-                    AND Head_Code = :Head_Code
-                    AND Is_Active = :Is_Active;
-                    """
-                ),
+                APPROVE_CHURCH_LEAD_BY_CODE,
                 dict(
                     Status="APR",
                     Status_Date=datetime.now(),
@@ -528,6 +520,7 @@ class ChurchLeadsServices:
                 ),
             )
             self.db.commit()
+            response_cache.invalidate("churches", self.current_user.Head_Code)
             return await self.get_current_church_lead_by_code(church.Code)
         except Exception as err:
             self.db.rollback()
@@ -539,12 +532,7 @@ class ChurchLeadsServices:
             church = await self.church_services.get_church_by_id_code(church_code)
             # fetch church leads hierarchy
             church_leads_hierarchy = self.db.execute(
-                text(
-                    """
-                    SELECT * FROM vwChurchLeadHierarchy 
-                    WHERE Church_Code = :Church_Code;
-                    """
-                ),
+                GET_CHURCH_LEAD_HIERARCHY_BY_CHURCH_CODE,
                 dict(Church_Code=church.Code),
             ).first()
             if not church_leads_hierarchy:
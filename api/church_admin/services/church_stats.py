@@ -0,0 +1,465 @@
+from collections import defaultdict
+from typing import Annotated, Optional
+
+from fastapi import Depends, HTTPException, status  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+
+from ...authentication.models.auth import User, UserAccess
+from ...church_admin.services.branch_ancestry import refresh_branch_ancestry
+from ...common.database import get_db
+from ...common.utils import get_level, set_user_access
+from ...common.dependencies import (
+    get_current_user,
+    get_current_user_access,
+    set_db_current_user,
+)
+from ...common.queries import register_query
+from ...common.tracing import traced_services
+
+
+GET_BRANCH_MEMBER_COUNTS = register_query(
+    "church_stats.GET_BRANCH_MEMBER_COUNTS",
+    """
+        SELECT MC.Branch_Code, COUNT(*) AS Active_Members, SUM(M.Is_Clergy) AS Active_Clergy
+        FROM tblMemberBranch MC
+            JOIN tblMember M ON M.Code = MC.Member_Code
+        WHERE MC.Head_Code = :Head_Code AND MC.Is_Active = :Is_Active AND M.Is_Active = :Is_Active
+        GROUP BY MC.Branch_Code;
+    """,
+)
+
+GET_MEMBER_COUNTS_BY_BRANCH_CODES = register_query(
+    "church_stats.GET_MEMBER_COUNTS_BY_BRANCH_CODES",
+    """
+        SELECT MC.Branch_Code, COUNT(*) AS Active_Members, SUM(M.Is_Clergy) AS Active_Clergy
+        FROM tblMemberBranch MC
+            JOIN tblMember M ON M.Code = MC.Member_Code
+        WHERE MC.Branch_Code IN :Branch_Codes AND MC.Is_Active = :Is_Active AND M.Is_Active = :Is_Active
+        GROUP BY MC.Branch_Code;
+    """,
+    expanding=("Branch_Codes",),
+)
+
+GET_HEAD_CHURCH_CLOSURE = register_query(
+    "church_stats.GET_HEAD_CHURCH_CLOSURE",
+    """
+        SELECT Ancestor_Code, Church_Code FROM tblChurchClosure
+        WHERE Head_Code = :Head_Code;
+    """,
+)
+
+GET_CHURCH_ANCESTORS_BY_CODES = register_query(
+    "church_stats.GET_CHURCH_ANCESTORS_BY_CODES",
+    """
+        SELECT Church_Code, Ancestor_Code, Depth FROM tblChurchClosure
+        WHERE Church_Code IN :Church_Codes;
+    """,
+    expanding=("Church_Codes",),
+)
+
+GET_CHURCHES_BY_CODES = register_query(
+    "church_stats.GET_CHURCHES_BY_CODES",
+    """
+        SELECT `Code`, Level_Code, Head_Code FROM tblChurches
+        WHERE `Code` IN :Codes;
+    """,
+    expanding=("Codes",),
+)
+
+HEAD_CHURCH_STATS_EXIST = register_query(
+    "church_stats.HEAD_CHURCH_STATS_EXIST",
+    """
+        SELECT 1 FROM tblChurchStats
+        WHERE Head_Code = :Head_Code
+        LIMIT 1;
+    """,
+)
+
+GET_HEAD_CHURCH_CHURCH_LEVELS = register_query(
+    "church_stats.GET_HEAD_CHURCH_CHURCH_LEVELS",
+    """
+        SELECT `Code`, Level_Code FROM tblChurches
+        WHERE Head_Code = :Head_Code;
+    """,
+)
+
+DELETE_CHURCH_STATS = register_query(
+    "church_stats.DELETE_CHURCH_STATS",
+    """
+        DELETE FROM tblChurchStats
+        WHERE Head_Code = :Head_Code;
+    """,
+)
+
+INSERT_CHURCH_STATS = register_query(
+    "church_stats.INSERT_CHURCH_STATS",
+    """
+        INSERT INTO tblChurchStats
+            (Church_Code, Level_Code, Head_Code, Active_Members, Active_Clergy)
+        VALUES
+            (:Church_Code, :Level_Code, :Head_Code, :Active_Members, :Active_Clergy);
+    """,
+)
+
+UPDATE_CHURCH_STATS_COUNTERS = register_query(
+    "church_stats.UPDATE_CHURCH_STATS_COUNTERS",
+    """
+        UPDATE tblChurchStats
+        SET Active_Members = Active_Members + :Active_Members, Active_Clergy = Active_Clergy + :Active_Clergy
+        WHERE Church_Code = :Church_Code;
+    """,
+)
+
+INSERT_MISSING_CHURCH_CLOSURE = register_query(
+    "church_stats.INSERT_MISSING_CHURCH_CLOSURE",
+    """
+        INSERT IGNORE INTO tblChurchClosure
+            (Ancestor_Code, Church_Code, Head_Code, Depth)
+        VALUES
+            (:Church_Code, :Church_Code, :Head_Code, 0);
+    """,
+)
+
+INSERT_MISSING_BRANCH_ANCESTRY = register_query(
+    "church_stats.INSERT_MISSING_BRANCH_ANCESTRY",
+    """
+        INSERT IGNORE INTO tblBranchAncestry
+            (Branch_Code, Branch_Name, Branch_Level, Head_Code)
+        SELECT `Code`, Name, Level_Code, Head_Code FROM tblChurches
+        WHERE `Code` = :Church_Code;
+    """,
+)
+
+INSERT_MISSING_CHURCH_STATS = register_query(
+    "church_stats.INSERT_MISSING_CHURCH_STATS",
+    """
+        INSERT IGNORE INTO tblChurchStats
+            (Church_Code, Level_Code, Head_Code, Active_Members, Active_Clergy)
+        VALUES
+            (:Church_Code, :Level_Code, :Head_Code, :Active_Members, :Active_Clergy);
+    """,
+)
+
+GET_CHURCH_STATS_BY_CODE = register_query(
+    "church_stats.GET_CHURCH_STATS_BY_CODE",
+    """
+        SELECT CS.*, C.Name AS Church_Name
+        FROM tblChurchStats CS
+            LEFT JOIN tblChurches C ON C.Code = CS.Church_Code
+        WHERE CS.Church_Code = :Church_Code;
+    """,
+)
+
+GET_CHURCH_STATS_BY_CODES = register_query(
+    "church_stats.GET_CHURCH_STATS_BY_CODES",
+    """
+        SELECT Church_Code, Active_Members, Active_Clergy FROM tblChurchStats
+        WHERE Church_Code IN :Church_Codes;
+    """,
+    expanding=("Church_Codes",),
+)
+
+GET_CHURCH_STATS_BY_LEVEL = register_query(
+    "church_stats.GET_CHURCH_STATS_BY_LEVEL",
+    """
+        SELECT CS.*, C.Name AS Church_Name
+        FROM tblChurchStats CS
+            LEFT JOIN tblChurches C ON C.Code = CS.Church_Code
+        WHERE CS.Head_Code = :Head_Code AND CS.Level_Code = :Level_Code
+        ORDER BY CS.Church_Code;
+    """,
+)
+
+
+def refresh_church_stats(db: Session, head_code: str) -> int:
+    """
+    Rebuilds the member counters (tblChurchStats) of every church of a head church:
+    each church's active members/clergy are added to the church and to all its lead churches (tblChurchClosure).
+    - 3 reads and 1 DELETE + 1 executemany INSERT, in the caller's transaction (the caller commits)
+    Returns the number of churches refreshed.
+    """
+    counts = {
+        branch.Branch_Code.upper(): branch
+        for branch in db.execute(
+            GET_BRANCH_MEMBER_COUNTS, dict(Head_Code=head_code, Is_Active=1)
+        )
+    }
+    stats = {
+        church.Code.upper(): dict(
+            Church_Code=church.Code,
+            Level_Code=church.Level_Code,
+            Head_Code=head_code,
+            Active_Members=0,
+            Active_Clergy=0,
+        )
+        for church in db.execute(
+            GET_HEAD_CHURCH_CHURCH_LEVELS, dict(Head_Code=head_code)
+        )
+    }
+    for closure in db.execute(GET_HEAD_CHURCH_CLOSURE, dict(Head_Code=head_code)):
+        branch = counts.get(closure.Church_Code.upper())
+        church_stats = stats.get(closure.Ancestor_Code.upper())
+        if branch is not None and church_stats is not None:
+            church_stats["Active_Members"] += branch.Active_Members
+            church_stats["Active_Clergy"] += int(branch.Active_Clergy or 0)
+
+    db.execute(DELETE_CHURCH_STATS, dict(Head_Code=head_code))
+    if stats:
+        db.execute(INSERT_CHURCH_STATS, list(stats.values()))
+    return len(stats)
+
+
+def _get_lead_churches(db: Session, church_code: str) -> set[str]:
+    """The lead churches of a church (tblChurchClosure), upper-cased."""
+    return {
+        church.Ancestor_Code.upper()
+        for church in db.execute(
+            GET_CHURCH_ANCESTORS_BY_CODES, dict(Church_Codes=[church_code])
+        )
+        if church.Depth > 0
+    }
+
+
+def refresh_church_rollups(db: Session, head_code: str, church_code: Optional[str] = None):
+    """
+    Rebuilds the branch ancestry, then the church stats rolled up on it (caller commits).
+    - church_code: the church whose lead mapping, name or status changed. Only its rows and the rows of
+      the churches under it are rebuilt, and its counters (which include the churches under it)
+      are moved from its old lead churches to the new ones: no member recount.
+    """
+    if church_code is None:
+        refresh_branch_ancestry(db, head_code)
+        refresh_church_stats(db, head_code)
+        return
+    old_leads = _get_lead_churches(db, church_code)
+    refresh_branch_ancestry(db, head_code, church_code)
+    new_leads = _get_lead_churches(db, church_code)
+    if old_leads == new_leads:
+        return
+    church_stats = {
+        church.Church_Code.upper(): church
+        for church in db.execute(
+            GET_CHURCH_STATS_BY_CODES,
+            dict(Church_Codes=[church_code, *new_leads]),
+        )
+    }
+    church_stats_row = church_stats.get(church_code.upper())
+    if church_stats_row is None or not new_leads <= set(church_stats):
+        # the head church's stats are built on first read: rebuild them only if they were built
+        # before a church with no row yet (created since)
+        if church_stats or db.execute(HEAD_CHURCH_STATS_EXIST, dict(Head_Code=head_code)).first():
+            refresh_church_stats(db, head_code)
+        return
+    members, clergy = church_stats_row.Active_Members, church_stats_row.Active_Clergy
+    db.execute(
+        UPDATE_CHURCH_STATS_COUNTERS,
+        [
+            dict(Church_Code=code, Active_Members=-members, Active_Clergy=-clergy)
+            for code in old_leads - new_leads
+        ]
+        + [
+            dict(Church_Code=code, Active_Members=members, Active_Clergy=clergy)
+            for code in new_leads - old_leads
+        ],
+    )
+
+
+def new_member_stats_deltas() -> defaultdict:
+    """branch code -> [active members delta, active clergy delta] (see apply_member_stats_deltas)"""
+    return defaultdict(lambda: [0, 0])
+
+
+def add_member_stats_delta(
+    deltas: defaultdict, branch_code: Optional[str], members: int, clergy: int = 0
+):
+    """
+    Adds a change of a branch's active members/clergy, e.g. a clergy member leaving: (branch, -1, -1),
+    a member promoted to clergy: (branch, 0, 1). Members without a branch are not counted.
+    """
+    if not branch_code:
+        return
+    deltas[branch_code.upper()][0] += members
+    deltas[branch_code.upper()][1] += clergy
+
+
+def _add_missing_churches(db: Session, church_codes: list[str]):
+    """
+    Adds the rows of churches created since their head church's last rebuild (no lead mapping yet,
+    so no lead churches): the closure row, the branch ancestry row of a branch and, if the head church's
+    stats are built, the stats row from a recount of the church's members (which includes the caller's changes).
+    """
+    churches = db.execute(GET_CHURCHES_BY_CODES, dict(Codes=church_codes)).all()
+    for church in churches:
+        db.execute(
+            INSERT_MISSING_CHURCH_CLOSURE,
+            dict(Church_Code=church.Code, Head_Code=church.Head_Code),
+        )
+        if church.Level_Code == "BRN":
+            db.execute(INSERT_MISSING_BRANCH_ANCESTRY, dict(Church_Code=church.Code))
+    counts = {
+        branch.Branch_Code.upper(): branch
+        for branch in db.execute(
+            GET_MEMBER_COUNTS_BY_BRANCH_CODES,
+            dict(Branch_Codes=church_codes, Is_Active=1),
+        )
+    }
+    for church in churches:
+        if db.execute(HEAD_CHURCH_STATS_EXIST, dict(Head_Code=church.Head_Code)).first():
+            branch = counts.get(church.Code.upper())
+            db.execute(
+                INSERT_MISSING_CHURCH_STATS,
+                dict(
+                    Church_Code=church.Code,
+                    Level_Code=church.Level_Code,
+                    Head_Code=church.Head_Code,
+                    Active_Members=branch.Active_Members if branch else 0,
+                    Active_Clergy=int(branch.Active_Clergy or 0) if branch else 0,
+                ),
+            )
+
+
+def apply_member_stats_deltas(db: Session, deltas: dict):
+    """
+    Incremental update of the church stats after member writes, in the caller's transaction.
+    - deltas: branch code -> [active members delta, active clergy delta] (see add_member_stats_delta)
+    - one read of the branches' lead churches (tblChurchClosure), then one executemany UPDATE
+      of the branches and their lead churches
+    - a branch missing from tblChurchClosure (created since the last rebuild) gets its rows added and recounted
+    """
+    deltas = {code: delta for code, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    church_deltas = new_member_stats_deltas()
+    found = set()
+    for church in db.execute(
+        GET_CHURCH_ANCESTORS_BY_CODES, dict(Church_Codes=list(deltas))
+    ):
+        branch_code = church.Church_Code.upper()
+        found.add(branch_code)
+        members, clergy = deltas[branch_code]
+        church_deltas[church.Ancestor_Code][0] += members
+        church_deltas[church.Ancestor_Code][1] += clergy
+    missing = [code for code in deltas if code not in found]
+    if missing:
+        _add_missing_churches(db, missing)
+    if church_deltas:
+        db.execute(
+            UPDATE_CHURCH_STATS_COUNTERS,
+            [
+                dict(Church_Code=code, Active_Members=members, Active_Clergy=clergy)
+                for code, (members, clergy) in church_deltas.items()
+            ],
+        )
+
+
+@traced_services
+class ChurchStatsServices:
+    """
+    #### Church Stats Service methods
+    - Get Church Stats by Code
+    - Get Church Stats by Level
+    - Refresh Church Stats
+    """
+
+    def __init__(self, db: Session, current_user: User, current_user_access: UserAccess):
+        self.db = db
+        self.current_user = current_user
+        self.current_user_access = current_user_access
+
+    def _ensure_church_stats(self) -> bool:
+        """
+        Builds the rows of a head church on its first read, i.e. if it has none; returns True if built.
+        Churches created since are added by the member writes (_add_missing_churches) and the refresh,
+        so an empty result of a head church with stats is served as is, without a rebuild.
+        """
+        if self.db.execute(
+            HEAD_CHURCH_STATS_EXIST, dict(Head_Code=self.current_user.Head_Code)
+        ).first():
+            return False
+        refresh_church_rollups(self.db, self.current_user.Head_Code)
+        self.db.commit()
+        return True
+
+    async def get_church_stats_by_code(self, church_code: str):
+        """Get Church Stats: accessible to church admins and executives of same/higher level/church."""
+        try:
+            level = get_level(church_code, self.current_user.Head_Code, self.db)
+            # set user access
+            set_user_access(
+                self.current_user_access,
+                head_code=self.current_user.Head_Code,
+                church_code=church_code.upper(),
+                level_no=level.Level_No - 1,
+                role_code=["ADM", "SAD", "EXC"],
+                module_code=["ALLM", "HRCH"],
+                access_type=["VW", "ED", "CR"],
+            )
+            church_stats = self.db.execute(
+                GET_CHURCH_STATS_BY_CODE, dict(Church_Code=church_code)
+            ).first()
+            if church_stats is None and self._ensure_church_stats():
+                church_stats = self.db.execute(
+                    GET_CHURCH_STATS_BY_CODE, dict(Church_Code=church_code)
+                ).first()
+            if church_stats is None or church_stats.Head_Code != self.current_user.Head_Code:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"No stats found for Church: '{church_code.upper()}'",
+                )
+            return church_stats
+        except Exception as err:
+            self.db.rollback()
+            raise err
+
+    async def get_church_stats_by_level(self, level_code: str):
+        """Get Church Stats by Level: accessible to church admins and executives of same/higher level."""
+        try:
+            level = get_level(level_code, self.current_user.Head_Code, self.db)
+            # set user access
+            set_user_access(
+                self.current_user_access,
+                head_code=self.current_user.Head_Code,
+                level_no=level.Level_No - 1,
+                role_code=["ADM", "SAD", "EXC"],
+                module_code=["ALLM", "HRCH"],
+                access_type=["VW", "ED", "CR"],
+            )
+            params = dict(
+                Head_Code=self.current_user.Head_Code, Level_Code=level.Level_Code
+            )
+            church_stats = self.db.execute(GET_CHURCH_STATS_BY_LEVEL, params).all()
+            if not church_stats and self._ensure_church_stats():
+                church_stats = self.db.execute(GET_CHURCH_STATS_BY_LEVEL, params).all()
+            return church_stats
+        except Exception as err:
+            self.db.rollback()
+            raise err
+
+    async def refresh_church_stats(self):
+        """Refresh Church Stats (full rebuild): accessible to only head church admins."""
+        try:
+            # set user access
+            set_user_access(
+                self.current_user_access,
+                head_code=self.current_user.Head_Code,
+                level_code=["CHU"],
+                role_code=["ADM", "SAD"],
+                module_code=["ALLM", "HRCH"],
+                access_type=["ED"],
+            )
+            refresh_branch_ancestry(self.db, self.current_user.Head_Code)
+            refreshed = refresh_church_stats(self.db, self.current_user.Head_Code)
+            self.db.commit()
+            return refreshed
+        except Exception as err:
+            self.db.rollback()
+            raise err
+
+
+def get_church_stats_services(
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    current_user_access: Annotated[UserAccess, Depends(get_current_user_access)],
+    db_current_user: Annotated[str, Depends(set_db_current_user)],
+):
+    return ChurchStatsServices(db, current_user, current_user_access)
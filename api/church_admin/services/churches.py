@@ -2,11 +2,12 @@ from datetime import datetime
 from typing import Annotated, Optional
 
 from fastapi import HTTPException, status, Depends  # type: ignore
-from sqlalchemy import text  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
 from ...authentication.models.auth import User, UserAccess
 from ...church_admin.models.churches import ChurchBase, ChurchUpdate
+from ...church_admin.services.church_stats import refresh_church_rollups
+from ...common.cache import response_cache
 from ...common.database import get_db
 from ...common.utils import (
     check_duplicate_entry,
@@ -19,8 +20,112 @@ from ...common.dependencies import (
     get_current_user_access,
     set_db_current_user,
 )
+from ...common.queries import register_query
+from ...common.tracing import traced_services
 
 
+CREATE_NEW_CHURCH_INSERT = register_query(
+    "churches.CREATE_NEW_CHURCH_INSERT",
+    """
+        INSERT INTO tblChurches
+            (Name, Alt_Name, Address, Founding_Date, About, Mission, Vision, Motto, Contact_No, Contact_No2, Contact_Email, Contact_Email2, Town_Code, State_Code, Region_Code, Country_Code, Level_Code, Head_Code, Created_By)
+        VALUES
+            (:Name, :Alt_Name, :Address, :Founding_Date, :About, :Mission, :Vision, :Motto, :Contact_No, :Contact_No2, :Contact_Email, :Contact_Email2, :Town_Code, :State_Code, :Region_Code, :Country_Code, :Level_Code, :Head_Code, :Created_By);
+    """,
+)
+
+CREATE_NEW_CHURCH_SELECT = register_query(
+    "churches.CREATE_NEW_CHURCH_SELECT",
+    "SELECT * FROM tblChurches WHERE Id = LAST_INSERT_ID();",
+)
+
+APPROVE_CHURCH_BY_CODE = register_query(
+    "churches.APPROVE_CHURCH_BY_CODE",
+    """
+        UPDATE tblChurches
+        SET Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date
+        WHERE Id = :Id AND Is_Active = :Is_Active
+            AND (Status = :Old_Status1 OR Status = :Old_Status2);
+    """,
+)
+
+GET_ALL_CHURCHES_1 = register_query(
+    "churches.GET_ALL_CHURCHES_1",
+    """
+        SELECT * FROM tblChurches
+        WHERE Head_Code = :Head_Code
+        ORDER BY Code, Level_Code;
+    """,
+)
+
+GET_ALL_CHURCHES_2 = register_query(
+    "churches.GET_ALL_CHURCHES_2",
+    """
+        SELECT * FROM tblChurches
+        WHERE Head_Code = :Head_Code AND Status = :Status
+        ORDER BY Code;
+    """,
+)
+
+GET_CHURCHES_BY_LEVEL_1 = register_query(
+    "churches.GET_CHURCHES_BY_LEVEL_1",
+    "SELECT * FROM tblChurches WHERE Head_Code = :Head_Code AND Level_Code = :Level_Code ORDER BY Code;",
+)
+
+GET_CHURCHES_BY_LEVEL_2 = register_query(
+    "churches.GET_CHURCHES_BY_LEVEL_2",
+    """
+        SELECT * FROM tblChurches
+        WHERE Head_Code = :Head_Code AND Level_Code = :Level_Code
+            AND Status = :Status ORDER BY Code;
+    """,
+)
+
+GET_CHURCH_BY_ID_CODE = register_query(
+    "churches.GET_CHURCH_BY_ID_CODE",
+    "SELECT * FROM tblChurches WHERE Head_Code = :Head_Code AND (Code = :Code or Id = :Id);",
+)
+
+UPDATE_CHURCH_BY_CODE = register_query(
+    "churches.UPDATE_CHURCH_BY_CODE",
+    """
+        UPDATE tblChurches
+        SET
+            Name = :Name, Alt_Name = :Alt_Name, Address = :Address, Founding_Date = :Founding_Date, About = :About, Mission = :Mission, Vision = :Vision, Motto = :Motto, Contact_No = :Contact_No, Contact_No2 = :Contact_No2, Contact_Email = :Contact_Email, Contact_Email2 = :Contact_Email2, Town_Code = :Town_Code, State_Code = :State_Code, Region_Code = :Region_Code, Country_Code = :Country_Code, Head_Code = :Head_Code,Modified_By = :Modified_By
+        WHERE
+            Code = :Code;
+    """,
+)
+
+ACTIVATE_CHURCH_BY_CODE = register_query(
+    "churches.ACTIVATE_CHURCH_BY_CODE",
+    "UPDATE tblChurches SET Is_Active = :Is_Active, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date, Modified_By = :Modified_By WHERE Code = :Code;",
+)
+
+DEACTIVATE_CHURCH_BY_CODE_1 = register_query(
+    "churches.DEACTIVATE_CHURCH_BY_CODE_1",
+    "UPDATE tblChurches SET Is_Active = :Is_Active, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date, Modified_By = :Modified_By WHERE Code = :Code;",
+)
+
+DEACTIVATE_CHURCH_BY_CODE_2 = register_query(
+    "churches.DEACTIVATE_CHURCH_BY_CODE_2",
+    """
+        UPDATE tblChurchLeads
+        SET End_Date = :End_Date, Is_Active = :Is_Active, Modified_By = :Modified_By, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date
+        WHERE Church_Code = :Church_Code AND End_Date IS NULL;
+    """,
+)
+
+TEST_QUERY = register_query(
+    "churches.TEST_QUERY",
+    """
+        SELECT 'Good' AS `Check`, H.Level_No, UR.Level_Code  FROM ChMS_generic.tblHierarchy H
+        LEFT JOIN ChMS_testdb.tblUserRole UR  ON UR.Level_Code = H.Code
+    """,
+)
+
+
+@traced_services
 class ChurchServices:
     """
     #### Church Service methods
@@ -89,14 +194,7 @@ class ChurchServices:
             )
             # insert new church
             self.db.execute(
-                text(
-                    """
-                    INSERT INTO tblChurches
-                        (Name, Alt_Name, Address, Founding_Date, About, Mission, Vision, Motto, Contact_No, Contact_No2, Contact_Email, Contact_Email2, Town_Code, State_Code, Region_Code, Country_Code, Level_Code, Head_Code, Created_By)
-                    VALUES
-                        (:Name, :Alt_Name, :Address, :Founding_Date, :About, :Mission, :Vision, :Motto, :Contact_No, :Contact_No2, :Contact_Email, :Contact_Email2, :Town_Code, :State_Code, :Region_Code, :Country_Code, :Level_Code, :Head_Code, :Created_By);
-                    """
-                ),
+                CREATE_NEW_CHURCH_INSERT,
                 dict(
                     Name=church.Name,
                     Alt_Name=church.Alt_Name,
@@ -121,9 +219,8 @@ class ChurchServices:
                 ),
             )
             self.db.commit()
-            new_church = self.db.execute(
-                text("SELECT * FROM tblChurches WHERE Id = LAST_INSERT_ID();")
-            ).first()
+            response_cache.invalidate("churches", self.current_user.Head_Code)
+            new_church = self.db.execute(CREATE_NEW_CHURCH_SELECT).first()
             return new_church
         except Exception as err:
             self.db.rollback()
@@ -159,14 +256,7 @@ class ChurchServices:
             )
             # update church
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblChurches 
-                    SET Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date 
-                    WHERE Id = :Id AND Is_Active = :Is_Active 
-                        AND (Status = :Old_Status1 OR Status = :Old_Status2);
-                    """
-                ),
+                APPROVE_CHURCH_BY_CODE,
                 dict(
                     Status="APR",
                     Status_By=self.current_user.Usercode,
@@ -178,6 +268,7 @@ class ChurchServices:
                 ),
             )
             self.db.commit()
+            response_cache.invalidate("churches", self.current_user.Head_Code)
             return await self.get_church_by_id_code(id_code)
         except Exception as err:
             self.db.rollback()
@@ -195,24 +286,12 @@ class ChurchServices:
             # fetch all churches
             churches = (
                 self.db.execute(
-                    text(
-                        """
-                        SELECT * FROM tblChurches 
-                        WHERE Head_Code = :Head_Code 
-                        ORDER BY Code, Level_Code;
-                        """
-                    ),
+                    GET_ALL_CHURCHES_1,
                     dict(Head_Code=self.current_user.Head_Code),
                 ).all()
                 if status_code is None
                 else self.db.execute(
-                    text(
-                        """
-                        SELECT * FROM tblChurches 
-                        WHERE Head_Code = :Head_Code AND Status = :Status 
-                        ORDER BY Code;
-                        """
-                    ),
+                    GET_ALL_CHURCHES_2,
                     dict(
                         Head_Code=self.current_user.Head_Code,
                         Status=status_code,
@@ -238,9 +317,7 @@ class ChurchServices:
             # fetch churches by level
             churches = (
                 self.db.execute(
-                    text(
-                        "SELECT * FROM tblChurches WHERE Head_Code = :Head_Code AND Level_Code = :Level_Code ORDER BY Code;"
-                    ),
+                    GET_CHURCHES_BY_LEVEL_1,
                     dict(
                         Head_Code=self.current_user.Head_Code,
                         Level_Code=level_code,
@@ -248,13 +325,7 @@ class ChurchServices:
                 ).all()
                 if status_code is None
                 else self.db.execute(
-                    text(
-                        """
-                        SELECT * FROM tblChurches 
-                        WHERE Head_Code = :Head_Code AND Level_Code = :Level_Code 
-                            AND Status = :Status ORDER BY Code;
-                        """
-                    ),
+                    GET_CHURCHES_BY_LEVEL_2,
                     dict(
                         Head_Code=self.current_user.Head_Code,
                         Level_Code=level_code,
@@ -278,9 +349,7 @@ class ChurchServices:
             )
             # fetch church
             church = self.db.execute(
-                text(
-                    "SELECT * FROM tblChurches WHERE Head_Code = :Head_Code AND (Code = :Code or Id = :Id);"
-                ),
+                GET_CHURCH_BY_ID_CODE,
                 dict(
                     Head_Code=self.current_user.Head_Code,
                     Code=id_code,
@@ -353,15 +422,7 @@ class ChurchServices:
             )
             # update church data
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblChurches
-                    SET
-                        Name = :Name, Alt_Name = :Alt_Name, Address = :Address, Founding_Date = :Founding_Date, About = :About, Mission = :Mission, Vision = :Vision, Motto = :Motto, Contact_No = :Contact_No, Contact_No2 = :Contact_No2, Contact_Email = :Contact_Email, Contact_Email2 = :Contact_Email2, Town_Code = :Town_Code, State_Code = :State_Code, Region_Code = :Region_Code, Country_Code = :Country_Code, Head_Code = :Head_Code,Modified_By = :Modified_By
-                    WHERE
-                        Code = :Code;
-                    """
-                ),
+                UPDATE_CHURCH_BY_CODE,
                 dict(
                     Name=church.Name if church.Name else old_church.Name,
                     Alt_Name=(
@@ -420,7 +481,10 @@ class ChurchServices:
                     Code=code,
                 ),
             )
+            # church names/levels are denormalised in the branch ancestry and stats
+            refresh_church_rollups(self.db, self.current_user.Head_Code, old_church.Code)
             self.db.commit()
+            response_cache.invalidate("churches", self.current_user.Head_Code)
             return await self.get_church_by_id_code(code)
         except Exception as err:
             self.db.rollback()
@@ -451,9 +515,7 @@ class ChurchServices:
             )
             # activate church
             self.db.execute(
-                text(
-                    "UPDATE tblChurches SET Is_Active = :Is_Active, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date, Modified_By = :Modified_By WHERE Code = :Code;"
-                ),
+                ACTIVATE_CHURCH_BY_CODE,
                 dict(
                     Is_Active=1,
                     Status="ACT",
@@ -464,6 +526,7 @@ class ChurchServices:
                 ),
             )
             self.db.commit()
+            response_cache.invalidate("churches", self.current_user.Head_Code)
             return await self.get_church_by_id_code(code)
         except Exception as err:
             self.db.rollback()
@@ -494,9 +557,7 @@ class ChurchServices:
             )
             # deactivate church
             self.db.execute(
-                text(
-                    "UPDATE tblChurches SET Is_Active = :Is_Active, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date, Modified_By = :Modified_By WHERE Code = :Code;"
-                ),
+                DEACTIVATE_CHURCH_BY_CODE_1,
                 dict(
                     Is_Active=0,
                     Status="INA",
@@ -509,13 +570,7 @@ class ChurchServices:
             self.db.commit()
             # deactivate all active church lead mapping
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblChurchLeads 
-                    SET End_Date = :End_Date, Is_Active = :Is_Active, Modified_By = :Modified_By, Status = :Status, Status_By = :Status_By, Status_Date = :Status_Date 
-                    WHERE Church_Code = :Church_Code AND End_Date IS NULL;
-                    """
-                ),
+                DEACTIVATE_CHURCH_BY_CODE_2,
                 dict(
                     End_Date=datetime.now(),
                     Is_Active=0,
@@ -526,7 +581,9 @@ class ChurchServices:
                     Church_Code=code.upper(),
                 ),
             )
+            refresh_church_rollups(self.db, self.current_user.Head_Code, church.Code)
             self.db.commit()
+            response_cache.invalidate("churches", self.current_user.Head_Code)
             return await self.get_church_by_id_code(code)
         except Exception as err:
             self.db.rollback()
@@ -535,14 +592,7 @@ class ChurchServices:
     @staticmethod
     async def test_query(db: Session):
         try:
-            db.execute(
-                text(
-                    """
-                    SELECT 'Good' AS `Check`, H.Level_No, UR.Level_Code  FROM ChMS_generic.tblHierarchy H
-                    LEFT JOIN ChMS_testdb.tblUserRole UR  ON UR.Level_Code = H.Code
-                    """
-                )
-            )
+            db.execute(TEST_QUERY)
         except Exception as err:
             db.rollback()
             raise err
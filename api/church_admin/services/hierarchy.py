@@ -2,12 +2,12 @@ from typing import Annotated, Optional
 
 
 from fastapi import HTTPException, status, Depends  # type: ignore
-from sqlalchemy import text  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
 from ...church_admin.models.hierarchy import HierarchyUpdate
 from ...authentication.models.auth import User, UserAccess
 from ...common.config import settings
+from ...common.cache import response_cache
 from ...common.database import get_db
 from ...common.utils import set_user_access
 from ...common.dependencies import (
@@ -15,11 +15,66 @@ from ...common.dependencies import (
     get_current_user_access,
     set_db_current_user,
 )
+from ...common.queries import register_query
+from ...common.tracing import traced_services
+from ...common.query_builder import FilterQuery
 
 db_schema_headchu = settings.db_schema_headchu
 db_schema_generic = settings.db_schema_generic
 
 
+ALL_HIERARCHIES = FilterQuery(
+    "hierarchy.ALL_HIERARCHIES",
+    columns=["A.*", "A.Code AS Level_Code", "B.Level_No"],
+    from_clause=f"""
+        {db_schema_headchu}.tblChurchLevels A
+        LEFT JOIN {db_schema_generic}.tblHierarchy B ON B.Code = A.Hierarchy_Code
+    """,
+    where=["Head_Code = :Head_Code"],
+    filters=dict(Is_Active="A.Is_Active = :Is_Active"),
+)
+
+GET_HIERARCHY_BY_CODE = register_query(
+    "hierarchy.GET_HIERARCHY_BY_CODE",
+    f"""
+        SELECT A.*, A.Code AS Level_Code, B.Level_No
+        FROM {db_schema_headchu}.tblChurchLevels A
+        LEFT JOIN {db_schema_generic}.tblHierarchy B ON B.Code = A.Hierarchy_Code
+        WHERE Head_Code = :Head_Code AND (A.Code = :Code OR Hierarchy_Code = :Hierarchy_Code);
+    """,
+)
+
+ACTIVATE_HIERARCHY_BY_CODE = register_query(
+    "hierarchy.ACTIVATE_HIERARCHY_BY_CODE",
+    f"""
+        UPDATE {db_schema_headchu}.tblChurchLevels
+        SET Is_Active = :Is_Active, Modified_By = :Modified_By
+        WHERE Head_Code = :Head_Code AND Is_Active = :Is_Active2
+            AND Code = :Code;
+    """,
+)
+
+DEACTIVATE_HIERARCHY_BY_CODE = register_query(
+    "hierarchy.DEACTIVATE_HIERARCHY_BY_CODE",
+    f"""
+        UPDATE {db_schema_headchu}.tblChurchLevels
+        SET Is_Active = :Is_Active, Modified_By = :Modified_By
+        WHERE Head_Code = :Head_Code AND Is_Active = :Is_Active2
+            AND Code = :Code;
+    """,
+)
+
+UPDATE_HIERARCHY_BY_CODE = register_query(
+    "hierarchy.UPDATE_HIERARCHY_BY_CODE",
+    f"""
+        UPDATE {db_schema_headchu}.tblChurchLevels
+        SET Level_Name = :Level_Name, Code = :Code, Is_Active = :Is_Active, Modified_By = :Modified_By
+        WHERE Head_Code = :Head_Code AND (Code = :OldCode OR Hierarchy_Code = :Hierarchy_Code);
+    """,
+)
+
+
+@traced_services
 class HierarchyService:
     """
     Hierarchy Services
@@ -47,31 +102,10 @@ class HierarchyService:
                 access_type=["RD"],
             )
 
-            hierarchies = (
-                self.db.execute(
-                    text(
-                        f"""
-                        SELECT A.*, A.Code AS Level_Code, B.Level_No
-                        FROM {db_schema_headchu}.tblChurchLevels A
-                        LEFT JOIN {db_schema_generic}.tblHierarchy B ON B.Code = A.Hierarchy_Code
-                        WHERE Head_Code = :Head_Code;
-                        """
-                    ),
-                    dict(Head_Code=self.current_user.Head_Code),
-                ).all()
-                if is_active is None
-                else self.db.execute(
-                    text(
-                        f"""
-                        SELECT A.*, A.Code AS Level_Code, B.Level_No 
-                        FROM {db_schema_headchu}.tblChurchLevels A
-                        LEFT JOIN {db_schema_generic}.tblHierarchy B ON B.Code = A.Hierarchy_Code
-                        WHERE Head_Code = :Head_Code AND A.Is_Active = :Is_Active;
-                        """
-                    ),
-                    dict(Head_Code=self.current_user.Head_Code, Is_Active=is_active),
-                ).all()
-            )
+            hierarchies = ALL_HIERARCHIES.execute(
+                self.db,
+                dict(Head_Code=self.current_user.Head_Code, Is_Active=is_active),
+            ).all()
             return hierarchies
         except Exception as err:
             self.db.rollback()
@@ -91,14 +125,7 @@ class HierarchyService:
             )
             # fetch data from self.db
             hierarchy = self.db.execute(
-                text(
-                    f"""
-                    SELECT A.*, A.Code AS Level_Code, B.Level_No
-                    FROM {db_schema_headchu}.tblChurchLevels A
-                    LEFT JOIN {db_schema_generic}.tblHierarchy B ON B.Code = A.Hierarchy_Code
-                    WHERE Head_Code = :Head_Code AND (A.Code = :Code OR Hierarchy_Code = :Hierarchy_Code);
-                    """
-                ),
+                GET_HIERARCHY_BY_CODE,
                 dict(
                     Head_Code=self.current_user.Head_Code,
                     Code=code,
@@ -142,14 +169,7 @@ class HierarchyService:
                     detail=f"Church Hierarchy: '{hierarchy.Level_Name} ({hierarchy.Level_Code})' is already active.",
                 )
             self.db.execute(
-                text(
-                    f"""
-                    UPDATE {db_schema_headchu}.tblChurchLevels
-                    SET Is_Active = :Is_Active, Modified_By = :Modified_By
-                    WHERE Head_Code = :Head_Code AND Is_Active = :Is_Active2 
-                        AND Code = :Code;
-                    """
-                ),
+                ACTIVATE_HIERARCHY_BY_CODE,
                 dict(
                     Is_Active=1,
                     Modified_By=self.current_user.Usercode,
@@ -159,6 +179,7 @@ class HierarchyService:
                 ),
             )
             self.db.commit()
+            response_cache.invalidate("hierarchy", self.current_user.Head_Code)
             return await self.get_hierarchy_by_code(code)
         except Exception as err:
             self.db.rollback()
@@ -189,14 +210,7 @@ class HierarchyService:
                     detail=f"Church Hierarchy: '{hierarchy.Level_Name} ({hierarchy.Level_Code})' is already inactive.",
                 )
             self.db.execute(
-                text(
-                    f"""
-                    UPDATE {db_schema_headchu}.tblChurchLevels 
-                    SET Is_Active = :Is_Active, Modified_By = :Modified_By 
-                    WHERE Head_Code = :Head_Code AND Is_Active = :Is_Active2 
-                        AND Code = :Code;
-                    """
-                ),
+                DEACTIVATE_HIERARCHY_BY_CODE,
                 dict(
                     Is_Active=0,
                     Modified_By=self.current_user.Usercode,
@@ -206,6 +220,7 @@ class HierarchyService:
                 ),
             )
             self.db.commit()
+            response_cache.invalidate("hierarchy", self.current_user.Head_Code)
             return await self.get_hierarchy_by_code(code)
         except Exception as err:
             self.db.rollback()
@@ -239,13 +254,7 @@ class HierarchyService:
                 )
             # updates hierarchy
             self.db.execute(
-                text(
-                    f"""
-                    UPDATE {db_schema_headchu}.tblChurchLevels
-                    SET Level_Name = :Level_Name, Code = :Code, Is_Active = :Is_Active, Modified_By = :Modified_By
-                    WHERE Head_Code = :Head_Code AND (Code = :OldCode OR Hierarchy_Code = :Hierarchy_Code);
-                    """
-                ),
+                UPDATE_HIERARCHY_BY_CODE,
                 dict(
                     Level_Name=(
                         hierarchy.Level_Name
@@ -269,6 +278,7 @@ class HierarchyService:
                 ),
             )
             self.db.commit()
+            response_cache.invalidate("hierarchy", self.current_user.Head_Code)
             h_code = (
                 hierarchy.Level_Code
                 if hierarchy.Level_Code
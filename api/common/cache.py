@@ -0,0 +1,354 @@
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+from typing import Annotated, Any, Optional
+
+from fastapi import Depends, Request, Response  # type: ignore
+
+from .config import settings
+from .dependencies import get_current_user, get_current_user_access
+from ..authentication.models.auth import User, UserAccess
+from ..authentication.services.auth import AuthService
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    media_type: str
+    namespace: str
+    head_code: str
+    expires: float
+    # route which produced the response (labels the metrics of the cache hits)
+    route: Any = None
+    # version of the namespace when the response was computed (see ResponseCache.version)
+    version: Any = None
+    # when the user of a response cached per token was last checked (see /auth/bootstrap)
+    checked: float = 0.0
+
+
+@dataclass
+class CacheIdentity:
+    head_code: str
+    fingerprint: str
+    expires: float
+    # version of the "auth" namespace (user status and grants) when the identity was memoised
+    version: Any = None
+
+
+# namespace invalidated by the user status and grant changes: drops the memoised identities
+AUTH_NAMESPACE = "auth"
+# head_code of the invalidations of a namespace for all head churches
+ALL_HEADS = "ALL"
+
+
+def get_permission_fingerprint(current_user_access: list[UserAccess]) -> str:
+    """Fingerprint of the user's grants: users with the same grants share cache entries."""
+    grants = sorted(
+        "|".join(
+            str(getattr(access, field, None))
+            for field in (
+                "Head_Code",
+                "Church_Code",
+                "Level_Code",
+                "Level_No",
+                "Role_Code",
+                "Module_Code",
+                "SubModule_Code",
+                "Access_Type",
+            )
+        )
+        for access in current_user_access
+    )
+    return sha256("\n".join(grants).encode()).hexdigest()[:32]
+
+
+class ResponseCache:
+    """
+    In-process HTTP response cache for rarely changing reads
+    - Keyed by route (path), query params, head church and the user's permission fingerprint
+    - Strong ETags; If-None-Match is answered with 304 Not Modified
+    - Entries are grouped in namespaces (e.g. "churches") invalidated by the write services
+    - Identities (token -> head church + fingerprint) are memoised for identity_ttl seconds,
+      so cache hits never reach MySQL; user status and grant changes invalidate them ("auth")
+    - With several workers, the invalidations are shared through version files in directory
+      (RESPONSE_CACHE_DIR): every lookup compares the entry's version with the file's
+    """
+
+    def __init__(self, ttl: int, max_entries: int, identity_ttl: int = 30, directory: str = ""):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.identity_ttl = identity_ttl
+        self.directory = directory
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._identities: OrderedDict[str, CacheIdentity] = OrderedDict()
+        # namespace/head church -> version, without a shared directory
+        self._versions: dict[tuple, int] = {}
+        self._lock = Lock()
+
+    def _version_path(self, namespace: str, head_code: str) -> str:
+        return os.path.join(self.directory, f"{namespace}.{head_code}.version")
+
+    def _file_version(self, namespace: str, head_code: str):
+        try:
+            stat = os.stat(self._version_path(namespace, head_code))
+        except FileNotFoundError:
+            return None
+        # each invalidation replaces the file: a new inode
+        return stat.st_ino, stat.st_mtime_ns
+
+    def version(self, namespace: str, head_code: str):
+        """Current version of a namespace for a head church (changed by every invalidation)."""
+        if self.directory:
+            return (
+                self._file_version(namespace, head_code),
+                self._file_version(namespace, ALL_HEADS),
+            )
+        return (
+            self._versions.get((namespace, head_code), 0),
+            self._versions.get((namespace, ALL_HEADS), 0),
+        )
+
+    def _bump_version(self, namespace: str, head_code: str):
+        if not self.directory:
+            key = (namespace, head_code)
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._version_path(namespace, head_code)
+        with open(f"{path}.{os.getpid()}.tmp", "wb") as file:
+            file.write(os.urandom(8))
+        # atomic, and a new inode even within the same mtime tick
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+    @staticmethod
+    def make_key(path: str, query_string: bytes, identity: CacheIdentity) -> str:
+        params = "&".join(sorted(query_string.decode("latin-1").split("&")))
+        raw = f"{path}?{params}|{identity.head_code}|{identity.fingerprint}"
+        return sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        return f'"{sha256(body).hexdigest()[:32]}"'
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        return sha256(token.encode()).hexdigest()
+
+    def make_token_key(self, namespace: str, token: str) -> str:
+        """Key of a response cached per token (e.g. /auth/bootstrap)."""
+        return f"{namespace}|{self._token_key(token)}"
+
+    def get_identity(self, token: str) -> Optional[CacheIdentity]:
+        with self._lock:
+            identity = self._identities.get(self._token_key(token))
+            if identity is None or identity.expires < monotonic():
+                return None
+        if identity.version != self.version(AUTH_NAMESPACE, identity.head_code):
+            return None
+        # the token signature and expiry are still verified on every cache hit
+        try:
+            AuthService().re_verify_access_token(token)
+        except Exception:
+            return None
+        return identity
+
+    def set_identity(self, token: str, head_code: str, fingerprint: str, version=None):
+        with self._lock:
+            self._identities[self._token_key(token)] = CacheIdentity(
+                head_code, fingerprint, monotonic() + self.identity_ttl, version
+            )
+            self._identities.move_to_end(self._token_key(token))
+            while len(self._identities) > self.max_entries:
+                self._identities.popitem(last=False)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # invalidated by another worker (or since the response was computed)
+        if entry.version != self.version(entry.namespace, entry.head_code):
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return entry
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def set(self, key: str, entry: CachedResponse):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, namespace: str, head_code: Optional[str] = None):
+        """Drops the namespace's entries (of a head church, or all if head_code is None), in all the workers."""
+        with self._lock:
+            try:
+                self._bump_version(namespace, head_code or ALL_HEADS)
+            except OSError as err:
+                print(f"Response cache invalidation not shared: {err}")
+            for key in [
+                key
+                for key, entry in self._entries.items()
+                if entry.namespace == namespace
+                and (head_code is None or entry.head_code == head_code)
+            ]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._identities.clear()
+
+
+response_cache = ResponseCache(
+    ttl=settings.response_cache_ttl,
+    max_entries=settings.response_cache_max_entries,
+    identity_ttl=settings.response_cache_identity_ttl,
+    directory=settings.response_cache_dir,
+)
+
+
+def cached_response(namespace: str):
+    """
+    Route dependency marking a GET route's response as cacheable in a namespace.
+    Sets the cache identity on the request state for the ResponseCacheMiddleware.
+    """
+
+    async def set_cache_namespace(
+        request: Request,
+        current_user: Annotated[User, Depends(get_current_user)],
+        current_user_access: Annotated[list, Depends(get_current_user_access)],
+    ):
+        request.state.cache_namespace = namespace
+        request.state.cache_head_code = current_user.Head_Code
+        request.state.cache_fingerprint = get_permission_fingerprint(
+            current_user_access
+        )
+        # versions before the route reads the data: a write committed meanwhile makes the entry stale
+        request.state.cache_version = response_cache.version(namespace, current_user.Head_Code)
+        request.state.cache_auth_version = response_cache.version(
+            AUTH_NAMESPACE, current_user.Head_Code
+        )
+
+    return set_cache_namespace
+
+
+def entry_response(entry: CachedResponse, if_none_match: Optional[str] = None) -> Response:
+    """Response of a cache entry from a route, with its ETag (304 Not Modified if it matches If-None-Match)."""
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if entry.etag in [tag.strip() for tag in (if_none_match or "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware serving the cacheable GET routes (see cached_response) from the ResponseCache.
+    """
+
+    def __init__(self, app, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        token = authorization[7:] if authorization.lower().startswith("bearer ") else None
+        if_none_match = headers.get(b"if-none-match", b"").decode("latin-1")
+
+        # cache hit: answer without calling the app (no DB access)
+        identity = self.cache.get_identity(token) if token else None
+        if identity is not None:
+            key = self.cache.make_key(scope["path"], scope["query_string"], identity)
+            entry = self.cache.get(key)
+            if entry is not None:
+                scope["route"] = entry.route
+                scope.setdefault("state", {})["head_code"] = entry.head_code
+                await self._send_entry(send, entry, if_none_match)
+                return
+
+        # cache miss: call the app and store the response if the route is cacheable
+        state = scope.setdefault("state", {})
+        response_start = {}
+        body = []
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                if message["status"] == 200 and state.get("cache_namespace") and token:
+                    response_start.update(message)
+                    return
+            elif message["type"] == "http.response.body" and response_start:
+                body.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                await self._store_and_send(
+                    send, scope, state, token, response_start, b"".join(body), if_none_match
+                )
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _store_and_send(
+        self, send, scope, state, token, response_start, body, if_none_match
+    ):
+        self.cache.set_identity(
+            token,
+            state["cache_head_code"],
+            state["cache_fingerprint"],
+            state["cache_auth_version"],
+        )
+        identity = CacheIdentity(
+            state["cache_head_code"], state["cache_fingerprint"], 0
+        )
+        media_type = dict(response_start.get("headers", [])).get(
+            b"content-type", b"application/json"
+        )
+        entry = CachedResponse(
+            body=body,
+            etag=self.cache.make_etag(body),
+            media_type=media_type.decode("latin-1"),
+            namespace=state["cache_namespace"],
+            head_code=state["cache_head_code"],
+            expires=monotonic() + self.cache.ttl,
+            route=scope.get("route"),
+            version=state["cache_version"],
+        )
+        key = self.cache.make_key(scope["path"], scope["query_string"], identity)
+        self.cache.set(key, entry)
+        await self._send_entry(send, entry, if_none_match)
+
+    @staticmethod
+    async def _send_entry(send, entry: CachedResponse, if_none_match: str):
+        not_modified = entry.etag in [tag.strip() for tag in if_none_match.split(",")]
+        headers = [
+            (b"etag", entry.etag.encode()),
+            (b"cache-control", b"private, no-cache"),
+        ]
+        if not_modified:
+            await send(dict(type="http.response.start", status=304, headers=headers))
+            await send(dict(type="http.response.body", body=b""))
+            return
+        headers += [
+            (b"content-type", entry.media_type.encode()),
+            (b"content-length", str(len(entry.body)).encode()),
+        ]
+        await send(dict(type="http.response.start", status=200, headers=headers))
+        await send(dict(type="http.response.body", body=entry.body))
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings  # type: ignore
 
 
@@ -10,6 +12,7 @@ class Settings(BaseSettings):
     database: str
     db_schema_headchu: str
     db_schema_generic: str
+    db_query_cache_size: int = 500
 
     # Swagger/Server settings
     dev_prefix: str
@@ -17,6 +20,61 @@ class Settings(BaseSettings):
     stg_prefix: str
     prod_prefix: str
 
+    # Production server settings (serve.py); SERVER_WORKERS = 0: one worker per CPU
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0
+    server_loop: str = "auto"
+    server_http: str = "auto"
+    server_log_level: str = "info"
+    server_access_log: bool = False
+    server_backlog: int = 2048
+    server_keep_alive: int = 5
+    server_graceful_timeout: int = 30
+    server_max_requests: int = 10_000
+    server_max_requests_jitter: int = 1_000
+
+    # Response cache settings (RESPONSE_CACHE_IDENTITY_TTL: seconds a token is served from the cache
+    # without re-checking the user; RESPONSE_CACHE_DIR: directory shared by the workers for the
+    # invalidations, required with several workers)
+    response_cache_enabled: bool = True
+    response_cache_ttl: int = 300
+    response_cache_max_entries: int = 1000
+    response_cache_identity_ttl: int = 30
+    response_cache_dir: str = ""
+
+    # Metrics settings (GET /metrics, Prometheus format; METRICS_TOKEN: bearer token required if set;
+    # METRICS_DIR: directory shared by the workers to sum their metrics, empty with a single worker)
+    metrics_enabled: bool = True
+    metrics_token: str = ""
+    metrics_dir: str = ""
+    metrics_flush_interval: float = 5
+
+    # Tracing settings (TRACING_SAMPLE_RATE: share of the requests traced, 0 to 1;
+    # TRACING_EXPORTER: file (JSON lines in TRACING_FILE) or memory)
+    tracing_enabled: bool = False
+    tracing_sample_rate: float = 0.01
+    tracing_exporter: str = "file"
+    tracing_file: str = "traces/traces.jsonl"
+    tracing_max_sql_length: int = 1000
+
+    # Profiling settings (admin only; PROFILING_INTERVAL: seconds between stack samples)
+    profiling_enabled: bool = False
+    profiling_interval: float = 0.005
+    profiling_max_seconds: int = 60
+
+    # Phone number settings
+    phone_default_region: Optional[str] = None
+    phone_cache_size: int = 100_000
+
+    # Background jobs settings
+    jobs_max_workers: int = 2
+    jobs_max_queued: int = 100
+    jobs_progress_interval: float = 1.0
+    jobs_heartbeat_interval: float = 30.0
+    jobs_shutdown_timeout: float = 20.0
+    jobs_export_dir: str = "exports"
+
     # JWT settings
     jwt_secret_key: str
     algorithm: str
@@ -31,6 +89,25 @@ class Settings(BaseSettings):
     mail_from_name: str
     mail_secret_key: str
     mail_token_expire_hours: int
+    mail_starttls: bool = True
+    mail_use_credentials: bool = True
+    mail_validate_certs: bool = True
+    mail_timeout: float = 30
+
+    # Mail queue settings
+    mail_backend: str = "smtp"
+    mail_file_dir: str = "mail_outbox"
+    mail_pool_size: int = 2
+    mail_batch_size: int = 50
+    mail_max_retries: int = 5
+    mail_retry_backoff: float = 2.0
+    mail_queue_max: int = 10_000
+    mail_idle_timeout: float = 60
+    mail_shutdown_timeout: float = 10
+
+    # User provisioning settings (activation link of the welcome email: URL?token=...)
+    user_activation_url: str = "http://localhost:3000/activate"
+    user_activation_expire_hours: int = 72
 
     # importing the environment variables from the .env file
     class Config:
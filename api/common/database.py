@@ -1,6 +1,7 @@
 # from contextlib import asynccontextmanager, contextmanager
 
-from typing import List
+import asyncio
+from typing import Callable, List, Optional
 from .utils import extract_submodule, generate_endpoint_code
 from fastapi import FastAPI, APIRouter  # type: ignore
 from fastapi.routing import APIRoute  # type: ignore
@@ -35,6 +36,7 @@ def get_engine_session(db_name=None):
         pool_size=10,
         max_overflow=20,
         pool_timeout=30,
+        query_cache_size=settings.db_query_cache_size,
     )
 
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -58,6 +60,23 @@ async def get_db():  # -> Session:
         print("Server/DB connection closed.")
 
 
+# Run a blocking query function on its own pooled connection, in the threadpool
+async def run_in_session(func: Callable, *args):
+    """
+    Calls func(*args, db) in a worker thread with a new session, closed afterwards.
+    Independent reads can then run concurrently (asyncio.gather), one connection each.
+    """
+
+    def call():
+        db = SessionLocal()
+        try:
+            return func(*args, db)
+        finally:
+            db.close()
+
+    return await asyncio.to_thread(call)
+
+
 # # Connecting to MySQL Server (with specified databases/schemas)
 # # Connecting to the Head Church Database/Schema
 # @asynccontextmanager
@@ -100,7 +119,19 @@ EXEMPT_COLUMNS = {
 
 STATUS_COLUMNS = {"Status", "Status_Date", "Status_By"}
 
-EXEMPT_TABLES = {"tblAuditLog", "tblCodeSequence"}
+# tblJobs: job progress is updated every few seconds while a job runs
+# tblBranchAncestry, tblChurchClosure, tblChurchStats: derived (rebuilt) tables; tblMailDeadLetter: no Created_By column
+# tblUserActivation: single-use token hashes
+EXEMPT_TABLES = {
+    "tblAuditLog",
+    "tblCodeSequence",
+    "tblJobs",
+    "tblBranchAncestry",
+    "tblChurchClosure",
+    "tblChurchStats",
+    "tblMailDeadLetter",
+    "tblUserActivation",
+}
 
 
 # Get Columns
@@ -349,7 +380,8 @@ def create_update_mod_trigger(db, table_name):
         return trigger_text
 
 
-def create_audit_log_triggers():
+def create_audit_log_triggers(progress: Optional[Callable] = None):
+    """progress(done, total, message): called per table when run as a background job (errors are then raised)."""
     db = SessionLocal()
     try:
         inspector = inspect(engine1)
@@ -359,7 +391,9 @@ def create_audit_log_triggers():
             if table_name.startswith("tbl")
         ]
 
-        for table_name in table_names:
+        for done, table_name in enumerate(table_names):
+            if progress is not None:
+                progress(done, len(table_names), table_name)
             if table_name in EXEMPT_TABLES:
                 continue
             # Get columns
@@ -391,11 +425,14 @@ def create_audit_log_triggers():
     except Exception as err:
         print(f"Error: {err}")
         db.rollback()
+        if progress is not None:
+            raise err
     finally:
         db.close()
 
 
-def create_change_track_triggers():
+def create_change_track_triggers(progress: Optional[Callable] = None):
+    """progress(done, total, message): called per table when run as a background job (errors are then raised)."""
     db = SessionLocal()
     try:
         inspector = inspect(engine1)
@@ -405,7 +442,9 @@ def create_change_track_triggers():
             if table_name.startswith("tbl")
         ]
 
-        for table_name in table_names:
+        for done, table_name in enumerate(table_names):
+            if progress is not None:
+                progress(done, len(table_names), table_name)
             if table_name in EXEMPT_TABLES:
                 continue
 
@@ -431,6 +470,8 @@ def create_change_track_triggers():
     except Exception as err:
         print(f"Error: {err}")
         db.rollback()
+        if progress is not None:
+            raise err
     finally:
         db.close()
 
@@ -443,7 +484,7 @@ def get_all_endpoints(app: FastAPI) -> List[str]:
         for tag in openapi_schema.get("tags", [])
     }
     for route in app.routes:
-        if isinstance(route, APIRoute):
+        if isinstance(route, APIRoute) and route.include_in_schema:
             router_name = route.tags[0] if route.tags else "Default"
             # Get the router description from the tags
             router_description = tag_descriptions.get(router_name, "")
@@ -461,7 +502,8 @@ def get_all_endpoints(app: FastAPI) -> List[str]:
     return endpoints
 
 
-def insert_mod_sub_endpts_table(app: FastAPI):
+def insert_mod_sub_endpts_table(app: FastAPI, progress: Optional[Callable] = None):
+    """progress(done, total, message): called per endpoint when run as a background job (errors are then raised)."""
     db = SessionLocal()
     endpoints = get_all_endpoints(app)
     try:
@@ -553,7 +595,9 @@ def insert_mod_sub_endpts_table(app: FastAPI):
             print(f"SubModules Table updated for submodule '{name}' - {code}")
 
         # Insert new records into the Endpoints Table
-        for code, name, description, submodule_code in end_points:
+        for done, (code, name, description, submodule_code) in enumerate(end_points):
+            if progress is not None:
+                progress(done, len(end_points), name)
             db.execute(
                 text(
                     f"""
@@ -573,3 +617,7 @@ def insert_mod_sub_endpts_table(app: FastAPI):
     except Exception as err:
         print(f"Error: {err}")
         db.rollback()
+        if progress is not None:
+            raise err
+    finally:
+        db.close()
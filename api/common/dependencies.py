@@ -2,19 +2,26 @@ from typing import Annotated
 
 from fastapi import Depends, HTTPException, status, Request  # type: ignore
 from fastapi.security import OAuth2PasswordBearer  # type: ignore
-from sqlalchemy import text  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
 from ..common.database import get_db
+from .queries import register_query
+from .tracing import traced
 from .utils import generate_endpoint_code
 from ..authentication.models.auth import User
 from ..authentication.services.auth import AuthService, auth_credentials_exception
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+SET_DB_CURRENT_USER = register_query(
+    "dependencies.SET_DB_CURRENT_USER", "SET @current_user = :Usercode;"
+)
+
 
 # Get Current User
+@traced("auth.get_current_user", "auth")
 async def get_current_user(
+    request: Request,
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Session = Depends(get_db),
 ):
@@ -33,6 +40,8 @@ async def get_current_user(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Inactive user",
             )
+        # head church label of the request metrics (api/common/metrics.py)
+        request.state.head_code = current_user.Head_Code
         # print("current user fetched")
         return current_user
     except Exception as err:
@@ -42,13 +51,14 @@ async def get_current_user(
 
 
 # Set Current User as DB Current User
+@traced("auth.set_db_current_user", "auth")
 async def set_db_current_user(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
         # db = db[0]  # use this when connecting with specified dbs in database.py
-        db.execute(text(f"SET @current_user = '{current_user.Usercode}';"))
+        db.execute(SET_DB_CURRENT_USER, dict(Usercode=current_user.Usercode))
         # print("db current user set to", current_user.Usercode)
         return current_user.Usercode
     except Exception as err:
@@ -58,6 +68,7 @@ async def set_db_current_user(
 
 
 # Get Current User Access
+@traced("auth.get_current_user_access", "auth")
 async def get_current_user_access(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Session = Depends(get_db),
@@ -0,0 +1,354 @@
+import asyncio
+import inspect
+import os
+import socket
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Optional
+
+import orjson  # type: ignore
+from fastapi import HTTPException  # type: ignore
+
+from .config import settings
+from .database import SessionLocal
+from .dependencies import SET_DB_CURRENT_USER
+from .queries import register_query
+from .responses import _orjson_default
+
+# job statuses (tblJobs.Status)
+JOB_QUEUED = "QUEUED"
+JOB_RUNNING = "RUNNING"
+JOB_SUCCEEDED = "SUCCEEDED"
+JOB_FAILED = "FAILED"
+JOB_CANCELLED = "CANCELLED"
+JOB_FINISHED = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+START_JOB = register_query(
+    "jobs.START_JOB",
+    """
+        UPDATE tblJobs
+        SET Status = :Status, Started_Date = NOW(), Owner = :Owner, Heartbeat_Date = NOW()
+        WHERE Id = :Id AND Status = :Status2 AND Cancel_Requested = 0;
+    """,
+)
+
+UPDATE_JOBS_HEARTBEAT = register_query(
+    "jobs.UPDATE_JOBS_HEARTBEAT",
+    """
+        UPDATE tblJobs
+        SET Heartbeat_Date = NOW()
+        WHERE Id IN :Ids;
+    """,
+    expanding=("Ids",),
+)
+
+FAIL_STALE_JOBS = register_query(
+    "jobs.FAIL_STALE_JOBS",
+    """
+        UPDATE tblJobs
+        SET Status = :Status, Error = :Error, Finished_Date = NOW()
+        WHERE Status IN :Statuses
+            AND (Heartbeat_Date IS NULL OR Heartbeat_Date < NOW() - INTERVAL :Stale_Seconds SECOND);
+    """,
+    expanding=("Statuses",),
+)
+
+UPDATE_JOB_PROGRESS = register_query(
+    "jobs.UPDATE_JOB_PROGRESS",
+    """
+        UPDATE tblJobs
+        SET Progress_Done = :Progress_Done, Progress_Total = :Progress_Total, Message = :Message
+        WHERE Id = :Id;
+    """,
+)
+
+GET_JOB_CANCEL_REQUESTED = register_query(
+    "jobs.GET_JOB_CANCEL_REQUESTED",
+    "SELECT Cancel_Requested FROM tblJobs WHERE Id = :Id;",
+)
+
+FINISH_JOB = register_query(
+    "jobs.FINISH_JOB",
+    """
+        UPDATE tblJobs
+        SET Status = :Status, Result = :Result, Error = :Error, Finished_Date = NOW(),
+            Progress_Done = COALESCE(:Progress_Done, Progress_Done),
+            Progress_Total = COALESCE(:Progress_Total, Progress_Total)
+        WHERE Id = :Id;
+    """,
+)
+
+
+class JobCancelled(Exception):
+    """Raised in a running job (by JobContext.progress) once its cancellation is requested."""
+
+
+@dataclass
+class JobKind:
+    name: str
+    func: Callable
+    description: str
+    # pydantic model validating the params when the job is submitted
+    params_model: Optional[type] = None
+    # set_user_access kwargs checked when the job is submitted
+    access: dict = field(default_factory=dict)
+
+
+job_kinds: dict[str, JobKind] = {}
+
+
+def register_job(name: str, description: str, params_model: Optional[type] = None, **access):
+    """
+    Registers a background job kind: func(ctx: JobContext, **params), sync or async.
+    params_model: optional pydantic model of the params, validated on submit.
+    access: set_user_access kwargs the submitting user must satisfy (e.g. role_code=["SAD"]).
+    """
+
+    def decorator(func: Callable):
+        job_kinds[name] = JobKind(name, func, description, params_model, access)
+        return func
+
+    return decorator
+
+
+def _dumps(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return orjson.dumps(value, default=_orjson_default).decode()
+
+
+class JobContext:
+    """
+    Passed to a running job:
+    - db: the job's own DB session (closed after the job), with @current_user set to the submitting user
+    - current_user/current_user_access: the submitting user's, for the services used by the job
+    - progress(done, total, message): records the progress (throttled) and raises JobCancelled if cancelled
+    """
+
+    def __init__(self, job_id: int, current_user, current_user_access, app=None):
+        self.job_id = job_id
+        self.current_user = current_user
+        self.current_user_access = current_user_access
+        self.app = app
+        self.db = SessionLocal()
+        self.done = 0
+        self.total: Optional[int] = None
+        self._last_progress = 0.0
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None):
+        self.done = done
+        self.total = total if total is not None else self.total
+        if monotonic() - self._last_progress < settings.jobs_progress_interval:
+            return
+        self._last_progress = monotonic()
+        # own short session: the job's changes are committed by the job only
+        db = SessionLocal()
+        try:
+            db.execute(
+                UPDATE_JOB_PROGRESS,
+                dict(
+                    Id=self.job_id,
+                    Progress_Done=self.done,
+                    Progress_Total=self.total,
+                    Message=message[:255] if message else None,
+                ),
+            )
+            cancel_requested = db.execute(
+                GET_JOB_CANCEL_REQUESTED, dict(Id=self.job_id)
+            ).scalar()
+            db.commit()
+        finally:
+            db.close()
+        if cancel_requested:
+            raise JobCancelled()
+
+    def close(self):
+        self.db.close()
+
+
+class JobRunner:
+    """
+    In-process background job runner
+    - Bounded pool of worker threads (JOBS_MAX_WORKERS) and of queued jobs (JOBS_MAX_QUEUED)
+    - The job records (tblJobs) are written by the JobsServices (submit) and by the runner (start/progress/finish)
+    - Jobs run in the process they were submitted to; they can be polled/cancelled from any process
+    - The process owning a job (Owner) refreshes its Heartbeat_Date every JOBS_HEARTBEAT_INTERVAL seconds;
+      at startup, the queued/running jobs without a recent heartbeat (their process died) are failed
+    """
+
+    def __init__(self, max_workers: int, max_queued: int):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.app = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # queued/running jobs of this process: job id -> future
+        self._pending: dict[int, Future] = {}
+        self._lock = Lock()
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def init_app(self, app):
+        """Keeps the app for the jobs using it (e.g. the endpoints sync), starts and shuts down with it."""
+        self.app = app
+        app.add_event_handler("startup", self.start)
+        app.add_event_handler("shutdown", self.shutdown)
+
+    async def start(self):
+        """Fails the stale jobs of dead processes, then starts the heartbeat of this process' jobs."""
+        if self._heartbeat is not None:
+            return
+        # forked workers (serve.py) start after the fork: the pid is the worker's
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        try:
+            failed = await asyncio.to_thread(self._fail_stale_jobs)
+            if failed:
+                print(f"Failed {failed} stale job(s) of stopped processes")
+        except Exception as err:
+            print(f"Error: {err}")
+        self._heartbeat = asyncio.create_task(self._beat())
+
+    def _fail_stale_jobs(self) -> int:
+        db = SessionLocal()
+        try:
+            failed = db.execute(
+                FAIL_STALE_JOBS,
+                dict(
+                    Status=JOB_FAILED,
+                    Error="Interrupted: the server process stopped",
+                    Statuses=[JOB_QUEUED, JOB_RUNNING],
+                    Stale_Seconds=int(3 * settings.jobs_heartbeat_interval),
+                ),
+            ).rowcount
+            db.commit()
+            return failed
+        finally:
+            db.close()
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(settings.jobs_heartbeat_interval)
+            with self._lock:
+                job_ids = list(self._pending)
+            if not job_ids:
+                continue
+            try:
+                await asyncio.to_thread(self._write_heartbeat, job_ids)
+            except Exception as err:
+                print(f"Error: {err}")
+
+    def _write_heartbeat(self, job_ids: list[int]):
+        db = SessionLocal()
+        try:
+            db.execute(UPDATE_JOBS_HEARTBEAT, dict(Ids=job_ids))
+            db.commit()
+        finally:
+            db.close()
+
+    def is_full(self) -> bool:
+        with self._lock:
+            return len(self._pending) >= self.max_queued
+
+    def submit(self, job_id: int, kind: JobKind, current_user, current_user_access, params: dict):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="job"
+                )
+            # added under the lock: _run removes it under the lock too
+            self._pending[job_id] = self._executor.submit(
+                self._run, job_id, kind, current_user, current_user_access, params
+            )
+
+    def _finish(self, job_id: int, status: str, ctx: Optional[JobContext] = None, result=None, error=None):
+        db = SessionLocal()
+        try:
+            db.execute(
+                FINISH_JOB,
+                dict(
+                    Id=job_id,
+                    Status=status,
+                    Result=_dumps(result),
+                    Error=error,
+                    Progress_Done=ctx.done if ctx else None,
+                    Progress_Total=ctx.total if ctx else None,
+                ),
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _run(self, job_id: int, kind: JobKind, current_user, current_user_access, params: dict):
+        ctx = None
+        try:
+            db = SessionLocal()
+            try:
+                started = db.execute(
+                    START_JOB,
+                    dict(Id=job_id, Status=JOB_RUNNING, Status2=JOB_QUEUED, Owner=self.owner),
+                ).rowcount
+                db.commit()
+            finally:
+                db.close()
+            if not started:
+                # cancelled while queued
+                self._finish(job_id, JOB_CANCELLED)
+                return
+
+            ctx = JobContext(job_id, current_user, current_user_access, self.app)
+            ctx.db.execute(SET_DB_CURRENT_USER, dict(Usercode=current_user.Usercode))
+            result = kind.func(ctx, **params)
+            if inspect.iscoroutine(result):
+                result = asyncio.run(result)
+            self._finish(job_id, JOB_SUCCEEDED, ctx, result=result)
+            print(f"Job {job_id} ({kind.name}) succeeded")
+        except JobCancelled:
+            self._finish(job_id, JOB_CANCELLED, ctx)
+            print(f"Job {job_id} ({kind.name}) cancelled")
+        except Exception as err:
+            error = err.detail if isinstance(err, HTTPException) else str(err)
+            print(f"Job {job_id} ({kind.name}) failed: {error}")
+            try:
+                self._finish(job_id, JOB_FAILED, ctx, error=str(error))
+            except Exception as finish_err:
+                print(f"Error: {finish_err}")
+        finally:
+            if ctx is not None:
+                ctx.close()
+            with self._lock:
+                self._pending.pop(job_id, None)
+
+    async def shutdown(self):
+        """
+        Stops the workers: queued jobs are failed, running jobs get up to JOBS_SHUTDOWN_TIMEOUT seconds
+        to finish (without blocking the event loop) and are failed after it.
+        """
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        with self._lock:
+            executor, self._executor = self._executor, None
+            futures = list(self._pending.values())
+        if executor is None:
+            return
+        executor.shutdown(wait=False, cancel_futures=True)
+        if futures:
+            await asyncio.to_thread(wait, futures, settings.jobs_shutdown_timeout)
+        with self._lock:
+            interrupted, self._pending = list(self._pending), {}
+        for job_id in interrupted:
+            try:
+                await asyncio.to_thread(
+                    self._finish, job_id, JOB_FAILED, error="Interrupted by server shutdown"
+                )
+            except Exception as err:
+                print(f"Error: {err}")
+
+
+job_runner = JobRunner(
+    max_workers=settings.jobs_max_workers,
+    max_queued=settings.jobs_max_queued,
+)
@@ -0,0 +1,257 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Iterable, Optional
+from uuid import uuid4
+
+import aiosmtplib  # type: ignore
+from fastapi import HTTPException, status  # type: ignore
+
+from .config import settings
+from .database import SessionLocal
+from .queries import register_query
+
+
+INSERT_MAIL_DEAD_LETTER = register_query(
+    "mail_queue.INSERT_MAIL_DEAD_LETTER",
+    """
+        INSERT INTO tblMailDeadLetter
+            (Message_Id, Recipients, Subject, Message, Attempts, Error)
+        VALUES
+            (:Message_Id, :Recipients, :Subject, :Message, :Attempts, :Error);
+    """,
+)
+
+
+def build_message(
+    subject: str,
+    recipients: Iterable[str],
+    body: str,
+    subtype: str = "html",
+) -> EmailMessage:
+    """Builds an email from the configured sender (MAIL_FROM / MAIL_FROM_NAME)."""
+    message = EmailMessage()
+    message["From"] = formataddr((settings.mail_from_name, settings.mail_from))
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    message["Message-ID"] = make_msgid()
+    message.set_content(body, subtype=subtype)
+    return message
+
+
+@dataclass
+class MailItem:
+    message: EmailMessage
+    attempts: int = 0
+
+
+class SmtpSender:
+    """One persistent SMTP connection (STARTTLS and login once per connection, not per message)."""
+
+    def __init__(self):
+        self.smtp: Optional[aiosmtplib.SMTP] = None
+
+    async def send(self, message: EmailMessage):
+        if self.smtp is None or not self.smtp.is_connected:
+            self.smtp = aiosmtplib.SMTP(
+                hostname=settings.mail_server,
+                port=int(settings.mail_port),
+                username=settings.mail_username if settings.mail_use_credentials else None,
+                password=settings.mail_password if settings.mail_use_credentials else None,
+                start_tls=settings.mail_starttls,
+                validate_certs=settings.mail_validate_certs,
+                timeout=settings.mail_timeout,
+            )
+            await self.smtp.connect()
+        await self.smtp.send_message(message)
+
+    async def close(self):
+        if self.smtp is not None and self.smtp.is_connected:
+            try:
+                await self.smtp.quit()
+            except aiosmtplib.SMTPException:
+                self.smtp.close()
+        self.smtp = None
+
+
+class FileSender:
+    """Local sink (MAIL_BACKEND=file): writes each email to MAIL_FILE_DIR as an .eml file."""
+
+    async def send(self, message: EmailMessage):
+        os.makedirs(settings.mail_file_dir, exist_ok=True)
+        path = os.path.join(
+            settings.mail_file_dir,
+            f"{datetime.now():%Y%m%d%H%M%S%f}_{uuid4().hex[:8]}.eml",
+        )
+        await asyncio.to_thread(_write_bytes, path, message.as_bytes())
+
+    async def close(self):
+        pass
+
+
+def _write_bytes(path: str, content: bytes):
+    with open(path, "wb") as file:
+        file.write(content)
+
+
+SENDERS = dict(smtp=SmtpSender, file=FileSender)
+
+
+def _is_permanent(err: Exception) -> bool:
+    # 5xx replies (e.g. unknown recipient, message rejected) are not retried
+    if isinstance(err, aiosmtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(err, aiosmtplib.SMTPResponseException) and err.code >= 500
+
+
+class MailQueue:
+    """
+    Outbound mail queue: request handlers only enqueue, the emails are sent in the background
+    - MAIL_POOL_SIZE workers, each with its own persistent connection (closed after MAIL_IDLE_TIMEOUT seconds idle)
+    - Each worker drains up to MAIL_BATCH_SIZE queued emails per wake-up over its connection
+    - Transient failures are retried with exponential backoff (MAIL_RETRY_BACKOFF * 2^n, up to MAIL_MAX_RETRIES)
+    - Permanent failures and exhausted retries go to the dead-letter table (tblMailDeadLetter)
+    - MAIL_BACKEND: "smtp" (a debug SMTP server can be used as sink) or "file" (.eml files in MAIL_FILE_DIR)
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        # emails waiting for a retry: id(item) -> (timer handle, item)
+        self._retrying: dict[int, tuple] = {}
+        self.sent = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+    def init_app(self, app):
+        app.add_event_handler("startup", self.start)
+        app.add_event_handler("shutdown", self.shutdown)
+
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.mail_queue_max)
+        self._workers = [
+            asyncio.create_task(self._worker(SENDERS[settings.mail_backend]()))
+            for _ in range(settings.mail_pool_size)
+        ]
+
+    def enqueue(self, message: EmailMessage):
+        """Queues an email (non-blocking); raises a 503 if the queue is full."""
+        if self._queue is None:
+            raise RuntimeError("The mail queue is not started")
+        try:
+            self._queue.put_nowait(MailItem(message))
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Mail queue is full, please retry later",
+            )
+
+    def stats(self) -> dict:
+        return dict(
+            queued=self._queue.qsize() if self._queue else 0,
+            retrying=len(self._retrying),
+            sent=self.sent,
+            retried=self.retried,
+            dead_lettered=self.dead_lettered,
+        )
+
+    async def _worker(self, sender):
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(
+                        self._queue.get(), timeout=settings.mail_idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    await sender.close()
+                    continue
+                batch = [item]
+                while len(batch) < settings.mail_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                for item in batch:
+                    try:
+                        await self._send(sender, item)
+                    finally:
+                        self._queue.task_done()
+        finally:
+            await sender.close()
+
+    async def _send(self, sender, item: MailItem):
+        item.attempts += 1
+        try:
+            await sender.send(item.message)
+            self.sent += 1
+        except Exception as err:
+            # drop the connection, the next email reconnects
+            await sender.close()
+            if _is_permanent(err) or item.attempts >= settings.mail_max_retries:
+                await self._dead_letter(item, err)
+                return
+            self.retried += 1
+            delay = settings.mail_retry_backoff * 2 ** (item.attempts - 1)
+            print(f"Mail to '{item.message['To']}' failed ({err}), retrying in {delay}s")
+            handle = asyncio.get_running_loop().call_later(
+                delay, self._requeue, item
+            )
+            self._retrying[id(item)] = (handle, item)
+
+    def _requeue(self, item: MailItem):
+        self._retrying.pop(id(item), None)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            asyncio.create_task(self._dead_letter(item, "Mail queue is full"))
+
+    async def _dead_letter(self, item: MailItem, err):
+        self.dead_lettered += 1
+        print(f"Mail to '{item.message['To']}' dead-lettered: {err}")
+        await asyncio.to_thread(_insert_dead_letter, item, str(err))
+
+    async def shutdown(self):
+        """Sends the queued emails (for up to MAIL_SHUTDOWN_TIMEOUT seconds), then dead-letters the rest."""
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=settings.mail_shutdown_timeout)
+        except asyncio.TimeoutError:
+            pass
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        retrying, self._retrying = list(self._retrying.values()), {}
+        for handle, item in retrying:
+            handle.cancel()
+            await self._dead_letter(item, "Interrupted by server shutdown")
+        while not self._queue.empty():
+            await self._dead_letter(self._queue.get_nowait(), "Interrupted by server shutdown")
+
+
+def _insert_dead_letter(item: MailItem, error: str):
+    db = SessionLocal()
+    try:
+        db.execute(
+            INSERT_MAIL_DEAD_LETTER,
+            dict(
+                Message_Id=item.message["Message-ID"],
+                Recipients=item.message["To"],
+                Subject=item.message["Subject"],
+                Message=item.message.as_string(),
+                Attempts=item.attempts,
+                Error=error[:1000],
+            ),
+        )
+        db.commit()
+    except Exception as err:
+        print(f"Error: {err}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+mail_queue = MailQueue()
@@ -0,0 +1,415 @@
+import asyncio
+import os
+import re
+from bisect import bisect_left
+from glob import glob
+from time import perf_counter
+from typing import Optional
+
+import orjson  # type: ignore
+from fastapi import APIRouter, HTTPException, Request, status  # type: ignore
+from fastapi.responses import Response  # type: ignore
+
+from .config import settings
+from .mail_queue import mail_queue
+from .utils import generate_endpoint_code
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows: no forked workers (serve.py), the files are not folded
+    fcntl = None
+
+# histogram upper bounds (the +Inf bucket is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# route code of the requests not matching any route (bounded label values)
+UNMATCHED = "UNMATCHED"
+ANONYMOUS = "-"
+
+# cumulative metrics of the exited workers (see Metrics.fold_exited)
+EXITED_FILE = "exited.json"
+WORKER_FILE = re.compile(r"worker_(\d+)\.json$")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, counts: list, total: float, count: int):
+        for index, bucket_count in enumerate(counts):
+            self.counts[index] += bucket_count
+        self.sum += total
+        self.count += count
+
+
+class Metrics:
+    """
+    HTTP RED metrics of the worker: request rate, errors (status label) and duration,
+    per route code (e.g. GET_ALL_MEMBERS), method, head church and status, plus response sizes
+    and the requests in flight.
+    - Updated from the event loop only, so no locking is needed
+    - With several workers (METRICS_DIR set), each worker flushes its metrics to a file
+      and /metrics sums the files of all the workers. The files of exited workers are folded
+      into one cumulative file (EXITED_FILE) and deleted, so the counters never go backwards
+      and the directory does not grow with the recycled workers
+    """
+
+    def __init__(self):
+        self.requests: dict[tuple, int] = {}
+        self.durations: dict[tuple, Histogram] = {}
+        self.sizes: dict[tuple, Histogram] = {}
+        self.in_flight = 0
+        self._route_codes: dict = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def init_app(self, app):
+        app.include_router(metrics_router)
+        if settings.metrics_dir:
+            app.add_event_handler("startup", self.start)
+            app.add_event_handler("shutdown", self.shutdown)
+
+    def route_code(self, route) -> str:
+        if route is None:
+            return UNMATCHED
+        code = self._route_codes.get(route.name)
+        if code is None:
+            code = self._route_codes[route.name] = generate_endpoint_code(route.name)
+        return code
+
+    def observe(self, route, method: str, head_code: str, status_code: int, seconds: float, size: int):
+        route_code = self.route_code(route)
+        key = (route_code, method, head_code, str(status_code))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        key = (route_code, method, head_code)
+        histogram = self.durations.get(key)
+        if histogram is None:
+            histogram = self.durations[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+        key = (route_code, head_code)
+        histogram = self.sizes.get(key)
+        if histogram is None:
+            histogram = self.sizes[key] = Histogram(SIZE_BUCKETS)
+        histogram.observe(size)
+
+    # ---- multi-worker aggregation ----------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """Copy of the metrics (taken on the event loop, then written/merged in a thread)."""
+        return dict(
+            pid=os.getpid(),
+            requests=[[*key, value] for key, value in self.requests.items()],
+            durations=[[*key, list(h.counts), h.sum, h.count] for key, h in self.durations.items()],
+            sizes=[[*key, list(h.counts), h.sum, h.count] for key, h in self.sizes.items()],
+            gauges=dict(http_requests_in_flight=self.in_flight, **_mail_queue_gauges()),
+            counters=_mail_queue_counters(),
+        )
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(settings.metrics_dir, f"worker_{pid}.json")
+
+    def flush(self, snapshot: dict):
+        _write_snapshot(self._path(snapshot["pid"]), snapshot)
+
+    async def start(self):
+        os.makedirs(settings.metrics_dir, exist_ok=True)
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(settings.metrics_flush_interval)
+            try:
+                await asyncio.to_thread(self.flush, self.snapshot())
+            except OSError as err:
+                print(f"Metrics flush failed: {err}")
+
+    async def shutdown(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        snapshot = self.snapshot()
+        snapshot["gauges"]["http_requests_in_flight"] = 0
+        self.flush(snapshot)
+
+    def _worker_files(self) -> list[tuple]:
+        """(pid, path) of the worker files."""
+        files = []
+        for path in glob(os.path.join(settings.metrics_dir, "worker_*.json")):
+            match = WORKER_FILE.search(path)
+            if match:
+                files.append((int(match.group(1)), path))
+        return files
+
+    def fold_exited(self):
+        """
+        Adds the files of the exited workers to the cumulative file of the exited workers (EXITED_FILE),
+        then deletes them. Under a file lock: the workers may collect at the same time.
+        The pids being folded are recorded in the cumulative file until their files are deleted,
+        so an interrupted fold never counts a file twice.
+        """
+        if fcntl is None:
+            return
+        exited = [(pid, path) for pid, path in self._worker_files() if not _is_alive(pid)]
+        if not exited:
+            return
+        exited_path = os.path.join(settings.metrics_dir, EXITED_FILE)
+        with open(os.path.join(settings.metrics_dir, ".fold.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            cumulative = _read_snapshot(exited_path)
+            folded = set(cumulative["folded"]) if cumulative else set()
+            total, scalars = Metrics(), {}
+            if cumulative:
+                _add_snapshot(total, scalars, cumulative)
+            for pid, path in exited:
+                snapshot = None if pid in folded else _read_snapshot(path)
+                if snapshot is not None:
+                    _add_snapshot(total, scalars, snapshot)
+                folded.add(pid)
+            cumulative = total.to_snapshot(scalars, sorted(folded))
+            _write_snapshot(exited_path, cumulative)
+            for _, path in exited:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            cumulative["folded"] = []
+            _write_snapshot(exited_path, cumulative)
+
+    def to_snapshot(self, scalars: dict, folded: list) -> dict:
+        """Snapshot of summed metrics (the cumulative file of the exited workers: no gauges)."""
+        return dict(
+            pid=0,
+            requests=[[*key, value] for key, value in self.requests.items()],
+            durations=[[*key, list(h.counts), h.sum, h.count] for key, h in self.durations.items()],
+            sizes=[[*key, list(h.counts), h.sum, h.count] for key, h in self.sizes.items()],
+            gauges={},
+            counters={name: value for name, (_, value) in scalars.items()},
+            folded=folded,
+        )
+
+    def collect(self, snapshot: dict) -> tuple:
+        """
+        Sums a snapshot of this worker with the files of the other workers and of the exited workers
+        (the files of the workers which exited since the last collect are folded first).
+        Returns (metrics, scalars: name -> (type, value)); the gauges are summed over the live workers only.
+        """
+        try:
+            self.fold_exited()
+        except OSError as err:
+            print(f"Metrics fold failed: {err}")
+        total = Metrics()
+        scalars: dict = {}
+        snapshots = [snapshot]
+        exited = _read_snapshot(os.path.join(settings.metrics_dir, EXITED_FILE))
+        if exited is not None:
+            snapshots.append(exited)
+        # the files being folded are already counted in the cumulative file
+        folded = set(exited["folded"]) if exited else set()
+        for pid, path in self._worker_files():
+            if pid == snapshot["pid"] or pid in folded:
+                continue
+            worker = _read_snapshot(path)
+            if worker is not None:
+                snapshots.append(worker)
+        for snapshot in snapshots:
+            _add_snapshot(
+                total,
+                scalars,
+                snapshot,
+                gauges=snapshot["pid"] == os.getpid() or (snapshot["pid"] and _is_alive(snapshot["pid"])),
+            )
+        return total, scalars
+
+    def render(self, scalars: dict) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        lines = [
+            "# HELP http_requests_total Requests by route code, method, head church and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (route_code, method, head_code, status_code), value in sorted(self.requests.items()):
+            labels = _labels(route=route_code, method=method, head=head_code, status=status_code)
+            lines.append(f"http_requests_total{{{labels}}} {value}")
+        lines += _render_histogram(
+            "http_request_duration_seconds",
+            "Request duration in seconds by route code, method and head church.",
+            self.durations,
+            ("route", "method", "head"),
+        )
+        lines += _render_histogram(
+            "http_response_size_bytes",
+            "Response body size in bytes by route code and head church.",
+            self.sizes,
+            ("route", "head"),
+        )
+        for name, (metric_type, value) in sorted(scalars.items()):
+            lines += [f"# TYPE {name} {metric_type}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _add_snapshot(total: Metrics, scalars: dict, snapshot: dict, gauges: bool = False):
+    """Adds a worker snapshot to summed metrics and scalars (name -> (type, value))."""
+    for *key, value in snapshot["requests"]:
+        key = tuple(key)
+        total.requests[key] = total.requests.get(key, 0) + value
+    for name, buckets, histograms in (
+        ("durations", LATENCY_BUCKETS, total.durations),
+        ("sizes", SIZE_BUCKETS, total.sizes),
+    ):
+        for *key, counts, histogram_sum, count in snapshot[name]:
+            histogram = histograms.setdefault(tuple(key), Histogram(buckets))
+            histogram.merge(counts, histogram_sum, count)
+    for name, value in snapshot["counters"].items():
+        scalars[name] = ("counter", scalars.get(name, ("counter", 0))[1] + value)
+    if gauges:
+        for name, value in snapshot["gauges"].items():
+            scalars[name] = ("gauge", scalars.get(name, ("gauge", 0))[1] + value)
+
+
+def _read_snapshot(path: str) -> Optional[dict]:
+    try:
+        with open(path, "rb") as file:
+            return orjson.loads(file.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def _write_snapshot(path: str, snapshot: dict):
+    with open(f"{path}.tmp", "wb") as file:
+        file.write(orjson.dumps(snapshot))
+    # atomic: readers never see a partial file
+    os.replace(f"{path}.tmp", path)
+
+
+def _mail_queue_gauges() -> dict:
+    stats = mail_queue.stats()
+    return dict(mail_queue_queued=stats["queued"], mail_queue_retrying=stats["retrying"])
+
+
+def _mail_queue_counters() -> dict:
+    stats = mail_queue.stats()
+    return {
+        f"mail_queue_{name}_total": stats[name] for name in ("sent", "retried", "dead_lettered")
+    }
+
+
+def scalars_of(snapshot: dict) -> dict:
+    """Scalars (name -> (type, value)) of a single worker's snapshot."""
+    return {
+        **{name: ("counter", value) for name, value in snapshot["counters"].items()},
+        **{name: ("gauge", value) for name, value in snapshot["gauges"].items()},
+    }
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def _render_histogram(name: str, description: str, histograms: dict, label_names: tuple) -> list:
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        labels = _labels(**dict(zip(label_names, key)))
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def clear_metrics_dir():
+    """Deletes the worker files of a previous run (called by serve.py before forking)."""
+    if settings.metrics_dir:
+        for pattern in ("worker_*.json*", f"{EXITED_FILE}*"):
+            for path in glob(os.path.join(settings.metrics_dir, pattern)):
+                os.remove(path)
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording every HTTP request in the Metrics.
+    The route is read from the scope after routing; the head church is set on the request
+    state by get_current_user (ANONYMOUS for the routes without a user).
+    """
+
+    def __init__(self, app, registry: Metrics = metrics):
+        self.app = app
+        self.metrics = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        response = [500, 0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                response[1] += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.in_flight += 1
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_flight -= 1
+            self.metrics.observe(
+                scope.get("route"),
+                scope["method"],
+                state.get("head_code", ANONYMOUS),
+                response[0],
+                perf_counter() - start,
+                response[1],
+            )
+
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", name="Metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    if settings.metrics_token:
+        if request.headers.get("authorization", "") != f"Bearer {settings.metrics_token}":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token",
+            )
+    snapshot = metrics.snapshot()
+    if settings.metrics_dir:
+        collected, scalars = await asyncio.to_thread(metrics.collect, snapshot)
+    else:
+        collected, scalars = metrics, scalars_of(snapshot)
+    return Response(
+        collected.render(scalars), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
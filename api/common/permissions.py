@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from typing import Annotated, Optional
+
+from fastapi import Depends, HTTPException, Request, status  # type: ignore
+
+from .dependencies import get_current_user, get_current_user_access
+from .utils import generate_endpoint_code
+from ..authentication.models.auth import User, UserAccess
+
+# head_code of a spec: the head church of the current user (default); None: any head church
+USER_HEAD = "USER"
+
+SPEC_CRITERIA = ("access_type", "role_code", "module_code", "submodule_code")
+
+# level of the grants covering the whole head church (no church scope)
+HEAD_CHURCH_LEVEL = "CHU"
+
+
+@dataclass(frozen=True)
+class PermissionSpec:
+    """
+    Grants needed to call a route: the user needs one grant matching every given criterion
+    (same rules as set_user_access). Checked by requires() before the route runs any query.
+    The checks depending on the data (church_code, level of a church) stay in the services.
+    """
+
+    access_type: Optional[frozenset] = None
+    role_code: Optional[frozenset] = None
+    module_code: Optional[frozenset] = None
+    submodule_code: Optional[frozenset] = None
+    head_code: Optional[str] = USER_HEAD
+
+    def __post_init__(self):
+        # lists, as with set_user_access: stored as frozensets (hashable, fast lookups)
+        for name in SPEC_CRITERIA:
+            value = getattr(self, name)
+            if value is not None:
+                object.__setattr__(self, name, frozenset(value))
+
+    def criteria(self) -> dict:
+        """The criteria as set_user_access kwargs: set_user_access(access, head_code=..., **spec.criteria())."""
+        return {
+            name: sorted(getattr(self, name))
+            for name in SPEC_CRITERIA
+            if getattr(self, name) is not None
+        }
+
+    def to_dict(self) -> dict:
+        return dict(self.criteria(), head_code=self.head_code)
+
+
+# system administration features (jobs, profiling, permissions): super admins of any head church
+SYSTEM_ADMIN = PermissionSpec(
+    role_code=["SAD"],
+    module_code=["ALLM", "SYSA"],
+    access_type=["ED", "CR"],
+    head_code=None,
+)
+
+
+class AccessIndex:
+    """
+    The grants of the request's user, with the results of the specs already checked
+    (a spec is evaluated once per request, see get_access_index).
+    """
+
+    def __init__(self, current_user_access: UserAccess):
+        self.grants = current_user_access
+        self.checked: dict[tuple, bool] = {}
+
+    def allows(self, spec: PermissionSpec, head_code: str) -> bool:
+        if spec.head_code != USER_HEAD:
+            head_code = spec.head_code
+        key = (spec, head_code)
+        allowed = self.checked.get(key)
+        if allowed is None:
+            allowed = self.checked[key] = self._matches(spec, head_code)
+        return allowed
+
+    def church_scope(self, spec: PermissionSpec, head_code: str) -> Optional[list[str]]:
+        """
+        Churches whose data the user may see with the grants matching spec: the churches of the grants
+        (the queries add the churches under them, see tblChurchClosure).
+        None: a head church level grant (all the churches); []: no matching grant.
+        """
+        if spec.head_code != USER_HEAD:
+            head_code = spec.head_code
+        church_codes = set()
+        for grant in self._grants(spec, head_code):
+            if grant.Level_Code == HEAD_CHURCH_LEVEL:
+                return None
+            if grant.Church_Code:
+                church_codes.add(grant.Church_Code.upper())
+        return sorted(church_codes)
+
+    def _matches(self, spec: PermissionSpec, head_code: Optional[str]) -> bool:
+        for _ in self._grants(spec, head_code):
+            return True
+        return False
+
+    def _grants(self, spec: PermissionSpec, head_code: Optional[str]):
+        access_type = spec.access_type
+        role_code = spec.role_code
+        module_code = spec.module_code
+        submodule_code = spec.submodule_code
+        for grant in self.grants:
+            if (
+                (head_code is None or grant.Head_Code == head_code)
+                and (access_type is None or grant.Access_Type in access_type)
+                and (role_code is None or grant.Role_Code in role_code)
+                and (module_code is None or grant.Module_Code in module_code)
+                and (submodule_code is None or grant.SubModule_Code in submodule_code)
+            ):
+                yield grant
+
+
+def get_access_index(request: Request, current_user_access: UserAccess) -> AccessIndex:
+    """Access index of the request's user, built once per request."""
+    access_index = getattr(request.state, "access_index", None)
+    if access_index is None:
+        access_index = request.state.access_index = AccessIndex(current_user_access)
+    return access_index
+
+
+def resolve_church_scope(
+    current_user_access: UserAccess, spec: PermissionSpec, head_code: str
+) -> Optional[list[str]]:
+    """Church scope of a user's grants for spec (see AccessIndex.church_scope)."""
+    return AccessIndex(current_user_access).church_scope(spec, head_code)
+
+
+def requires(spec: PermissionSpec):
+    """
+    Route dependency enforcing spec before the route's services run (403 otherwise):
+        @router.get("/", name="Get All Churches", dependencies=[Depends(requires(CHURCH_VIEW))])
+    The user and grants are the same (cached) dependencies as the services'.
+    """
+
+    async def check_permission(
+        request: Request,
+        current_user: Annotated[User, Depends(get_current_user)],
+        current_user_access: Annotated[UserAccess, Depends(get_current_user_access)],
+    ):
+        if not get_access_index(request, current_user_access).allows(spec, current_user.Head_Code):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access Denied: You are NOT ALLOWED to perform this action",
+            )
+
+    check_permission.permission = spec
+    return check_permission
+
+
+@dataclass(frozen=True)
+class RoutePermission:
+    route_code: str
+    name: str
+    methods: tuple
+    path: str
+    spec: PermissionSpec
+
+
+class PermissionRegistry:
+    """The permission specs of the app's routes, by route code (see get_route_code)."""
+
+    def __init__(self):
+        self.routes: dict[str, RoutePermission] = {}
+
+    def init_app(self, app):
+        """Registers the specs of the routes (called once the routers are included)."""
+        for route in app.routes:
+            for dependency in getattr(route, "dependencies", None) or []:
+                spec = getattr(dependency.dependency, "permission", None)
+                if spec is None:
+                    continue
+                route_code = generate_endpoint_code(route.name)
+                registered = self.routes.get(route_code)
+                if registered is not None and registered.path != route.path:
+                    raise RuntimeError(
+                        f"Route code '{route_code}' of '{route.path}' is already used by '{registered.path}'"
+                    )
+                self.routes[route_code] = RoutePermission(
+                    route_code, route.name, tuple(sorted(route.methods)), route.path, spec
+                )
+
+    def get(self, route_code: str) -> Optional[RoutePermission]:
+        return self.routes.get(route_code)
+
+
+permissions = PermissionRegistry()
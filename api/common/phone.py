@@ -0,0 +1,103 @@
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from phonenumbers import (  # type: ignore
+    NumberParseException,
+    PhoneNumberFormat,
+    country_code_for_region,
+    format_number,
+    is_possible_number,
+    parse,
+)
+
+from .config import settings
+
+
+@lru_cache(maxsize=settings.phone_cache_size)
+def _normalise(raw: str, region: Optional[str], strict: bool) -> str:
+    try:
+        number = parse(raw, region)
+    except NumberParseException as err:
+        raise ValueError(f"Invalid phone number: '{raw}'. {err._msg}") from None
+    if strict and not is_possible_number(number):
+        raise ValueError(f"Invalid phone number: '{raw}'.")
+    return format_number(number, PhoneNumberFormat.E164)
+
+
+def normalise_phonenumber(
+    raw: Optional[str],
+    region: Optional[str] = settings.phone_default_region or None,
+    strict: bool = True,
+) -> Optional[str]:
+    """
+    Normalises a phone number to E.164 (e.g. +2348012345678).
+    - Memoised on (raw, region, strict) in a bounded LRU cache
+    - Raises ValueError for invalid numbers (a 422 response when raised in a model validator)
+    - strict=False (response models): numbers which parse are accepted even if not possible numbers,
+      so the numbers already stored never fail a response
+    """
+    if raw is None:
+        return None
+    raw = raw.strip()
+    if not raw:
+        return None
+    return _normalise(raw, region, strict)
+
+
+def normalise_phonenumbers(
+    raws: Iterable[Optional[str]],
+    region: Optional[str] = settings.phone_default_region or None,
+) -> tuple[list[Optional[str]], dict[int, str]]:
+    """
+    Batch normalisation for imports/bulk paths.
+    - Each distinct number of the batch is parsed once
+    - Returns the normalised numbers (None where invalid/empty) and the errors by index
+    """
+    raws = list(raws)
+    distinct: dict[str, Optional[str]] = {}
+    failed: dict[str, str] = {}
+    for raw in set(raw.strip() for raw in raws if raw and raw.strip()):
+        try:
+            distinct[raw] = _normalise(raw, region, True)
+        except ValueError as err:
+            distinct[raw] = None
+            failed[raw] = str(err)
+
+    numbers: list[Optional[str]] = []
+    errors: dict[int, str] = {}
+    for index, raw in enumerate(raws):
+        raw = raw.strip() if raw else raw
+        numbers.append(distinct.get(raw) if raw else None)
+        if raw in failed:
+            errors[index] = failed[raw]
+    return numbers, errors
+
+
+def phonenumber_cache_info():
+    return _normalise.cache_info()
+
+
+def phonenumber_search_prefix(
+    raw: str, region: Optional[str] = settings.phone_default_region or None
+) -> Optional[str]:
+    """
+    E.164 prefix of a partly typed phone number, for prefix searches on the stored (E.164) numbers,
+    e.g. "0803 12" -> "+23480312" (default region NG), "+44 20" -> "+4420".
+    Returns None if the input is not a phone number (fewer than 3 digits or other characters).
+    """
+    raw = raw.strip()
+    digits = "".join(char for char in raw if char.isdigit())
+    if len(digits) < 3 or any(
+        not (char.isdigit() or char in "+-() ") for char in raw
+    ):
+        return None
+    if raw.startswith("+"):
+        return f"+{digits}"
+    if raw.startswith("00"):
+        return f"+{digits[2:]}"
+    # national format: drop the trunk prefix, add the default region's country code
+    if region and digits.startswith("0"):
+        country_code = country_code_for_region(region)
+        if country_code:
+            return f"+{country_code}{digits[1:]}"
+    return None
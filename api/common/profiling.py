@@ -0,0 +1,279 @@
+import asyncio
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from time import perf_counter
+from typing import Optional
+
+import orjson  # type: ignore
+from fastapi import HTTPException, status  # type: ignore
+
+from .config import settings
+from .database import SessionLocal
+from .utils import set_user_access
+from ..authentication.services.auth import AuthService
+
+# grants needed to profile (same as the system admin jobs)
+PROFILING_ACCESS = dict(
+    level_code=["CHU"],
+    role_code=["SAD"],
+    module_code=["ALLM", "SYSA"],
+    access_type=["ED", "CR"],
+)
+
+# leaf frames of threads waiting for work (event loop selector, idle pool threads): not sampled
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _frame_label(code, labels: dict) -> str:
+    label = labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(BASE_DIR):
+            filename = os.path.relpath(filename, BASE_DIR)
+        else:
+            filename = "/".join(filename.replace("\\", "/").split("/")[-2:])
+        label = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+        labels[code] = label
+    return label
+
+
+class StackSampler:
+    """
+    Sampling profiler: a background thread records the Python stacks of the other threads
+    every interval seconds. The stacks are counted in the collapsed ("folded") format:
+    "thread;outer frame;...;leaf frame" -> samples, read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._labels: dict = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._started = perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = perf_counter() - self._started
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code, self._labels))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """One profile at a time per worker process (a request's, or a time-boxed window of the worker)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def acquire(self, interval: Optional[float] = None) -> StackSampler:
+        if not self._lock.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A profile is already running in this worker, please retry later",
+            )
+        return StackSampler(interval or settings.profiling_interval)
+
+    def release(self):
+        self._lock.release()
+
+    async def sample_window(self, seconds: float, interval: Optional[float] = None) -> StackSampler:
+        """Samples all the threads of the worker for seconds (the worker keeps serving)."""
+        sampler = self.acquire(interval)
+        try:
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stop()
+        finally:
+            self.release()
+        return sampler
+
+
+profiler = Profiler()
+
+
+def check_profiling_access(token: str):
+    """Raises a 401/403 unless the token's user may profile (see PROFILING_ACCESS)."""
+    token_data = AuthService().re_verify_access_token(token)
+    db = SessionLocal()
+    try:
+        current_user_access = AuthService().get_user_access(
+            token_data.username, token_data.church_level, db
+        )
+    finally:
+        db.close()
+    set_user_access(current_user_access, **PROFILING_ACCESS)
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware profiling single requests flagged with the "X-Profile: 1" header or "?profile=1".
+    Only installed when PROFILING_ENABLED is set; unflagged requests only cost the flag check.
+    The flagged request is run as usual, then its response is replaced by the collapsed stacks
+    (text/plain), with the original status in the X-Profile-Status header.
+    The sampled stacks are those of the whole worker while the request runs: profile on a quiet worker.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def is_flagged(scope) -> bool:
+        for name, value in scope.get("headers") or []:
+            if name == b"x-profile":
+                return value not in (b"", b"0", b"false")
+        query_string = scope.get("query_string", b"")
+        return b"profile=1" in query_string.split(b"&") or b"profile=true" in query_string.split(b"&")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.is_flagged(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        token = authorization[7:] if authorization.lower().startswith("bearer ") else ""
+        try:
+            if not token:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Not authenticated",
+                )
+            await asyncio.to_thread(check_profiling_access, token)
+            sampler = profiler.acquire()
+        except HTTPException as err:
+            await self._send(send, err.status_code, orjson.dumps(dict(detail=err.detail)), b"application/json")
+            return
+
+        response_status = []
+
+        async def send_wrapper(message):
+            # the response is consumed: only its status is kept
+            if message["type"] == "http.response.start":
+                response_status.append(message["status"])
+
+        try:
+            sampler.start()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                sampler.stop()
+        finally:
+            profiler.release()
+        await self._send(
+            send,
+            status.HTTP_200_OK,
+            sampler.collapsed().encode(),
+            b"text/plain; charset=utf-8",
+            [
+                (b"x-profile-status", str(response_status[0] if response_status else 500).encode()),
+                (b"x-profile-samples", str(sampler.samples).encode()),
+                (b"x-profile-duration-ms", f"{sampler.duration * 1000:.1f}".encode()),
+            ],
+        )
+
+    @staticmethod
+    async def _send(send, status_code: int, body: bytes, media_type: bytes, headers=None):
+        headers = (headers or []) + [
+            (b"content-type", media_type),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        await send(dict(type="http.response.start", status=status_code, headers=headers))
+        await send(dict(type="http.response.body", body=body))
+
+
+def start_tracemalloc(frames: int):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracemalloc():
+    global _last_snapshot
+    _last_snapshot = None
+    tracemalloc.stop()
+
+
+# previous snapshot, compared to by top_allocations(diff=True)
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+_snapshot_filters = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def top_allocations(limit: int, group_by: str, diff: bool) -> dict:
+    """
+    Top allocators of the traced memory (by size), grouped by "lineno", "filename" or "traceback".
+    diff: the growth since the previous snapshot, instead of the allocated memory.
+    """
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Memory tracing is not started",
+        )
+    snapshot = tracemalloc.take_snapshot().filter_traces(_snapshot_filters)
+    if diff and _last_snapshot is not None:
+        stats = snapshot.compare_to(_last_snapshot, group_by)
+    else:
+        stats = snapshot.statistics(group_by)
+    _last_snapshot = snapshot
+    current, peak = tracemalloc.get_traced_memory()
+    top = []
+    for stat in stats[:limit]:
+        frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+        top.append(
+            dict(
+                Location=frames[0] if frames else "",
+                Traceback=frames if group_by == "traceback" else None,
+                Size_KB=round(stat.size / 1024, 1),
+                Size_Diff_KB=round(stat.size_diff / 1024, 1) if hasattr(stat, "size_diff") else None,
+                Count=stat.count,
+                Count_Diff=getattr(stat, "count_diff", None),
+            )
+        )
+    return dict(
+        Traced_KB=round(current / 1024, 1),
+        Peak_KB=round(peak / 1024, 1),
+        Top=top,
+    )
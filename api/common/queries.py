@@ -0,0 +1,43 @@
+from sqlalchemy import bindparam, text  # type: ignore
+from sqlalchemy.sql.elements import TextClause  # type: ignore
+
+# name -> compiled TextClause of every static SQL text the app can issue
+query_registry: dict[str, TextClause] = {}
+# name -> FilterQuery (api/common/query_builder.py) of the queries with optional filters
+query_builder_registry: dict = {}
+# id(statement) -> name of the registered statements (names the SQL spans, see api/common/tracing.py)
+query_names: dict[int, str] = {}
+
+
+def register_query(name: str, sql: str, expanding: tuple[str, ...] = ()) -> TextClause:
+    """
+    Compiles a static SQL text once (at import time) and registers it by name.
+    - The returned TextClause is reused on every call, so bind params are parsed only once
+      and SQLAlchemy's compiled cache is always hit.
+    - name: "<module>.<QUERY_NAME>", e.g. "members.GET_ALL_MEMBERS".
+    - expanding: params bound to a list, e.g. "WHERE Code IN :Codes" with expanding=("Codes",).
+    """
+    sql = sql.strip()
+    registered = query_registry.get(name)
+    if registered is not None:
+        if registered.text != sql:
+            raise ValueError(f"Query '{name}' is already registered with another SQL text")
+        return registered
+    query = text(sql)
+    if expanding:
+        query = query.bindparams(*[bindparam(param, expanding=True) for param in expanding])
+    query_registry[name] = query
+    query_names[id(query)] = name
+    return query
+
+
+def get_query(name: str) -> TextClause:
+    try:
+        return query_registry[name]
+    except KeyError:
+        raise KeyError(f"Query '{name}' is not registered") from None
+
+
+def registered_queries() -> dict[str, str]:
+    """Returns the SQL text of every registered query by name."""
+    return {name: query.text for name, query in sorted(query_registry.items())}
@@ -0,0 +1,135 @@
+from typing import Any, Optional
+
+from sqlalchemy import Integer, bindparam, literal_column, select, text  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+from sqlalchemy.sql import Select  # type: ignore
+
+from .queries import query_builder_registry, query_names
+
+
+def _predicate(predicate: str, expanding: tuple[str, ...] = ()):
+    # OR predicates are grouped, so they are not mixed up with the ANDed predicates
+    if " OR " in predicate.upper():
+        predicate = f"({predicate})"
+    clause = text(predicate)
+    # expanding (list) params used by the predicate, e.g. "Code IN :Codes"
+    params = [param for param in expanding if f":{param}" in predicate]
+    if params:
+        clause = clause.bindparams(*[bindparam(param, expanding=True) for param in params])
+    return clause
+
+
+class FilterQuery:
+    """
+    Composable filter query (SQLAlchemy Core)
+    - Emits one parameterised SELECT with only the optional predicates whose params are given (not None)
+    - Projection selection: "default" columns or any of the named projections
+    - LIMIT and keyset pagination (WHERE <keyset> > :After ORDER BY <keyset>)
+    - Every built variant is cached, so each combination of filters is built/compiled only once
+    - expanding: params bound to a list, e.g. filters=dict(Codes="M.Code IN :Codes") with expanding=("Codes",)
+
+    Example:
+        MEMBER_BRANCHES = FilterQuery(
+            "members.MEMBER_BRANCHES",
+            columns=["MC.*", "C.Name AS Branch_Name"],
+            from_clause="tblMemberBranch MC LEFT JOIN tblChurches C ON C.Code = MC.Branch_Code",
+            where=["MC.Head_Code = :Head_Code"],
+            filters=dict(Is_Active="MC.Is_Active = :Is_Active"),
+            order_by=["MC.Join_Date"],
+        )
+        MEMBER_BRANCHES.execute(db, dict(Head_Code="HC", Is_Active=None)).all()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        columns: list[str],
+        from_clause: str,
+        where: Optional[list[str]] = None,
+        filters: Optional[dict[str, str]] = None,
+        order_by: Optional[list[str]] = None,
+        projections: Optional[dict[str, list[str]]] = None,
+        keyset: Optional[str] = None,
+        expanding: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.from_clause = " ".join(from_clause.split())
+        self.where = where or []
+        # param name -> predicate using the param
+        self.filters = filters or {}
+        self.order_by = order_by or []
+        self.projections = dict(default=columns, **(projections or {}))
+        self.keyset = keyset
+        self.expanding = expanding
+        self._statements: dict[tuple, Select] = {}
+        query_builder_registry[name] = self
+
+    def statement(
+        self,
+        active_filters: frozenset = frozenset(),
+        projection: str = "default",
+        limit: bool = False,
+        after: bool = False,
+    ) -> Select:
+        """Returns the (cached) statement for a combination of active filters."""
+        key = (active_filters, projection, limit, after)
+        statement = self._statements.get(key)
+        if statement is not None:
+            return statement
+
+        if projection not in self.projections:
+            raise ValueError(f"{self.name}: unknown projection '{projection}'")
+        unknown = active_filters - self.filters.keys()
+        if unknown:
+            raise ValueError(f"{self.name}: unknown filters {sorted(unknown)}")
+        if after and not self.keyset:
+            raise ValueError(f"{self.name}: keyset pagination is not supported")
+
+        statement = select(
+            *[literal_column(column) for column in self.projections[projection]]
+        ).select_from(text(self.from_clause))
+        for predicate in self.where:
+            statement = statement.where(_predicate(predicate, self.expanding))
+        # filters are added in their declared order, so each variant has a stable text
+        for param, predicate in self.filters.items():
+            if param in active_filters:
+                statement = statement.where(_predicate(predicate, self.expanding))
+        if after:
+            statement = statement.where(text(f"{self.keyset} > :After"))
+        order_by = [self.keyset] if self.keyset and (after or limit) else self.order_by
+        if order_by:
+            statement = statement.order_by(*[literal_column(column) for column in order_by])
+        if limit:
+            statement = statement.limit(bindparam("Limit", type_=Integer))
+
+        self._statements[key] = statement
+        query_names[id(statement)] = self.name
+        return statement
+
+    def execute(
+        self,
+        db: Session,
+        params: dict[str, Any],
+        projection: str = "default",
+        limit: Optional[int] = None,
+        after: Optional[Any] = None,
+    ):
+        """Executes the variant matching the given params; optional filters set to None are left out."""
+        params = dict(params)
+        active_filters = frozenset(
+            param for param in self.filters if params.get(param) is not None
+        )
+        for param in self.filters.keys() - active_filters:
+            params.pop(param, None)
+        if limit is not None:
+            params["Limit"] = limit
+        if after is not None:
+            params["After"] = after
+        statement = self.statement(
+            active_filters, projection, limit is not None, after is not None
+        )
+        return db.execute(statement, params)
+
+    def variants(self) -> dict[tuple, Select]:
+        """Returns the statements built so far by (filters, projection, limit, after)."""
+        return dict(self._statements)
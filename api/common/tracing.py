@@ -0,0 +1,331 @@
+import asyncio
+import inspect
+import os
+import random
+import re
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from threading import Lock
+from time import time_ns
+from typing import Optional
+
+import orjson  # type: ignore
+from sqlalchemy import event  # type: ignore
+
+from .config import settings
+from .queries import query_names
+
+# W3C trace context: version-trace_id-parent_id-flags
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass
+class Span:
+    trace: "Trace"
+    name: str
+    kind: str
+    span_id: str
+    parent_id: Optional[str]
+    start: int = field(default_factory=time_ns)
+    end: Optional[int] = None
+    attributes: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.end = time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"[:500]
+
+    def to_dict(self) -> dict:
+        return dict(
+            trace_id=self.trace.trace_id,
+            span_id=self.span_id,
+            parent_span_id=self.parent_id,
+            name=self.name,
+            kind=self.kind,
+            start_time_unix_nano=self.start,
+            end_time_unix_nano=self.end,
+            duration_ms=round((self.end - self.start) / 1e6, 3) if self.end else None,
+            attributes=self.attributes,
+            status="ERROR" if self.error else "OK",
+            error=self.error,
+        )
+
+
+class Trace:
+    """The spans of one sampled request, exported together when its root span ends."""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: list[Span] = []
+
+    def start_span(self, name: str, kind: str, parent_id: Optional[str], **attributes) -> Span:
+        span = Span(self, name, kind, os.urandom(8).hex(), parent_id, attributes=attributes)
+        # list.append is atomic: spans may be started from the threadpool
+        self.spans.append(span)
+        return span
+
+
+# span of the running code (None: the request is not sampled, nothing is recorded)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class InMemoryExporter:
+    """Keeps the finished spans (tests, debugging)."""
+
+    def __init__(self, max_spans: int = 100_000):
+        self.max_spans = max_spans
+        self.spans: list[dict] = []
+        self._lock = Lock()
+
+    def export(self, spans: list[dict]):
+        with self._lock:
+            self.spans.extend(spans)
+            del self.spans[: max(len(self.spans) - self.max_spans, 0)]
+
+    def get_finished_spans(self) -> list[dict]:
+        with self._lock:
+            return list(self.spans)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class FileExporter:
+    """Appends the spans to TRACING_FILE as JSON lines (one span per line)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+
+    def export(self, spans: list[dict]):
+        lines = b"".join(orjson.dumps(span) + b"\n" for span in spans)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "ab") as file:
+                file.write(lines)
+
+
+EXPORTERS = dict(file=lambda: FileExporter(settings.tracing_file), memory=InMemoryExporter)
+
+
+class Tracer:
+    """
+    Request tracing with OpenTelemetry-style spans
+    - A sampled request (TRACING_SAMPLE_RATE, or the sampled flag of an incoming traceparent header)
+      gets a root "server" span, with child spans for the auth dependencies, the service methods
+      (see traced_services) and every SQL statement
+    - The spans are exported when the request ends: JSON lines file (TRACING_EXPORTER=file)
+      or in memory (TRACING_EXPORTER=memory, tests)
+    - Requests not sampled only cost a context variable lookup per traced call
+    """
+
+    def __init__(self):
+        self.exporter = None
+
+    def init_app(self, app, engines=()):
+        self.exporter = EXPORTERS[settings.tracing_exporter]()
+        for engine in engines:
+            instrument_engine(engine)
+        app.add_middleware(TracingMiddleware, tracer=self)
+
+    def should_sample(self) -> bool:
+        return random.random() < settings.tracing_sample_rate
+
+    def export(self, trace: Trace):
+        spans = [span.to_dict() for span in trace.spans if span.end is not None]
+        try:
+            self.exporter.export(spans)
+        except Exception as err:
+            print(f"Trace export failed: {err}")
+
+
+tracer = Tracer()
+
+
+class start_span:
+    """
+    Context manager starting a child span of the current span (no-op when the request is not sampled).
+        with start_span("members.import", rows=len(rows)):
+            ...
+    """
+
+    __slots__ = ("name", "kind", "attributes", "span", "token")
+
+    def __init__(self, name: str, kind: str = "internal", **attributes):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.span = None
+
+    def __enter__(self) -> Optional[Span]:
+        parent = current_span.get()
+        if parent is not None:
+            self.span = parent.trace.start_span(self.name, self.kind, parent.span_id, **self.attributes)
+            self.token = current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            self.span.finish(exc)
+            current_span.reset(self.token)
+        return False
+
+
+def traced(name: str, kind: str = "internal"):
+    """Decorator tracing a function (sync or async) as a span named name."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with start_span(name, kind):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_span.get() is None:
+                return func(*args, **kwargs)
+            with start_span(name, kind):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_services(cls):
+    """Class decorator tracing every public method of a services class as "<Class>.<method>"."""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or not inspect.isfunction(value):
+            continue
+        setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+# ---- SQL -------------------------------------------------------------------------------------
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = current_span.get()
+    if parent is None or context is None:
+        return
+    invoked = getattr(context, "invoked_statement", None)
+    attributes = {
+        "db.statement": " ".join(statement.split())[: settings.tracing_max_sql_length],
+        "db.operation": statement.split(None, 1)[0].upper() if statement.strip() else "",
+    }
+    query_name = query_names.get(id(invoked)) if invoked is not None else None
+    if query_name:
+        attributes["db.query_name"] = query_name
+    if executemany:
+        attributes["db.executemany"] = len(parameters)
+    span = parent.trace.start_span(
+        f"SQL {query_name or attributes['db.operation']}", "db", parent.span_id, **attributes
+    )
+    context._trace_span = span
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        span.attributes["db.rowcount"] = cursor.rowcount
+        span.finish()
+
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None and span.end is None:
+        span.finish(exception_context.original_exception)
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# ---- requests --------------------------------------------------------------------------------
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of the sampled requests.
+    The span is named after the route template (e.g. "GET /members/church/{church_code}"),
+    and the trace id is returned in the X-Trace-Id header.
+    """
+
+    def __init__(self, app, tracer: Tracer = tracer):
+        self.app = app
+        self.tracer = tracer
+
+    @staticmethod
+    def parent_context(scope) -> tuple:
+        """(trace_id, parent span id, sampled) of an incoming traceparent header."""
+        for name, value in scope.get("headers") or []:
+            if name == b"traceparent":
+                match = TRACEPARENT.match(value.decode("latin-1").strip().lower())
+                if match:
+                    return match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1
+        return None, None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace_id, parent_id, sampled = self.parent_context(scope)
+        if sampled is None:
+            sampled = self.tracer.should_sample()
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(trace_id or os.urandom(16).hex())
+        span = trace.start_span(
+            f"{scope['method']} {scope['path']}",
+            "server",
+            parent_id,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        token = current_span.set(span)
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-trace-id", trace.trace_id.encode())
+                ]
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as err:
+            error = err
+            raise
+        finally:
+            current_span.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
+                span.attributes["http.route"] = route.path
+                span.attributes["route.name"] = route.name
+            head_code = scope.get("state", {}).get("head_code")
+            if head_code:
+                span.attributes["head_code"] = head_code
+            span.attributes["http.status_code"] = status_code[0]
+            span.finish(error)
+            if error is None and status_code[0] >= 500:
+                span.error = f"HTTP {status_code[0]}"
+            await asyncio.to_thread(self.tracer.export, trace)
@@ -1,15 +1,17 @@
 from typing import Optional
 
 from fastapi import HTTPException, status  # type: ignore
-from phonenumbers import format_number, PhoneNumberFormat, parse  # type: ignore
 from sqlalchemy import text  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
 from ..authentication.models.auth import UserAccess
+from .phone import normalise_phonenumber
+from .queries import register_query
 
 
-def get_phonenumber(number_str: str):
-    phonenumber = format_number(parse(number_str), PhoneNumberFormat.E164)
+def get_phonenumber(number_str: str, strict: bool = True):
+    """Normalised (E.164) phone number; raises ValueError if invalid. See common/phone.py."""
+    phonenumber = normalise_phonenumber(number_str, strict=strict)
     return phonenumber
 
 
@@ -219,18 +221,22 @@ def set_user_access(
         )
 
 
+GET_LEVEL = register_query(
+    "utils.GET_LEVEL",
+    """
+        SELECT DISTINCT B.Level_No, A.Level_Code, A.ChurchLevel_Code FROM tblHeadChurchLevels  A
+        LEFT JOIN dfHierarchy B ON B.Code = A.Level_Code
+        LEFT JOIN tblChurches C ON C.Level_Code = A.Level_Code
+        WHERE Head_Code = :Head_Code AND A.Is_Active = :Is_Active
+        AND (A.Level_Code = :Code OR A.ChurchLevel_Code = :Code OR C.Code = :Code);
+    """,
+)
+
+
 def get_level(code: str, head_code: str, db: Session):
     """code: can be Level_Code or ChurchLevel_Code or Church_Code."""
     level_no = db.execute(
-        text(
-            """
-            SELECT DISTINCT B.Level_No, A.Level_Code, A.ChurchLevel_Code FROM tblHeadChurchLevels  A
-            LEFT JOIN dfHierarchy B ON B.Code = A.Level_Code
-            LEFT JOIN tblChurches C ON C.Level_Code = A.Level_Code
-            WHERE Head_Code = :Head_Code AND A.Is_Active = :Is_Active
-            AND (A.Level_Code = :Code OR A.ChurchLevel_Code = :Code OR C.Code = :Code);
-            """
-        ),
+        GET_LEVEL,
         dict(Code=code, Head_Code=head_code, Is_Active=1),
     ).first()
     if level_no is None:
@@ -241,16 +247,20 @@ def get_level(code: str, head_code: str, db: Session):
     return level_no
 
 
+VALIDATE_CODE_TYPE = register_query(
+    "utils.VALIDATE_CODE_TYPE",
+    """
+        SELECT Code, Name FROM dfCodeTable
+        WHERE Code = :Code AND Category = :Category AND Is_Active = :Active;
+    """,
+)
+
+
 def validate_code_type(code: str | None, category: str, db: Session):
     if not code:
         return None
     code_type = db.execute(
-        text(
-            """
-            SELECT Code, Name FROM dfCodeTable 
-            WHERE Code = :Code AND Category = :Category AND Is_Active = :Active;
-            """
-        ),
+        VALIDATE_CODE_TYPE,
         dict(Code=code, Category=category, Active=1),
     ).first()
     # check if code is valid
@@ -262,16 +272,20 @@ def validate_code_type(code: str | None, category: str, db: Session):
     return True
 
 
+CHECK_ROLE_CODE = register_query(
+    "utils.CHECK_ROLE_CODE",
+    """
+        SELECT Code FROM dfRole
+        WHERE Code = :Code AND Is_Active = :Active;
+    """,
+)
+
+
 def check_role_code(role_code: str, db: Session):
     if role_code is None:
         return None
     role = db.execute(
-        text(
-            """
-            SELECT Code FROM dfRole 
-            WHERE Code = :Code AND Is_Active = :Active;
-            """
-        ),
+        CHECK_ROLE_CODE,
         dict(Code=role_code, Active=1),
     ).first()
     # check if code is valid
@@ -283,17 +297,21 @@ def check_role_code(role_code: str, db: Session):
     return True
 
 
+CHECK_LEVEL_CODE = register_query(
+    "utils.CHECK_LEVEL_CODE",
+    """
+        SELECT Level_Code FROM tblHeadChurchLevels
+        WHERE (Level_Code = :Level_Code OR ChurchLevel_Code = :ChurchLevel_Code)
+            AND Is_Active = :Active AND Head_Code = :Head_Code;
+    """,
+)
+
+
 def check_level_code(level_code: str, db: Session, head_code: str):
     if level_code is None:
         return None
     level = db.execute(
-        text(
-            """
-            SELECT Level_Code FROM tblHeadChurchLevels 
-            WHERE (Level_Code = :Level_Code OR ChurchLevel_Code = :ChurchLevel_Code) 
-                AND Is_Active = :Active AND Head_Code = :Head_Code;
-            """
-        ),
+        CHECK_LEVEL_CODE,
         dict(
             Level_Code=level_code.upper(),
             ChurchLevel_Code=level_code.upper(),
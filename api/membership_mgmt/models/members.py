@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field, validator, EmailStr  # type: ignore
 from ...common.utils import custom_title_case, get_phonenumber
@@ -84,6 +84,38 @@ class MemberBranchExitIn(BaseModel):
     Exit_Note: Optional[str] = None
 
 
+class MemberCodesIn(BaseModel):
+    Member_Codes: List[str] = Field(min_length=1, max_length=1000)
+
+
+class MembersBranchJoinIn(MemberBranchJoinIn, MemberCodesIn):
+    pass
+
+
+class MembersBranchExitIn(MemberBranchExitIn, MemberCodesIn):
+    pass
+
+
+class MemberBranchTransferIn(BaseModel):
+    From_Branch_Code: str
+    To_Branch_Code: str
+    # list of member codes or "ALL" (all the current members of the source branch)
+    Member_Codes: Union[Literal["ALL"], List[str]]
+    Transfer_Date: Optional[datetime] = None
+    Exit_Code: str
+    Exit_Note: Optional[str] = None
+    Join_Code: str
+    Join_Note: Optional[str] = None
+
+    @validator("Member_Codes", pre=True)
+    def validate_member_codes(cls, value):
+        if isinstance(value, str):
+            return value.upper()
+        if not value:
+            raise ValueError("Member_Codes must not be empty")
+        return value
+
+
 class MemberIn(MemberBranchJoinIn, MemberBase):
     pass
 
@@ -106,6 +138,11 @@ class Member(MemberBase, MemberCode):
     Modified_By: Optional[str] = None
     Id: Optional[int] = None
 
+    # response model: the stored numbers are not re-checked (see normalise_phonenumber)
+    @validator("Personal_Contact_No", "Contact_No", "Contact_No2")
+    def get_phone_numbers(cls, v):
+        return get_phonenumber(v, strict=False) if v else None
+
 
 class MemberResponse(BaseModel):
     status_code: int
@@ -143,6 +180,43 @@ class MemberBranchResponse(BaseModel):
     data: Union[list[MemberBranchOut], MemberBranchOut, None] = None
 
 
+class MemberBranchTransferOut(BaseModel):
+    From_Branch_Code: str
+    To_Branch_Code: str
+    Transfer_Date: datetime
+    Transferred: int
+    Member_Codes: List[str]
+
+
+class MemberBranchTransferResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Optional[MemberBranchTransferOut] = None
+
+
+class MemberSearchOut(BaseModel):
+    Code: str
+    Title: Optional[str] = None
+    Title2: Optional[str] = None
+    First_Name: str
+    Middle_Name: Optional[str] = None
+    Last_Name: str
+    Family_Name: Optional[str] = None
+    Personal_Contact_No: Optional[str] = None
+    Contact_No: Optional[str] = None
+    Personal_Email: Optional[str] = None
+    Contact_Email: Optional[str] = None
+    Branch_Code: Optional[str] = None
+    Branch_Name: Optional[str] = None
+    Is_Active: Optional[bool] = None
+
+
+class MemberSearchResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Optional[list[MemberSearchOut]] = None
+
+
 class MemberUpdate(BaseModel):
     First_Name: Optional[str] = Field(default=None, examples=["John"], max_length=255)
     Middle_Name: Optional[str] = Field(default=None, examples=["Janet"], max_length=255)
@@ -215,8 +289,8 @@ class MemberUpdate(BaseModel):
 class MemberChurchHierarchy(BaseModel):
     Member_Code: str
     LeadCode_1: str
-    LeadName_1: str
-    LeadLevel_1: str
+    LeadName_1: Optional[str] = None
+    LeadLevel_1: Optional[str] = None
     LeadCode_2: Optional[str] = None
     LeadName_2: Optional[str] = None
     LeadLevel_2: Optional[str] = None
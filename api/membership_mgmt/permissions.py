@@ -0,0 +1,49 @@
+from ..common.permissions import PermissionSpec
+
+# route permissions, checked before any query of the services (see common/permissions.py);
+# the services use the same specs for their own checks (set_user_access(..., **spec.criteria()))
+# and church scopes (resolve_church_scope)
+MEMBER_CREATE = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "MBSH"],
+    submodule_code=["ALLS", "MBRS"],
+    access_type=["CR"],
+)
+MEMBER_ADMIN = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "MBSH"],
+    submodule_code=["ALLS", "MBRS"],
+    access_type=["ED"],
+)
+# also the grants whose churches scope the member lists (MemberServices.get_all_members)
+MEMBERS_VIEW_ALL = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "MBSH"],
+    submodule_code=["ALLS", "MBRS"],
+    access_type=["VW"],
+)
+# also the grants whose churches scope the member search (MemberServices.search_members)
+MEMBER_VIEW = PermissionSpec(
+    role_code=["ADM", "SAD", "EXC"],
+    module_code=["ALLM", "MBSH"],
+    submodule_code=["ALLS", "MBRS"],
+    access_type=["VW", "ED", "CR"],
+)
+MEMBERS_VIEW = PermissionSpec(
+    role_code=["ADM", "SAD", "EXC"],
+    module_code=["ALLM", "MBSH"],
+    submodule_code=["ALLS", "MBRS"],
+    access_type=["VW", "ED"],
+)
+MEMBER_EDIT = PermissionSpec(
+    role_code=["ADM", "SAD", "EXC"],
+    module_code=["ALLM", "MBSH"],
+    submodule_code=["ALLS", "MBRS"],
+    access_type=["ED"],
+)
+MEMBER_BRANCH_VIEW = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "MBSH"],
+    submodule_code=["ALLS", "MBRS"],
+    access_type=["ED", "VW", "CR"],
+)
@@ -1,20 +1,42 @@
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, status, Depends, Path  # type: ignore
-
+from fastapi import APIRouter, status, Depends, Path, Query  # type: ignore
+
+from ...membership_mgmt.permissions import (
+    MEMBER_ADMIN,
+    MEMBER_BRANCH_VIEW,
+    MEMBER_CREATE,
+    MEMBER_EDIT,
+    MEMBER_VIEW,
+    MEMBERS_VIEW,
+    MEMBERS_VIEW_ALL,
+)
 from ...membership_mgmt.services import get_member_services, MemberServices
 from ...membership_mgmt.models.members import (
     MemberBranchExitIn,
     MemberBranchJoinIn,
+    MemberCodesIn,
+    MembersBranchExitIn,
+    MembersBranchJoinIn,
     MemberChurchHierarchyResponse,
+    Member,
     MemberIn,
     MemberResponse,
+    MemberSearchOut,
+    MemberSearchResponse,
     MemberUpdate,
     MemberBranchResponse,
+    MemberBranchTransferIn,
+    MemberBranchTransferResponse,
     MemberBranchUpdate,
 )
+from ...common.responses import RowSchema, fast_response
+from ...common.permissions import requires
 from ...swagger_doc import tags
 
+member_schema = RowSchema(Member)
+member_search_schema = RowSchema(MemberSearchOut)
+
 members_router = APIRouter(
     prefix="/members",
     tags=[f"{tags['members']['module']}: {tags['members']['submodule']}"],
@@ -23,6 +45,7 @@ members_router = APIRouter(
 """
 ### Member Routes
 - Get All Members
+- Search Members
 - Get Member by Code
 - Get Current User Member
 - Get Members by Church Code
@@ -40,6 +63,8 @@ members_adm_router = APIRouter(
 - Create New Member
 - Activate Member by Code
 - Deactivate Member by Code
+- Deactivate Members
+- Activate Members
 - Promote Member to Clergy
 - Demote Member from Clergy
 """
@@ -69,6 +94,10 @@ member_branch_adm_router = APIRouter(
 - Exit Member From All Churches
 - Exit Memeber From Church
 - Join Member To Church
+- Exit Members From Church
+- Exit Members From All Churches
+- Join Members To Church
+- Transfer Members between Churches
 """
 
 
@@ -80,6 +109,7 @@ member_branch_adm_router = APIRouter(
     summary="Create New Member",
     description="## Create New Member",
     response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_CREATE))],
 )
 async def create_new_member(
     member: MemberIn,
@@ -107,6 +137,7 @@ async def create_new_member(
     summary="Deactivate Member by Code",
     description="## Deactivate Member by Code",
     response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
 )
 async def deactivate_member(
     member_code: Annotated[
@@ -131,6 +162,7 @@ async def deactivate_member(
     summary="Activate Member by Code",
     description="## Activate Member by Code",
     response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
 )
 async def activate_member(
     member_code: Annotated[
@@ -151,6 +183,58 @@ async def activate_member(
     return response
 
 
+# Deactivate Members
+@members_adm_router.patch(
+    "/deactivate",
+    status_code=status.HTTP_200_OK,
+    name="Deactivate Members",
+    summary="Deactivate Members by Codes",
+    description="## Deactivate Members by Codes (in one transaction)",
+    response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
+)
+async def deactivate_members(
+    members: MemberCodesIn,
+    member_services: Annotated[MemberServices, Depends(get_member_services)],
+):
+    deactivated_members = await member_services.transition_members(
+        members.Member_Codes, "deactivate"
+    )
+    # set response body
+    response = dict(
+        data=deactivated_members,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully deactivated {len(deactivated_members)} Member(s)",
+    )
+    return response
+
+
+# Activate Members
+@members_adm_router.patch(
+    "/activate",
+    status_code=status.HTTP_200_OK,
+    name="Activate Members",
+    summary="Activate Members by Codes",
+    description="## Activate Members by Codes (in one transaction)",
+    response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
+)
+async def activate_members(
+    members: MembersBranchJoinIn,
+    member_services: Annotated[MemberServices, Depends(get_member_services)],
+):
+    activated_members = await member_services.transition_members(
+        members.Member_Codes, "activate", members
+    )
+    # set response body
+    response = dict(
+        data=activated_members,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully activated {len(activated_members)} Member(s) in the church: '{members.Branch_Code.upper()}'",
+    )
+    return response
+
+
 @members_adm_router.patch(
     "/{member_code_id}/promote_to_clergy",
     status_code=status.HTTP_200_OK,
@@ -158,6 +242,7 @@ async def activate_member(
     summary="Promote Member to Clergy",
     description="## Promote Member to Clergy",
     response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
 )
 async def promote_member_to_clergy(
     member_code_id: Annotated[
@@ -182,6 +267,7 @@ async def promote_member_to_clergy(
     summary="Demote Member from Clergy",
     description="## Demote Member from Clergy",
     response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
 )
 async def demote_member_from_clergy(
     member_code_id: Annotated[
@@ -204,20 +290,43 @@ async def demote_member_from_clergy(
     "/",
     name="Get All Members",
     summary="Get All Members",
-    description="## Retrieve All Members",
+    description="## Retrieve All Members. Head church level admins get all the members, church level admins the members of their churches and of the churches under them",
     response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBERS_VIEW_ALL))],
 )
 async def get_all_members(
     member_services: Annotated[MemberServices, Depends(get_member_services)],
 ):
     members = await member_services.get_all_members()
-    # set response body
-    response = dict(
-        data=members,
-        status_code=status.HTTP_200_OK,
+    # serialise rows straight to the response body
+    return fast_response(
+        member_schema,
+        members,
+        message=f"Successfully retrived {len(members)} Members",
+    )
+
+
+# Search Members (declared before "/{member_code_id}")
+@members_router.get(
+    "/search",
+    name="Search Members",
+    summary="Search Members by Name, Email or Phone Number",
+    description="## Search Members (typeahead) by names, family name, email or phone number prefix, within the user's churches",
+    response_model=MemberSearchResponse,
+    dependencies=[Depends(requires(MEMBER_VIEW))],
+)
+async def search_members(
+    member_services: Annotated[MemberServices, Depends(get_member_services)],
+    q: Annotated[str, Query(min_length=1, max_length=100)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    is_active: Optional[bool] = None,
+):
+    members = await member_services.search_members(q, limit, is_active)
+    return fast_response(
+        member_search_schema,
+        members,
         message=f"Successfully retrived {len(members)} Members",
     )
-    return response
 
 
 # Get Current User Member
@@ -252,6 +361,7 @@ async def get_current_user_member(
     summary="Get Member by Code or Id",
     description="## Retrieve Member by Code or Id",
     response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_VIEW))],
 )
 async def get_member_by_code_id(
     member_code_id: str,
@@ -281,19 +391,19 @@ async def get_member_by_code_id(
     summary="Get Members by Church Code",
     description="## Retrieve Members by Church Code",
     response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBERS_VIEW))],
 )
 async def get_members_by_church(
     church_code: str,
     member_services: Annotated[MemberServices, Depends(get_member_services)],
 ):
     members = await member_services.get_members_by_church(church_code)
-    # set response body
-    response = dict(
-        data=members,
-        status_code=status.HTTP_200_OK,
+    # serialise rows straight to the response body
+    return fast_response(
+        member_schema,
+        members,
         message=f"Successfully retrieved {len(members)} Members",
     )
-    return response
 
 
 # Update Current User Member
@@ -331,6 +441,7 @@ async def update_current_user_member(
     summary="Update Member by Code or Id",
     description="## Update Member by Code or Id",
     response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_EDIT))],
 )
 async def update_member_by_code(
     member_code: str,
@@ -355,6 +466,7 @@ async def update_member_by_code(
     summary="Get Member Current Branch",
     description="## Retrieve Member Current Branch",
     response_model=MemberBranchResponse,
+    dependencies=[Depends(requires(MEMBER_BRANCH_VIEW))],
 )
 async def get_member_current_branch(
     member_code: str,
@@ -380,6 +492,7 @@ async def get_member_current_branch(
     summary="Get Specific Member-Branch by Code",
     description="## Retrieve Specific Member-Branch by Code",
     response_model=MemberBranchResponse,
+    dependencies=[Depends(requires(MEMBER_BRANCH_VIEW))],
 )
 async def get_member_branch_by_code(
     member_code: str,
@@ -414,6 +527,7 @@ async def get_member_branch_by_code(
     summary="Get All Member-Branches by Member Code",
     description="## Retrieve All Member-Branches by Member Code",
     response_model=MemberBranchResponse,
+    dependencies=[Depends(requires(MEMBER_BRANCH_VIEW))],
 )
 async def get_member_all_branches(
     member_code: str,
@@ -463,7 +577,7 @@ async def get_member_church_hierarchy_by_member_code(
     response = dict(
         data=mc_hierarchy,
         status_code=status.HTTP_200_OK,
-        message=f"Successfully retrieved the Member's Church Hierarchy for Member: '{mc_hierarchy.Member_Code}'",
+        message=f"Successfully retrieved the Member's Church Hierarchy for Member: '{mc_hierarchy['Member_Code']}'",
     )
     return response
 
@@ -476,6 +590,7 @@ async def get_member_church_hierarchy_by_member_code(
     summary="Exit Member From Church by Member Code",
     description="## Exit Member From Church by Member Code",
     response_model=MemberBranchResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
 )
 async def exit_member_from_branch(
     member_code: Annotated[str, Path(..., description="code of member to be exited")],
@@ -503,6 +618,7 @@ async def exit_member_from_branch(
     summary="Exit Member From All Churches",
     description="## Exit Member From All Churches",
     response_model=MemberBranchResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
 )
 async def exit_member_from_all_branches(
     member_code: str,
@@ -527,6 +643,7 @@ async def exit_member_from_all_branches(
     summary="Join Member To Church by Member Code",
     description="## Join Member To Church by Member Code",
     response_model=MemberBranchResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
 )
 async def join_member_to_branch(
     member_code: Annotated[
@@ -548,6 +665,108 @@ async def join_member_to_branch(
         return response
 
 
+# Exit Members From Church
+@member_branch_adm_router.patch(
+    "/exit",
+    status_code=status.HTTP_200_OK,
+    name="Exit Members From Church",
+    summary="Exit Members From Church by Member Codes",
+    description="## Exit Members From Church by Member Codes (in one transaction)",
+    response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
+)
+async def exit_members_from_branch(
+    members: MembersBranchExitIn,
+    member_services: Annotated[MemberServices, Depends(get_member_services)],
+):
+    exited_members = await member_services.transition_members(
+        members.Member_Codes, "exit", members
+    )
+    # set response body
+    response = dict(
+        data=exited_members,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully exited {len(exited_members)} Member(s) from Branch: '{members.Branch_Code.upper()}'",
+    )
+    return response
+
+
+# Exit Members From All Churches
+@member_branch_adm_router.patch(
+    "/exit_all",
+    status_code=status.HTTP_200_OK,
+    name="Exit Members From All Churches",
+    summary="Exit Members From All Churches by Member Codes",
+    description="## Exit Members From All Churches by Member Codes (in one transaction)",
+    response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
+)
+async def exit_members_from_all_branches(
+    members: MemberCodesIn,
+    member_services: Annotated[MemberServices, Depends(get_member_services)],
+):
+    exited_members = await member_services.transition_members(
+        members.Member_Codes, "exit_all"
+    )
+    # set response body
+    response = dict(
+        data=exited_members,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully exited {len(exited_members)} Member(s) from all Branches",
+    )
+    return response
+
+
+# Join Members To Church
+@member_branch_adm_router.patch(
+    "/join",
+    status_code=status.HTTP_200_OK,
+    name="Join Members To Church",
+    summary="Join Members To Church by Member Codes",
+    description="## Join Members To Church by Member Codes (in one transaction)",
+    response_model=MemberResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
+)
+async def join_members_to_branch(
+    members: MembersBranchJoinIn,
+    member_services: Annotated[MemberServices, Depends(get_member_services)],
+):
+    joined_members = await member_services.transition_members(
+        members.Member_Codes, "join", members
+    )
+    # set response body
+    response = dict(
+        data=joined_members,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully joined {len(joined_members)} Member(s) to Branch: '{members.Branch_Code.upper()}'",
+    )
+    return response
+
+
+# Transfer Members between Churches
+@member_branch_adm_router.post(
+    "/transfer",
+    status_code=status.HTTP_200_OK,
+    name="Transfer Members between Churches",
+    summary="Transfer Members between Churches",
+    description="## Transfer listed (or all) Members of a Branch to another Branch (in one transaction)",
+    response_model=MemberBranchTransferResponse,
+    dependencies=[Depends(requires(MEMBER_ADMIN))],
+)
+async def transfer_members(
+    transfer: MemberBranchTransferIn,
+    member_services: Annotated[MemberServices, Depends(get_member_services)],
+):
+    transferred = await member_services.transfer_members(transfer)
+    # set response body
+    response = dict(
+        data=transferred,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully transferred {transferred['Transferred']} Member(s) from Branch: '{transferred['From_Branch_Code']}' to Branch: '{transferred['To_Branch_Code']}'",
+    )
+    return response
+
+
 # Update Member-Branch Reason
 @member_branch_adm_router.put(
     "/{member_branch_id}/update_reason",
@@ -556,6 +775,7 @@ async def join_member_to_branch(
     summary="Get All Member-Branches by Member Code",
     description="## Update Member-Branch Reason Member-Branches by Member Code",
     response_model=MemberBranchResponse,
+    dependencies=[Depends(requires(MEMBER_EDIT))],
 )
 async def update_member_branch_reason(
     member_branch_id: int,
@@ -1,21 +1,33 @@
+import re
+from collections import defaultdict
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Annotated, Callable, Optional
 
 from fastapi import Depends, HTTPException, status  # type: ignore
-from sqlalchemy import text  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
 from ...authentication.models.auth import User, UserAccess
+from ...church_admin.services.branch_ancestry import get_branch_ancestry
+from ...church_admin.services.church_stats import (
+    add_member_stats_delta,
+    apply_member_stats_deltas,
+    new_member_stats_deltas,
+)
 from ...church_admin.services.church_leads import church_recursive_cte
 from ...church_admin.services import get_church_services, ChurchServices
+from ...membership_mgmt.permissions import MEMBER_VIEW, MEMBERS_VIEW_ALL
 from ...membership_mgmt.models.members import (
     MemberBranchExitIn,
     MemberBranchJoinIn,
+    MemberBranchTransferIn,
     MemberBranchUpdate,
     MemberIn,
     MemberUpdate,
 )
 from ...common.database import get_db
+from ...common.cache import response_cache
+from ...common.permissions import resolve_church_scope
+from ...common.phone import phonenumber_search_prefix
 from ...common.utils import (
     check_duplicate_entry,
     validate_code_type,
@@ -27,8 +39,331 @@ from ...common.dependencies import (
     get_current_user_access,
     set_db_current_user,
 )
+from ...common.queries import register_query
+from ...common.tracing import traced_services
+from ...common.query_builder import FilterQuery
+
+# member state transitions (see MemberServices.transition_members)
+MEMBER_TRANSITIONS = ("deactivate", "activate", "exit", "exit_all", "join")
+# max member codes per IN list of a member transfer UPDATE
+MEMBER_TRANSFER_BATCH_SIZE = 1000
+# max words of a member search (each word must match)
+MEMBER_SEARCH_MAX_WORDS = 8
+
+# the member's branch is one of the caller's churches or under one of them
+# (indexed semi-join on tblChurchClosure, see migrations/0008_church_closure.sql)
+MEMBER_CHURCH_SCOPE = (
+    "EXISTS (SELECT 1 FROM tblChurchClosure S"
+    " WHERE S.Church_Code = MC.Branch_Code AND S.Ancestor_Code IN :Church_Codes)"
+)
+
+
+CREATE_NEW_MEMBER_INSERT_1 = register_query(
+    "members.CREATE_NEW_MEMBER_INSERT_1",
+    """
+        INSERT INTO tblMember
+            (First_Name, Middle_Name, Last_Name, Title, Title2, Family_Name, Is_FamilyHead, Home_Address, Date_of_Birth, Gender, Marital_Status, Employ_Status, Occupation, Office_Address, State_of_Origin, Country_of_Origin, Personal_Contact_No, Contact_No, Contact_No2, Personal_Email, Contact_Email, Contact_Email2, Town_Code, State_Code, Region_Code, Country_Code, `Type`, Is_Clergy, Head_Code, Created_By)
+        VALUES
+            (:First_Name, :Middle_Name, :Last_Name, :Title, :Title2, :Family_Name, :Is_FamilyHead, :Home_Address, :Date_of_Birth, :Gender, :Marital_Status, :Employ_Status, :Occupation, :Office_Address, :State_of_Origin, :Country_of_Origin, :Personal_Contact_No, :Contact_No, :Contact_No2, :Personal_Email, :Contact_Email, :Contact_Email2, :Town_Code, :State_Code, :Region_Code, :Country_Code, :Type, :Is_Clergy, :Head_Code, :Created_By);
+    """,
+)
+
+CREATE_NEW_MEMBER_SELECT = register_query(
+    "members.CREATE_NEW_MEMBER_SELECT",
+    "SELECT Code FROM tblMember WHERE Id = LAST_INSERT_ID();",
+)
+
+CREATE_NEW_MEMBER_INSERT_2 = register_query(
+    "members.CREATE_NEW_MEMBER_INSERT_2",
+    """
+        INSERT INTO tblMemberBranch
+            (Member_Code, Branch_Code, Join_Date, Join_Code, Join_Note, Head_Code, Created_By)
+        VALUES
+            (:Member_Code, :Branch_Code, :Join_Date, :Join_Code, :Join_Note, :Head_Code, :Created_By);
+    """,
+)
+
+ALL_MEMBERS = FilterQuery(
+    "members.ALL_MEMBERS",
+    columns=["M.*", "MC.Branch_Code", "MC.Join_Date", "MC.Join_Code", "MC.Join_Note"],
+    from_clause="""
+        tblMember M
+            LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
+    """,
+    where=["M.Head_Code = :Head_Code"],
+    filters=dict(
+        Is_Active="M.Is_Active = :Is_Active AND MC.Is_Active = :Is_Active",
+        Church_Codes=MEMBER_CHURCH_SCOPE,
+    ),
+    order_by=["M.Code"],
+    expanding=("Church_Codes",),
+)
+
+GET_MEMBER_BY_CODE_ID = register_query(
+    "members.GET_MEMBER_BY_CODE_ID",
+    """
+        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note, MC.Exit_Date, MC.Exit_Code, MC.Exit_Note
+        FROM tblMember M
+        LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code AND MC.Is_Active = :Is_Active
+        WHERE (M.Code = :Code or M.Id = :Id) AND M.Head_Code = :Head_Code
+    """,
+)
+
+GET_CURRENT_USER_MEMBER = register_query(
+    "members.GET_CURRENT_USER_MEMBER",
+    """
+        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note
+        FROM tblMember M
+        LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
+        WHERE `Code` = :Code AND M.Head_Code = :Head_Code AND M.Is_Active = :Is_Active AND MC.Is_Active = :Is_Active;
+    """,
+)
+
+GET_MEMBERS_BY_CHURCH_1 = register_query(
+    "members.GET_MEMBERS_BY_CHURCH_1",
+    """
+        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note
+        FROM tblMember M
+            LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
+        WHERE M.Head_Code = :Head_Code
+            AND M.Is_Active = :Is_Active AND MC.Is_Active = :Is_Active
+            AND MC.Branch_Code = :Church_Code;
+    """,
+)
+
+GET_MEMBERS_BY_CHURCH_2 = register_query(
+    "members.GET_MEMBERS_BY_CHURCH_2",
+    f"""
+        {church_recursive_cte}
+        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note FROM tblMember M
+            LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
+        WHERE M.Head_Code = :Head_Code
+            AND M.Is_Active = :Is_Active AND MC.Is_Active = :Is_Active
+            AND MC.Branch_Code IN (
+                SELECT Church FROM ChurchHierarchy
+                WHERE Church_Level = 'BRN'
+            );
+    """,
+)
+
+UPDATE_MEMBER_BY_CODE_ID = register_query(
+    "members.UPDATE_MEMBER_BY_CODE_ID",
+    """
+        UPDATE tblMember
+        SET
+            First_Name = :First_Name, Last_Name = :Last_Name, Middle_Name = :Middle_Name, Title = :Title, Title2 = :Title2, Family_Name = :Family_Name, Is_FamilyHead = :Is_FamilyHead, Home_Address = :Home_Address, Date_of_Birth = :Date_of_Birth, Gender = :Gender, Marital_Status = :Marital_Status, Employ_Status = :Employ_Status, Occupation = :Occupation, Office_Address = :Office_Address, State_of_Origin = :State_of_Origin, Personal_Contact_No = :Personal_Contact_No, Contact_No = :Contact_No, Contact_No2 = :Contact_No2, Personal_Email = :Personal_Email, Contact_Email = :Contact_Email, Contact_Email2 = :Contact_Email2, Town_Code = :Town_Code, State_Code = :State_Code, Region_Code = :Region_Code, Country_Code = :Country_Code, `Type` = :Type, Is_Clergy = :Is_Clergy, Modified_By = :Modified_By
+        WHERE (`Code` = :Code OR Id = :Id) AND Head_Code = :Head_Code;
+    """,
+)
+
+UPDATE_CURRENT_USER_MEMBER = register_query(
+    "members.UPDATE_CURRENT_USER_MEMBER",
+    """
+        UPDATE tblMember
+        SET First_Name = :First_Name, Last_Name = :Last_Name, Middle_Name = :Middle_Name, Title = :Title, Title2 = :Title2, Family_Name = :Family_Name, Is_FamilyHead = :Is_FamilyHead, Home_Address = :Home_Address, Date_of_Birth = :Date_of_Birth, Gender = :Gender, Marital_Status = :Marital_Status, Employ_Status = :Employ_Status, Occupation = :Occupation, Office_Address = :Office_Address, State_of_Origin = :State_of_Origin, Personal_Contact_No = :Personal_Contact_No, Contact_No = :Contact_No, Contact_No2 = :Contact_No2, Personal_Email = :Personal_Email, Contact_Email = :Contact_Email, Contact_Email2 = :Contact_Email2, Town_Code = :Town_Code, State_Code = :State_Code, Region_Code = :Region_Code, Country_Code = :Country_Code, Modified_By = :Modified_By
+        WHERE `Code` = :Code AND Head_Code = :Head_Code;
+    """,
+)
+
+GET_MEMBERS_BY_CODES = register_query(
+    "members.GET_MEMBERS_BY_CODES",
+    """
+        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note, MC.Exit_Date, MC.Exit_Code, MC.Exit_Note
+        FROM tblMember M
+        LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code AND MC.Is_Active = :Is_Active
+        WHERE M.Code IN :Codes AND M.Head_Code = :Head_Code
+    """,
+    expanding=("Codes",),
+)
+
+SET_MEMBERS_ACTIVE_STATUS = register_query(
+    "members.SET_MEMBERS_ACTIVE_STATUS",
+    """
+        UPDATE tblMember
+        SET Is_Active = :Is_Active
+        WHERE `Code` IN :Codes AND Head_Code = :Head_Code AND Is_Active = :Is_Active2;
+    """,
+    expanding=("Codes",),
+)
+
+PROMOTE_MEMBER_TO_CLERGY = register_query(
+    "members.PROMOTE_MEMBER_TO_CLERGY",
+    """
+        UPDATE tblMember
+        SET Is_Clergy = :Is_Clergy
+        WHERE `Code` = :Code AND Head_Code = :Head_Code
+            AND Is_Active = :Is_Active AND Is_Clergy = :Is_Clergy2;
+    """,
+)
+
+DEMOTE_MEMBER_FROM_CLERGY = register_query(
+    "members.DEMOTE_MEMBER_FROM_CLERGY",
+    """
+        UPDATE tblMember
+        SET Is_Clergy = :Is_Clergy
+        WHERE `Code` = :Code AND Head_Code = :Head_Code
+            AND Is_Active = :Is_Active AND Is_Clergy = :Is_Clergy2;
+    """,
+)
+
+MEMBER_BRANCHES = FilterQuery(
+    "members.MEMBER_BRANCHES",
+    columns=[
+        "MC.*",
+        "M.Title",
+        "M.Title2",
+        "M.First_Name",
+        "M.Middle_Name",
+        "M.Last_Name",
+        "C.Name AS Branch_Name",
+    ],
+    from_clause="""
+        tblMemberBranch MC
+            LEFT JOIN tblMember M ON M.Code = MC.Member_Code
+            LEFT JOIN tblChurches C ON C.Code = MC.Branch_Code
+    """,
+    where=["MC.Member_Code = :Member_Code", "MC.Head_Code = :Head_Code"],
+    filters=dict(
+        Branch_Code="MC.Branch_Code = :Branch_Code",
+        Is_Active="MC.Is_Active = :Is_Active",
+    ),
+    order_by=["MC.Join_Date"],
+)
 
+# columns of the FULLTEXT (ngram) index ftx_Member_Search (see migrations/0004_member_search.sql)
+MEMBER_SEARCH_MATCH = "MATCH (M.First_Name, M.Middle_Name, M.Last_Name, M.Family_Name, M.Personal_Email, M.Contact_Email)"
 
+MEMBER_SEARCH = FilterQuery(
+    "members.MEMBER_SEARCH",
+    columns=[
+        "M.Code",
+        "M.Title",
+        "M.Title2",
+        "M.First_Name",
+        "M.Middle_Name",
+        "M.Last_Name",
+        "M.Family_Name",
+        "M.Personal_Contact_No",
+        "M.Contact_No",
+        "M.Personal_Email",
+        "M.Contact_Email",
+        "MC.Branch_Code",
+        "BA.Branch_Name",
+        "M.Is_Active",
+    ],
+    from_clause="""
+        tblMember M
+            LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code AND MC.Is_Active = 1
+            LEFT JOIN tblBranchAncestry BA ON BA.Branch_Code = MC.Branch_Code
+    """,
+    where=["M.Head_Code = :Head_Code"],
+    filters=dict(
+        Terms=f"{MEMBER_SEARCH_MATCH} AGAINST (:Terms IN BOOLEAN MODE)",
+        Phone="M.Personal_Contact_No LIKE :Phone OR M.Contact_No LIKE :Phone OR M.Contact_No2 LIKE :Phone",
+        Is_Active="M.Is_Active = :Is_Active",
+        Church_Codes=MEMBER_CHURCH_SCOPE,
+    ),
+    order_by=["M.Last_Name", "M.First_Name"],
+    expanding=("Church_Codes",),
+)
+
+
+def member_search_terms(query: str) -> Optional[str]:
+    """
+    Boolean-mode FULLTEXT terms of a search text: every word is required and matched as an
+    ngram phrase, so parts of names/emails match ("jo smi" finds "John Smith");
+    one-letter words are matched as prefixes. Returns None if the text has no words.
+    """
+    words = re.findall(r"\w+", query)[:MEMBER_SEARCH_MAX_WORDS]
+    if not words:
+        return None
+    return " ".join(f"+{word}*" if len(word) == 1 else f'+"{word}"' for word in words)
+
+
+GET_MEMBER_BRANCH_BY_ID = register_query(
+    "members.GET_MEMBER_BRANCH_BY_ID",
+    """
+        SELECT
+            MC.*, M.Title, M.Title2, M.First_Name, M.Middle_Name, M.Last_Name, C.Name AS Branch_Name
+        FROM tblMemberBranch MC
+            LEFT JOIN tblMember M ON M.Code = MC.Member_Code
+            LEFT JOIN tblChurches C ON C.Code = MC.Branch_Code
+        WHERE MC.Id = :Id;
+    """,
+)
+
+GET_BRANCH_MEMBER_CODES = register_query(
+    "members.GET_BRANCH_MEMBER_CODES",
+    """
+        SELECT MC.Member_Code, M.Is_Clergy, M.Is_Active
+        FROM tblMemberBranch MC
+            JOIN tblMember M ON M.Code = MC.Member_Code
+        WHERE MC.Branch_Code = :Branch_Code AND MC.Head_Code = :Head_Code AND MC.Is_Active = :Is_Active;
+    """,
+)
+
+GET_BRANCH_MEMBER_CODES_IN = register_query(
+    "members.GET_BRANCH_MEMBER_CODES_IN",
+    """
+        SELECT MC.Member_Code, M.Is_Clergy, M.Is_Active
+        FROM tblMemberBranch MC
+            JOIN tblMember M ON M.Code = MC.Member_Code
+        WHERE MC.Branch_Code = :Branch_Code AND MC.Head_Code = :Head_Code AND MC.Is_Active = :Is_Active
+            AND MC.Member_Code IN :Member_Codes;
+    """,
+    expanding=("Member_Codes",),
+)
+
+EXIT_MEMBERS_FROM_BRANCH = register_query(
+    "members.EXIT_MEMBERS_FROM_BRANCH",
+    """
+        UPDATE tblMemberBranch
+        SET Exit_Date = :Exit_Date, Exit_Note = :Exit_Note, Exit_Code = :Exit_Code, Is_Active = :Is_Active, Modified_By = :Modified_By
+        WHERE Member_Code IN :Member_Codes AND Branch_Code = :Branch_Code
+            AND Head_Code = :Head_Code AND Is_Active = :Is_Active2;
+    """,
+    expanding=("Member_Codes",),
+)
+
+EXIT_MEMBERS_FROM_ALL_BRANCHES = register_query(
+    "members.EXIT_MEMBERS_FROM_ALL_BRANCHES",
+    """
+        UPDATE tblMemberBranch
+        SET Exit_Date = :Exit_Date, Exit_Note = :Exit_Note, Exit_Code = :Exit_Code, Is_Active = :Is_Active, Modified_By = :Modified_By
+        WHERE Member_Code IN :Member_Codes AND Head_Code = :Head_Code AND Is_Active = :Is_Active2;
+    """,
+    expanding=("Member_Codes",),
+)
+
+JOIN_MEMBER_TO_BRANCH = register_query(
+    "members.JOIN_MEMBER_TO_BRANCH",
+    """
+        INSERT INTO tblMemberBranch
+        (Member_Code, Branch_Code, Head_Code, Join_Date, Join_Code, Join_Note, Is_Active, Created_By)
+        VALUES
+        (:Member_Code, :Branch_Code, :Head_Code, :Join_Date, :Join_Code, :Join_Note, :Is_Active, :Created_By);
+    """,
+)
+
+UPDATE_MEMBER_BRANCH_REASON_1 = register_query(
+    "members.UPDATE_MEMBER_BRANCH_REASON_1",
+    """
+        UPDATE tblMemberBranch
+        SET Join_Date = :Join_Date, Join_Code = :Join_Code, Join_Note = :Join_Note, Modified_By = :Modified_By
+        WHERE Id = :Id;
+    """,
+)
+
+UPDATE_MEMBER_BRANCH_REASON_2 = register_query(
+    "members.UPDATE_MEMBER_BRANCH_REASON_2",
+    """
+        UPDATE tblMemberBranch
+        SET Join_Code = :Join_Code, Join_Note = :Join_Note, Exit_Date = :Exit_Date, Exit_Note = :Exit_Note, Exit_Code = :Exit_Code, Modified_By = :Modified_By
+        WHERE Id = :Id;
+    """,
+)
+
+@traced_services
 class MemberServices:
     """
     ### Member Service methods
@@ -50,6 +385,8 @@ class MemberServices:
     - Exit Member From All Churches
     - Exit Memeber From Church
     - Join Member To Church
+    - Member State Transition (one or many members)
+    - Transfer Members between Branches
     """
 
     def __init__(
@@ -114,14 +451,7 @@ class MemberServices:
             )
             # insert new member
             self.db.execute(
-                text(
-                    """
-                    INSERT INTO tblMember
-                        (First_Name, Middle_Name, Last_Name, Title, Title2, Family_Name, Is_FamilyHead, Home_Address, Date_of_Birth, Gender, Marital_Status, Employ_Status, Occupation, Office_Address, State_of_Origin, Country_of_Origin, Personal_Contact_No, Contact_No, Contact_No2, Personal_Email, Contact_Email, Contact_Email2, Town_Code, State_Code, Region_Code, Country_Code, `Type`, Is_Clergy, Head_Code, Created_By)
-                    VALUES
-                        (:First_Name, :Middle_Name, :Last_Name, :Title, :Title2, :Family_Name, :Is_FamilyHead, :Home_Address, :Date_of_Birth, :Gender, :Marital_Status, :Employ_Status, :Occupation, :Office_Address, :State_of_Origin, :Country_of_Origin, :Personal_Contact_No, :Contact_No, :Contact_No2, :Personal_Email, :Contact_Email, :Contact_Email2, :Town_Code, :State_Code, :Region_Code, :Country_Code, :Type, :Is_Clergy, :Head_Code, :Created_By);
-                    """
-                ),
+                CREATE_NEW_MEMBER_INSERT_1,
                 dict(
                     First_Name=new_member.First_Name,
                     Middle_Name=new_member.Middle_Name,
@@ -157,20 +487,11 @@ class MemberServices:
             )
             self.db.commit()
             # fetch new code
-            new_code = self.db.execute(
-                text("SELECT Code FROM tblMember WHERE Id = LAST_INSERT_ID();")
-            ).first()
+            new_code = self.db.execute(CREATE_NEW_MEMBER_SELECT).first()
 
             # inserts new member church
             self.db.execute(
-                text(
-                    """
-                INSERT INTO tblMemberBranch
-                    (Member_Code, Branch_Code, Join_Date, Join_Code, Join_Note, Head_Code, Created_By)
-                VALUES
-                    (:Member_Code, :Branch_Code, :Join_Date, :Join_Code, :Join_Note, :Head_Code, :Created_By);
-                """
-                ),
+                CREATE_NEW_MEMBER_INSERT_2,
                 dict(
                     Member_Code=new_code.Code,
                     Branch_Code=new_member.Branch_Code,
@@ -181,6 +502,12 @@ class MemberServices:
                     Created_By=self.current_user.Usercode,
                 ),
             )
+            # update church stats
+            deltas = new_member_stats_deltas()
+            add_member_stats_delta(
+                deltas, new_member.Branch_Code, 1, int(bool(new_member.Is_Clergy))
+            )
+            apply_member_stats_deltas(self.db, deltas)
             self.db.commit()
             return await self.get_member_by_code_id(new_code.Code)
         except Exception as err:
@@ -188,46 +515,31 @@ class MemberServices:
             raise err
 
     async def get_all_members(self, is_active: Optional[bool] = None):
-        """Get All Members: accessible to only head church admins and super-admins."""
+        """
+        Get All Members: accessible to church admins and super-admins. Head church level admins get all
+        the members, the other admins the members of their churches and of the churches under them.
+        """
         try:
             # set user access
             set_user_access(
                 self.current_user_access,
                 head_code=self.current_user.Head_Code,
-                level_code=["CHU"],
-                role_code=["ADM", "SAD"],
-                module_code=["ALLM", "MBSH"],
-                submodule_code=["ALLS", "MBRS"],
-                access_type=["VW"],
+                **MEMBERS_VIEW_ALL.criteria(),
             )
-            members = (
-                self.db.execute(
-                    text(
-                        """
-                        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note FROM tblMember M
-                        LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
-                        WHERE M.Head_Code = :Head_Code
-                        ORDER BY `Code`;
-                        """
-                    ),
-                    dict(Head_Code=self.current_user.Head_Code),
-                ).all()
-                if is_active is None
-                else self.db.execute(
-                    text(
-                        """
-                        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note FROM tblMember M
-                        LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
-                        WHERE M.Head_Code = :Head_Code AND M.Is_Active = :Is_Active AND MC.Is_Active = :Is_Active
-                        ORDER BY `Code`;
-                        """
-                    ),
-                    dict(
-                        Head_Code=self.current_user.Head_Code,
-                        Is_Active=is_active,
-                    ),
-                ).all()
+            # the caller's slice, in the WHERE clause of the query
+            church_codes = resolve_church_scope(
+                self.current_user_access, MEMBERS_VIEW_ALL, self.current_user.Head_Code
             )
+            if church_codes is not None and not church_codes:
+                return []
+            members = ALL_MEMBERS.execute(
+                self.db,
+                dict(
+                    Head_Code=self.current_user.Head_Code,
+                    Is_Active=is_active,
+                    Church_Codes=church_codes,
+                ),
+            ).all()
             return members
         except Exception as err:
             raise err
@@ -235,16 +547,17 @@ class MemberServices:
     async def get_member_by_code_id(self, member_code_id: str):
         """Get Member By Code: accessible to church admins and executives of same/higher level/church."""
         try:
+            # set user access: before the member is fetched (the access does not depend on it)
+            set_user_access(
+                self.current_user_access,
+                head_code=self.current_user.Head_Code,
+                # church_code=member.Branch_Code,
+                # level_no=level.Level_No - 1,
+                **MEMBER_VIEW.criteria(),
+            )
             # fetch member data
             member = self.db.execute(
-                text(
-                    """
-                    SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note, MC.Exit_Date, MC.Exit_Code, MC.Exit_Note
-                    FROM tblMember M
-                    LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code AND MC.Is_Active = :Is_Active
-                    WHERE (M.Code = :Code or M.Id = :Id) AND M.Head_Code = :Head_Code
-                    """
-                ),
+                GET_MEMBER_BY_CODE_ID,
                 dict(
                     Code=member_code_id,
                     Id=member_code_id,
@@ -256,17 +569,6 @@ class MemberServices:
             # level = get_level(
             #     member.Branch_Code, self.current_user.Head_Code, self.db
             # ) if member.Branch_Code is not None else 0
-            # set user access
-            set_user_access(
-                self.current_user_access,
-                head_code=self.current_user.Head_Code,
-                # church_code=member.Branch_Code,
-                # level_no=level.Level_No - 1,
-                role_code=["ADM", "SAD", "EXC"],
-                module_code=["ALLM", "MBSH"],
-                submodule_code=["ALLS", "MBRS"],
-                access_type=["VW", "ED", "CR"],
-            )
             # check if member exists
             if member is None:
                 raise HTTPException(
@@ -277,18 +579,50 @@ class MemberServices:
         except Exception as err:
             raise err
 
+    async def search_members(
+        self, query: str, limit: int = 20, is_active: Optional[bool] = None
+    ):
+        """
+        Search Members (typeahead) by names, family name, email or phone number prefix:
+        accessible to church admins and executives, scoped to their churches and the branches they lead.
+        """
+        try:
+            # set user access
+            set_user_access(
+                self.current_user_access,
+                head_code=self.current_user.Head_Code,
+                **MEMBER_VIEW.criteria(),
+            )
+            church_codes = resolve_church_scope(
+                self.current_user_access, MEMBER_VIEW, self.current_user.Head_Code
+            )
+            if church_codes is not None and not church_codes:
+                return []
+            # a (partly typed) phone number is searched by its E.164 prefix, anything else by name/email
+            phone_prefix = phonenumber_search_prefix(query)
+            terms = None if phone_prefix else member_search_terms(query)
+            if phone_prefix is None and terms is None:
+                return []
+            members = MEMBER_SEARCH.execute(
+                self.db,
+                dict(
+                    Head_Code=self.current_user.Head_Code,
+                    Terms=terms,
+                    Phone=f"{phone_prefix}%" if phone_prefix else None,
+                    Is_Active=is_active,
+                    Church_Codes=church_codes,
+                ),
+                limit=limit,
+            ).all()
+            return members
+        except Exception as err:
+            raise err
+
     async def get_current_user_member(self):
         """Get Current User Member: accessible to only the current logged in member."""
         try:
             member = self.db.execute(
-                text(
-                    """
-                    SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note 
-                    FROM tblMember M
-                    LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
-                    WHERE `Code` = :Code AND M.Head_Code = :Head_Code AND M.Is_Active = :Is_Active AND MC.Is_Active = :Is_Active;
-                    """
-                ),
+                GET_CURRENT_USER_MEMBER,
                 dict(
                     Code=self.current_user.Usercode,
                     Head_Code=self.current_user.Head_Code,
@@ -324,16 +658,7 @@ class MemberServices:
             # fetch members
             members = (
                 self.db.execute(
-                    text(
-                        """
-                        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note 
-                        FROM tblMember M
-                            LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
-                        WHERE M.Head_Code = :Head_Code 
-                            AND M.Is_Active = :Is_Active AND MC.Is_Active = :Is_Active
-                            AND MC.Branch_Code = :Church_Code;
-                        """
-                    ),
+                    GET_MEMBERS_BY_CHURCH_1,
                     dict(
                         Church_Code=church_code.upper(),
                         Head_Code=self.current_user.Head_Code,
@@ -342,19 +667,7 @@ class MemberServices:
                 ).all()
                 if level.Level_No == 8  # if church is a branch
                 else self.db.execute(
-                    text(
-                        f"""
-                        {church_recursive_cte}
-                        SELECT M.* , MC.Branch_Code, MC.Join_Date, MC.Join_Code, MC.Join_Note FROM tblMember M
-                            LEFT JOIN tblMemberBranch MC ON MC.Member_Code = M.Code
-                        WHERE M.Head_Code = :Head_Code 
-                            AND M.Is_Active = :Is_Active AND MC.Is_Active = :Is_Active
-                            AND MC.Branch_Code IN (
-                                SELECT Church FROM ChurchHierarchy
-                                WHERE Church_Level = 'BRN'
-                            );
-                        """
-                    ),
+                    GET_MEMBERS_BY_CHURCH_2,
                     dict(
                         Church_Code=church_code.upper(),
                         Head_Code=self.current_user.Head_Code,
@@ -410,14 +723,7 @@ class MemberServices:
             )
             # update member
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblMember 
-                    SET 
-                        First_Name = :First_Name, Last_Name = :Last_Name, Middle_Name = :Middle_Name, Title = :Title, Title2 = :Title2, Family_Name = :Family_Name, Is_FamilyHead = :Is_FamilyHead, Home_Address = :Home_Address, Date_of_Birth = :Date_of_Birth, Gender = :Gender, Marital_Status = :Marital_Status, Employ_Status = :Employ_Status, Occupation = :Occupation, Office_Address = :Office_Address, State_of_Origin = :State_of_Origin, Personal_Contact_No = :Personal_Contact_No, Contact_No = :Contact_No, Contact_No2 = :Contact_No2, Personal_Email = :Personal_Email, Contact_Email = :Contact_Email, Contact_Email2 = :Contact_Email2, Town_Code = :Town_Code, State_Code = :State_Code, Region_Code = :Region_Code, Country_Code = :Country_Code, `Type` = :Type, Is_Clergy = :Is_Clergy, Modified_By = :Modified_By
-                    WHERE (`Code` = :Code OR Id = :Id) AND Head_Code = :Head_Code;
-                    """
-                ),
+                UPDATE_MEMBER_BY_CODE_ID,
                 dict(
                     First_Name=(
                         member.First_Name
@@ -541,6 +847,7 @@ class MemberServices:
                 ),
             )
             self.db.commit()
+            response_cache.invalidate("bootstrap", self.current_user.Head_Code)
             return await self.get_member_by_code_id(member_code_id)
         except Exception as err:
             self.db.rollback()
@@ -581,13 +888,7 @@ class MemberServices:
             )
             # update member
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblMember 
-                    SET First_Name = :First_Name, Last_Name = :Last_Name, Middle_Name = :Middle_Name, Title = :Title, Title2 = :Title2, Family_Name = :Family_Name, Is_FamilyHead = :Is_FamilyHead, Home_Address = :Home_Address, Date_of_Birth = :Date_of_Birth, Gender = :Gender, Marital_Status = :Marital_Status, Employ_Status = :Employ_Status, Occupation = :Occupation, Office_Address = :Office_Address, State_of_Origin = :State_of_Origin, Personal_Contact_No = :Personal_Contact_No, Contact_No = :Contact_No, Contact_No2 = :Contact_No2, Personal_Email = :Personal_Email, Contact_Email = :Contact_Email, Contact_Email2 = :Contact_Email2, Town_Code = :Town_Code, State_Code = :State_Code, Region_Code = :Region_Code, Country_Code = :Country_Code, Modified_By = :Modified_By
-                    WHERE `Code` = :Code AND Head_Code = :Head_Code;
-                    """
-                ),
+                UPDATE_CURRENT_USER_MEMBER,
                 dict(
                     First_Name=(
                         member.First_Name
@@ -704,6 +1005,7 @@ class MemberServices:
                 ),
             )
             self.db.commit()
+            response_cache.invalidate("bootstrap", self.current_user.Head_Code)
             return await self.get_current_user_member()
         except Exception as err:
             self.db.rollback()
@@ -711,118 +1013,17 @@ class MemberServices:
 
     async def deactivate_member_by_code(self, member_code):
         """Deactivate Member by Code: accessible to only church admins in the same/higher level/church."""
-        try:
-            member = await self.get_member_by_code_id(member_code)
-            level = get_level("BRN", self.current_user.Head_Code, self.db)
-            # set user access
-            set_user_access(
-                self.current_user_access,
-                head_code=self.current_user.Head_Code,
-                church_code=member.Branch_Code,
-                level_no=level.Level_No - 1,
-                role_code=["ADM", "SAD"],
-                module_code=["ALLM", "MBSH"],
-                submodule_code=["ALLS", "MBRS"],
-                access_type=["ED"],
-            )
-            # checks if member is inactive
-            if member.Is_Active != 1:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Member is already deactivated",
-                )
-            # deactivate member
-            self.db.execute(
-                text(
-                    """
-                    UPDATE tblMember
-                    SET Is_Active = :Is_Active
-                    WHERE `Code` = :Code AND Head_Code = :Head_Code AND Is_Active = :Is_Active2;
-                    """
-                ),
-                dict(
-                    Is_Active=0,
-                    Code=member.Code,
-                    Head_Code=self.current_user.Head_Code,
-                    Is_Active2=1,
-                ),
-            )
-            self.db.commit()
-            # deactivate member church
-            await self.exit_member_from_all_branches(member.Code)
-            return await self.get_member_by_code_id(member.Code)
-        except Exception as err:
-            self.db.rollback()
-            raise err
+        members = await self.transition_members([member_code], "deactivate")
+        return members[0]
 
     async def activate_member_by_code(
         self, member_code, member_church: MemberBranchJoinIn
     ):
         """Activate Member by Code: accessible to only church admins in the same/higher level/church."""
-        try:
-            member = await self.get_member_by_code_id(member_code)
-            level = get_level(member.Branch_Code, self.current_user.Head_Code, self.db)
-            # set user access
-            set_user_access(
-                self.current_user_access,
-                head_code=self.current_user.Head_Code,
-                church_code=member.Branch_Code,
-                level_no=level.Level_No - 1,
-                role_code=["ADM", "SAD"],
-                module_code=["ALLM", "MBSH"],
-                submodule_code=["ALLS", "MBRS"],
-                access_type=["ED"],
-            )
-            # check join type
-            if member_church.Join_Code:
-                validate_code_type(member_church.Join_Code, "Exit/Join Reason", self.db)
-            # check if member is active
-            if member.Is_Active == 1:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Member is already activated.",
-                )
-            # activate member
-            self.db.execute(
-                text(
-                    """
-                    UPDATE tblMember
-                    SET Is_Active = :Is_Active
-                    WHERE `Code` = :Code AND Head_Code = :Head_Code AND Is_Active = :Is_Active2;
-                    """
-                ),
-                dict(
-                    Is_Active=1,
-                    Code=member.Code,
-                    Head_Code=self.current_user.Head_Code,
-                    Is_Active2=0,
-                ),
-            )
-            self.db.commit()
-            # insert new member church
-            self.db.execute(
-                text(
-                    """
-                    INSERT INTO tblMemberBranch
-                    (Member_Code, Branch_Code, Join_Date, Join_Note, Join_Code, Head_Code)
-                    VALUES
-                    (:Member_Code, :Branch_Code, :Join_Date, :Join_Note, :Join_Code, :Head_Code);
-                    """
-                ),
-                dict(
-                    Member_Code=member.Code,
-                    Branch_Code=member_church.Branch_Code,
-                    Join_Date=member_church.Join_Date,
-                    Join_Note=member_church.Join_Note,
-                    Join_Code=member_church.Join_Code,
-                    Head_Code=self.current_user.Head_Code,
-                ),
-            )
-            self.db.commit()
-            return await self.get_member_by_code_id(member.Code)
-        except Exception as err:
-            self.db.rollback()
-            raise err
+        members = await self.transition_members(
+            [member_code], "activate", member_church
+        )
+        return members[0]
 
     async def promote_member_to_clergy(self, member_code_id):
         try:
@@ -845,14 +1046,7 @@ class MemberServices:
                 )
             # promote member
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblMember
-                    SET Is_Clergy = :Is_Clergy
-                    WHERE `Code` = :Code AND Head_Code = :Head_Code 
-                        AND Is_Active = :Is_Active AND Is_Clergy = :Is_Clergy2;
-                    """
-                ),
+                PROMOTE_MEMBER_TO_CLERGY,
                 dict(
                     Is_Clergy=1,
                     Code=member.Code,
@@ -861,7 +1055,13 @@ class MemberServices:
                     Is_Clergy2=0,
                 ),
             )
+            # update church stats
+            if not member.Is_Clergy:
+                deltas = new_member_stats_deltas()
+                add_member_stats_delta(deltas, member.Branch_Code, 0, 1)
+                apply_member_stats_deltas(self.db, deltas)
             self.db.commit()
+            response_cache.invalidate("bootstrap", self.current_user.Head_Code)
             return await self.get_member_by_code_id(member.Code)
         except Exception as err:
             self.db.rollback()
@@ -882,14 +1082,7 @@ class MemberServices:
             )
             # demote member
             self.db.execute(
-                text(
-                    """
-                    UPDATE tblMember
-                    SET Is_Clergy = :Is_Clergy
-                    WHERE `Code` = :Code AND Head_Code = :Head_Code 
-                        AND Is_Active = :Is_Active AND Is_Clergy = :Is_Clergy2;
-                    """
-                ),
+                DEMOTE_MEMBER_FROM_CLERGY,
                 dict(
                     Is_Clergy=0,
                     Code=member.Code,
@@ -898,7 +1091,13 @@ class MemberServices:
                     Is_Clergy2=1,
                 ),
             )
+            # update church stats
+            if member.Is_Active == 1 and member.Is_Clergy:
+                deltas = new_member_stats_deltas()
+                add_member_stats_delta(deltas, member.Branch_Code, 0, -1)
+                apply_member_stats_deltas(self.db, deltas)
             self.db.commit()
+            response_cache.invalidate("bootstrap", self.current_user.Head_Code)
             return await self.get_member_by_code_id(member.Code)
         except Exception as err:
             self.db.rollback()
@@ -946,87 +1145,15 @@ class MemberServices:
 
             print(f"msg: {msg}")
 
-            if is_active is not None:
-                if branch_code:
-                    member_branches = self.db.execute(
-                        text(
-                            """
-                            SELECT
-                                MC.*, M.Title, M.Title2, M.First_Name, M.Middle_Name, M.Last_Name, C.Name AS Branch_Name
-                            FROM tblMemberBranch MC
-                                LEFT JOIN tblMember M ON M.Code = MC.Member_Code
-                                LEFT JOIN tblChurches C ON C.Code = MC.Branch_Code
-                            WHERE MC.Member_Code = :Member_Code AND MC.Head_Code = :Head_Code
-                                AND MC.Branch_Code = :Branch_Code AND MC.Is_Active = :Is_Active
-                            ORDER BY MC.Join_Date;
-                            """
-                        ),
-                        dict(
-                            Member_Code=member_code,
-                            Head_Code=self.current_user.Head_Code,
-                            Is_Active=is_active,
-                            Branch_Code=branch_code,
-                        ),
-                    ).all()
-                else:
-                    member_branches = self.db.execute(
-                        text(
-                            """
-                        SELECT
-                            MC.*, M.Title, M.Title2, M.First_Name, M.Middle_Name, M.Last_Name, C.Name AS Branch_Name
-                        FROM tblMemberBranch MC
-                            LEFT JOIN tblMember M ON M.Code = MC.Member_Code
-                            LEFT JOIN tblChurches C ON C.Code = MC.Branch_Code
-                        WHERE MC.Member_Code = :Member_Code AND MC.Head_Code = :Head_Code
-                            AND MC.Is_Active = :Is_Active
-                        ORDER BY MC.Join_Date;
-                        """
-                        ),
-                        dict(
-                            Member_Code=member_code,
-                            Head_Code=self.current_user.Head_Code,
-                            Is_Active=is_active,
-                        ),
-                    ).all()
-            else:
-                if branch_code:
-                    member_branches = self.db.execute(
-                        text(
-                            """
-                            SELECT
-                                MC.*, M.Title, M.Title2, M.First_Name, M.Middle_Name, M.Last_Name, C.Name AS Branch_Name
-                            FROM tblMemberBranch MC
-                                LEFT JOIN tblMember M ON M.Code = MC.Member_Code
-                                LEFT JOIN tblChurches C ON C.Code = MC.Branch_Code
-                            WHERE MC.Member_Code = :Member_Code AND MC.Head_Code = :Head_Code
-                                AND MC.Branch_Code = :Branch_Code
-                            ORDER BY MC.Join_Date;
-                            """
-                        ),
-                        dict(
-                            Member_Code=member_code,
-                            Head_Code=self.current_user.Head_Code,
-                            Branch_Code=branch_code,
-                        ),
-                    ).all()
-                else:
-                    member_branches = self.db.execute(
-                        text(
-                            """
-                        SELECT
-                            MC.*, M.Title, M.Title2, M.First_Name, M.Middle_Name, M.Last_Name, C.Name AS Branch_Name
-                        FROM tblMemberBranch MC
-                            LEFT JOIN tblMember M ON M.Code = MC.Member_Code
-                            LEFT JOIN tblChurches C ON C.Code = MC.Branch_Code
-                        WHERE MC.Member_Code = :Member_Code AND MC.Head_Code = :Head_Code
-                        ORDER BY MC.Join_Date;
-                        """
-                        ),
-                        dict(
-                            Member_Code=member_code,
-                            Head_Code=self.current_user.Head_Code,
-                        ),
-                    ).all()
+            member_branches = MEMBER_BRANCHES.execute(
+                self.db,
+                dict(
+                    Member_Code=member_code,
+                    Head_Code=self.current_user.Head_Code,
+                    Branch_Code=branch_code or None,
+                    Is_Active=is_active,
+                ),
+            ).all()
             # if not member_branches:
             #     raise HTTPException(
             #         status_code=status.HTTP_404_NOT_FOUND,
@@ -1049,16 +1176,7 @@ class MemberServices:
     async def get_member_branch_by_id(self, member_branch_id):
         try:
             member_branch = self.db.execute(
-                text(
-                    """
-                    SELECT
-                        MC.*, M.Title, M.Title2, M.First_Name, M.Middle_Name, M.Last_Name, C.Name AS Branch_Name
-                    FROM tblMemberBranch MC
-                        LEFT JOIN tblMember M ON M.Code = MC.Member_Code
-                        LEFT JOIN tblChurches C ON C.Code = MC.Branch_Code
-                    WHERE MC.Id = :Id;
-                    """
-                ),
+                GET_MEMBER_BRANCH_BY_ID,
                 dict(Id=member_branch_id),
             ).first()
             return member_branch
@@ -1069,175 +1187,401 @@ class MemberServices:
         self, member_code, member_exit: MemberBranchExitIn
     ):
         """Exit Member From Church: accessible to only church admins in the same/higher level/church."""
+        members = await self.transition_members([member_code], "exit", member_exit)
+        return MEMBER_BRANCHES.execute(
+            self.db,
+            dict(
+                Member_Code=members[0].Code,
+                Head_Code=self.current_user.Head_Code,
+                Branch_Code=member_exit.Branch_Code,
+                Is_Active=None,
+            ),
+        ).all()
+
+    async def exit_member_from_all_branches(self, member_code: str):
+        """Exit Member From All Churches: accessible to only church admins in higher level/church."""
+        members = await self.transition_members([member_code], "exit_all")
+        return MEMBER_BRANCHES.execute(
+            self.db,
+            dict(
+                Member_Code=members[0].Code,
+                Head_Code=self.current_user.Head_Code,
+                Branch_Code=None,
+                Is_Active=None,
+            ),
+        ).all()
+
+    async def join_member_to_branch(self, member_code, member_join: MemberBranchJoinIn):
+        """Join Member To Church: accessible to only church admins in the same/higher level/church."""
+        members = await self.transition_members([member_code], "join", member_join)
+        return MEMBER_BRANCHES.execute(
+            self.db,
+            dict(
+                Member_Code=members[0].Code,
+                Head_Code=self.current_user.Head_Code,
+                Branch_Code=member_join.Branch_Code,
+                Is_Active=1,
+            ),
+        ).all()
+
+    @staticmethod
+    def _member_transition_error(member, transition: str, branch_code: Optional[str]):
+        """Returns (status code, detail) if the member cannot make the transition, else None."""
+        current_branch = member.Branch_Code.upper() if member.Branch_Code else None
+        if transition == "deactivate" and member.Is_Active != 1:
+            return status.HTTP_403_FORBIDDEN, "Member is already deactivated"
+        if transition == "activate" and member.Is_Active == 1:
+            return status.HTTP_403_FORBIDDEN, "Member is already activated."
+        if transition == "exit":
+            if current_branch is None:
+                return status.HTTP_400_BAD_REQUEST, "Member is not a member of any branch."
+            if current_branch != branch_code:
+                return (
+                    status.HTTP_400_BAD_REQUEST,
+                    "Member is not a member of the selected branch",
+                )
+        if transition == "join":
+            if current_branch == branch_code:
+                return (
+                    status.HTTP_400_BAD_REQUEST,
+                    "Member is already a member of the same branch",
+                )
+            if current_branch is not None:
+                return (
+                    status.HTTP_400_BAD_REQUEST,
+                    "Member is already a member of a branch. Please exit member from all branches first.",
+                )
+        return None
+
+    @staticmethod
+    def _member_state_after(member, transition: str, branch_code: Optional[str]):
+        """Returns (is active, current branch) of the member after the transition."""
+        if transition == "deactivate":
+            return False, None
+        if transition == "activate":
+            return True, branch_code
+        if transition == "join":
+            return member.Is_Active == 1, branch_code
+        # exit, exit_all
+        return member.Is_Active == 1, None
+
+    @staticmethod
+    def _group_member_rows(rows, branch_code: Optional[str]):
+        """
+        Groups GET_MEMBERS_BY_CODES rows (a row per active branch of a member) by member code.
+        Returns ({code: row}, {code: [branch codes]}), keeping one row per member: the one on
+        the selected branch if any.
+        """
+        member_branches = defaultdict(list)
+        members_by_code = {}
+        for member in rows:
+            code = member.Code.upper()
+            member_branches[code].append(member.Branch_Code)
+            if code not in members_by_code or (
+                member.Branch_Code and member.Branch_Code.upper() == branch_code
+            ):
+                members_by_code[code] = member
+        return members_by_code, member_branches
+
+    async def transition_members(
+        self,
+        member_codes: list[str],
+        transition: str,
+        member_branch: MemberBranchJoinIn | MemberBranchExitIn | None = None,
+    ):
+        """
+        Member State Transition: deactivate, activate, exit (from a branch), exit_all (from all branches)
+        or join (a branch) one or many members.
+        - the members and their current branches are read once, with one query for all the members
+        - every member is checked before any change: one invalid member fails the whole request
+        - the changes of all the members are applied in one transaction
+        - returns the members with their current branch
+        Accessible to only church admins in the same/higher level/church.
+        """
+        if transition not in MEMBER_TRANSITIONS:
+            raise ValueError(f"Unknown member transition: '{transition}'")
         try:
-            level = get_level(
-                member_exit.Branch_Code, self.current_user.Head_Code, self.db
-            )
-            # set user access
-            set_user_access(
-                self.current_user_access,
-                head_code=self.current_user.Head_Code,
-                church_code=member_exit.Branch_Code,
-                level_no=level.Level_No - 1,
-                role_code=["ADM", "SAD"],
-                module_code=["ALLM", "MBSH"],
-                submodule_code=["ALLS", "MBRS"],
-                access_type=["ED"],
+            member_codes = list(dict.fromkeys(code.upper() for code in member_codes))
+            branch_code = member_branch.Branch_Code.upper() if member_branch else None
+            # fetch members and their current branches (one row per member)
+            members_by_code, member_branches = self._group_member_rows(
+                self.db.execute(
+                    GET_MEMBERS_BY_CODES,
+                    dict(Codes=member_codes, Head_Code=self.current_user.Head_Code, Is_Active=1),
+                ).all(),
+                branch_code,
             )
-            # validate member and church
-            member = await self.get_member_by_code_id(member_code)
-            await self.church_services.get_church_by_id_code(member_exit.Branch_Code)
-            await self.get_member_branches(member.Code, member_exit.Branch_Code, True)
-            # check if member is already a member of the same branch
-            if member.Branch_Code != member_exit.Branch_Code:
+            members = list(members_by_code.values())
+            missing = set(member_codes) - set(members_by_code)
+            if missing:
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Member is not a member of the selected branch",
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=(
+                        "Member not found or inactive"
+                        if len(member_codes) == 1
+                        else f"Members not found: {', '.join(sorted(missing))}"
+                    ),
+                )
+            # set user access: on the branches of the members (deactivate), the selected branch
+            # (activate, exit, join) or higher level churches only (exit_all)
+            if transition == "exit_all":
+                church_access = [dict(level_no=1)]
+            else:
+                level = get_level(
+                    "BRN" if transition == "deactivate" else branch_code,
+                    self.current_user.Head_Code,
+                    self.db,
+                )
+                church_codes = (
+                    {branch for branches in member_branches.values() for branch in branches}
+                    if transition == "deactivate"
+                    else {branch_code}
+                )
+                church_access = [
+                    dict(church_code=church_code, level_no=level.Level_No - 1)
+                    for church_code in church_codes
+                ]
+            for access in church_access:
+                set_user_access(
+                    self.current_user_access,
+                    head_code=self.current_user.Head_Code,
+                    role_code=["ADM", "SAD"],
+                    module_code=["ALLM", "MBSH"],
+                    submodule_code=["ALLS", "MBRS"],
+                    access_type=["ED"],
+                    **access,
                 )
-            member_branch = await self.get_member_branches(member_code, is_active=True)
-            # checks if member is already a member of a church
-            if not member_branch:
+            # validate join type and church
+            if transition in ("activate", "join"):
+                validate_code_type(member_branch.Join_Code, "Exit/Join Reason", self.db)
+                await self.church_services.get_church_by_id_code(branch_code)
+            # check the members' state
+            errors = {
+                member.Code: error
+                for member in members
+                if (error := self._member_transition_error(member, transition, branch_code))
+            }
+            if errors:
+                if len(member_codes) == 1:
+                    status_code, detail = next(iter(errors.values()))
+                    raise HTTPException(status_code=status_code, detail=detail)
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Member is not a member of any branch.",
+                    detail="; ".join(f"{code}: {detail}" for code, (_, detail) in errors.items()),
                 )
-            # exit member from church
-            self.db.execute(
-                text(
-                    """
-                    UPDATE tblMemberBranch
-                    SET Exit_Date = :Exit_Date, Exit_Note = :Exit_Note, Exit_Code = :Exit_Code, Is_Active = :Is_Active, Modified_By = :Modified_By
-                    WHERE Member_Code = :Member_Code AND Branch_Code = :Branch_Code
-                        AND Head_Code = :Head_Code AND Is_Active = :Is_Active2;
-                    """
-                ),
-                dict(
-                    Exit_Date=(
-                        member_exit.Exit_Date
-                        if member_exit.Exit_Date
-                        else datetime.now()
+
+            codes = [member.Code for member in members]
+            now = datetime.now()
+            # activate/deactivate members
+            if transition in ("activate", "deactivate"):
+                self.db.execute(
+                    SET_MEMBERS_ACTIVE_STATUS,
+                    dict(
+                        Is_Active=1 if transition == "activate" else 0,
+                        Codes=codes,
+                        Head_Code=self.current_user.Head_Code,
+                        Is_Active2=0 if transition == "activate" else 1,
                     ),
-                    Exit_Note=member_exit.Exit_Note,
-                    Exit_Code=member_exit.Exit_Code,
-                    Modified_By=self.current_user.Usercode,
-                    Member_Code=member.Code,
-                    Branch_Code=member_exit.Branch_Code,
-                    Head_Code=self.current_user.Head_Code,
-                    Is_Active=0,
-                    Is_Active2=1,
-                ),
-            )
+                )
+            # exit members from their branches
+            if transition in ("deactivate", "exit_all"):
+                self.db.execute(
+                    EXIT_MEMBERS_FROM_ALL_BRANCHES,
+                    dict(
+                        Exit_Date=now,
+                        Exit_Note="Member exited from all churches",
+                        Exit_Code="OTH",
+                        Modified_By=self.current_user.Usercode,
+                        Member_Codes=codes,
+                        Head_Code=self.current_user.Head_Code,
+                        Is_Active=0,
+                        Is_Active2=1,
+                    ),
+                )
+            elif transition == "exit":
+                self.db.execute(
+                    EXIT_MEMBERS_FROM_BRANCH,
+                    dict(
+                        Exit_Date=member_branch.Exit_Date or now,
+                        Exit_Note=member_branch.Exit_Note,
+                        Exit_Code=member_branch.Exit_Code,
+                        Modified_By=self.current_user.Usercode,
+                        Member_Codes=codes,
+                        Branch_Code=branch_code,
+                        Head_Code=self.current_user.Head_Code,
+                        Is_Active=0,
+                        Is_Active2=1,
+                    ),
+                )
+            # join members to the branch (executemany)
+            elif transition in ("activate", "join"):
+                self.db.execute(
+                    JOIN_MEMBER_TO_BRANCH,
+                    [
+                        dict(
+                            Member_Code=code,
+                            Branch_Code=branch_code,
+                            Head_Code=self.current_user.Head_Code,
+                            Join_Date=member_branch.Join_Date or now,
+                            Join_Code=member_branch.Join_Code,
+                            Join_Note=member_branch.Join_Note,
+                            Is_Active=1,
+                            Created_By=self.current_user.Usercode,
+                        )
+                        for code in codes
+                    ],
+                )
+            # update church stats: members are counted in their branch while active
+            deltas = new_member_stats_deltas()
+            for member in members:
+                is_active, branch = self._member_state_after(member, transition, branch_code)
+                if member.Is_Active == 1:
+                    # deactivate/exit_all close all the member's branches
+                    for closed in (
+                        member_branches[member.Code.upper()]
+                        if transition in ("deactivate", "exit_all")
+                        else [member.Branch_Code]
+                    ):
+                        add_member_stats_delta(
+                            deltas, closed, -1, -int(bool(member.Is_Clergy))
+                        )
+                if is_active:
+                    add_member_stats_delta(
+                        deltas, branch, 1, int(bool(member.Is_Clergy))
+                    )
+            apply_member_stats_deltas(self.db, deltas)
             self.db.commit()
-            return await self.get_member_branches(member.Code, member_exit.Branch_Code)
-        except Exception as err:
-            self.db.rollback()
-            raise err
-
-    async def exit_member_from_all_branches(self, member_code: str):
-        """Exit Member From All Churches: accessible to only church admins in higher level/church."""
-        try:
-            # validate member
-            member = await self.get_member_by_code_id(member_code)
-            # set user access
-            set_user_access(
-                self.current_user_access,
-                head_code=self.current_user.Head_Code,
-                level_no=1,
-                role_code=["ADM", "SAD"],
-                module_code=["ALLM", "MBSH"],
-                submodule_code=["ALLS", "MBRS"],
-                access_type=["ED"],
-            )
-            # exit member from all churches
-            self.db.execute(
-                text(
-                    """
-                    UPDATE tblMemberBranch
-                    SET Exit_Date = :Exit_Date, Exit_Note = :Exit_Note, Exit_Code = :Exit_Code, Is_Active = :Is_Active, Modified_By = :Modified_By
-                    WHERE Member_Code = :Member_Code AND Head_Code = :Head_Code AND Is_Active = :Is_Active2;
-                    """
-                ),
-                dict(
-                    Exit_Date=datetime.now(),
-                    Exit_Note="Member exited from all churches",
-                    Exit_Code="OTH",
-                    Modified_By=self.current_user.Usercode,
-                    Member_Code=member_code,
-                    Head_Code=self.current_user.Head_Code,
-                    Is_Active=0,
-                    Is_Active2=1,
-                ),
+            response_cache.invalidate("bootstrap", self.current_user.Head_Code)
+            # the members with their current branch, one row per member
+            transitioned, _ = self._group_member_rows(
+                self.db.execute(
+                    GET_MEMBERS_BY_CODES,
+                    dict(Codes=codes, Head_Code=self.current_user.Head_Code, Is_Active=1),
+                ).all(),
+                branch_code,
             )
-            self.db.commit()
-            return await self.get_member_branches(member.Code, member.Branch_Code)
-            return member
+            return list(transitioned.values())
         except Exception as err:
             self.db.rollback()
             raise err
 
-    async def join_member_to_branch(self, member_code, member_join: MemberBranchJoinIn):
-        """Join Member To Church: accessible to only church admins in the same/higher level/church."""
+    async def transfer_members(
+        self, transfer: MemberBranchTransferIn, progress: Optional[Callable] = None
+    ):
+        """
+        Transfer Members between Branches: accessible to only church admins of both branches (same/higher level/church).
+        - access is checked once per branch, not per member
+        - the source member-branches are closed with set-based UPDATEs (IN lists of up to MEMBER_TRANSFER_BATCH_SIZE codes)
+          and the target member-branches are opened with one executemany INSERT (sent as multi-row INSERTs)
+        - all in one transaction
+        - progress(done, total, message): called per batch when run as a background job ("member_transfer")
+        """
         try:
-            level = get_level(
-                member_join.Branch_Code, self.current_user.Head_Code, self.db
-            )
-            # set user access
-            set_user_access(
-                self.current_user_access,
-                head_code=self.current_user.Head_Code,
-                church_code=member_join.Branch_Code,
-                level_no=level.Level_No - 1,
-                role_code=["ADM", "SAD"],
-                module_code=["ALLM", "MBSH"],
-                submodule_code=["ALLS", "MBRS"],
-                access_type=["ED"],
-            )
-            # validate member and church
-            member = await self.get_member_by_code_id(member_code)
-            await self.church_services.get_church_by_id_code(member_join.Branch_Code)
-            # check if member is already a member of the same branch
-            if member.Branch_Code == member_join.Branch_Code:
+            from_branch = transfer.From_Branch_Code.upper()
+            to_branch = transfer.To_Branch_Code.upper()
+            if from_branch == to_branch:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Member is already a member of the same branch",
+                    detail="Source and target branches must be different",
+                )
+            # set user access on both branches
+            for branch_code in (from_branch, to_branch):
+                level = get_level(branch_code, self.current_user.Head_Code, self.db)
+                set_user_access(
+                    self.current_user_access,
+                    head_code=self.current_user.Head_Code,
+                    church_code=branch_code,
+                    level_no=level.Level_No - 1,
+                    role_code=["ADM", "SAD"],
+                    module_code=["ALLM", "MBSH"],
+                    submodule_code=["ALLS", "MBRS"],
+                    access_type=["ED"],
                 )
-            member_branch = await self.get_member_branches(member_code, is_active=True)
-            # checks if member is already a member of a church
-            if member_branch:
+            # validate target church and exit/join types
+            await self.church_services.get_church_by_id_code(to_branch)
+            validate_code_type(transfer.Exit_Code, "Exit/Join Reason", self.db)
+            validate_code_type(transfer.Join_Code, "Exit/Join Reason", self.db)
+            # fetch the current members of the source branch
+            params = dict(
+                Branch_Code=from_branch,
+                Head_Code=self.current_user.Head_Code,
+                Is_Active=1,
+            )
+            if transfer.Member_Codes == "ALL":
+                branch_members = self.db.execute(GET_BRANCH_MEMBER_CODES, params).all()
+            else:
+                requested = list(
+                    dict.fromkeys(code.upper() for code in transfer.Member_Codes)
+                )
+                branch_members = self.db.execute(
+                    GET_BRANCH_MEMBER_CODES_IN, dict(params, Member_Codes=requested)
+                ).all()
+            member_codes = [member.Member_Code for member in branch_members]
+            if transfer.Member_Codes != "ALL":
+                missing = set(requested) - {code.upper() for code in member_codes}
+                if missing:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Members are not current members of branch '{from_branch}': {', '.join(sorted(missing))}",
+                    )
+            if not member_codes:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Member is already a member of a branch. Please exit member from all branches first.",
+                    detail=f"Branch '{from_branch}' has no current members to transfer",
                 )
-            # # check and exit member from possible member church
-            # await self.exit_member_from_all_branches(member.Code)
-            # join member to church
-            self.db.execute(
-                text(
-                    """
-                    INSERT INTO tblMemberBranch
-                    (Member_Code, Branch_Code, Head_Code, Join_Date, Join_Code, Join_Note, Is_Active, Created_By)
-                    VALUES
-                    (:Member_Code, :Branch_Code, :Head_Code, :Join_Date, :Join_Code, :Join_Note, :Is_Active, :Created_By);
-                    """
-                ),
-                dict(
-                    Member_Code=member.Code,
-                    Branch_Code=member_join.Branch_Code,
-                    Head_Code=self.current_user.Head_Code,
-                    Join_Date=(
-                        member_join.Join_Date
-                        if member_join.Join_Date
-                        else datetime.now()
+
+            transfer_date = transfer.Transfer_Date or datetime.now()
+            # exit members from the source branch
+            for start in range(0, len(member_codes), MEMBER_TRANSFER_BATCH_SIZE):
+                if progress is not None:
+                    progress(start, len(member_codes), f"Transferring members to '{to_branch}'")
+                self.db.execute(
+                    EXIT_MEMBERS_FROM_BRANCH,
+                    dict(
+                        Exit_Date=transfer_date,
+                        Exit_Note=transfer.Exit_Note,
+                        Exit_Code=transfer.Exit_Code,
+                        Modified_By=self.current_user.Usercode,
+                        Member_Codes=member_codes[start : start + MEMBER_TRANSFER_BATCH_SIZE],
+                        Branch_Code=from_branch,
+                        Head_Code=self.current_user.Head_Code,
+                        Is_Active=0,
+                        Is_Active2=1,
                     ),
-                    Join_Code=member_join.Join_Code,
-                    Join_Note=member_join.Join_Note,
-                    Is_Active=1,
-                    Created_By=self.current_user.Usercode,
-                ),
+                )
+            # join members to the target branch
+            self.db.execute(
+                JOIN_MEMBER_TO_BRANCH,
+                [
+                    dict(
+                        Member_Code=code,
+                        Branch_Code=to_branch,
+                        Head_Code=self.current_user.Head_Code,
+                        Join_Date=transfer_date,
+                        Join_Code=transfer.Join_Code,
+                        Join_Note=transfer.Join_Note,
+                        Is_Active=1,
+                        Created_By=self.current_user.Usercode,
+                    )
+                    for code in member_codes
+                ],
             )
+            # update church stats
+            deltas = new_member_stats_deltas()
+            for member in branch_members:
+                if member.Is_Active == 1:
+                    clergy = int(bool(member.Is_Clergy))
+                    add_member_stats_delta(deltas, from_branch, -1, -clergy)
+                    add_member_stats_delta(deltas, to_branch, 1, clergy)
+            apply_member_stats_deltas(self.db, deltas)
             self.db.commit()
-            return await self.get_member_branches(
-                member.Code, member_join.Branch_Code, True
+            response_cache.invalidate("bootstrap", self.current_user.Head_Code)
+            return dict(
+                From_Branch_Code=from_branch,
+                To_Branch_Code=to_branch,
+                Transfer_Date=transfer_date,
+                Transferred=len(member_codes),
+                Member_Codes=member_codes,
             )
         except Exception as err:
             self.db.rollback()
@@ -1267,13 +1611,7 @@ class MemberServices:
             )
             if memb_brn.Is_Active == 1:
                 self.db.execute(
-                    text(
-                        """
-                        UPDATE tblMemberBranch
-                        SET Join_Date = :Join_Date, Join_Code = :Join_Code, Join_Note = :Join_Note, Modified_By = :Modified_By
-                        WHERE Id = :Id;
-                        """
-                    ),
+                    UPDATE_MEMBER_BRANCH_REASON_1,
                     dict(
                         Join_Date=member_branch.Join_Date,
                         Join_Code=member_branch.Join_Code,
@@ -1285,13 +1623,7 @@ class MemberServices:
                 self.db.commit()
             else:
                 self.db.execute(
-                    text(
-                        """
-                        UPDATE tblMemberBranch
-                        SET Join_Code = :Join_Code, Join_Note = :Join_Note, Exit_Date = :Exit_Date, Exit_Note = :Exit_Note, Exit_Code = :Exit_Code, Modified_By = :Modified_By
-                        WHERE Id = :Id;
-                        """
-                    ),
+                    UPDATE_MEMBER_BRANCH_REASON_2,
                     dict(
                         Join_Code=member_branch.Join_Code,
                         Join_Note=member_branch.Join_Note,
@@ -1311,22 +1643,20 @@ class MemberServices:
     async def get_member_church_hierarchy_by_member_code(self, member_code: str):
         try:
             member = await self.get_member_by_code_id(member_code)
-            # fetch data
-            mc_hierarchy = self.db.execute(
-                text(
-                    """
-                    SELECT * FROM vwMemberChurchHierarchy
-                    WHERE Member_Code = :Member_Code
-                    """
-                ),
-                dict(Member_Code=member.Code),
-            ).first()
-            if not mc_hierarchy:
+            # fetch the lead chain of the member's current branch (tblBranchAncestry)
+            branch_ancestry = (
+                get_branch_ancestry(
+                    self.db, member.Branch_Code, self.current_user.Head_Code
+                )
+                if member.Branch_Code
+                else None
+            )
+            if not branch_ancestry or not branch_ancestry["LeadCode_1"]:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Member's church hierarchy not found",
                 )
-            return mc_hierarchy
+            return dict(branch_ancestry, Member_Code=member.Code)
         except Exception as err:
             raise err
 
@@ -48,7 +48,13 @@ This has the folowing Sub-Modules and endpoints:
 {checkbox} Get Churches by Lead Code &nbsp;
 <hr>
 
-### 1.5 Groups Sub-Module
+### 1.5 Church Stats Sub-Module
+{checkbox} Get Church Stats by Code &nbsp;
+{checkbox} Get Church Stats by Level &nbsp;
+{checkbox} Refresh Church Stats &nbsp;
+<hr>
+
+### 1.6 Groups Sub-Module
 {uncheckbox} Create New Group &nbsp;
 {uncheckbox} Get All Groups &nbsp;
 {uncheckbox} Get Group by Code &nbsp;
@@ -92,16 +98,36 @@ This manages Members, Member Branch, Member Groups, Church Positions, Member Pos
 ## 3. User Management (_in progress_)
 This managers users, user roles, user access to modules and submodules.
 
-## 4. Asset Management (_not implemented_)
+## 4. System Administration (_in progress_)
+This manages background jobs of heavy admin operations (triggers, endpoints sync, member transfers, exports), the profiling of the workers and the route permissions.
+
+### 4.1 Jobs Sub-Module
+{checkbox} Get Job Kinds &nbsp;
+{checkbox} Submit Job &nbsp;
+{checkbox} Get Jobs &nbsp;
+{checkbox} Get Job by Id &nbsp;
+{checkbox} Cancel Job &nbsp;
+{checkbox} Download Job File &nbsp;
+
+### 4.2 Profiling Sub-Module
+{checkbox} Profile Worker &nbsp;
+{checkbox} Start Memory Tracing &nbsp;
+{checkbox} Get Top Allocations &nbsp;
+{checkbox} Stop Memory Tracing &nbsp;
+
+### 4.3 Permissions Sub-Module
+{checkbox} Get Route Permissions &nbsp;
+
+## 5. Asset Management (_not implemented_)
 This manages assets, asset types, assets allocation and locations.
 
-## 5. Event Management (_not implemented_)
+## 6. Event Management (_not implemented_)
 This manages program events and events details.
 
-## 6. Finance Management (_not implemented_)
+## 7. Finance Management (_not implemented_)
 This manages tithes, offerings, donations, seeds etc.
 
-## 7. Communication Management (_not implemented_)
+## 8. Communication Management (_not implemented_)
 This manages all communication channels and messages.
 
 <br>
@@ -135,6 +161,11 @@ tags = {
         "submodule": "Church Leads Sub-Module (LEAD)",
         "description": "Operations on Church Leads",
     },
+    "church_stats": {
+        "module": "Church Administration (CHAD)",
+        "submodule": "Church Stats Sub-Module (STAT)",
+        "description": "Member statistics of Churches",
+    },
     # GROUPS MANAGEMENT MODULE
     "groups": {
         "module": "Groups Management (GRPM)",
@@ -173,6 +204,22 @@ tags = {
         "submodule": "Users Sub-Module (USAD)",
         "description": "Operations on Users",
     },
+    # SYSTEM ADMINISTRATION MODULE
+    "jobs": {
+        "module": "System Administration (SYSA)",
+        "submodule": "Jobs Sub-Module (JOBS)",
+        "description": "Background jobs of heavy admin operations",
+    },
+    "profiling": {
+        "module": "System Administration (SYSA)",
+        "submodule": "Profiling Sub-Module (PROF)",
+        "description": "CPU and memory profiling of the workers",
+    },
+    "permissions": {
+        "module": "System Administration (SYSA)",
+        "submodule": "Permissions Sub-Module (PERM)",
+        "description": "Grants needed by the routes",
+    },
 }
 
 openapi_tags = [
@@ -215,6 +262,15 @@ openapi_tags = [
         "name": f"{tags['church_leads']['module']}: {tags['church_leads']['submodule']}",
         "description": f"{tags['church_leads']['description']}",
     },
+    # Church Stats Sub Module
+    {
+        "name": f"{tags['church_stats']['module']}: {tags['church_stats']['submodule']}: Admin only",
+        "description": f"{tags['church_stats']['description']}: Admins only",
+    },
+    {
+        "name": f"{tags['church_stats']['module']}: {tags['church_stats']['submodule']}",
+        "description": f"{tags['church_stats']['description']}",
+    },
     # GROUP MANAGEMENT MODULE
     # Group Sub Module
     {
@@ -263,6 +319,22 @@ openapi_tags = [
         "name": f"{tags['users']['module']}: {tags['users']['submodule']}",
         "description": f"{tags['users']['description']}",
     },
+    ## SYSTEM ADMINISTRATION MODULE
+    # Jobs Sub Module
+    {
+        "name": f"{tags['jobs']['module']}: {tags['jobs']['submodule']}: Admin only",
+        "description": f"{tags['jobs']['description']}: Admins only",
+    },
+    # Profiling Sub Module
+    {
+        "name": f"{tags['profiling']['module']}: {tags['profiling']['submodule']}: Admin only",
+        "description": f"{tags['profiling']['description']}: Admins only",
+    },
+    # Permissions Sub Module
+    {
+        "name": f"{tags['permissions']['module']}: {tags['permissions']['submodule']}: Admin only",
+        "description": f"{tags['permissions']['description']}: Admins only",
+    },
 ]
 
 
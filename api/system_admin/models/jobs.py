@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Any, Optional, Union
+
+from pydantic import BaseModel, Field  # type: ignore
+
+
+class JobIn(BaseModel):
+    Job_Kind: str = Field(examples=["members_export"], max_length=50)
+    Params: dict[str, Any] = Field(default_factory=dict, examples=[{"church_code": "BRN001"}])
+    Idempotency_Key: Optional[str] = Field(default=None, max_length=100)
+
+
+class Job(BaseModel):
+    Id: int
+    Job_Kind: str
+    Status: str
+    Idempotency_Key: Optional[str] = None
+    Params: Optional[dict[str, Any]] = None
+    Progress_Done: int = 0
+    Progress_Total: Optional[int] = None
+    Progress_Percent: Optional[float] = None
+    ETA_Seconds: Optional[int] = None
+    Message: Optional[str] = None
+    Result: Optional[Any] = None
+    Error: Optional[str] = None
+    Cancel_Requested: bool = False
+    Created_By: Optional[str] = None
+    Owner: Optional[str] = None
+    Created_Date: Optional[datetime] = None
+    Started_Date: Optional[datetime] = None
+    Finished_Date: Optional[datetime] = None
+    Heartbeat_Date: Optional[datetime] = None
+
+
+class JobResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Union[list[Job], Job, None] = None
+
+
+class JobKindOut(BaseModel):
+    Job_Kind: str
+    Description: str
+
+
+class JobKindResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Optional[list[JobKindOut]] = None
@@ -0,0 +1,26 @@
+from typing import Optional
+
+from pydantic import BaseModel  # type: ignore
+
+
+class PermissionSpecOut(BaseModel):
+    access_type: Optional[list[str]] = None
+    role_code: Optional[list[str]] = None
+    module_code: Optional[list[str]] = None
+    submodule_code: Optional[list[str]] = None
+    head_code: Optional[str] = None
+
+
+class RoutePermissionOut(BaseModel):
+    Route_Code: str
+    Name: str
+    Methods: list[str]
+    Path: str
+    Permission: PermissionSpecOut
+    Allowed: bool
+
+
+class RoutePermissionResponse(BaseModel):
+    status_code: int
+    message: str
+    data: list[RoutePermissionOut] = []
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from pydantic import BaseModel  # type: ignore
+
+
+class TracemallocStat(BaseModel):
+    Location: str
+    Traceback: Optional[list[str]] = None
+    Size_KB: float
+    Size_Diff_KB: Optional[float] = None
+    Count: int
+    Count_Diff: Optional[int] = None
+
+
+class TracemallocOut(BaseModel):
+    Tracing: bool
+    Traced_KB: Optional[float] = None
+    Peak_KB: Optional[float] = None
+    Top: list[TracemallocStat] = []
+
+
+class TracemallocResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Optional[TracemallocOut] = None
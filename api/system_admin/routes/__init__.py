@@ -0,0 +1,3 @@
+from .jobs import jobs_adm_router
+from .profiling import profiling_adm_router
+from .permissions import permissions_adm_router
@@ -0,0 +1,165 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, status, Depends, Header, Path, Query, Response  # type: ignore
+from fastapi.responses import FileResponse  # type: ignore
+
+from ...system_admin.services import JobsServices, get_jobs_services
+from ...system_admin.models.jobs import JobIn, JobKindResponse, JobResponse
+from ...swagger_doc import tags
+
+jobs_adm_router = APIRouter(
+    prefix="/admin/jobs",
+    tags=[f"{tags['jobs']['module']}: {tags['jobs']['submodule']}: Admin only"],
+)
+"""
+#### Jobs Admin Routes
+- Get Job Kinds
+- Submit Job
+- Get Jobs
+- Get Job by Id
+- Cancel Job
+- Download Job File
+"""
+
+
+# Get job kinds
+@jobs_adm_router.get(
+    "/kinds",
+    status_code=status.HTTP_200_OK,
+    name="Get Job Kinds",
+    summary="Get Job Kinds",
+    description="## Retrieve the kinds of background jobs which can be submitted",
+    response_model=JobKindResponse,
+)
+async def get_job_kinds(
+    jobs_services: Annotated[JobsServices, Depends(get_jobs_services)],
+):
+    job_kinds = await jobs_services.get_job_kinds()
+    # set response body
+    response = dict(
+        data=job_kinds,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully retrieved {len(job_kinds)} Job Kinds",
+    )
+    return response
+
+
+# Submit job
+@jobs_adm_router.post(
+    "/",
+    status_code=status.HTTP_202_ACCEPTED,
+    name="Submit Job",
+    summary="Submit Background Job",
+    description="## Submit a background job; poll it with Get Job by Id. A job submitted again with the same Idempotency Key (body or `Idempotency-Key` header) is returned as is",
+    response_model=JobResponse,
+)
+async def submit_job(
+    job: JobIn,
+    http_response: Response,
+    jobs_services: Annotated[JobsServices, Depends(get_jobs_services)],
+    idempotency_key: Annotated[Optional[str], Header(max_length=100)] = None,
+):
+    submitted_job, created = await jobs_services.submit_job(
+        job.Job_Kind, job.Params, job.Idempotency_Key or idempotency_key
+    )
+    status_code = status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+    http_response.status_code = status_code
+    # set response body
+    response = dict(
+        data=submitted_job,
+        status_code=status_code,
+        message=(
+            f"Successfully submitted Job: '{submitted_job['Job_Kind']} ({submitted_job['Id']})'"
+            if created
+            else f"Job: '{submitted_job['Job_Kind']} ({submitted_job['Id']})' was already submitted"
+        ),
+    )
+    return response
+
+
+# Get jobs
+@jobs_adm_router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    name="Get Jobs",
+    summary="Get Jobs",
+    description="## Retrieve the latest background jobs (all jobs for head church admins, else the user's own jobs)",
+    response_model=JobResponse,
+)
+async def get_jobs(
+    jobs_services: Annotated[JobsServices, Depends(get_jobs_services)],
+    job_status: Annotated[Optional[str], Query(alias="status")] = None,
+    job_kind: Optional[str] = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+):
+    jobs = await jobs_services.get_jobs(job_status, job_kind, limit)
+    # set response body
+    response = dict(
+        data=jobs,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully retrieved {len(jobs)} Jobs",
+    )
+    return response
+
+
+# Get job by id
+@jobs_adm_router.get(
+    "/{job_id}",
+    status_code=status.HTTP_200_OK,
+    name="Get Job",
+    summary="Get Job by Id",
+    description="## Retrieve a background job with its status, progress and ETA",
+    response_model=JobResponse,
+)
+async def get_job_by_id(
+    job_id: Annotated[int, Path(..., description="id of the job")],
+    jobs_services: Annotated[JobsServices, Depends(get_jobs_services)],
+):
+    job = await jobs_services.get_job_by_id(job_id)
+    # set response body
+    response = dict(
+        data=job,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully retrieved Job: '{job['Job_Kind']} ({job['Id']})' - {job['Status']}",
+    )
+    return response
+
+
+# Cancel job
+@jobs_adm_router.patch(
+    "/{job_id}/cancel",
+    status_code=status.HTTP_200_OK,
+    name="Cancel Job",
+    summary="Cancel Job by Id",
+    description="## Cancel a queued or running background job",
+    response_model=JobResponse,
+)
+async def cancel_job(
+    job_id: Annotated[int, Path(..., description="id of the job")],
+    jobs_services: Annotated[JobsServices, Depends(get_jobs_services)],
+):
+    job = await jobs_services.cancel_job(job_id)
+    # set response body
+    response = dict(
+        data=job,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully requested the cancellation of Job: '{job['Job_Kind']} ({job['Id']})'",
+    )
+    return response
+
+
+# Download job file
+@jobs_adm_router.get(
+    "/{job_id}/download",
+    status_code=status.HTTP_200_OK,
+    name="Download Job File",
+    summary="Download Job File by Id",
+    description="## Download the file created by a background job (e.g. a members export)",
+    response_class=FileResponse,
+)
+async def download_job_file(
+    job_id: Annotated[int, Path(..., description="id of the job")],
+    jobs_services: Annotated[JobsServices, Depends(get_jobs_services)],
+):
+    path = await jobs_services.get_job_file(job_id)
+    return FileResponse(path, filename=path.replace("\\", "/").split("/")[-1])
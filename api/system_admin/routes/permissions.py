@@ -0,0 +1,46 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, status, Depends, Query  # type: ignore
+
+from ...system_admin.services import PermissionsServices, get_permissions_services
+from ...system_admin.models.permissions import RoutePermissionResponse
+from ...common.permissions import SYSTEM_ADMIN, requires
+from ...swagger_doc import tags
+
+permissions_adm_router = APIRouter(
+    prefix="/admin/permissions",
+    tags=[f"{tags['permissions']['module']}: {tags['permissions']['submodule']}: Admin only"],
+)
+"""
+#### Permissions Admin Routes
+- Get Route Permissions
+"""
+
+
+# Get route permissions
+@permissions_adm_router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    name="Get Route Permissions",
+    summary="Get Route Permissions",
+    description="## Retrieve the grants needed by each route (checked before any data is fetched), and whether the current user has them",
+    response_model=RoutePermissionResponse,
+    dependencies=[Depends(requires(SYSTEM_ADMIN))],
+)
+async def get_route_permissions(
+    permissions_services: Annotated[PermissionsServices, Depends(get_permissions_services)],
+    module_code: Annotated[
+        Optional[str], Query(description="(Optional) routes of a module, e.g. MBSH")
+    ] = None,
+    allowed: Annotated[
+        Optional[bool], Query(description="(Optional) routes allowed (or not) to the current user")
+    ] = None,
+):
+    route_permissions = await permissions_services.get_route_permissions(module_code, allowed)
+    # set response body
+    response = dict(
+        data=route_permissions,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully retrieved {len(route_permissions)} route permissions",
+    )
+    return response
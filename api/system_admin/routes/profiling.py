@@ -0,0 +1,119 @@
+from typing import Annotated, Literal, Optional
+
+from fastapi import APIRouter, status, Depends, Query  # type: ignore
+from fastapi.responses import PlainTextResponse  # type: ignore
+
+from ...system_admin.services import ProfilingServices, get_profiling_services
+from ...system_admin.models.profiling import TracemallocResponse
+from ...common.permissions import SYSTEM_ADMIN, requires
+from ...swagger_doc import tags
+
+profiling_adm_router = APIRouter(
+    prefix="/admin/profiling",
+    tags=[f"{tags['profiling']['module']}: {tags['profiling']['submodule']}: Admin only"],
+)
+"""
+#### Profiling Admin Routes
+- Profile Worker
+- Start Memory Tracing
+- Get Top Allocations
+- Stop Memory Tracing
+"""
+
+
+# Profile worker
+@profiling_adm_router.post(
+    "/sample",
+    status_code=status.HTTP_200_OK,
+    name="Profile Worker",
+    summary="Profile Worker Over a Time Window",
+    description="## Sample the stacks of all the threads of the worker serving this request for a number of seconds. Returns the collapsed stacks (flamegraph.pl, speedscope). A single request is profiled with the `X-Profile: 1` header or `?profile=1`",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(requires(SYSTEM_ADMIN))],
+)
+async def profile_worker(
+    profiling_services: Annotated[ProfilingServices, Depends(get_profiling_services)],
+    seconds: Annotated[float, Query(gt=0, description="length of the window")] = 10,
+    interval_ms: Annotated[Optional[float], Query(ge=1, le=1000)] = None,
+):
+    sampler = await profiling_services.sample_worker(seconds, interval_ms)
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={
+            "X-Profile-Samples": str(sampler.samples),
+            "X-Profile-Duration-Ms": f"{sampler.duration * 1000:.1f}",
+        },
+    )
+
+
+# Start memory tracing
+@profiling_adm_router.post(
+    "/tracemalloc/start",
+    status_code=status.HTTP_200_OK,
+    name="Start Memory Tracing",
+    summary="Start Memory Tracing",
+    description="## Start tracing the memory allocations of the worker (tracemalloc), storing `frames` frames per allocation. Tracing slows the worker down: stop it when done",
+    response_model=TracemallocResponse,
+    dependencies=[Depends(requires(SYSTEM_ADMIN))],
+)
+async def start_tracemalloc(
+    profiling_services: Annotated[ProfilingServices, Depends(get_profiling_services)],
+    frames: Annotated[int, Query(ge=1, le=50)] = 10,
+):
+    tracing = await profiling_services.start_tracemalloc(frames)
+    # set response body
+    response = dict(
+        data=tracing,
+        status_code=status.HTTP_200_OK,
+        message="Successfully started memory tracing",
+    )
+    return response
+
+
+# Get top allocations
+@profiling_adm_router.get(
+    "/tracemalloc",
+    status_code=status.HTTP_200_OK,
+    name="Get Top Allocations",
+    summary="Get Top Memory Allocations",
+    description="## Snapshot of the top allocators of the worker, by size. With `diff`, the growth since the previous snapshot",
+    response_model=TracemallocResponse,
+    dependencies=[Depends(requires(SYSTEM_ADMIN))],
+)
+async def get_top_allocations(
+    profiling_services: Annotated[ProfilingServices, Depends(get_profiling_services)],
+    limit: Annotated[int, Query(ge=1, le=200)] = 20,
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+    diff: bool = False,
+):
+    top = await profiling_services.get_top_allocations(limit, group_by, diff)
+    # set response body
+    response = dict(
+        data=top,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully retrieved {len(top['Top'])} top allocations",
+    )
+    return response
+
+
+# Stop memory tracing
+@profiling_adm_router.post(
+    "/tracemalloc/stop",
+    status_code=status.HTTP_200_OK,
+    name="Stop Memory Tracing",
+    summary="Stop Memory Tracing",
+    description="## Stop tracing the memory allocations of the worker and free the traces",
+    response_model=TracemallocResponse,
+    dependencies=[Depends(requires(SYSTEM_ADMIN))],
+)
+async def stop_tracemalloc(
+    profiling_services: Annotated[ProfilingServices, Depends(get_profiling_services)],
+):
+    tracing = await profiling_services.stop_tracemalloc()
+    # set response body
+    response = dict(
+        data=tracing,
+        status_code=status.HTTP_200_OK,
+        message="Successfully stopped memory tracing",
+    )
+    return response
@@ -0,0 +1,3 @@
+from .jobs import JobsServices, get_jobs_services
+from .profiling import ProfilingServices, get_profiling_services
+from .permissions import PermissionsServices, get_permissions_services
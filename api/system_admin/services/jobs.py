@@ -0,0 +1,437 @@
+import csv
+import inspect
+import os
+from typing import Annotated, Optional
+
+import orjson  # type: ignore
+from fastapi import Depends, HTTPException, status  # type: ignore
+from pydantic import ValidationError  # type: ignore
+from sqlalchemy.exc import IntegrityError  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+
+from ...authentication.models.auth import User, UserAccess
+from ...church_admin.services import ChurchServices
+from ...membership_mgmt.models.members import MemberBranchTransferIn
+from ...membership_mgmt.services import MemberServices
+from ...common.config import settings
+from ...common.database import (
+    create_audit_log_triggers,
+    create_change_track_triggers,
+    get_db,
+    insert_mod_sub_endpts_table,
+)
+from ...common.dependencies import (
+    get_current_user,
+    get_current_user_access,
+    set_db_current_user,
+)
+from ...common.jobs import (
+    JOB_CANCELLED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JobCancelled,
+    JobContext,
+    job_kinds,
+    job_runner,
+    register_job,
+)
+from ...common.queries import register_query
+from ...common.tracing import traced_services
+from ...common.query_builder import FilterQuery
+from ...common.utils import set_user_access
+
+
+INSERT_JOB = register_query(
+    "jobs.INSERT_JOB",
+    """
+        INSERT INTO tblJobs
+            (Job_Kind, Status, Idempotency_Key, Params, Head_Code, Created_By, Owner, Heartbeat_Date)
+        VALUES
+            (:Job_Kind, :Status, :Idempotency_Key, :Params, :Head_Code, :Created_By, :Owner, NOW());
+    """,
+)
+
+GET_LAST_JOB_ID = register_query(
+    "jobs.GET_LAST_JOB_ID",
+    "SELECT LAST_INSERT_ID() AS Id;",
+)
+
+JOB_COLUMNS = "*, TIMESTAMPDIFF(SECOND, Started_Date, NOW()) AS Elapsed_Seconds"
+
+GET_JOB_BY_ID = register_query(
+    "jobs.GET_JOB_BY_ID",
+    f"""
+        SELECT {JOB_COLUMNS} FROM tblJobs
+        WHERE Id = :Id AND Head_Code = :Head_Code;
+    """,
+)
+
+GET_JOB_BY_IDEMPOTENCY_KEY = register_query(
+    "jobs.GET_JOB_BY_IDEMPOTENCY_KEY",
+    f"""
+        SELECT {JOB_COLUMNS} FROM tblJobs
+        WHERE Head_Code = :Head_Code AND Idempotency_Key = :Idempotency_Key;
+    """,
+)
+
+JOBS = FilterQuery(
+    "jobs.JOBS",
+    columns=[JOB_COLUMNS],
+    from_clause="tblJobs",
+    where=["Head_Code = :Head_Code"],
+    filters=dict(
+        Created_By="Created_By = :Created_By",
+        Status="Status = :Status",
+        Job_Kind="Job_Kind = :Job_Kind",
+    ),
+    order_by=["Id DESC"],
+)
+
+CANCEL_JOB = register_query(
+    "jobs.CANCEL_JOB",
+    """
+        UPDATE tblJobs
+        SET Cancel_Requested = 1,
+            Finished_Date = IF(Status = :Queued, NOW(), Finished_Date),
+            Status = IF(Status = :Queued, :Cancelled, Status)
+        WHERE Id = :Id AND Head_Code = :Head_Code AND Status IN (:Queued, :Running);
+    """,
+)
+
+
+def _job_out(job) -> dict:
+    """Job row -> Job (decoded JSON columns, progress percentage and ETA of running jobs)."""
+    job = dict(job._mapping)
+    for column in ("Params", "Result"):
+        if isinstance(job.get(column), (str, bytes)):
+            job[column] = orjson.loads(job[column])
+    done, total = job["Progress_Done"] or 0, job["Progress_Total"]
+    if total:
+        job["Progress_Percent"] = round(100 * min(done, total) / total, 1)
+    elapsed = job.pop("Elapsed_Seconds", None)
+    if job["Status"] == JOB_RUNNING and total and 0 < done < total and elapsed:
+        job["ETA_Seconds"] = int(elapsed * (total - done) / done)
+    return job
+
+
+@traced_services
+class JobsServices:
+    """
+    #### Jobs Service methods
+    - Get Job Kinds
+    - Submit Job
+    - Get Jobs
+    - Get Job by Id
+    - Cancel Job
+    - Get Job File
+    """
+
+    def __init__(self, db: Session, current_user: User, current_user_access: UserAccess):
+        self.db = db
+        self.current_user = current_user
+        self.current_user_access = current_user_access
+
+    def _is_jobs_admin(self) -> bool:
+        """Head church admins see the jobs of all users; other users see their own jobs."""
+        try:
+            set_user_access(
+                self.current_user_access,
+                head_code=self.current_user.Head_Code,
+                level_code=["CHU"],
+                role_code=["ADM", "SAD"],
+                module_code=["ALLM", "SYSA"],
+                access_type=["VW", "ED", "CR"],
+            )
+            return True
+        except HTTPException:
+            return False
+
+    def _get_job(self, job_id: int):
+        job = self.db.execute(
+            GET_JOB_BY_ID, dict(Id=job_id, Head_Code=self.current_user.Head_Code)
+        ).first()
+        if job is None or (
+            job.Created_By != self.current_user.Usercode and not self._is_jobs_admin()
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job '{job_id}' not found",
+            )
+        return job
+
+    async def get_job_kinds(self):
+        """Get Job Kinds: accessible to all users (access is checked per kind on submit)."""
+        return [
+            dict(Job_Kind=kind.name, Description=kind.description)
+            for kind in job_kinds.values()
+        ]
+
+    async def submit_job(
+        self, job_kind: str, params: dict, idempotency_key: Optional[str] = None
+    ):
+        """
+        Submit Job: accessible to the users with the job kind's access.
+        Returns (job, created): a job already submitted with the same idempotency key is returned as is.
+        """
+        try:
+            kind = job_kinds.get(job_kind)
+            if kind is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown job kind '{job_kind}'. Job kinds: {', '.join(job_kinds)}",
+                )
+            # set user access
+            set_user_access(
+                self.current_user_access,
+                head_code=self.current_user.Head_Code,
+                **kind.access,
+            )
+            if idempotency_key:
+                job = self.db.execute(
+                    GET_JOB_BY_IDEMPOTENCY_KEY,
+                    dict(
+                        Head_Code=self.current_user.Head_Code,
+                        Idempotency_Key=idempotency_key,
+                    ),
+                ).first()
+                if job is not None:
+                    return _job_out(job), False
+            # validate params
+            try:
+                if kind.params_model is not None:
+                    params = kind.params_model(**params).model_dump(mode="json")
+                inspect.signature(kind.func).bind(None, **params)
+            except (ValidationError, TypeError) as err:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid params for job kind '{job_kind}': {err}",
+                )
+            if job_runner.is_full():
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many queued jobs, please retry later",
+                )
+            try:
+                self.db.execute(
+                    INSERT_JOB,
+                    dict(
+                        Job_Kind=job_kind,
+                        Status=JOB_QUEUED,
+                        Idempotency_Key=idempotency_key,
+                        Params=orjson.dumps(params).decode(),
+                        Head_Code=self.current_user.Head_Code,
+                        Created_By=self.current_user.Usercode,
+                        Owner=job_runner.owner,
+                    ),
+                )
+            except IntegrityError:
+                # submitted concurrently with the same idempotency key
+                self.db.rollback()
+                job = self.db.execute(
+                    GET_JOB_BY_IDEMPOTENCY_KEY,
+                    dict(
+                        Head_Code=self.current_user.Head_Code,
+                        Idempotency_Key=idempotency_key,
+                    ),
+                ).first()
+                return _job_out(job), False
+            job_id = self.db.execute(GET_LAST_JOB_ID).scalar()
+            self.db.commit()
+            job_runner.submit(
+                job_id, kind, self.current_user, self.current_user_access, params
+            )
+            return _job_out(self._get_job(job_id)), True
+        except Exception as err:
+            self.db.rollback()
+            raise err
+
+    async def get_jobs(
+        self,
+        job_status: Optional[str] = None,
+        job_kind: Optional[str] = None,
+        limit: int = 50,
+    ):
+        """Get Jobs: head church admins get all the jobs, other users their own jobs."""
+        try:
+            jobs = JOBS.execute(
+                self.db,
+                dict(
+                    Head_Code=self.current_user.Head_Code,
+                    Created_By=(
+                        None if self._is_jobs_admin() else self.current_user.Usercode
+                    ),
+                    Status=job_status.upper() if job_status else None,
+                    Job_Kind=job_kind,
+                ),
+                limit=limit,
+            ).all()
+            return [_job_out(job) for job in jobs]
+        except Exception as err:
+            raise err
+
+    async def get_job_by_id(self, job_id: int):
+        """Get Job by Id: accessible to the job's user and head church admins."""
+        try:
+            return _job_out(self._get_job(job_id))
+        except Exception as err:
+            raise err
+
+    async def cancel_job(self, job_id: int):
+        """
+        Cancel Job: accessible to the job's user and head church admins.
+        A queued job is cancelled at once; a running job stops at its next progress report.
+        """
+        try:
+            self._get_job(job_id)
+            cancelled = self.db.execute(
+                CANCEL_JOB,
+                dict(
+                    Id=job_id,
+                    Head_Code=self.current_user.Head_Code,
+                    Queued=JOB_QUEUED,
+                    Running=JOB_RUNNING,
+                    Cancelled=JOB_CANCELLED,
+                ),
+            ).rowcount
+            if not cancelled:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Job '{job_id}' has already finished",
+                )
+            self.db.commit()
+            return _job_out(self._get_job(job_id))
+        except Exception as err:
+            self.db.rollback()
+            raise err
+
+    async def get_job_file(self, job_id: int) -> str:
+        """Get Job File (e.g. of an export): accessible to the job's user and head church admins."""
+        try:
+            job = _job_out(self._get_job(job_id))
+            result = job["Result"] if isinstance(job["Result"], dict) else {}
+            path = result.get("File")
+            if job["Status"] != JOB_SUCCEEDED or not path or not os.path.isfile(path):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Job '{job_id}' has no file to download",
+                )
+            return path
+        except Exception as err:
+            raise err
+
+
+def get_jobs_services(
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)],
+    current_user_access: Annotated[UserAccess, Depends(get_current_user_access)],
+    db_current_user: Annotated[str, Depends(set_db_current_user)],
+):
+    return JobsServices(db, current_user, current_user_access)
+
+
+"""
+### Job Kinds
+- Audit Log Triggers
+- Change Track Triggers
+- Endpoints Sync
+- Member Transfer
+- Members Export
+"""
+
+SYSTEM_ADMIN_ACCESS = dict(
+    level_code=["CHU"],
+    role_code=["SAD"],
+    module_code=["ALLM", "SYSA"],
+    access_type=["ED", "CR"],
+)
+
+
+def _member_services(ctx: JobContext) -> MemberServices:
+    church_services = ChurchServices(ctx.db, ctx.current_user, ctx.current_user_access)
+    return MemberServices(
+        ctx.db, ctx.current_user, ctx.current_user_access, church_services
+    )
+
+
+@register_job(
+    "audit_log_triggers",
+    "Create/update the audit log triggers of all tables",
+    **SYSTEM_ADMIN_ACCESS,
+)
+def audit_log_triggers_job(ctx: JobContext):
+    create_audit_log_triggers(progress=ctx.progress)
+    return dict(Tables=ctx.total)
+
+
+@register_job(
+    "change_track_triggers",
+    "Create/update the change tracking triggers of all tables",
+    **SYSTEM_ADMIN_ACCESS,
+)
+def change_track_triggers_job(ctx: JobContext):
+    create_change_track_triggers(progress=ctx.progress)
+    return dict(Tables=ctx.total)
+
+
+@register_job(
+    "endpoints_sync",
+    "Sync the modules, sub-modules and endpoints tables with the app's routes",
+    **SYSTEM_ADMIN_ACCESS,
+)
+def endpoints_sync_job(ctx: JobContext):
+    if ctx.app is None:
+        raise ValueError("The job runner is not attached to the app")
+    insert_mod_sub_endpts_table(ctx.app, progress=ctx.progress)
+    return dict(Endpoints=ctx.total)
+
+
+@register_job(
+    "member_transfer",
+    "Transfer members between branches (params as for POST /admin/member_branch/transfer)",
+    params_model=MemberBranchTransferIn,
+    role_code=["ADM", "SAD"],
+    module_code=["ALLM", "MBSH"],
+    submodule_code=["ALLS", "MBRS"],
+    access_type=["ED"],
+)
+async def member_transfer_job(ctx: JobContext, **transfer):
+    transferred = await _member_services(ctx).transfer_members(
+        MemberBranchTransferIn(**transfer), progress=ctx.progress
+    )
+    ctx.done = ctx.total = transferred["Transferred"]
+    return transferred
+
+
+@register_job(
+    "members_export",
+    "Export the members (of a church, or all members) to a CSV file",
+    role_code=["ADM", "SAD", "EXC"],
+    module_code=["ALLM", "MBSH"],
+    submodule_code=["ALLS", "MBRS"],
+    access_type=["VW", "ED"],
+)
+async def members_export_job(
+    ctx: JobContext, church_code: Optional[str] = None, is_active: Optional[bool] = None
+):
+    member_services = _member_services(ctx)
+    members = (
+        await member_services.get_members_by_church(church_code)
+        if church_code
+        else await member_services.get_all_members(is_active)
+    )
+    os.makedirs(settings.jobs_export_dir, exist_ok=True)
+    path = os.path.join(settings.jobs_export_dir, f"members_{ctx.job_id}.csv")
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            if members:
+                writer.writerow(members[0]._mapping.keys())
+            for done, member in enumerate(members):
+                ctx.progress(done, len(members), "Writing members")
+                writer.writerow(member)
+    except JobCancelled:
+        os.remove(path)
+        raise
+    ctx.done = ctx.total = len(members)
+    return dict(File=path, Rows=len(members))
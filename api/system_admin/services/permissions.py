@@ -0,0 +1,54 @@
+from typing import Annotated, Optional
+
+from fastapi import Depends, Request  # type: ignore
+
+from ...authentication.models.auth import User, UserAccess
+from ...common.dependencies import get_current_user, get_current_user_access
+from ...common.permissions import get_access_index, permissions
+from ...common.tracing import traced_services
+
+
+@traced_services
+class PermissionsServices:
+    """
+    #### Permissions Service methods
+    - Get Route Permissions
+    """
+
+    def __init__(self, request: Request, current_user: User, current_user_access: UserAccess):
+        self.request = request
+        self.current_user = current_user
+        self.current_user_access = current_user_access
+
+    async def get_route_permissions(
+        self, module_code: Optional[str] = None, allowed: Optional[bool] = None
+    ):
+        """Get Route Permissions: the grants needed by each route, and whether the current user has them."""
+        access_index = get_access_index(self.request, self.current_user_access)
+        route_permissions = []
+        for route_code, route in sorted(permissions.routes.items()):
+            spec = route.spec
+            if module_code and (spec.module_code is None or module_code.upper() not in spec.module_code):
+                continue
+            route_allowed = access_index.allows(spec, self.current_user.Head_Code)
+            if allowed is not None and route_allowed != allowed:
+                continue
+            route_permissions.append(
+                dict(
+                    Route_Code=route_code,
+                    Name=route.name,
+                    Methods=list(route.methods),
+                    Path=route.path,
+                    Permission=spec.to_dict(),
+                    Allowed=route_allowed,
+                )
+            )
+        return route_permissions
+
+
+def get_permissions_services(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_user)],
+    current_user_access: Annotated[UserAccess, Depends(get_current_user_access)],
+):
+    return PermissionsServices(request, current_user, current_user_access)
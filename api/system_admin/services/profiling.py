@@ -0,0 +1,87 @@
+import asyncio
+import tracemalloc
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, status  # type: ignore
+
+from ...authentication.models.auth import User, UserAccess
+from ...common.config import settings
+from ...common.dependencies import get_current_user, get_current_user_access
+from ...common.profiling import (
+    PROFILING_ACCESS,
+    profiler,
+    start_tracemalloc,
+    stop_tracemalloc,
+    top_allocations,
+)
+from ...common.utils import set_user_access
+
+
+class ProfilingServices:
+    """
+    #### Profiling Service methods
+    - Sample Worker
+    - Start Memory Tracing
+    - Get Top Allocations
+    - Stop Memory Tracing
+    """
+
+    def __init__(self, current_user: User, current_user_access: UserAccess):
+        self.current_user = current_user
+        self.current_user_access = current_user_access
+        if not settings.profiling_enabled:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Profiling is disabled (PROFILING_ENABLED)",
+            )
+        # check user access
+        set_user_access(self.current_user_access, **PROFILING_ACCESS)
+
+    async def sample_worker(self, seconds: float, interval_ms: float | None = None):
+        """Sample Worker: collapsed stacks of all the worker's threads over a time window."""
+        if seconds > settings.profiling_max_seconds:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The profile window is limited to {settings.profiling_max_seconds} seconds",
+            )
+        sampler = await profiler.sample_window(
+            seconds, interval_ms / 1000 if interval_ms else None
+        )
+        print(
+            f"Worker profiled by {self.current_user.Usercode}: "
+            f"{sampler.samples} samples in {sampler.duration:.1f}s"
+        )
+        return sampler
+
+    async def start_tracemalloc(self, frames: int):
+        """Start Memory Tracing: allocations are traced (with some overhead) until stopped."""
+        start_tracemalloc(frames)
+        return self._tracemalloc_status()
+
+    async def get_top_allocations(self, limit: int, group_by: str, diff: bool):
+        """Get Top Allocations: snapshot of the top allocators (or of their growth since the last snapshot)."""
+        top = await asyncio.to_thread(top_allocations, limit, group_by, diff)
+        return dict(Tracing=True, **top)
+
+    async def stop_tracemalloc(self):
+        """Stop Memory Tracing: the traces are freed."""
+        stop_tracemalloc()
+        return self._tracemalloc_status()
+
+    @staticmethod
+    def _tracemalloc_status():
+        if not tracemalloc.is_tracing():
+            return dict(Tracing=False)
+        current, peak = tracemalloc.get_traced_memory()
+        return dict(
+            Tracing=True,
+            Traced_KB=round(current / 1024, 1),
+            Peak_KB=round(peak / 1024, 1),
+        )
+
+
+def get_profiling_services(
+    current_user: Annotated[User, Depends(get_current_user)],
+    current_user_access: Annotated[UserAccess, Depends(get_current_user_access)],
+):
+    return ProfilingServices(current_user, current_user_access)
@@ -57,3 +57,28 @@ class UserResponse(BaseModel):
     status_code: int
     message: str
     data: Union[List[UserDetails], UserDetails, None] = None
+
+
+class UsersFromMembersIn(BaseModel):
+    Member_Codes: List[str] = Field(..., min_length=1, max_length=1000)
+    Role_Code: str
+    Level_Code: str
+    # church the role is granted for; defaults to each member's branch
+    Church_Code: Optional[str] = None
+
+
+class UsersFromMembersOut(BaseModel):
+    Role_Code: str
+    Level_Code: str
+    Created: int
+    Usercodes: List[str] = []
+    # member code -> reason the member was not provisioned
+    Skipped: dict[str, str] = {}
+    # usercodes whose welcome email could not be queued
+    Email_Failed: List[str] = []
+
+
+class UsersFromMembersResponse(BaseModel):
+    status_code: int
+    message: str
+    data: Optional[UsersFromMembersOut] = None
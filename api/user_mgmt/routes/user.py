@@ -5,8 +5,10 @@ from fastapi import APIRouter, status, HTTPException, Depends, Path, Query, Head
 from jose import jwt  # type: ignore
 
 from ..services.user import UserServices, get_user_services
-from ..models.user import UserResponse
+from ..models.user import UserResponse, UsersFromMembersIn, UsersFromMembersResponse
+from ...authentication.models.auth import UserActivationResponse
 from ...common.config import settings
+from ...common.permissions import PermissionSpec, requires
 from ...swagger_doc import tags
 
 JWT_SECRET_KEY = settings.jwt_secret_key
@@ -23,6 +25,61 @@ user_adm_route = APIRouter(
 )
 
 
+# route permissions, checked before any query of the services (see common/permissions.py)
+USER_ADMIN = PermissionSpec(
+    role_code=["ADM", "SAD"],
+    access_type=["ED", "CR"],
+)
+
+
+@user_adm_route.post(
+    "/create",
+    status_code=status.HTTP_201_CREATED,
+    name="Create Users From Members",
+    summary="Create Users From Members Details (bulk)",
+    description="## Create Users From Members Details - welcome emails with activation links are queued",
+    response_model=UsersFromMembersResponse,
+    dependencies=[Depends(requires(USER_ADMIN))],
+)
+async def create_users_from_members(
+    users: UsersFromMembersIn,
+    user_services: Annotated[UserServices, Depends(get_user_services)],
+):
+    new_users = await user_services.create_users_from_members(users)
+    # set response body
+    response = dict(
+        data=new_users,
+        status_code=status.HTTP_201_CREATED,
+        message=f"Successfully created {new_users['Created']} members as users, skipped {len(new_users['Skipped'])}",
+    )
+    return response
+
+
+@user_adm_route.post(
+    "/{usercode}/activation",
+    status_code=status.HTTP_200_OK,
+    name="Resend User Activation",
+    summary="Resend User Activation Token",
+    description="## Resend User Activation - replaces the user's activation token and queues the welcome email again",
+    response_model=UserActivationResponse,
+    dependencies=[Depends(requires(USER_ADMIN))],
+)
+async def resend_user_activation(
+    usercode: Annotated[
+        str, Path(..., description="Usercode of the user to be sent a new activation token")
+    ],
+    user_services: Annotated[UserServices, Depends(get_user_services)],
+):
+    usercode = await user_services.resend_user_activation(usercode)
+    # set response body
+    response = dict(
+        data=usercode,
+        status_code=status.HTTP_200_OK,
+        message=f"Successfully re-issued the activation token of user: '{usercode}'",
+    )
+    return response
+
+
 @user_adm_route.post(
     "/{member_code}/create",
     status_code=status.HTTP_201_CREATED,
@@ -30,6 +87,7 @@ user_adm_route = APIRouter(
     summary="Create User From Member Details",
     description="## Create User From Member Details",
     response_model=UserResponse,
+    dependencies=[Depends(requires(USER_ADMIN))],
 )
 async def create_user_from_member(
     member_code: Annotated[
@@ -67,6 +125,7 @@ async def create_user_from_member(
     summary="Get User Details By Usercode",
     description="## Retrieve User Details By Usercode",
     response_model=UserResponse,
+    dependencies=[Depends(requires(USER_ADMIN))],
 )
 async def get_user_details_by_usercode(
     user_code: Annotated[
@@ -102,6 +161,7 @@ async def get_user_details_by_usercode(
     summary="Get Users Details",
     description="## Retrieve Users Details",
     response_model=UserResponse,
+    dependencies=[Depends(requires(USER_ADMIN))],
 )
 async def get_users_details(
     user_services: Annotated[UserServices, Depends(get_user_services)],
@@ -1,38 +1,250 @@
+from datetime import datetime, timedelta
 from typing import Annotated, Optional
-from secrets import token_hex
+from secrets import token_hex, token_urlsafe
 
 from fastapi import Depends, HTTPException, status  # type: ignore
-from sqlalchemy import text  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 from jose import jwt  # type: ignore
 
 from ...authentication.models.auth import User, UserAccess
-from ...authentication.services.auth import AuthService
+from ...authentication.services.auth import AuthService, hash_activation_token
 from ...membership_mgmt.services.members import MemberServices, get_member_services
-from ...user_mgmt.models.user import UserDetails, UserRoles, UserSubModules
+from ...user_mgmt.models.user import (
+    UserDetails,
+    UserRoles,
+    UsersFromMembersIn,
+    UserSubModules,
+)
 from ...common.utils import (
     check_level_code,
     check_role_code,
     get_level,
     set_user_access,
 )
+from ...common.cache import AUTH_NAMESPACE, response_cache
 from ...common.config import settings
 from ...common.database import get_db
+from ...common.mail_queue import build_message, mail_queue
 from ...common.dependencies import (
     get_current_user,
     get_current_user_access,
     set_db_current_user,
 )
+from ...common.queries import register_query
+from ...common.tracing import traced_services
+from ...common.query_builder import FilterQuery
 
 JWT_SECRET_KEY = settings.jwt_secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 
+CREATE_USER_FROM_MEMBER_UPDATE = register_query(
+    "user.CREATE_USER_FROM_MEMBER_UPDATE",
+    """
+        Update tblMember
+        SET Is_User = :Is_User
+        WHERE `Code` = :Usercode AND Is_Active = :Is_Active
+            AND HeadChurch_Code = :HeadChurch_Code
+    """,
+)
+
+CREATE_USER_FROM_MEMBER_INSERT_1 = register_query(
+    "user.CREATE_USER_FROM_MEMBER_INSERT_1",
+    """
+        INSERT INTO tblUser
+            (Usercode, Email, Password, Is_Member, Church_Code, HeadChurch_Code)
+        VALUES
+            (:Usercode, :Email, :Password, :HeadChurch_Code)
+    """,
+)
+
+CREATE_USER_FROM_MEMBER_INSERT_2 = register_query(
+    "user.CREATE_USER_FROM_MEMBER_INSERT_2",
+    """
+        INSERT INTO tblUserRole
+            (Usercode, Role_Code, Level_Code, HeadChurch_Code)
+        VALUES
+            (:Usercode, :Role_Code, :Level_Code, :HeadChurch_Code)
+    """,
+)
+
+GET_MEMBERS_FOR_USERS = register_query(
+    "user.GET_MEMBERS_FOR_USERS",
+    """
+        SELECT M.Code, M.First_Name, M.Last_Name, M.Personal_Email, M.Is_Active, MB.Branch_Code, U.Usercode
+        FROM tblMember M
+        LEFT JOIN tblMemberBranch MB ON MB.Member_Code = M.Code AND MB.Is_Active = :Is_Active
+        LEFT JOIN tblUsers U ON U.Usercode = M.Code
+        WHERE M.Code IN :Codes AND M.Head_Code = :Head_Code;
+    """,
+    expanding=("Codes",),
+)
+
+CREATE_USERS_FROM_MEMBERS_UPDATE = register_query(
+    "user.CREATE_USERS_FROM_MEMBERS_UPDATE",
+    """
+        UPDATE tblMember
+        SET Is_User = :Is_User
+        WHERE `Code` IN :Codes AND Head_Code = :Head_Code;
+    """,
+    expanding=("Codes",),
+)
+
+CREATE_USERS_FROM_MEMBERS_INSERT_1 = register_query(
+    "user.CREATE_USERS_FROM_MEMBERS_INSERT_1",
+    """
+        INSERT INTO tblUsers
+            (Usercode, Email, Password, Is_Member, Is_Active, Head_Code, Created_By)
+        VALUES
+            (:Usercode, :Email, NULL, :Is_Member, :Is_Active, :Head_Code, :Created_By);
+    """,
+)
+
+CREATE_USERS_FROM_MEMBERS_INSERT_2 = register_query(
+    "user.CREATE_USERS_FROM_MEMBERS_INSERT_2",
+    """
+        INSERT INTO tblUserRole
+            (Usercode, Role_Code, Level_Code, Church_Code, Head_Code, Created_By)
+        VALUES
+            (:Usercode, :Role_Code, :Level_Code, :Church_Code, :Head_Code, :Created_By);
+    """,
+)
+
+INSERT_USER_ACTIVATION = register_query(
+    "user.INSERT_USER_ACTIVATION",
+    """
+        INSERT INTO tblUserActivation
+            (Usercode, Token_Hash, Expires_Date, Head_Code, Created_By)
+        VALUES
+            (:Usercode, :Token_Hash, :Expires_Date, :Head_Code, :Created_By);
+    """,
+)
+
+DELETE_USER_ACTIVATION = register_query(
+    "user.DELETE_USER_ACTIVATION",
+    """
+        DELETE FROM tblUserActivation
+        WHERE Usercode = :Usercode AND Head_Code = :Head_Code AND Used_Date IS NULL;
+    """,
+)
+
+GET_USER_FOR_ACTIVATION = register_query(
+    "user.GET_USER_FOR_ACTIVATION",
+    """
+        SELECT U.Usercode, U.Password, M.Code, M.First_Name, M.Last_Name, M.Personal_Email,
+            UR.Level_Code, UR.Church_Code
+        FROM tblUsers U
+            JOIN tblMember M ON M.Code = U.Usercode
+            LEFT JOIN tblUserRole UR ON UR.Usercode = U.Usercode
+        WHERE U.Usercode = :Usercode AND U.Head_Code = :Head_Code;
+    """,
+)
+
+GET_USER = register_query(
+    "user.GET_USER",
+    """
+        SELECT * FROM tblUser
+        WHERE Usercode = :Usercode
+    """,
+)
+
+USER_SUBMODULES = FilterQuery(
+    "user.USER_SUBMODULES",
+    columns=[
+        "B.Submodule_Code",
+        "C.SubModule AS Submodule_Name",
+        "B.Module_Code",
+        "D.Module AS Module_Name",
+        "HL.Level_Code",
+        "HL.ChurchLevel_Code",
+        "HL.Church_Level",
+        "B.Access_Type",
+        "A.Is_Active",
+        "A.Status",
+    ],
+    from_clause="""
+        tblUserRole U
+        INNER JOIN tblUserRoleSubModule A ON A.UserRole_Code = U.Code
+        LEFT JOIN dfSubModuleAccess B ON B.Code = A.SubModuleAccess_Code
+        LEFT JOIN dfSubModules C ON C.Code = B.SubModule_Code
+        LEFT JOIN dfModules D ON D.Code = B.Module_Code
+        LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = U.Level_Code
+    """,
+    where=["HL.Head_Code = :Head_Code", "HL.Is_Active = :Is_Active"],
+    filters=dict(
+        Usercode="U.Usercode = :Usercode",
+        Level_Code="U.Level_Code = :Level_Code",
+    ),
+)
+
+USER_ROLES = FilterQuery(
+    "user.USER_ROLES",
+    columns=[
+        "UR.Role_Code",
+        "R.Role AS Role_Name",
+        "HL.Level_Code",
+        "HL.ChurchLevel_Code",
+        "HL.Church_Level",
+        "UR.Is_Active",
+        "UR.Status",
+    ],
+    from_clause="""
+        tblUserRole UR
+        LEFT JOIN dfRole R ON R.Code = UR.Role_Code
+        LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = UR.Level_Code
+    """,
+    where=["HL.Head_Code = :Head_Code", "HL.Is_Active = :Is_Active"],
+    filters=dict(
+        Usercode="UR.Usercode = :Usercode",
+        Level_Code="UR.Level_Code = :Level_Code",
+    ),
+)
+
+GET_USER_DETAILS = register_query(
+    "user.GET_USER_DETAILS",
+    """
+        SELECT U.*, UR.Role_Code, UR.Level_Code, M.First_Name, M.Last_Name, M.Title, M.Title2, MB.Branch_Code, C.Name AS Branch_Name, UR.Status, UR.Status_By, UR.Status_Date
+        FROM tblUser U
+        LEFT JOIN tblUserRole UR ON UR.Usercode = U.Usercode
+        LEFT JOIN tblMember M ON M.Code = U.Usercode
+        LEFT JOIN tblMemberBranch MB ON MB.Member_Code = U.Usercode
+        LEFT JOIN tblChurches C ON C.Code = MB.Branch_Code
+        WHERE U.Usercode = :Usercode
+    """,
+)
+
+GET_USERS_DETAILS = register_query(
+    "user.GET_USERS_DETAILS",
+    """
+        SELECT U.*, UR.Role_Code, UR.Level_Code, M.First_Name, M.Last_Name, M.Title, M.Title2, MB.Branch_Code, C.Name AS Branch_Name, UR.Status, UR.Status_By, UR.Status_Date
+        FROM tblUser U
+        LEFT JOIN tblUserRole UR ON UR.Usercode = U.Usercode
+        LEFT JOIN tblMember M ON M.Code = U.Usercode
+        LEFT JOIN tblMemberBranch MB ON MB.Member_Code = U.Usercode
+        LEFT JOIN tblChurches C ON C.Code = MB.Branch_Code
+        WHERE UR.Level_Code = :Level_Code
+    """,
+)
+
+ASSIGN_USER_ROLE = register_query(
+    "user.ASSIGN_USER_ROLE",
+    """
+        INSERT INTO tblUserRole
+            (Usercode, Role_Code, Level_Code, HeadChurch_Code)
+        VALUES
+            (:Usercode, :Role_Code, :Level_Code, :HeadChurch_Code)
+    """,
+)
+
+
+@traced_services
 class UserServices:
     """
     User Service methods
     - Create User From Member
+    - Create Users From Members (bulk)
+    - Resend User Activation
     - Get User Details by Usercode
     - Get Users Details
     - Assign User Role Access
@@ -99,14 +311,7 @@ class UserServices:
             password_hash = AuthService().get_password_hash(new_password)
             # update is_user to create user
             self.db.execute(
-                text(
-                    """
-                    Update tblMember
-                    SET Is_User = :Is_User
-                    WHERE `Code` = :Usercode AND Is_Active = :Is_Active
-                        AND HeadChurch_Code = :HeadChurch_Code
-                    """
-                ),
+                CREATE_USER_FROM_MEMBER_UPDATE,
                 dict(
                     Is_User=1,
                     Usercode=member_code,
@@ -117,14 +322,7 @@ class UserServices:
             self.db.commit()
             # insert new user
             self.db.execute(
-                text(
-                    """
-                    INSERT INTO tblUser
-                        (Usercode, Email, Password, Is_Member, Church_Code, HeadChurch_Code)
-                    VALUES
-                        (:Usercode, :Email, :Password, :HeadChurch_Code)
-                    """
-                ),
+                CREATE_USER_FROM_MEMBER_INSERT_1,
                 dict(
                     Usercode=user.Code,
                     Email=user.Personal_Email,
@@ -137,14 +335,7 @@ class UserServices:
             self.db.commit()
             # assign user role
             self.db.execute(
-                text(
-                    """
-                    INSERT INTO tblUserRole
-                        (Usercode, Role_Code, Level_Code, HeadChurch_Code)
-                    VALUES
-                        (:Usercode, :Role_Code, :Level_Code, :HeadChurch_Code)
-                    """
-                ),
+                CREATE_USER_FROM_MEMBER_INSERT_2,
                 dict(
                     Usercode=user.Code,
                     Role_Code=role_code.upper(),
@@ -158,16 +349,212 @@ class UserServices:
             self.db.rollback()
             raise err
 
+    async def create_users_from_members(self, users: UsersFromMembersIn):
+        """
+        Create Users From Members (bulk): accessible to only church admins of same/higher level/church.
+        - the members are fetched and validated in one query; invalid members are skipped and reported
+        - access is checked once per church, the role and level codes once per batch
+        - users, user roles and activation tokens are inserted with executemany INSERTs, in one transaction
+        - no password is hashed here: each user sets one with the single-use activation token
+          sent in the welcome email (queued after the commit), see AuthService.activate_user
+        """
+        try:
+            head_code = self.current_user.Head_Code
+            check_role_code(users.Role_Code, self.db)
+            level_code = check_level_code(users.Level_Code, self.db, head_code)
+            level = get_level(level_code, head_code, self.db)
+            role_code = users.Role_Code.upper()
+            church_code = users.Church_Code.upper() if users.Church_Code else None
+
+            codes = list(dict.fromkeys(code.upper() for code in users.Member_Codes))
+            members = {
+                member.Code.upper(): member
+                for member in self.db.execute(
+                    GET_MEMBERS_FOR_USERS,
+                    dict(Codes=codes, Head_Code=head_code, Is_Active=1),
+                ).all()
+            }
+            skipped, new_users = {}, []
+            for code in codes:
+                member = members.get(code)
+                if member is None:
+                    skipped[code] = "Member not found"
+                elif member.Usercode is not None:
+                    skipped[code] = "Member is already a user"
+                elif member.Is_Active == 0:
+                    skipped[code] = "Member is inactive"
+                elif member.Branch_Code is None:
+                    skipped[code] = "Member does not have a branch"
+                elif member.Personal_Email is None:
+                    skipped[code] = "Member has no personal email address"
+                else:
+                    new_users.append(member)
+            if not new_users:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="No members to create as users: "
+                    + "; ".join(f"{code}: {reason}" for code, reason in skipped.items()),
+                )
+            # set user access on each church the role is granted for
+            for code in {church_code or member.Branch_Code for member in new_users}:
+                set_user_access(
+                    self.current_user_access,
+                    head_code=head_code,
+                    church_code=code,
+                    level_no=level.Level_No,
+                    role_code=["ADM", "SAD"],
+                    access_type=["ED", "CR"],
+                )
+
+            # activation tokens: only their hashes are stored
+            tokens = {member.Code: token_urlsafe(32) for member in new_users}
+            expires_date = datetime.now() + timedelta(
+                hours=settings.user_activation_expire_hours
+            )
+            created_by = self.current_user.Usercode
+            self.db.execute(
+                CREATE_USERS_FROM_MEMBERS_INSERT_1,
+                [
+                    dict(
+                        Usercode=member.Code,
+                        Email=member.Personal_Email,
+                        Is_Member=1,
+                        Is_Active=0,
+                        Head_Code=head_code,
+                        Created_By=created_by,
+                    )
+                    for member in new_users
+                ],
+            )
+            self.db.execute(
+                CREATE_USERS_FROM_MEMBERS_INSERT_2,
+                [
+                    dict(
+                        Usercode=member.Code,
+                        Role_Code=role_code,
+                        Level_Code=level_code,
+                        Church_Code=church_code or member.Branch_Code,
+                        Head_Code=head_code,
+                        Created_By=created_by,
+                    )
+                    for member in new_users
+                ],
+            )
+            self.db.execute(
+                INSERT_USER_ACTIVATION,
+                [
+                    dict(
+                        Usercode=member.Code,
+                        Token_Hash=hash_activation_token(tokens[member.Code]),
+                        Expires_Date=expires_date,
+                        Head_Code=head_code,
+                        Created_By=created_by,
+                    )
+                    for member in new_users
+                ],
+            )
+            self.db.execute(
+                CREATE_USERS_FROM_MEMBERS_UPDATE,
+                dict(
+                    Is_User=1,
+                    Codes=[member.Code for member in new_users],
+                    Head_Code=head_code,
+                ),
+            )
+            self.db.commit()
+        except Exception as err:
+            self.db.rollback()
+            raise err
+
+        # queue the welcome emails (sent in the background by the mail queue)
+        email_failed = []
+        for member in new_users:
+            try:
+                mail_queue.enqueue(
+                    welcome_message(member, tokens[member.Code], expires_date)
+                )
+            except (HTTPException, RuntimeError) as err:
+                print(f"Welcome email to '{member.Code}' not queued: {err}")
+                email_failed.append(member.Code)
+        return dict(
+            Role_Code=role_code,
+            Level_Code=level_code,
+            Created=len(new_users),
+            Usercodes=[member.Code for member in new_users],
+            Skipped=skipped,
+            Email_Failed=email_failed,
+        )
+
+    async def resend_user_activation(self, usercode: str):
+        """
+        Resend User Activation (re-issue): accessible to only church admins of same/higher level/church.
+        - for users created without a password (create_users_from_members) who have not activated yet
+        - the unused activation tokens of the user are replaced by a new one, and the welcome email is queued again
+        """
+        try:
+            head_code = self.current_user.Head_Code
+            user = self.db.execute(
+                GET_USER_FOR_ACTIVATION,
+                dict(Usercode=usercode.upper(), Head_Code=head_code),
+            ).first()
+            if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"User: '{usercode.upper()}' not found",
+                )
+            if user.Password is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"User: '{user.Usercode}' is already activated",
+                )
+            if user.Personal_Email is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"User: '{user.Usercode}' has no personal email address",
+                )
+            # set user access on the church the user's role is granted for
+            level = get_level(user.Level_Code, head_code, self.db)
+            set_user_access(
+                self.current_user_access,
+                head_code=head_code,
+                church_code=user.Church_Code,
+                level_no=level.Level_No,
+                role_code=["ADM", "SAD"],
+                access_type=["ED", "CR"],
+            )
+            # replace the user's activation token: only its hash is stored
+            token = token_urlsafe(32)
+            expires_date = datetime.now() + timedelta(
+                hours=settings.user_activation_expire_hours
+            )
+            self.db.execute(
+                DELETE_USER_ACTIVATION,
+                dict(Usercode=user.Usercode, Head_Code=head_code),
+            )
+            self.db.execute(
+                INSERT_USER_ACTIVATION,
+                dict(
+                    Usercode=user.Usercode,
+                    Token_Hash=hash_activation_token(token),
+                    Expires_Date=expires_date,
+                    Head_Code=head_code,
+                    Created_By=self.current_user.Usercode,
+                ),
+            )
+            self.db.commit()
+        except Exception as err:
+            self.db.rollback()
+            raise err
+
+        # queue the welcome email (sent in the background by the mail queue)
+        mail_queue.enqueue(welcome_message(user, token, expires_date))
+        return user.Usercode
+
     async def get_user(self, usercode: str):
         """Get User: accessible to only church admins of same/higher level/church."""
         try:
             user = self.db.execute(
-                text(
-                    """
-                    SELECT * FROM tblUser
-                    WHERE Usercode = :Usercode
-                    """
-                ),
+                GET_USER,
                 dict(Usercode=usercode),
             ).first()
             return user
@@ -178,94 +565,21 @@ class UserServices:
         self, level_code: str, usercode: Optional[str] = None
     ):
         try:
-            if usercode:
-                user = await self.get_user(usercode)
-                user_submodules = (
-                    self.db.execute(
-                        text(
-                            """
-                            SELECT B.Submodule_Code, C.SubModule AS Submodule_Name, B.Module_Code, D.Module AS Module_Name, HL.Level_Code, HL.ChurchLevel_Code, HL.Church_Level, B.Access_Type,  A.Is_Active, A.Status
-                            FROM tblUserRole U
-                            INNER JOIN tblUserRoleSubModule A ON A.UserRole_Code = U.Code
-                            LEFT JOIN dfSubModuleAccess B ON B.Code = A.SubModuleAccess_Code
-                            LEFT JOIN dfSubModules C ON C.Code = B.SubModule_Code
-                            LEFT JOIN dfModules D ON D.Code = B.Module_Code
-                            LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = U.Level_Code
-                            WHERE U.Usercode = :Usercode AND U.Level_Code = :Level_Code
-                                AND HL.Head_Code = :Head_Code AND HL.Is_Active = :Is_Active
-                            """
-                        ),
-                        dict(
-                            Usercode=user.Usercode,
-                            Level_Code=level_code,
-                            Head_Code=user.HeadChurch_Code,
-                            Is_Active=1,
-                        ),
-                    ).all()
-                    if level_code != "CHU"
-                    else self.db.execute(
-                        text(
-                            """
-                            SELECT B.Submodule_Code, C.SubModule AS Submodule_Name, B.Module_Code, D.Module AS Module_Name, HL.Level_Code, HL.ChurchLevel_Code, HL.Church_Level, B.Access_Type,  A.Is_Active, A.Status
-                            FROM tblUserRole U
-                            INNER JOIN tblUserRoleSubModule A ON A.UserRole_Code = U.Code
-                            LEFT JOIN dfSubModuleAccess B ON B.Code = A.SubModuleAccess_Code
-                            LEFT JOIN dfSubModules C ON C.Code = B.SubModule_Code
-                            LEFT JOIN dfModules D ON D.Code = B.Module_Code
-                            LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = U.Level_Code
-                            WHERE U.Usercode = :Usercode
-                                AND HL.Head_Code = :Head_Code AND HL.Is_Active = :Is_Active
-                            """
-                        ),
-                        dict(
-                            Usercode=user.Usercode,
-                            Head_Code=user.HeadChurch_Code,
-                            Is_Active=1,
-                        ),
-                    ).all()
-                )
-            else:
-                user_submodules = (
-                    self.db.execute(
-                        text(
-                            """
-                            SELECT B.Submodule_Code, C.SubModule AS Submodule_Name, B.Module_Code, D.Module AS Module_Name, HL.Level_Code, HL.ChurchLevel_Code, HL.Church_Level, B.Access_Type,  A.Is_Active, A.Status
-                            FROM tblUserRole U
-                            INNER JOIN tblUserRoleSubModule A ON A.UserRole_Code = U.Code
-                            LEFT JOIN dfSubModuleAccess B ON B.Code = A.SubModuleAccess_Code
-                            LEFT JOIN dfSubModules C ON C.Code = B.SubModule_Code
-                            LEFT JOIN dfModules D ON D.Code = B.Module_Code
-                            LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = U.Level_Code
-                            WHERE U.Level_Code = :Level_Code
-                                AND HL.Head_Code = :Head_Code AND HL.Is_Active = :Is_Active
-                            """
-                        ),
-                        dict(
-                            Level_Code=level_code,
-                            Head_Code=self.current_user.HeadChurch_Code,
-                            Is_Active=1,
-                        ),
-                    ).all()
-                    if level_code != "CHU"
-                    else self.db.execute(
-                        text(
-                            """
-                            SELECT B.Submodule_Code, C.SubModule AS Submodule_Name, B.Module_Code, D.Module AS Module_Name, HL.Level_Code, HL.ChurchLevel_Code, HL.Church_Level, B.Access_Type,  A.Is_Active, A.Status
-                            FROM tblUserRole U
-                            INNER JOIN tblUserRoleSubModule A ON A.UserRole_Code = U.Code
-                            LEFT JOIN dfSubModuleAccess B ON B.Code = A.SubModuleAccess_Code
-                            LEFT JOIN dfSubModules C ON C.Code = B.SubModule_Code
-                            LEFT JOIN dfModules D ON D.Code = B.Module_Code
-                            LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = U.Level_Code
-                            WHERE HL.Head_Code = :Head_Code AND HL.Is_Active = :Is_Active
-                            """
-                        ),
-                        dict(
-                            Head_Code=self.current_user.HeadChurch_Code,
-                            Is_Active=1,
-                        ),
-                    ).all()
-                )
+            user = await self.get_user(usercode) if usercode else None
+            # level filter is not applied for the CHU (head church) level
+            user_submodules = USER_SUBMODULES.execute(
+                self.db,
+                dict(
+                    Usercode=user.Usercode if user else None,
+                    Level_Code=level_code if level_code != "CHU" else None,
+                    Head_Code=(
+                        user.HeadChurch_Code
+                        if user
+                        else self.current_user.HeadChurch_Code
+                    ),
+                    Is_Active=1,
+                ),
+            ).all()
             return user_submodules
         except Exception as err:
             raise err
@@ -282,82 +596,17 @@ class UserServices:
 
     async def get_user_roles(self, level_code: str, usercode: Optional[str] = None):
         try:
-            if usercode:
-                user = await self.get_user(usercode)
-                user_roles = (
-                    self.db.execute(
-                        text(
-                            """
-                            SELECT UR.Role_Code, R.Role AS Role_Name, HL.Level_Code, HL.ChurchLevel_Code, HL.Church_Level,  UR.Is_Active, UR.Status
-                            FROM tblUserRole UR
-                            LEFT JOIN dfRole R ON R.Code = UR.Role_Code
-                            LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = UR.Level_Code
-                            WHERE UR.Usercode = :Usercode AND UR.Level_Code = :Level_Code
-                                AND HL.Head_Code = :Head_Code AND HL.Is_Active = :Is_Active
-                            """
-                        ),
-                        dict(
-                            Usercode=user.Usercode,
-                            Level_Code=level_code,
-                            Head_Code=self.current_user.HeadChurch_Code,
-                            Is_Active=1,
-                        ),
-                    ).all()
-                    if level_code != "CHU"
-                    else self.db.execute(
-                        text(
-                            """
-                            SELECT UR.Role_Code, R.Role AS Role_Name, HL.Level_Code, HL.ChurchLevel_Code, HL.Church_Level,  UR.Is_Active, UR.Status
-                            FROM tblUserRole UR
-                            LEFT JOIN dfRole R ON R.Code = UR.Role_Code
-                            LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = UR.Level_Code
-                            WHERE UR.Usercode = :Usercode
-                                AND HL.Head_Code = :Head_Code AND HL.Is_Active = :Is_Active
-                            """
-                        ),
-                        dict(
-                            Usercode=user.Usercode,
-                            Head_Code=self.current_user.HeadChurch_Code,
-                            Is_Active=1,
-                        ),
-                    ).all()
-                )
-            else:
-                user_roles = (
-                    self.db.execute(
-                        text(
-                            """
-                            SELECT UR.Role_Code, R.Role AS Role_Name, HL.Level_Code, HL.ChurchLevel_Code, HL.Church_Level,  UR.Is_Active, UR.Status
-                            FROM tblUserRole UR
-                            LEFT JOIN dfRole R ON R.Code = UR.Role_Code
-                            LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = UR.Level_Code
-                            WHERE UR.Level_Code = :Level_Code
-                                AND HL.Head_Code = :Head_Code AND HL.Is_Active = :Is_Active
-                            """
-                        ),
-                        dict(
-                            Level_Code=level_code,
-                            Head_Code=self.current_user.HeadChurch_Code,
-                            Is_Active=1,
-                        ),
-                    ).all()
-                    if level_code != "CHU"
-                    else self.db.execute(
-                        text(
-                            """
-                            SELECT UR.Role_Code, R.Role AS Role_Name, HL.Level_Code, HL.ChurchLevel_Code, HL.Church_Level,  UR.Is_Active, UR.Status
-                            FROM tblUserRole UR
-                            LEFT JOIN dfRole R ON R.Code = UR.Role_Code
-                            LEFT JOIN tblHeadChurchLevels HL ON HL.Level_Code = UR.Level_Code
-                            WHERE HL.Head_Code = :Head_Code AND HL.Is_Active = :Is_Active
-                            """
-                        ),
-                        dict(
-                            Head_Code=self.current_user.HeadChurch_Code,
-                            Is_Active=1,
-                        ),
-                    ).all()
-                )
+            user = await self.get_user(usercode) if usercode else None
+            # level filter is not applied for the CHU (head church) level
+            user_roles = USER_ROLES.execute(
+                self.db,
+                dict(
+                    Usercode=user.Usercode if user else None,
+                    Level_Code=level_code if level_code != "CHU" else None,
+                    Head_Code=self.current_user.HeadChurch_Code,
+                    Is_Active=1,
+                ),
+            ).all()
             return user_roles
         except Exception as err:
             raise err
@@ -379,17 +628,7 @@ class UserServices:
 
             # fetch user details
             user_details_row = self.db.execute(
-                text(
-                    """
-                    SELECT U.*, UR.Role_Code, UR.Level_Code, M.First_Name, M.Last_Name, M.Title, M.Title2, MB.Branch_Code, C.Name AS Branch_Name, UR.Status, UR.Status_By, UR.Status_Date
-                    FROM tblUser U
-                    LEFT JOIN tblUserRole UR ON UR.Usercode = U.Usercode
-                    LEFT JOIN tblMember M ON M.Code = U.Usercode
-                    LEFT JOIN tblMemberBranch MB ON MB.Member_Code = U.Usercode
-                    LEFT JOIN tblChurches C ON C.Code = MB.Branch_Code
-                    WHERE U.Usercode = :Usercode
-                    """
-                ),
+                GET_USER_DETAILS,
                 dict(Usercode=user.Usercode),
             ).first()
             # check if user exists
@@ -441,17 +680,7 @@ class UserServices:
 
             # fetch user details
             users_details_row = self.db.execute(
-                text(
-                    """
-                    SELECT U.*, UR.Role_Code, UR.Level_Code, M.First_Name, M.Last_Name, M.Title, M.Title2, MB.Branch_Code, C.Name AS Branch_Name, UR.Status, UR.Status_By, UR.Status_Date
-                    FROM tblUser U
-                    LEFT JOIN tblUserRole UR ON UR.Usercode = U.Usercode
-                    LEFT JOIN tblMember M ON M.Code = U.Usercode
-                    LEFT JOIN tblMemberBranch MB ON MB.Member_Code = U.Usercode
-                    LEFT JOIN tblChurches C ON C.Code = MB.Branch_Code
-                    WHERE UR.Level_Code = :Level_Code
-                    """
-                ),
+                GET_USERS_DETAILS,
                 dict(Level_Code=level_code),
             ).all()
             # check if user exists
@@ -507,14 +736,7 @@ class UserServices:
 
             # assign user role
             self.db.execute(
-                text(
-                    """
-                    INSERT INTO tblUserRole 
-                        (Usercode, Role_Code, Level_Code, HeadChurch_Code)
-                    VALUES 
-                        (:Usercode, :Role_Code, :Level_Code, :HeadChurch_Code)
-                    """
-                ),
+                ASSIGN_USER_ROLE,
                 dict(
                     Usercode=usercode,
                     Role_Code=role_code,
@@ -523,12 +745,33 @@ class UserServices:
                 ),
             )
             self.db.commit()
+            response_cache.invalidate("bootstrap", self.current_user.Head_Code)
+            # the user's grants changed: the memoised identities are re-checked
+            response_cache.invalidate(AUTH_NAMESPACE, self.current_user.Head_Code)
             return await self.get_user_details(usercode, level_code)
         except Exception as err:
             self.db.rollback()
             raise err
 
 
+def welcome_message(member, token: str, expires_date: datetime):
+    """Welcome email of a user created from a member, with the activation link."""
+    template = f"""
+        Hello {member.First_Name} {member.Last_Name}, welcome to ChMS!
+
+        Your username is {member.Code}.
+        Please activate your account and set your password with the link below
+        (valid until {expires_date:%Y-%m-%d %H:%M}).
+
+        {settings.user_activation_url}?token={token}
+        """
+    return build_message(
+        subject="Welcome to ChurchMan Church Management System",
+        recipients=[member.Personal_Email],
+        body=template,
+    )
+
+
 def get_user_services(
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
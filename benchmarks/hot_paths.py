@@ -0,0 +1,319 @@
+"""
+Hot path micro-benchmarks
+- Times the functions run on every request, with realistic inputs:
+    set_user_access:          access lists of 10, 100 and 1,000 grants (granted on the last one, and denied)
+    route_permission:         same checks, with the grants, indexed per request (api/common/permissions.py)
+    custom_title_case:        member names and addresses
+    get_phonenumber:          warm and cold phone number cache
+    generate_endpoint_code:   route names
+    extract_submodule:        router tags (api/swagger_doc.py)
+    create/verify_access_token
+    MemberIn:                 validation of member payloads
+    MemberResponse:           validation of 100 and 1,000 member rows
+- Each case is timed with timeit (auto-ranged loops, best of --repeat), in ns per operation
+- Compares with the stored baselines (benchmarks/baselines.json) and flags the cases
+  slower or faster than --threshold; --save stores the results as the new baselines
+
+Usage:
+    python benchmarks/hot_paths.py                          # run and compare with the baselines
+    python benchmarks/hot_paths.py --save                   # store the results as the baselines
+    python benchmarks/hot_paths.py --filter set_user_access --repeat 7
+    python benchmarks/hot_paths.py --json report.json --fail-on-regression   # CI
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from fastapi import HTTPException  # type: ignore
+
+from api.authentication.models.auth import UserAccess
+from api.authentication.services.auth import AuthService
+from api.common.permissions import AccessIndex, PermissionSpec
+from api.common.phone import _normalise
+from api.common.utils import (
+    custom_title_case,
+    extract_submodule,
+    generate_endpoint_code,
+    get_phonenumber,
+    set_user_access,
+)
+from api.membership_mgmt.models.members import MemberIn, MemberResponse
+from api.swagger_doc import tags
+
+BASELINES = os.path.join(BENCHMARKS_DIR, "baselines.json")
+
+FIRST_NAMES = ["JOHN", "mary", "David", "grace", "SAMUEL", "esther", "Chinedu", "ngozi", "Osagie", "aisha"]
+LAST_NAMES = ["okafor", "ADEYEMI", "Okonkwo", "bello", "eze", "IGBINEDION", "nwosu", "Ojo"]
+STREETS = ["sapele road", "AIRPORT ROAD", "ugbowo lagos express way", "new BENIN market", "plot 5 UNIBEN quarters"]
+ROUTE_NAMES = [
+    "Get All Members", "Get Members by Church", "Update Current User Member", "Search Members",
+    "Get Branches by Church Lead", "Create Users From Members", "Get Churches by Level",
+    "Approve Church by Code", "Re-Authenticate User", "Get Job/Status by Id",
+]
+ROLES = ["SAD", "ADM", "MBR"]
+MODULES = {"CHAD": ["HIER", "HEAD", "CHUR", "LEAD", "STAT"], "MBSM": ["MBRS", "MBRN", "MGRP"], "USRM": ["USAD"]}
+ACCESS_TYPES = ["CR", "VW", "ED", "AR", "DL"]
+LEVELS = [("CHU", 10), ("PRV", 9), ("DIO", 8), ("ZON", 5), ("PAR", 3), ("BRN", 1)]
+
+
+def phone_number(rnd: random.Random) -> str:
+    return f"+234 {rnd.choice(['803', '813', '703', '903'])} {rnd.randint(100, 999)} {rnd.randint(1000, 9999)}"
+
+
+def user_accesses(rnd: random.Random, count: int) -> list:
+    """count grants of a user across churches; the one checked by the benchmark is the last."""
+    accesses = []
+    for index in range(count - 1):
+        module = rnd.choice(list(MODULES))
+        level, level_no = rnd.choice(LEVELS)
+        accesses.append(
+            UserAccess(
+                Role_Code=rnd.choice(ROLES[1:]),
+                Hierarchy_Code=level,
+                Level_No=level_no,
+                Level_Code=level,
+                Church_Code=f"S001{level}{index:05d}",
+                Head_Code="S001",
+                Module_Code=module,
+                SubModule_Code=rnd.choice(MODULES[module]),
+                Access_Type=rnd.choice(ACCESS_TYPES[:2]),
+            )
+        )
+    accesses.append(
+        UserAccess(
+            Role_Code="ADM", Hierarchy_Code="PAR", Level_No=3, Level_Code="PAR",
+            Church_Code="S001PAR99999", Head_Code="S001", Module_Code="MBSM",
+            SubModule_Code="MBRS", Access_Type="AR",
+        )
+    )
+    return accesses
+
+
+def member_payload(rnd: random.Random, index: int) -> dict:
+    first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+    return dict(
+        First_Name=first,
+        Middle_Name=rnd.choice(FIRST_NAMES),
+        Last_Name=last,
+        Title=rnd.choice(["mr", "MRS", "dr", None]),
+        Family_Name=last,
+        Home_Address=f"{rnd.randint(1, 200)} {rnd.choice(STREETS)}",
+        Date_of_Birth=str(date(1950, 1, 1) + timedelta(days=rnd.randrange(20_000))),
+        Gender=rnd.choice("MF"),
+        Marital_Status="MAR",
+        Employ_Status="EMPD",
+        Occupation="teacher",
+        State_of_Origin="EDO",
+        Country_of_Origin="NIG",
+        Personal_Contact_No=phone_number(rnd),
+        Contact_No=phone_number(rnd),
+        Contact_Email=f"{first.lower()}.{last.lower()}{index}@example.com",
+        Town_Code="BEN",
+        State_Code="EDO",
+        Region_Code="SOUT",
+        Country_Code="NIG",
+        Type="MBR",
+        Branch_Code="S001BRN00001",
+        Join_Date="2015-06-01T00:00:00",
+        Join_Code="NEW",
+    )
+
+
+def member_row(rnd: random.Random, index: int) -> dict:
+    """A member as read from tblMember (already normalised)."""
+    payload = member_payload(rnd, index)
+    payload.update(
+        Code=f"S001M{index:07d}",
+        First_Name=payload["First_Name"].title(),
+        Last_Name=payload["Last_Name"].title(),
+        Family_Name=payload["Family_Name"].title(),
+        Personal_Contact_No="+2348031234567",
+        Contact_No="+2348031234567",
+        Join_Date=datetime(2015, 6, 1),
+        HeadChurch_Code="S001",
+        Is_Active=True,
+        Created_Date=datetime(2015, 6, 1, 10, 30),
+        Created_By="SEED",
+        Id=index,
+    )
+    return payload
+
+
+def get_cases(seed: int) -> dict:
+    """name -> (operations per call, function)."""
+    rnd = random.Random(seed)
+    cases = {}
+
+    def access_case(accesses, **kwargs):
+        def run():
+            try:
+                set_user_access(accesses, **kwargs)
+            except HTTPException:
+                pass
+
+        return run
+
+    def permission_case(accesses, spec):
+        # the access index is built per request: part of the check
+        return lambda: AccessIndex(accesses).allows(spec, "S001")
+
+    for count in (10, 100, 1000):
+        accesses = user_accesses(rnd, count)
+        checks = dict(
+            head_code="S001", role_code=["SAD", "ADM"], module_code=["ALLM", "MBSM"],
+            submodule_code=["ALLS", "MBRS"], access_type=["AR"],
+        )
+        for outcome, access_type in (("granted", ["AR"]), ("denied", ["DL"])):
+            checks["access_type"] = access_type
+            cases[f"set_user_access[{count} grants, {outcome}]"] = (1, access_case(accesses, **checks))
+            spec = PermissionSpec(**{name: value for name, value in checks.items() if name != "head_code"})
+            cases[f"route_permission[{count} grants, {outcome}]"] = (1, permission_case(accesses, spec))
+
+    names = [
+        f"{rnd.choice(FIRST_NAMES)} {rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}" for _ in range(50)
+    ] + [f"{rnd.randint(1, 200)} {rnd.choice(STREETS)}" for _ in range(50)]
+    cases["custom_title_case"] = (len(names), lambda: [custom_title_case(name) for name in names])
+
+    numbers = [phone_number(rnd) for _ in range(100)]
+    warm = [get_phonenumber(number) for number in numbers]
+    cases["get_phonenumber[warm cache]"] = (len(warm), lambda: [get_phonenumber(number) for number in numbers])
+
+    def cold_phonenumbers():
+        _normalise.cache_clear()
+        return [get_phonenumber(number) for number in numbers]
+
+    cases["get_phonenumber[cold cache]"] = (len(numbers), cold_phonenumbers)
+
+    cases["generate_endpoint_code"] = (
+        len(ROUTE_NAMES), lambda: [generate_endpoint_code(name) for name in ROUTE_NAMES]
+    )
+    router_names = [f"{tag['module']}: {tag['submodule']}" for tag in tags.values()]
+    cases["extract_submodule"] = (
+        len(router_names), lambda: [extract_submodule(name) for name in router_names]
+    )
+
+    auth = AuthService()
+    token = auth.create_access_token(dict(usercode="S001M0000042", church_level="PAR"))
+    cases["create_access_token"] = (
+        1, lambda: auth.create_access_token(dict(usercode="S001M0000042", church_level="PAR"))
+    )
+    cases["verify_access_token"] = (1, lambda: auth.verify_access_token(token))
+
+    payloads = [member_payload(rnd, index) for index in range(100)]
+    cases["MemberIn"] = (len(payloads), lambda: [MemberIn(**payload) for payload in payloads])
+    for count in (100, 1000):
+        rows = [member_row(rnd, index) for index in range(count)]
+        cases[f"MemberResponse[{count} rows]"] = (
+            1, lambda rows=rows: MemberResponse(status_code=200, message="", data=rows)
+        )
+    return cases
+
+
+def measure(func, operations: int, repeat: int) -> float:
+    """Best ns per operation over repeat runs of auto-ranged loops (at least 0.2s each)."""
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat, loops)) / loops / operations * 1e9
+
+
+def environment() -> dict:
+    return dict(
+        python=platform.python_version(),
+        machine=platform.machine(),
+        processor=platform.processor() or platform.machine(),
+        system=platform.system(),
+        date=datetime.now().isoformat(timespec="seconds"),
+    )
+
+
+def compare(results: dict, baselines: dict, threshold: float) -> dict:
+    """name -> (baseline ns or None, ratio or None, verdict)."""
+    report = {}
+    for name, ns in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            report[name] = (None, None, "new")
+            continue
+        ratio = ns / baseline
+        if ratio > 1 + threshold:
+            verdict = "SLOWER"
+        elif ratio < 1 / (1 + threshold):
+            verdict = "faster"
+        else:
+            verdict = "same"
+        report[name] = (baseline, ratio, verdict)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hot path micro-benchmarks")
+    parser.add_argument("--filter", default="", help="only the cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--save", action="store_true", help="store the results as the baselines")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change flagged (0.2: 20%%)")
+    parser.add_argument("--json", help="write the results and comparison to this file")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if a case is SLOWER")
+    args = parser.parse_args(argv)
+
+    cases = {name: case for name, case in get_cases(args.seed).items() if args.filter in name}
+    stored = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as file:
+            stored = json.load(file)
+    baselines = stored.get("results", {})
+    if stored and stored.get("environment", {}).get("python") != platform.python_version():
+        print(f"Note: the baselines were measured on Python {stored['environment'].get('python')}\n")
+
+    results = {}
+    for name, (operations, func) in cases.items():
+        results[name] = measure(func, operations, args.repeat)
+    report = compare(results, baselines, args.threshold)
+
+    print(f"{'case':<42}{'ns/op':>12}{'baseline':>12}{'ratio':>8}  verdict")
+    for name, ns in results.items():
+        baseline, ratio, verdict = report[name]
+        print(
+            f"{name:<42}{ns:>12,.0f}{'' if baseline is None else f'{baseline:,.0f}':>12}"
+            f"{'' if ratio is None else f'x{ratio:.2f}':>8}  {verdict}"
+        )
+    regressions = [name for name, (_baseline, _ratio, verdict) in report.items() if verdict == "SLOWER"]
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(
+                dict(
+                    environment=environment(),
+                    threshold=args.threshold,
+                    cases={
+                        name: dict(ns_per_op=round(results[name], 1), baseline=baseline, ratio=ratio, verdict=verdict)
+                        for name, (baseline, ratio, verdict) in report.items()
+                    },
+                ),
+                file,
+                indent=2,
+            )
+    if args.save:
+        # keep the baselines of the cases not run (--filter)
+        baselines.update({name: round(ns, 1) for name, ns in results.items()})
+        with open(args.baselines, "w") as file:
+            json.dump(dict(environment=environment(), results=baselines), file, indent=2)
+            file.write("\n")
+        print(f"\nBaselines saved to {args.baselines}")
+    elif regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baselines by more than {args.threshold:.0%}")
+    return 1 if args.fail_on_regression and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Phone number validation benchmark
+- Generates N member records (default 100k) with 3 phone fields each, drawn from a pool of
+  repeated numbers in mixed formats (as in real imports: family/branch numbers repeat)
+- Measures the throughput of:
+    baseline: phonenumbers parse + format per field (the previous get_phonenumber)
+    memoised: get_phonenumber (LRU cache on (raw, region)), cold and warm cache
+    batch:    normalise_phonenumbers per column
+    model:    MemberUpdate validation of the records
+
+Usage:
+    python benchmarks/phone_validation.py [--records 100000] [--distinct 20000] [--seed 42]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from phonenumbers import PhoneNumberFormat, format_number, parse  # type: ignore
+
+from api.common.phone import _normalise, normalise_phonenumbers, phonenumber_cache_info
+from api.common.utils import get_phonenumber
+from api.membership_mgmt.models.members import MemberUpdate
+
+PHONE_FIELDS = ("Personal_Contact_No", "Contact_No", "Contact_No2")
+FORMATS = ("+234{0}", "+234 {1} {2} {3}", "+234-{1}-{2}-{3}", "+234 ({1}) {2}{3}")
+
+
+def generate_records(count: int, distinct: int, seed: int):
+    rnd = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        number = f"{rnd.choice(['80', '81', '70', '90'])}{rnd.randint(10_000_000, 99_999_999)}"
+        parts = (number, number[:3], number[3:6], number[6:])
+        pool.append(rnd.choice(FORMATS).format(*parts))
+    return [
+        dict(
+            First_Name=f"first {index}",
+            Last_Name=f"last {index}",
+            **{field: rnd.choice(pool) for field in PHONE_FIELDS},
+        )
+        for index in range(count)
+    ]
+
+
+def timed(label: str, count: int, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:8.3f}s  {count / elapsed:12,.0f} records/s")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Phone number validation benchmark")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    records = generate_records(args.records, args.distinct, args.seed)
+    print(
+        f"{args.records:,} records, {len(PHONE_FIELDS)} phone fields each, "
+        f"{args.distinct:,} distinct numbers\n"
+    )
+
+    def baseline():
+        for record in records:
+            for field in PHONE_FIELDS:
+                format_number(parse(record[field]), PhoneNumberFormat.E164)
+
+    def memoised():
+        for record in records:
+            for field in PHONE_FIELDS:
+                get_phonenumber(record[field])
+
+    def batch():
+        for field in PHONE_FIELDS:
+            normalise_phonenumbers(record[field] for record in records)
+
+    def model():
+        for record in records:
+            MemberUpdate(**record)
+
+    results = {}
+    results["baseline"] = timed("baseline (no cache)", args.records, baseline)
+    _normalise.cache_clear()
+    results["memoised cold"] = timed("memoised (cold cache)", args.records, memoised)
+    results["memoised warm"] = timed("memoised (warm cache)", args.records, memoised)
+    _normalise.cache_clear()
+    results["batch"] = timed("batch (cold cache)", args.records, batch)
+    results["model"] = timed("MemberUpdate model", args.records, model)
+    print(f"\ncache: {phonenumber_cache_info()}")
+    print(
+        f"speed-up vs baseline: memoised cold x{results['baseline'] / results['memoised cold']:.1f}, "
+        f"warm x{results['baseline'] / results['memoised warm']:.1f}, "
+        f"batch x{results['baseline'] / results['batch']:.1f}"
+    )
+    return results
+
+
+if __name__ == "__main__":
+    main()
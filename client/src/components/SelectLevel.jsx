@@ -33,7 +33,8 @@ const SelectLevel = () => {
             headers: { "Authorization": `Bearer ${token}` }
         };
 
-        fetch(`${baseUrl}/auth/user_levels/me`, requestOptions)
+        // user, church levels, access and member profile in one request
+        fetch(`${baseUrl}/auth/bootstrap`, requestOptions)
             .then(response => {
                 if (!response.ok) {
                     throw new Error('Network response was not ok');
@@ -42,7 +43,7 @@ const SelectLevel = () => {
             })
             .then(data => {
                 console.log(data);
-                setChurchLevels(data); // Update state with received data
+                setChurchLevels(data.data.levels); // Update state with received data
                 setShow(true);
             })
             .catch(error => console.error('Error fetching data:', error));
@@ -0,0 +1,752 @@
+"""
+Index Advisor
+- Collects the SQL texts used by the service modules
+- Runs EXPLAIN on each of them against a database (optional)
+- Reports full table scans and filesorts
+- Generates the next numbered migration with the composite indexes the recurring predicates still need,
+  and drops the indexes made redundant by a longer index or a primary/unique key
+
+Usage:
+    python index_advisor.py                              # static analysis + migration only
+    python index_advisor.py --explain                    # also EXPLAIN against the .env database
+    python index_advisor.py --explain --url <db url> --fail-on-scan   # CI, seeded stand-in database
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from itertools import combinations
+from dataclasses import dataclass, field
+from glob import glob
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# modules holding the application SQL texts
+SOURCE_GLOBS = [
+    "api/*/services/*.py",
+    "api/common/utils.py",
+    "api/common/dependencies.py",
+]
+
+# functions taking an SQL text -> position of the SQL argument
+SQL_FUNCTIONS = {"text": 0, "register_query": 1}
+
+# schema variables used as f-string prefixes in the services, e.g. {db_schema_headchu}.tblUsers
+SCHEMA_VARIABLES = {"db_schema_headchu", "db_schema_generic"}
+
+# statements EXPLAIN is run against
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# columns with few distinct values go last in a composite index
+LOW_CARDINALITY_COLUMNS = ["Head_Code", "Level_Code", "Is_Active", "Status"]
+
+# primary key columns, already indexed
+PRIMARY_KEY_COLUMNS = {"Id"}
+
+# primary/unique keys of the base tables (not created by the migrations);
+# with --explain, the keys are also read from the database (information_schema)
+BASE_TABLE_KEYS = {
+    "tblChurchHeads": [("Code",)],
+    "tblChurches": [("Code",)],
+    "tblHierarchy": [("Code",)],
+    "tblMember": [("Code",)],
+    "tblMembers": [("Code",)],
+    "tblUser": [("Usercode",)],
+    "tblUsers": [("Usercode",)],
+}
+
+# name of the generated migration: <number>_hot_predicate_indexes.sql
+MIGRATION_NAME = "hot_predicate_indexes"
+MIGRATION_NUMBER_RE = re.compile(r"^(\d+)_")
+
+SQL_KEYWORDS = {
+    "WHERE", "ON", "LEFT", "RIGHT", "INNER", "OUTER", "JOIN", "ORDER", "GROUP",
+    "LIMIT", "SET", "AND", "OR", "UNION", "AS", "USING", "HAVING",
+}
+
+TABLE_ALIAS_RE = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE)\s+`?(?:\w+`?\.`?)?(\w+)`?(?:\s+(?:AS\s+)?(\w+))?",
+    re.IGNORECASE,
+)
+EQUALITY_RE = re.compile(
+    r"(?:\b(\w+)\.)?`?(\w+)`?\s*(?:=\s*(?::\w+|'[^']*'|\d+)|IN\s*(?:\(|:\w+))",
+    re.IGNORECASE,
+)
+JOIN_ON_RE = re.compile(
+    r"\bJOIN\s+`?(?:\w+`?\.`?)?(\w+)`?\s+(?:AS\s+)?(\w+)\s+ON\s+(.+?)(?=\bLEFT\b|\bRIGHT\b|\bINNER\b|\bJOIN\b|\bWHERE\b|\bORDER\b|\bGROUP\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+WHERE_RE = re.compile(
+    r"\bWHERE\b(.+?)(?=\bORDER\s+BY\b|\bGROUP\s+BY\b|\bLIMIT\b|\bUNION\b|\)\s*$|;|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+BIND_PARAM_RE = re.compile(r"(?<![:\w]):(\w+)")
+# expanding params (register_query(..., expanding=...)): "IN :Codes"
+EXPANDING_PARAM_RE = re.compile(r"\bIN\s+:(\w+)", re.IGNORECASE)
+CREATE_TABLE_RE = re.compile(
+    r"\bCREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s*\((.*?)\);",
+    re.IGNORECASE | re.DOTALL,
+)
+ALTER_TABLE_RE = re.compile(
+    r"\bALTER\s+TABLE\s+`?(\w+)`?(.*?);",
+    re.IGNORECASE | re.DOTALL,
+)
+TABLE_KEY_RE = re.compile(
+    r"\b((?:FULLTEXT\s+|SPATIAL\s+)?(?:PRIMARY\s+KEY|UNIQUE(?:\s+KEY|\s+INDEX)?|INDEX|KEY))\s*(?:`?(\w+)`?\s*)?\(([^)]*)\)",
+    re.IGNORECASE,
+)
+CREATE_INDEX_RE = re.compile(
+    r"\bCREATE\s+(UNIQUE\s+)?INDEX\s+`?(\w+)`?\s+ON\s+`?(\w+)`?\s*\(([^)]*)\)",
+    re.IGNORECASE,
+)
+DROP_INDEX_RE = re.compile(
+    r"\bDROP\s+INDEX\s+`?(\w+)`?\s+ON\s+`?(\w+)`?",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class CollectedQuery:
+    path: str
+    line: int
+    function: str
+    sql: str
+
+    @property
+    def source(self):
+        return f"{self.path}:{self.line}"
+
+    @property
+    def label(self):
+        """Source without the line number, which changes with every edit of the module."""
+        return f"{self.path} ({self.function})"
+
+    @property
+    def statement_type(self):
+        return self.sql.lstrip().split(None, 1)[0].upper()
+
+
+@dataclass
+class IndexCandidate:
+    table: str
+    columns: tuple
+    sources: set = field(default_factory=set)
+    # the sources without line numbers, for the migration comments
+    labels: set = field(default_factory=set)
+
+    @property
+    def name(self):
+        name = "ix_" + self.table.replace("tbl", "", 1) + "_" + "_".join(self.columns)
+        return name[:64]
+
+    def ddl(self):
+        columns = ", ".join(f"`{column}`" for column in self.columns)
+        return f"CREATE INDEX {self.name} ON {self.table} ({columns});"
+
+
+@dataclass
+class RedundantIndex:
+    table: str
+    name: str
+    columns: tuple
+    reason: str
+
+    def ddl(self):
+        return f"DROP INDEX {self.name} ON {self.table};"
+
+
+def _module_constants(tree):
+    """Module level string constants, used to resolve f-string placeholders."""
+    constants = {}
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+    return constants
+
+
+def _resolve_sql(node, constants, schemas):
+    """Rebuilds the SQL text of a text() argument; returns None for dynamic SQL."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if not isinstance(node, ast.JoinedStr):
+        return None
+    parts = []
+    strip_dot = False
+    for value in node.values:
+        if isinstance(value, ast.Constant):
+            chunk = value.value
+            if strip_dot and chunk.startswith("."):
+                chunk = chunk[1:]
+            parts.append(chunk)
+            strip_dot = False
+        elif isinstance(value, ast.FormattedValue) and isinstance(value.value, ast.Name):
+            name = value.value.id
+            if name in SCHEMA_VARIABLES:
+                schema = schemas.get(name)
+                if schema:
+                    parts.append(schema)
+                else:
+                    strip_dot = True
+            elif name in constants:
+                parts.append(constants[name])
+            else:
+                return None
+        else:
+            return None
+    return "".join(parts)
+
+
+def _resolve_predicate(node, constants, schemas):
+    """SQL of a filter predicate: a string, an f-string or a module level constant."""
+    if isinstance(node, ast.Name) and node.id in constants:
+        return constants[node.id]
+    sql = _resolve_sql(node, constants, schemas)
+    if sql is None:
+        raise ValueError("dynamic filter predicate")
+    return sql
+
+
+def _filter_query_variants(node, constants, schemas):
+    """Rebuilds the SQL of every filter combination of a FilterQuery(...) definition."""
+    keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+    from_clause = _resolve_sql(keywords.get("from_clause"), constants, schemas)
+    if from_clause is None or not isinstance(keywords.get("columns"), ast.List):
+        return {}
+    try:
+        columns = [ast.literal_eval(column) for column in keywords["columns"].elts]
+        where = ast.literal_eval(keywords["where"]) if "where" in keywords else []
+        filters = keywords.get("filters")
+        if isinstance(filters, ast.Call):
+            filters = {k.arg: _resolve_predicate(k.value, constants, schemas) for k in filters.keywords}
+        elif isinstance(filters, ast.Dict):
+            filters = {
+                ast.literal_eval(k): _resolve_predicate(v, constants, schemas)
+                for k, v in zip(filters.keys, filters.values)
+            }
+        else:
+            filters = {}
+        order_by = ast.literal_eval(keywords["order_by"]) if "order_by" in keywords else []
+    except ValueError:
+        return {}
+    variants = {}
+    for size in range(len(filters) + 1):
+        for active in combinations(filters, size):
+            predicates = where + [filters[param] for param in active]
+            sql = f"SELECT {', '.join(columns)} FROM {from_clause}"
+            if predicates:
+                sql += " WHERE " + " AND ".join(f"({p})" for p in predicates)
+            if order_by:
+                sql += " ORDER BY " + ", ".join(order_by)
+            variants[",".join(active)] = sql
+    return variants
+
+
+def collect_queries(base_dir=BASE_DIR, schemas=None):
+    """Collects every static SQL text passed to text()/register_query() and built by FilterQuery in the service modules."""
+    schemas = schemas or {}
+    paths = sorted(
+        path for pattern in SOURCE_GLOBS for path in glob(os.path.join(base_dir, pattern))
+    )
+    trees = {}
+    constants = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            trees[path] = ast.parse(file.read(), filename=path)
+        constants.update(_module_constants(trees[path]))
+
+    queries = []
+    for path, tree in trees.items():
+        relpath = os.path.relpath(path, base_dir)
+        # text() calls within functions, named after the function
+        # register_query() calls, named after the registered query
+        scopes = [(tree, None)] + [
+            (node, node.name)
+            for node in ast.walk(tree)
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        ]
+        for scope, function_name in scopes:
+            for node in ast.walk(scope):
+                if (
+                    function_name is None
+                    and isinstance(node, ast.Call)
+                    and isinstance(node.func, ast.Name)
+                    and node.func.id == "FilterQuery"
+                    and node.args
+                    and isinstance(node.args[0], ast.Constant)
+                ):
+                    # one query per filter combination, as each is issued separately
+                    variants = _filter_query_variants(node, constants, schemas)
+                    for active, sql in variants.items():
+                        queries.append(
+                            CollectedQuery(
+                                path=relpath,
+                                line=node.lineno,
+                                function=f"{node.args[0].value}[{active}]",
+                                sql=" ".join(sql.split()),
+                            )
+                        )
+                    continue
+                if not (
+                    isinstance(node, ast.Call)
+                    and isinstance(node.func, ast.Name)
+                    and node.func.id in SQL_FUNCTIONS
+                    and len(node.args) > SQL_FUNCTIONS[node.func.id]
+                ):
+                    continue
+                if node.func.id == "register_query":
+                    name = node.args[0]
+                    if not isinstance(name, ast.Constant):
+                        continue
+                    query_name = name.value
+                elif function_name is None:
+                    continue
+                else:
+                    query_name = function_name
+                sql = _resolve_sql(
+                    node.args[SQL_FUNCTIONS[node.func.id]], constants, schemas
+                )
+                if sql is None:
+                    continue
+                queries.append(
+                    CollectedQuery(
+                        path=relpath,
+                        line=node.lineno,
+                        function=query_name,
+                        sql=" ".join(sql.split()),
+                    )
+                )
+    # de-duplicate nested function walks
+    unique = {}
+    for query in queries:
+        unique.setdefault((query.source, query.sql), query)
+    return list(unique.values())
+
+
+def _strip_comments(sql):
+    return re.sub(r"--[^\n]*", " ", sql)
+
+
+def _alias_map(sql):
+    aliases = {}
+    first_table = None
+    for table, alias in TABLE_ALIAS_RE.findall(sql):
+        if first_table is None:
+            first_table = table
+        aliases[table] = table
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases, first_table
+
+
+def _order_columns(columns):
+    columns = [column for column in columns if column not in PRIMARY_KEY_COLUMNS]
+    selective = [column for column in columns if column not in LOW_CARDINALITY_COLUMNS]
+    low = [column for column in LOW_CARDINALITY_COLUMNS if column in columns]
+    return tuple(selective + low)
+
+
+def extract_predicates(sql):
+    """Returns {table: (columns, ...)} for the equality predicates of a statement."""
+    sql = _strip_comments(sql)
+    aliases, first_table = _alias_map(sql)
+    predicates = defaultdict(list)
+
+    for where in WHERE_RE.findall(sql):
+        for alias, column in EQUALITY_RE.findall(where):
+            table = aliases.get(alias) if alias else first_table
+            if table is None or column.upper() in SQL_KEYWORDS:
+                continue
+            if column not in predicates[table]:
+                predicates[table].append(column)
+
+    for table, alias, condition in JOIN_ON_RE.findall(sql):
+        for left_alias, left_column, right_alias, right_column in re.findall(
+            r"(\w+)\.`?(\w+)`?\s*=\s*(\w+)\.`?(\w+)`?", condition
+        ):
+            if left_alias == alias:
+                column = left_column
+            elif right_alias == alias:
+                column = right_column
+            else:
+                continue
+            join_key = f"{table}#join"
+            if column not in predicates[join_key]:
+                predicates[join_key].append(column)
+
+    result = {}
+    for table, columns in predicates.items():
+        table_name = table.split("#")[0]
+        columns = _order_columns(columns)
+        # only base tables: skip views, CTEs and the dictionary tables
+        if not table_name.startswith("tbl") or not columns:
+            continue
+        # a flag column alone is not selective enough to be worth an index
+        if set(columns) <= {"Is_Active", "Status"}:
+            continue
+        result[table] = columns
+    return result
+
+
+def recommend_indexes(queries, min_occurrences=2, existing=None, unique=None):
+    """
+    Groups the predicates into composite index candidates recurring in the queries.
+    existing: {table: {index name: columns}} (non-unique indexes), unique: {table: [key columns]}.
+    """
+    existing = existing or {}
+    unique = unique or {}
+    candidates = {}
+    for query in queries:
+        for table, columns in extract_predicates(query.sql).items():
+            table_name = table.split("#")[0]
+            key = (table_name, columns)
+            candidate = candidates.setdefault(
+                key, IndexCandidate(table=table_name, columns=columns)
+            )
+            candidate.sources.add(f"{query.source} ({query.function})")
+            candidate.labels.add(query.label)
+
+    # a candidate which is a prefix of another candidate is served by the longer one
+    merged = {}
+    for key, candidate in sorted(candidates.items(), key=lambda item: -len(item[0][1])):
+        for other in merged.values():
+            if (
+                other.table == candidate.table
+                and other.columns[: len(candidate.columns)] == candidate.columns
+            ):
+                other.sources |= candidate.sources
+                other.labels |= candidate.labels
+                break
+        else:
+            merged[key] = candidate
+
+    recommended = []
+    for candidate in merged.values():
+        if len(candidate.sources) < min_occurrences:
+            continue
+        # served by an existing index, or a lookup on a primary/unique key
+        covered = any(
+            index[: len(candidate.columns)] == candidate.columns
+            for index in [*existing.get(candidate.table, {}).values(), *unique.get(candidate.table, [])]
+        ) or any(
+            candidate.columns[: len(key)] == key for key in unique.get(candidate.table, [])
+        )
+        if not covered:
+            recommended.append(candidate)
+    return sorted(recommended, key=lambda c: (c.table, -len(c.sources), c.columns))
+
+
+def redundant_indexes(existing, unique, candidates=()):
+    """
+    Non-unique indexes which another index makes redundant:
+    - a prefix of a longer index (existing or recommended), which serves the same lookups
+    - an index leading with the columns of a primary/unique key, which already finds at most one row
+    - a duplicate of an earlier index
+    """
+    redundant = []
+    for table, indexes in sorted(existing.items()):
+        longer = [*indexes.items(), *((c.name, c.columns) for c in candidates if c.table == table)]
+        seen = {}
+        for name, columns in indexes.items():
+            key = next(
+                (key for key in unique.get(table, []) if columns[: len(key)] == key), None
+            )
+            other = next(
+                (
+                    other_name
+                    for other_name, other_columns in longer
+                    if len(other_columns) > len(columns)
+                    and other_columns[: len(columns)] == columns
+                ),
+                None,
+            )
+            if key:
+                reason = f"leads with the key ({', '.join(key)})"
+            elif other:
+                reason = f"prefix of {other}"
+            elif columns in seen:
+                reason = f"duplicate of {seen[columns]}"
+            else:
+                seen[columns] = name
+                continue
+            redundant.append(RedundantIndex(table=table, name=name, columns=columns, reason=reason))
+    return redundant
+
+
+def load_existing_indexes(connection, schema):
+    from sqlalchemy import text  # type: ignore
+
+    rows = connection.execute(
+        text(
+            """
+            SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = :Schema
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX;
+            """
+        ),
+        dict(Schema=schema),
+    ).all()
+    indexes = defaultdict(lambda: defaultdict(list))
+    unique_names = set()
+    for table_name, index_name, non_unique, column_name in rows:
+        indexes[table_name][index_name].append(column_name)
+        if not non_unique:
+            unique_names.add((table_name, index_name))
+    existing, unique = defaultdict(dict), defaultdict(list)
+    for table_name, table_indexes in indexes.items():
+        for index_name, columns in table_indexes.items():
+            if (table_name, index_name) in unique_names:
+                unique[table_name].append(tuple(columns))
+            else:
+                existing[table_name][index_name] = tuple(columns)
+    return dict(existing), dict(unique)
+
+
+def load_migration_indexes(migrations_dir, exclude=None):
+    """
+    Non-unique indexes ({table: {name: columns}}) and primary/unique keys ({table: [columns]})
+    left by the other migrations, applied in order (indexes dropped by a later migration are removed).
+    """
+    indexes, unique = defaultdict(dict), defaultdict(list)
+
+    def add(table, kind, name, columns):
+        columns = _index_columns(columns)
+        if kind.upper().startswith(("FULLTEXT", "SPATIAL")):
+            # not usable for the equality lookups
+            return
+        if kind.upper().startswith(("PRIMARY", "UNIQUE")):
+            unique[table].append(columns)
+        else:
+            # MySQL names an unnamed index after its first column
+            indexes[table][name or columns[0]] = columns
+
+    for path in sorted(glob(os.path.join(migrations_dir, "*.sql"))):
+        if exclude and os.path.abspath(path) == os.path.abspath(exclude):
+            continue
+        with open(path, encoding="utf-8") as file:
+            sql = _strip_comments(file.read())
+        statements = [
+            (match.start(), "table", match) for match in CREATE_TABLE_RE.finditer(sql)
+        ] + [
+            (match.start(), "table", match) for match in ALTER_TABLE_RE.finditer(sql)
+        ] + [
+            (match.start(), "create", match) for match in CREATE_INDEX_RE.finditer(sql)
+        ] + [
+            (match.start(), "drop", match) for match in DROP_INDEX_RE.finditer(sql)
+        ]
+        for _, statement, match in sorted(statements, key=lambda item: item[0]):
+            if statement == "table":
+                table, body = match.groups()
+                for kind, name, columns in TABLE_KEY_RE.findall(body):
+                    add(table, kind, name, columns)
+            elif statement == "create":
+                kind, name, table, columns = match.groups()
+                add(table, "UNIQUE" if kind else "INDEX", name, columns)
+            else:
+                name, table = match.groups()
+                indexes[table].pop(name, None)
+    return dict(indexes), dict(unique)
+
+
+def next_migration_path(migrations_dir):
+    """Path of the next numbered migration; applied migrations are never rewritten."""
+    numbers = [
+        int(match.group(1))
+        for match in (
+            MIGRATION_NUMBER_RE.match(os.path.basename(path))
+            for path in glob(os.path.join(migrations_dir, "*.sql"))
+        )
+        if match
+    ]
+    number = max(numbers, default=0) + 1
+    return os.path.join(migrations_dir, f"{number:04d}_{MIGRATION_NAME}.sql")
+
+
+def _index_columns(columns):
+    return tuple(column.strip(" `") for column in columns.split(","))
+
+
+def explain_queries(connection, queries):
+    """Runs EXPLAIN for every explainable query and flags full scans and filesorts."""
+    from sqlalchemy import text  # type: ignore
+
+    findings = []
+    for query in queries:
+        if query.statement_type not in EXPLAINABLE:
+            continue
+        params = {name: "" for name in BIND_PARAM_RE.findall(query.sql)}
+        try:
+            sql = EXPANDING_PARAM_RE.sub(r"IN (:\1)", query.sql.rstrip(";"))
+            plan = connection.execute(text("EXPLAIN " + sql), params)
+            rows = [row._asdict() for row in plan]
+        except Exception as err:
+            findings.append(dict(query=query, error=str(err).splitlines()[0]))
+            continue
+        for row in rows:
+            extra = row.get("Extra") or ""
+            issues = []
+            if row.get("type") == "ALL":
+                issues.append("full table scan")
+            elif row.get("type") == "index":
+                issues.append("full index scan")
+            if "Using filesort" in extra:
+                issues.append("filesort")
+            if "Using temporary" in extra:
+                issues.append("temporary table")
+            if issues:
+                findings.append(
+                    dict(
+                        query=query,
+                        table=row.get("table"),
+                        rows=row.get("rows"),
+                        key=row.get("key"),
+                        issues=issues,
+                    )
+                )
+    connection.rollback()
+    return findings
+
+
+def write_migration(path, candidates, redundant=()):
+    if not candidates and not redundant:
+        print("No missing or redundant indexes, no migration written")
+        return
+    lines = [
+        "-- Composite indexes for the recurring service query predicates.",
+        "-- Generated by index_advisor.py; re-run it after adding/changing service queries",
+        "-- (it writes the indexes still missing, and drops the redundant ones, in a new numbered migration).",
+        "",
+    ]
+    for candidate in candidates:
+        lines.append(f"-- used by {len(candidate.labels)} queries:")
+        for label in sorted(candidate.labels):
+            lines.append(f"--   {label}")
+        lines.append(candidate.ddl())
+        lines.append("")
+    # dropped after the new indexes are created, which serve their lookups
+    for index in redundant:
+        lines.append(f"-- redundant: {index.reason}")
+        lines.append(index.ddl())
+        lines.append("")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines))
+    print(
+        f"Migration with {len(candidates)} indexes and {len(redundant)} drops saved to {path}"
+    )
+
+
+def get_database_url():
+    try:
+        from dotenv import load_dotenv  # type: ignore
+
+        load_dotenv(os.path.join(BASE_DIR, ".env"))
+    except ImportError:
+        pass
+    env = os.environ
+    return (
+        f"mysql+mysqlconnector://{env.get('USER')}:{env.get('PASSWORD')}"
+        f"@{env.get('HOST')}:{env.get('PORT')}/{env.get('DATABASE')}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--explain", action="store_true", help="run EXPLAIN against a database")
+    parser.add_argument("--url", help="SQLAlchemy database url (default: built from .env)")
+    parser.add_argument(
+        "--migrations-dir", default="migrations", help="folder of the numbered migrations"
+    )
+    parser.add_argument(
+        "--migration",
+        help="path of the generated migration (default: the next numbered migration)",
+    )
+    parser.add_argument("--report", help="save the findings as JSON to this path")
+    parser.add_argument("--min-occurrences", type=int, default=2)
+    parser.add_argument(
+        "--fail-on-scan",
+        action="store_true",
+        help="exit with status 1 if any query does a full scan or filesort (for CI)",
+    )
+    args = parser.parse_args(argv)
+
+    schemas = {
+        "db_schema_headchu": os.environ.get("DB_SCHEMA_HEADCHU", ""),
+        "db_schema_generic": os.environ.get("DB_SCHEMA_GENERIC", ""),
+    }
+    queries = collect_queries(schemas=schemas)
+    print(f"Collected {len(queries)} SQL texts from the service modules")
+
+    findings = []
+    migration = args.migration or next_migration_path(args.migrations_dir)
+    existing, unique = load_migration_indexes(args.migrations_dir, exclude=migration)
+    for table, keys in BASE_TABLE_KEYS.items():
+        unique.setdefault(table, []).extend(keys)
+    if args.explain:
+        from sqlalchemy import create_engine  # type: ignore
+
+        engine = create_engine(args.url or get_database_url())
+        with engine.connect() as connection:
+            database_indexes, database_keys = load_existing_indexes(
+                connection, engine.url.database
+            )
+            for table, indexes in database_indexes.items():
+                existing.setdefault(table, {}).update(indexes)
+            for table, keys in database_keys.items():
+                unique.setdefault(table, []).extend(keys)
+            findings = explain_queries(connection, queries)
+        for finding in findings:
+            query = finding["query"]
+            if "error" in finding:
+                print(f"[ERROR] {query.source} ({query.function}): {finding['error']}")
+            else:
+                print(
+                    f"[{', '.join(finding['issues']).upper()}] {query.source} ({query.function}) "
+                    f"table={finding['table']} rows={finding['rows']} key={finding['key']}"
+                )
+
+    candidates = recommend_indexes(queries, args.min_occurrences, existing, unique)
+    redundant = redundant_indexes(existing, unique, candidates)
+    write_migration(migration, candidates, redundant)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            json.dump(
+                dict(
+                    queries=len(queries),
+                    findings=[
+                        {**finding, "query": finding["query"].source}
+                        for finding in findings
+                    ],
+                    indexes=[
+                        dict(table=c.table, columns=c.columns, sources=sorted(c.sources))
+                        for c in candidates
+                    ],
+                    redundant=[
+                        dict(table=r.table, name=r.name, columns=r.columns, reason=r.reason)
+                        for r in redundant
+                    ],
+                ),
+                file,
+                indent=4,
+            )
+        print(f"Report saved to {args.report}")
+
+    scans = [finding for finding in findings if "issues" in finding]
+    if args.fail_on_scan and scans:
+        print(f"{len(scans)} full scans/filesorts found")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
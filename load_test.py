@@ -0,0 +1,330 @@
+"""
+Load Test
+- Virtual users (VUs) log in (POST /auth/login) and select their church level
+  (POST /auth/select_level/{level_code}), then replay a weighted mix of reads and writes
+- The users are the ones seeded by seed_data.py, rebuilt from the same options without the
+  database (--seed, --heads, --depth, ...), or read from a --users CSV (Usercode,Password,Level_Code,Church_Code)
+- Reports the throughput, p50/p95/p99 latency, status codes and error rate per route (stdout, JSON, HTML)
+- Deterministic request mix: each VU draws from its own generator seeded with --seed
+
+Usage:
+    python seed_data.py --members 100000 && python serve.py      # seeded stand-in database + server
+    python load_test.py --url http://127.0.0.1:8000 --vus 50 --duration 60
+    python load_test.py --vus 200 --ramp-up 30 --json load_report.json --html load_report.html
+    python load_test.py --mix members_all=1,member_update=0       # override route weights
+    python load_test.py --max-p95-ms 500 --max-error-rate 0.01     # CI: exits 1 when exceeded
+"""
+
+import argparse
+import asyncio
+import csv
+import html
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import httpx  # type: ignore
+
+import seed_data
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# route name -> (method, path, weight); {church} is the VU's church code
+ROUTES = {
+    "members_all": ("GET", "/members/", 2),
+    "members_by_church": ("GET", "/members/church/{church}", 4),
+    "branches_by_lead": ("GET", "/church_leads/{church}/branches", 3),
+    "churches": ("GET", "/church/", 2),
+    "member_search": ("GET", "/members/search", 4),
+    "member_update": ("PUT", "/members/current/update", 1),
+}
+
+OCCUPATIONS = [occupation for occupation in seed_data.OCCUPATIONS if occupation]
+
+
+@dataclass
+class Identity:
+    usercode: str
+    password: str
+    level: str
+    church: str
+
+
+@dataclass
+class RouteStats:
+    latencies: list = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+    def add(self, seconds: float, status):
+        self.latencies.append(seconds)
+        self.statuses[str(status)] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors += 1
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(-(-pct * len(sorted_values) // 100)), 1)
+    return sorted_values[rank - 1]
+
+
+def seeded_identities(args) -> list:
+    """The users seed_data.py wrote with the same options (no database access)."""
+    identities = []
+    for head_code in seed_data.head_codes(args):
+        _rnd, plan = seed_data.make_plan(args, head_code)
+        for index, (_role, church) in sorted(plan.users.items()):
+            identities.append(
+                Identity(seed_data.member_code(head_code, index), args.password, church.level, church.code)
+            )
+    return identities
+
+
+def csv_identities(path: str) -> list:
+    with open(path, newline="") as file:
+        return [
+            Identity(row["Usercode"], row["Password"], row["Level_Code"], row["Church_Code"])
+            for row in csv.DictReader(file)
+        ]
+
+
+def parse_mix(value: str) -> dict:
+    weights = {name: weight for name, (_method, _path, weight) in ROUTES.items()}
+    for item in filter(None, (value or "").split(",")):
+        name, _, weight = item.partition("=")
+        if name.strip() not in ROUTES:
+            raise SystemExit(f"Unknown route '{name}', one of: {', '.join(ROUTES)}")
+        weights[name.strip()] = float(weight)
+    if not any(weights.values()):
+        raise SystemExit("The mix has no route with a weight above 0")
+    return weights
+
+
+class LoadTest:
+    def __init__(self, args, identities: list, weights: dict):
+        self.args = args
+        self.identities = identities
+        self.names = [name for name in weights if weights[name] > 0]
+        self.weights = [weights[name] for name in self.names]
+        self.stats: dict[str, RouteStats] = {}
+        self.prefix = args.url.rstrip("/") + args.prefix.rstrip("/")
+        self.started = 0.0
+        self.finished = 0.0
+
+    async def request(self, client, name: str, method: str, path: str, **kwargs):
+        stats = self.stats.setdefault(name, RouteStats())
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, self.prefix + path, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError as err:
+            response, status = None, type(err).__name__
+        stats.add(time.perf_counter() - start, status)
+        return response
+
+    async def login(self, client, identity: Identity):
+        """Returns the level token of the identity, None if its login failed."""
+        response = await self.request(
+            client, "login", "POST", "/auth/login",
+            data=dict(username=identity.usercode, password=identity.password),
+        )
+        if response is None or response.status_code >= 400:
+            return None
+        response = await self.request(
+            client, "select_level", "POST", f"/auth/select_level/{identity.level}",
+            headers=dict(Authorization=f"Bearer {response.json()['access_token']}"),
+        )
+        if response is None or response.status_code >= 400:
+            return None
+        return response.json()["access_token"]
+
+    async def call(self, client, rnd: random.Random, name: str, identity: Identity, headers: dict):
+        method, path, _weight = ROUTES[name]
+        kwargs = dict(headers=headers)
+        if name == "member_search":
+            kwargs["params"] = dict(q=rnd.choice(seed_data.LAST_NAMES)[:3])
+        elif name == "member_update":
+            kwargs["json"] = dict(Occupation=rnd.choice(OCCUPATIONS))
+        await self.request(client, name, method, path.format(church=identity.church), **kwargs)
+
+    async def virtual_user(self, client, number: int, deadline: float):
+        rnd = random.Random(f"{self.args.seed}:vu:{number}")
+        identity = self.identities[number % len(self.identities)]
+        # ramp-up: the VUs start evenly spread over --ramp-up seconds
+        await asyncio.sleep(self.args.ramp_up * number / self.args.vus)
+        token = await self.login(client, identity)
+        if token is None:
+            return
+        headers = dict(Authorization=f"Bearer {token}")
+        while time.monotonic() < deadline:
+            name = rnd.choices(self.names, self.weights)[0]
+            await self.call(client, rnd, name, identity, headers)
+            if self.args.think_ms:
+                await asyncio.sleep(rnd.uniform(0, 2 * self.args.think_ms) / 1000)
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=self.args.vus, max_keepalive_connections=self.args.vus)
+        timeout = httpx.Timeout(self.args.timeout)
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            self.started = time.monotonic()
+            deadline = self.started + self.args.ramp_up + self.args.duration
+            await asyncio.gather(
+                *(self.virtual_user(client, number, deadline) for number in range(self.args.vus))
+            )
+            self.finished = time.monotonic()
+
+    def report(self) -> dict:
+        elapsed = max(self.finished - self.started, 1e-9)
+        routes = {}
+        for name in sorted(self.stats):
+            stats = self.stats[name]
+            latencies = sorted(stats.latencies)
+            routes[name] = dict(
+                requests=len(latencies),
+                throughput=round(len(latencies) / elapsed, 2),
+                p50_ms=round(percentile(latencies, 50) * 1000, 2),
+                p95_ms=round(percentile(latencies, 95) * 1000, 2),
+                p99_ms=round(percentile(latencies, 99) * 1000, 2),
+                max_ms=round(latencies[-1] * 1000, 2) if latencies else 0.0,
+                error_rate=round(stats.errors / len(latencies), 4) if latencies else 0.0,
+                statuses=dict(sorted(stats.statuses.items())),
+            )
+        total = sum(route["requests"] for route in routes.values())
+        errors = sum(stats.errors for stats in self.stats.values())
+        return dict(
+            url=self.prefix,
+            date=datetime.now().isoformat(timespec="seconds"),
+            vus=self.args.vus,
+            duration_s=round(elapsed, 2),
+            requests=total,
+            throughput=round(total / elapsed, 2),
+            error_rate=round(errors / total, 4) if total else 0.0,
+            routes=routes,
+        )
+
+
+def print_report(report: dict):
+    print(
+        f"{report['requests']} requests in {report['duration_s']}s with {report['vus']} VUs: "
+        f"{report['throughput']} req/s, error rate {report['error_rate']:.2%}"
+    )
+    print(f"{'route':<20}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}  statuses")
+    for name, route in report["routes"].items():
+        statuses = " ".join(f"{status}:{count}" for status, count in route["statuses"].items())
+        print(
+            f"{name:<20}{route['requests']:>9}{route['throughput']:>9}{route['p50_ms']:>9}"
+            f"{route['p95_ms']:>9}{route['p99_ms']:>9}{route['error_rate']:>8.2%}  {statuses}"
+        )
+
+
+def write_html(report: dict, path: str):
+    """Self-contained page: summary and per-route table, with the p50/p95/p99 as bars."""
+    scale = max([route["p99_ms"] for route in report["routes"].values()] + [1])
+    rows = []
+    for name, route in report["routes"].items():
+        bars = "".join(
+            f'<div class="bar {key}" style="width:{route[key + "_ms"] / scale * 100:.1f}%" '
+            f'title="{key} {route[key + "_ms"]} ms"></div>'
+            for key in ("p99", "p95", "p50")
+        )
+        statuses = ", ".join(f"{status}: {count}" for status, count in route["statuses"].items())
+        error_class = ' class="error"' if route["error_rate"] else ""
+        rows.append(
+            f"<tr><td>{html.escape(name)}</td><td>{route['requests']}</td><td>{route['throughput']}</td>"
+            f"<td>{route['p50_ms']}</td><td>{route['p95_ms']}</td><td>{route['p99_ms']}</td>"
+            f"<td{error_class}>{route['error_rate']:.2%}</td><td>{html.escape(statuses)}</td>"
+            f'<td class="bars">{bars}</td></tr>'
+        )
+    page = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Load Test {html.escape(report['date'])}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}
+td:first-child, td:nth-child(8) {{ text-align: left; }}
+td.error {{ color: #b00; font-weight: bold; }}
+td.bars {{ width: 300px; position: relative; }}
+.bar {{ position: absolute; left: 0; top: 4px; bottom: 4px; }}
+.p99 {{ background: #f4b183; }} .p95 {{ background: #ffd966; }} .p50 {{ background: #a9d18e; }}
+</style></head><body>
+<h1>Load Test</h1>
+<p>{html.escape(report['url'])} &mdash; {html.escape(report['date'])}<br>
+{report['vus']} VUs, {report['duration_s']} s, {report['requests']} requests,
+{report['throughput']} req/s, error rate {report['error_rate']:.2%}</p>
+<table>
+<tr><th>Route</th><th>Requests</th><th>Req/s</th><th>p50 ms</th><th>p95 ms</th><th>p99 ms</th>
+<th>Errors</th><th>Statuses</th><th>Latency (p50/p95/p99)</th></tr>
+{chr(10).join(rows)}
+</table></body></html>
+"""
+    with open(path, "w") as file:
+        file.write(page)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="base URL of the server")
+    parser.add_argument("--prefix", default=None, help="API prefix (default: DEV_PREFIX from the .env)")
+    parser.add_argument("--vus", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load after the ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds to start all the VUs")
+    parser.add_argument("--think-ms", type=float, default=0, help="average pause between a VU's requests")
+    parser.add_argument("--timeout", type=float, default=30, help="request timeout in seconds")
+    parser.add_argument("--mix", default="", help="route weights, e.g. members_all=1,member_update=0")
+    parser.add_argument("--users", help="CSV of the users (Usercode,Password,Level_Code,Church_Code)")
+    parser.add_argument("--json", help="write the report as JSON to this file")
+    parser.add_argument("--html", help="write the report as HTML to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="exit 1 if a route's p95 is above this")
+    parser.add_argument("--max-error-rate", type=float, help="exit 1 if the error rate is above this")
+    seed_options = parser.add_argument_group("seeded users (the seed_data.py options used)")
+    seed_data.add_plan_arguments(seed_options)
+    args = parser.parse_args(argv)
+
+    if args.prefix is None:
+        try:
+            from dotenv import load_dotenv  # type: ignore
+
+            load_dotenv(os.path.join(BASE_DIR, ".env"))
+        except ImportError:
+            pass
+        args.prefix = os.environ.get("DEV_PREFIX", "")
+    weights = parse_mix(args.mix)
+    identities = csv_identities(args.users) if args.users else seeded_identities(args)
+    if not identities:
+        raise SystemExit("No users to log in with")
+    print(f"{args.vus} VUs ({len(identities)} users) against {args.url}{args.prefix}")
+
+    load_test = LoadTest(args, identities, weights)
+    asyncio.run(load_test.run())
+    report = load_test.report()
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.html:
+        write_html(report, args.html)
+
+    failed = []
+    if args.max_p95_ms is not None:
+        failed += [
+            f"{name}: p95 {route['p95_ms']} ms > {args.max_p95_ms} ms"
+            for name, route in report["routes"].items()
+            if route["p95_ms"] > args.max_p95_ms
+        ]
+    if args.max_error_rate is not None and report["error_rate"] > args.max_error_rate:
+        failed.append(f"error rate {report['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    for message in failed:
+        print(f"FAILED {message}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+-- Composite indexes for the recurring service query predicates.
+-- Generated by index_advisor.py; re-run it after adding/changing service queries
+-- (it writes the indexes still missing to a new numbered migration).
+
+-- used by 5 queries:
+--   api/authentication/services/auth.py (get_user)
+--   api/church_admin/services/church_heads.py (activate_head_church_by_code)
+--   api/church_admin/services/church_heads.py (deactivate_head_church_by_code)
+--   api/church_admin/services/church_heads.py (get_head_church_by_code)
+--   api/church_admin/services/church_heads.py (update_head_church_by_code)
+CREATE INDEX ix_ChurchHeads_Code ON tblChurchHeads (`Code`);
+
+-- used by 3 queries:
+--   api/church_admin/services/church_leads.py (get_church_leads_by_church_code)
+--   api/church_admin/services/church_leads.py (get_current_church_lead_by_code)
+CREATE INDEX ix_ChurchLeads_Church_Code_Head_Code_Status ON tblChurchLeads (`Church_Code`, `Head_Code`, `Status`);
+
+-- used by 3 queries:
+--   api/church_admin/services/church_leads.py (approve_church_lead_by_code)
+--   api/church_admin/services/church_leads.py (unmap_church_leads_by_church_code)
+--   api/church_admin/services/churches.py (deactivate_church_by_code)
+CREATE INDEX ix_ChurchLeads_Church_Code_LeadChurch_Code_Head_Code_Is_Active ON tblChurchLeads (`Church_Code`, `LeadChurch_Code`, `Head_Code`, `Is_Active`);
+
+-- used by 3 queries:
+--   api/church_admin/services/church_leads.py (get_all_churches_by_lead_code)
+CREATE INDEX ix_ChurchLeads_LeadChurch_Code_Head_Code ON tblChurchLeads (`LeadChurch_Code`, `Head_Code`);
+
+-- used by 4 queries:
+--   api/authentication/services/auth.py (get_user_access)
+--   api/authentication/services/auth.py (get_user_level)
+--   api/church_admin/services/hierarchy.py (get_hierarchy_by_code)
+--   api/church_admin/services/hierarchy.py (update_hierarchy_by_code)
+CREATE INDEX ix_ChurchLevels_Code_Hierarchy_Code_Head_Code ON tblChurchLevels (`Code`, `Hierarchy_Code`, `Head_Code`);
+
+-- used by 3 queries:
+--   api/authentication/services/auth.py (get_user_levels)
+--   api/church_admin/services/hierarchy.py (activate_hierarchy_by_code)
+--   api/church_admin/services/hierarchy.py (deactivate_hierarchy_by_code)
+CREATE INDEX ix_ChurchLevels_Code_Head_Code_Is_Active ON tblChurchLevels (`Code`, `Head_Code`, `Is_Active`);
+
+-- used by 2 queries:
+--   api/church_admin/services/hierarchy.py (get_all_hierarchies)
+CREATE INDEX ix_ChurchLevels_Head_Code_Is_Active ON tblChurchLevels (`Head_Code`, `Is_Active`);
+
+-- used by 22 queries:
+--   api/authentication/services/auth.py (get_user_level)
+--   api/church_admin/services/church_heads.py (activate_head_church_by_code)
+--   api/church_admin/services/church_heads.py (deactivate_head_church_by_code)
+--   api/church_admin/services/church_leads.py (get_all_churches_by_lead_code)
+--   api/church_admin/services/church_leads.py (get_church_leads_by_church_code)
+--   api/church_admin/services/church_leads.py (get_current_church_lead_by_code)
+--   api/church_admin/services/church_leads.py (map_church_lead_by_code)
+--   api/church_admin/services/churches.py (activate_church_by_code)
+--   api/church_admin/services/churches.py (deactivate_church_by_code)
+--   api/church_admin/services/churches.py (get_church_by_id_code)
+--   api/church_admin/services/churches.py (update_church_by_code)
+--   api/common/utils.py (get_level)
+--   api/membership_mgmt/services/members.py (get_member_branch_by_id)
+--   api/membership_mgmt/services/members.py (get_member_branches)
+--   api/user_mgmt/services/user.py (get_user_details)
+--   api/user_mgmt/services/user.py (get_users_details)
+CREATE INDEX ix_Churches_Code_Head_Code ON tblChurches (`Code`, `Head_Code`);
+
+-- used by 3 queries:
+--   api/church_admin/services/churches.py (get_all_churches)
+--   api/church_admin/services/churches.py (get_churches_by_level)
+CREATE INDEX ix_Churches_Head_Code_Level_Code_Status ON tblChurches (`Head_Code`, `Level_Code`, `Status`);
+
+-- used by 2 queries:
+--   api/church_admin/services/church_leads.py (get_all_churches_by_lead_code)
+--   api/common/utils.py (get_level)
+CREATE INDEX ix_Churches_Level_Code ON tblChurches (`Level_Code`);
+
+-- used by 8 queries:
+--   api/user_mgmt/services/user.py (get_user_roles)
+--   api/user_mgmt/services/user.py (get_user_submodules)
+CREATE INDEX ix_HeadChurchLevels_Head_Code_Is_Active ON tblHeadChurchLevels (`Head_Code`, `Is_Active`);
+
+-- used by 8 queries:
+--   api/user_mgmt/services/user.py (get_user_roles)
+--   api/user_mgmt/services/user.py (get_user_submodules)
+CREATE INDEX ix_HeadChurchLevels_Level_Code ON tblHeadChurchLevels (`Level_Code`);
+
+-- used by 2 queries:
+--   api/common/utils.py (check_level_code)
+--   api/common/utils.py (get_level)
+CREATE INDEX ix_HeadChurchLevels_ChurchLevel_Code_Head_Code_Level_Code_Is_Act ON tblHeadChurchLevels (`ChurchLevel_Code`, `Head_Code`, `Level_Code`, `Is_Active`);
+
+-- used by 4 queries:
+--   api/authentication/services/auth.py (get_user_access)
+--   api/church_admin/services/hierarchy.py (get_all_hierarchies)
+--   api/church_admin/services/hierarchy.py (get_hierarchy_by_code)
+CREATE INDEX ix_Hierarchy_Code ON tblHierarchy (`Code`);
+
+-- used by 9 queries:
+--   api/membership_mgmt/services/members.py (demote_member_from_clergy)
+--   api/membership_mgmt/services/members.py (get_member_branch_by_id)
+--   api/membership_mgmt/services/members.py (get_member_branches)
+--   api/membership_mgmt/services/members.py (promote_member_to_clergy)
+--   api/user_mgmt/services/user.py (get_user_details)
+--   api/user_mgmt/services/user.py (get_users_details)
+CREATE INDEX ix_Member_Code_Is_Clergy_Head_Code_Is_Active ON tblMember (`Code`, `Is_Clergy`, `Head_Code`, `Is_Active`);
+
+-- used by 6 queries:
+--   api/membership_mgmt/services/members.py (activate_member_by_code)
+--   api/membership_mgmt/services/members.py (deactivate_member_by_code)
+--   api/membership_mgmt/services/members.py (get_current_user_member)
+--   api/membership_mgmt/services/members.py (get_member_by_code_id)
+--   api/membership_mgmt/services/members.py (update_current_user_member)
+--   api/membership_mgmt/services/members.py (update_member_by_code_id)
+CREATE INDEX ix_Member_Code_Head_Code_Is_Active ON tblMember (`Code`, `Head_Code`, `Is_Active`);
+
+-- used by 3 queries:
+--   api/membership_mgmt/services/members.py (get_all_members)
+--   api/membership_mgmt/services/members.py (get_members_by_church)
+CREATE INDEX ix_Member_Head_Code_Is_Active ON tblMember (`Head_Code`, `Is_Active`);
+
+-- used by 10 queries:
+--   api/membership_mgmt/services/members.py (exit_member_from_branch)
+--   api/membership_mgmt/services/members.py (get_all_members)
+--   api/membership_mgmt/services/members.py (get_current_user_member)
+--   api/membership_mgmt/services/members.py (get_member_branches)
+--   api/membership_mgmt/services/members.py (get_member_by_code_id)
+--   api/membership_mgmt/services/members.py (get_members_by_church)
+--   api/user_mgmt/services/user.py (get_user_details)
+--   api/user_mgmt/services/user.py (get_users_details)
+CREATE INDEX ix_MemberBranch_Member_Code_Branch_Code_Head_Code_Is_Active ON tblMemberBranch (`Member_Code`, `Branch_Code`, `Head_Code`, `Is_Active`);
+
+-- used by 3 queries:
+--   api/membership_mgmt/services/members.py (exit_member_from_all_branches)
+--   api/membership_mgmt/services/members.py (get_member_branches)
+CREATE INDEX ix_MemberBranch_Member_Code_Head_Code_Is_Active ON tblMemberBranch (`Member_Code`, `Head_Code`, `Is_Active`);
+
+-- used by 3 queries:
+--   api/authentication/services/auth.py (get_user)
+--   api/authentication/services/auth.py (get_user_access)
+--   api/authentication/services/auth.py (get_user_level)
+CREATE INDEX ix_Members_Code ON tblMembers (`Code`);
+
+-- used by 2 queries:
+--   api/user_mgmt/services/user.py (get_user)
+--   api/user_mgmt/services/user.py (get_user_details)
+CREATE INDEX ix_User_Usercode ON tblUser (`Usercode`);
+
+-- used by 8 queries:
+--   api/authentication/services/auth.py (get_user_access)
+--   api/authentication/services/auth.py (get_user_level)
+--   api/user_mgmt/services/user.py (get_user_details)
+--   api/user_mgmt/services/user.py (get_user_roles)
+--   api/user_mgmt/services/user.py (get_user_submodules)
+--   api/user_mgmt/services/user.py (get_users_details)
+CREATE INDEX ix_UserRole_Usercode_Level_Code_Is_Active_Status ON tblUserRole (`Usercode`, `Level_Code`, `Is_Active`, `Status`);
+
+-- used by 4 queries:
+--   api/church_admin/services/churches.py (test_query)
+--   api/user_mgmt/services/user.py (get_user_roles)
+--   api/user_mgmt/services/user.py (get_user_submodules)
+--   api/user_mgmt/services/user.py (get_users_details)
+CREATE INDEX ix_UserRole_Level_Code ON tblUserRole (`Level_Code`);
+
+-- used by 4 queries:
+--   api/user_mgmt/services/user.py (get_user_submodules)
+CREATE INDEX ix_UserRoleSubModule_UserRole_Code ON tblUserRoleSubModule (`UserRole_Code`);
+
+-- used by 3 queries:
+--   api/authentication/services/auth.py (get_user)
+--   api/authentication/services/auth.py (get_user_access)
+--   api/authentication/services/auth.py (get_user_level)
+CREATE INDEX ix_Users_Usercode ON tblUsers (`Usercode`);
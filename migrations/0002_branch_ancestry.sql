@@ -0,0 +1,46 @@
+-- Materialised lead chain of every branch (replaces vwMemberChurchHierarchy for member hierarchy reads).
+-- Maintained by api/church_admin/services/branch_ancestry.py:refresh_branch_ancestry
+-- (church-lead mapping changes, church updates and deactivations).
+-- Reads never build the rows: get_branch_ancestry falls back to the lead chain in tblChurchClosure
+-- (backfilled by 0008_church_closure.sql) for a branch without a row. The rows of a head church are
+-- filled by its next rebuild, or by POST /admin/stats/refresh.
+
+CREATE TABLE IF NOT EXISTS tblBranchAncestry (
+    Branch_Code VARCHAR(20) NOT NULL,
+    Branch_Name VARCHAR(255) NULL,
+    Branch_Level VARCHAR(10) NULL,
+    Head_Code VARCHAR(4) NOT NULL,
+    LeadCode_1 VARCHAR(20) NULL,
+    LeadName_1 VARCHAR(255) NULL,
+    LeadLevel_1 VARCHAR(10) NULL,
+    LeadCode_2 VARCHAR(20) NULL,
+    LeadName_2 VARCHAR(255) NULL,
+    LeadLevel_2 VARCHAR(10) NULL,
+    LeadCode_3 VARCHAR(20) NULL,
+    LeadName_3 VARCHAR(255) NULL,
+    LeadLevel_3 VARCHAR(10) NULL,
+    LeadCode_4 VARCHAR(20) NULL,
+    LeadName_4 VARCHAR(255) NULL,
+    LeadLevel_4 VARCHAR(10) NULL,
+    LeadCode_5 VARCHAR(20) NULL,
+    LeadName_5 VARCHAR(255) NULL,
+    LeadLevel_5 VARCHAR(10) NULL,
+    LeadCode_6 VARCHAR(20) NULL,
+    LeadName_6 VARCHAR(255) NULL,
+    LeadLevel_6 VARCHAR(10) NULL,
+    LeadCode_7 VARCHAR(20) NULL,
+    LeadName_7 VARCHAR(255) NULL,
+    LeadLevel_7 VARCHAR(10) NULL,
+    LeadCode_8 VARCHAR(20) NULL,
+    LeadName_8 VARCHAR(255) NULL,
+    LeadLevel_8 VARCHAR(10) NULL,
+    LeadCode_9 VARCHAR(20) NULL,
+    LeadName_9 VARCHAR(255) NULL,
+    LeadLevel_9 VARCHAR(10) NULL,
+    LeadCode_10 VARCHAR(20) NULL,
+    LeadName_10 VARCHAR(255) NULL,
+    LeadLevel_10 VARCHAR(10) NULL,
+    Refreshed_Date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (Branch_Code),
+    INDEX ix_BranchAncestry_Head_Code (Head_Code)
+);
@@ -0,0 +1,21 @@
+-- Member statistics per church, rolled up the lead hierarchy (tblChurchClosure, 0008_church_closure.sql):
+-- a church's counts include the members of all the branches under it.
+-- Maintained by api/church_admin/services/church_stats.py:
+--   refresh_church_rollups moves a changed church's counters to its new lead churches (church-lead mapping
+--   changes, church updates/deactivations), refresh_church_stats rebuilds a head church's rows,
+--   apply_member_stats_deltas updates the counters on member create/activate/deactivate/join/exit/transfer
+--   and clergy promotion/demotion.
+-- The rows of a head church are built on the first stats read of a head church without rows,
+-- or by POST /admin/stats/refresh.
+
+CREATE TABLE IF NOT EXISTS tblChurchStats (
+    Church_Code VARCHAR(20) NOT NULL,
+    Level_Code VARCHAR(10) NULL,
+    Head_Code VARCHAR(4) NOT NULL,
+    Active_Members INT NOT NULL DEFAULT 0,
+    Active_Clergy INT NOT NULL DEFAULT 0,
+    Refreshed_Date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    Modified_Date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (Church_Code),
+    INDEX ix_ChurchStats_Head_Code_Level_Code (Head_Code, Level_Code)
+);
@@ -0,0 +1,14 @@
+-- Member search (GET /members/search, api/membership_mgmt/services/members.py: MEMBER_SEARCH).
+-- Names and emails: InnoDB FULLTEXT index with the ngram parser (ngram_token_size = 2, the default),
+-- so any part of a name/email matches, e.g. "jo smi" finds "John Smith".
+-- The MATCH (...) column list of the search query must be the same as the index's.
+-- Phone numbers (stored as E.164) are searched by prefix (LIKE '+234803%') on the B-tree indexes.
+
+ALTER TABLE tblMember
+    ADD FULLTEXT INDEX ftx_Member_Search
+        (First_Name, Middle_Name, Last_Name, Family_Name, Personal_Email, Contact_Email)
+        WITH PARSER ngram;
+
+CREATE INDEX ix_Member_Personal_Contact_No ON tblMember (Personal_Contact_No);
+CREATE INDEX ix_Member_Contact_No ON tblMember (Contact_No);
+CREATE INDEX ix_Member_Contact_No2 ON tblMember (Contact_No2);
@@ -0,0 +1,27 @@
+-- Background jobs (api/common/jobs.py, api/system_admin): one row per submitted job.
+-- Written by the JobsServices (submit/cancel) and by the JobRunner (start, progress, finish).
+-- Idempotency_Key is unique per head church: submitting a job with a used key returns the existing job.
+
+CREATE TABLE IF NOT EXISTS tblJobs (
+    Id BIGINT NOT NULL AUTO_INCREMENT,
+    Job_Kind VARCHAR(50) NOT NULL,
+    Status VARCHAR(10) NOT NULL DEFAULT 'QUEUED',
+    Idempotency_Key VARCHAR(100) NULL,
+    Params JSON NULL,
+    Progress_Done INT NOT NULL DEFAULT 0,
+    Progress_Total INT NULL,
+    Message VARCHAR(255) NULL,
+    Result JSON NULL,
+    Error TEXT NULL,
+    Cancel_Requested TINYINT(1) NOT NULL DEFAULT 0,
+    Head_Code VARCHAR(4) NOT NULL,
+    Created_By VARCHAR(20) NULL,
+    Created_Date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    Started_Date DATETIME NULL,
+    Finished_Date DATETIME NULL,
+    Modified_Date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (Id),
+    UNIQUE KEY ux_Jobs_Head_Code_Idempotency_Key (Head_Code, Idempotency_Key),
+    INDEX ix_Jobs_Head_Code_Created_By (Head_Code, Created_By),
+    INDEX ix_Jobs_Head_Code_Status (Head_Code, Status)
+);
@@ -0,0 +1,16 @@
+-- Emails the mail queue (api/common/mail_queue.py) could not deliver:
+-- permanent SMTP failures (5xx), emails whose retries were exhausted and emails still queued at shutdown.
+-- Message holds the full email (RFC 5322), so it can be inspected and sent again.
+
+CREATE TABLE IF NOT EXISTS tblMailDeadLetter (
+    Id BIGINT NOT NULL AUTO_INCREMENT,
+    Message_Id VARCHAR(255) NULL,
+    Recipients TEXT NOT NULL,
+    Subject VARCHAR(255) NULL,
+    Message MEDIUMTEXT NOT NULL,
+    Attempts INT NOT NULL DEFAULT 0,
+    Error VARCHAR(1000) NULL,
+    Created_Date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (Id),
+    INDEX ix_MailDeadLetter_Created_Date (Created_Date)
+);
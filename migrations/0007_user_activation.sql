@@ -0,0 +1,19 @@
+-- Bulk user provisioning (POST /admin/users/create): users are created without a password
+-- and set it with a single-use activation token (POST /auth/activate).
+-- Only the sha256 of each token is stored; Used_Date is set when the token is used.
+
+ALTER TABLE tblUsers MODIFY Password VARCHAR(255) NULL;
+
+CREATE TABLE IF NOT EXISTS tblUserActivation (
+    Id BIGINT NOT NULL AUTO_INCREMENT,
+    Usercode VARCHAR(20) NOT NULL,
+    Token_Hash CHAR(64) NOT NULL,
+    Expires_Date DATETIME NOT NULL,
+    Used_Date DATETIME NULL,
+    Head_Code VARCHAR(4) NOT NULL,
+    Created_By VARCHAR(20) NULL,
+    Created_Date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (Id),
+    UNIQUE KEY ux_UserActivation_Token_Hash (Token_Hash),
+    INDEX ix_UserActivation_Usercode (Usercode)
+);
@@ -0,0 +1,29 @@
+-- Closure of the lead hierarchy: one row per (church, church under it), including the church itself (Depth 0).
+-- Pushes the caller's church scope into the member list queries as an indexed semi-join
+-- (api/common/permissions.py: resolve_church_scope, api/membership_mgmt/services/members.py):
+--   EXISTS (SELECT 1 FROM tblChurchClosure S WHERE S.Church_Code = MC.Branch_Code AND S.Ancestor_Code IN (...))
+-- Maintained with tblBranchAncestry by api/church_admin/services/branch_ancestry.py:refresh_branch_ancestry
+-- (church-lead mapping changes, church updates and deactivations, POST /admin/stats/refresh).
+
+CREATE TABLE IF NOT EXISTS tblChurchClosure (
+    Ancestor_Code VARCHAR(20) NOT NULL,
+    Church_Code VARCHAR(20) NOT NULL,
+    Head_Code VARCHAR(4) NOT NULL,
+    Depth TINYINT NOT NULL,
+    PRIMARY KEY (Ancestor_Code, Church_Code),
+    INDEX ix_ChurchClosure_Church_Code_Ancestor_Code (Church_Code, Ancestor_Code),
+    INDEX ix_ChurchClosure_Head_Code (Head_Code)
+);
+
+-- Backfill from the active church-lead mappings (later rebuilt per head church by refresh_branch_ancestry)
+INSERT IGNORE INTO tblChurchClosure (Ancestor_Code, Church_Code, Head_Code, Depth)
+WITH RECURSIVE Closure AS (
+    SELECT `Code` AS Ancestor_Code, `Code` AS Church_Code, Head_Code, 0 AS Depth
+    FROM tblChurches
+    UNION ALL
+    SELECT CL.LeadChurch_Code, C.Church_Code, C.Head_Code, C.Depth + 1
+    FROM Closure C
+        JOIN tblChurchLeads CL ON CL.Church_Code = C.Ancestor_Code AND CL.Is_Active = 1
+    WHERE C.Depth < 10
+)
+SELECT Ancestor_Code, Church_Code, Head_Code, Depth FROM Closure;
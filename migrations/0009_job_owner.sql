@@ -0,0 +1,10 @@
+-- Owner and liveness of the background jobs (api/common/jobs.py: JobRunner).
+-- Owner is the "<host>:<pid>" of the process running the job, and Heartbeat_Date is refreshed by that process
+-- every JOBS_HEARTBEAT_INTERVAL seconds while the job is queued or running.
+-- At startup, each process fails the QUEUED/RUNNING jobs whose heartbeat is older than 3 intervals
+-- (their process died without running its shutdown handlers).
+
+ALTER TABLE tblJobs
+    ADD COLUMN Owner VARCHAR(100) NULL AFTER Created_By,
+    ADD COLUMN Heartbeat_Date DATETIME NULL AFTER Finished_Date,
+    ADD INDEX ix_Jobs_Status_Heartbeat_Date (Status, Heartbeat_Date);
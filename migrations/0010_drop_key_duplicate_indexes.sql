@@ -0,0 +1,8 @@
+-- Indexes of 0001_hot_predicate_indexes.sql on a lookup key column which is already the table's
+-- primary/unique key, so the key serves the lookups and the index only slows the writes.
+-- index_advisor.py now skips the columns covered by a primary/unique key (BASE_TABLE_KEYS).
+
+DROP INDEX ix_ChurchHeads_Code ON tblChurchHeads;
+DROP INDEX ix_Hierarchy_Code ON tblHierarchy;
+DROP INDEX ix_User_Usercode ON tblUser;
+DROP INDEX ix_Members_Code ON tblMembers;
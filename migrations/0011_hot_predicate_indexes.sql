@@ -0,0 +1,29 @@
+-- Composite indexes for the recurring service query predicates.
+-- Generated by index_advisor.py; re-run it after adding/changing service queries
+-- (it writes the indexes still missing to a new numbered migration).
+
+-- used by 3 queries:
+--   api/church_admin/services/branch_ancestry.py (branch_ancestry.DELETE_CHURCH_CLOSURE_BY_CODES)
+--   api/church_admin/services/branch_ancestry.py (branch_ancestry.GET_CHURCH_LEAD_CHAIN)
+--   api/church_admin/services/church_stats.py (church_stats.GET_CHURCH_ANCESTORS_BY_CODES)
+CREATE INDEX ix_ChurchClosure_Church_Code_Head_Code ON tblChurchClosure (`Church_Code`, `Head_Code`);
+
+-- used by 3 queries:
+--   api/church_admin/services/church_leads.py (church_leads.CHURCHES_BY_LEAD_CODE[Level_Code])
+--   api/church_admin/services/church_leads.py (church_leads.CHURCHES_BY_LEAD_CODE[Status,Level_Code])
+--   api/common/utils.py (utils.GET_LEVEL)
+CREATE INDEX ix_Churches_Level_Code_Status ON tblChurches (`Level_Code`, `Status`);
+
+-- used by 2 queries:
+--   api/church_admin/services/church_stats.py (church_stats.GET_MEMBER_COUNTS_BY_BRANCH_CODES)
+--   api/membership_mgmt/services/members.py (members.GET_MEMBERS_BY_CHURCH_1)
+CREATE INDEX ix_MemberBranch_Branch_Code_Is_Active ON tblMemberBranch (`Branch_Code`, `Is_Active`);
+
+-- used by 6 queries:
+--   api/authentication/services/auth.py (auth.ACTIVATE_USER)
+--   api/authentication/services/auth.py (auth.GET_BOOTSTRAP_MEMBER)
+--   api/authentication/services/auth.py (auth.GET_USER)
+--   api/authentication/services/auth.py (auth.GET_USER_LEVEL)
+--   api/user_mgmt/services/user.py (user.GET_MEMBERS_FOR_USERS)
+--   api/user_mgmt/services/user.py (user.GET_USER_FOR_ACTIVATION)
+CREATE INDEX ix_Users_Usercode_Head_Code ON tblUsers (`Usercode`, `Head_Code`);
@@ -0,0 +1,21 @@
+-- Composite indexes for the recurring service query predicates.
+-- Generated by index_advisor.py; re-run it after adding/changing service queries
+-- (it writes the indexes still missing, and drops the redundant ones, in a new numbered migration).
+
+-- redundant: leads with the key (Code)
+DROP INDEX ix_Churches_Code_Head_Code ON tblChurches;
+
+-- redundant: prefix of ix_Churches_Level_Code_Status
+DROP INDEX ix_Churches_Level_Code ON tblChurches;
+
+-- redundant: leads with the key (Code)
+DROP INDEX ix_Member_Code_Is_Clergy_Head_Code_Is_Active ON tblMember;
+
+-- redundant: leads with the key (Code)
+DROP INDEX ix_Member_Code_Head_Code_Is_Active ON tblMember;
+
+-- redundant: leads with the key (Usercode)
+DROP INDEX ix_Users_Usercode ON tblUsers;
+
+-- redundant: leads with the key (Usercode)
+DROP INDEX ix_Users_Usercode_Head_Code ON tblUsers;
@@ -0,0 +1,653 @@
+"""
+Synthetic data generator for scale testing
+- Head churches with their church levels, and a church tree of up to 10 levels (CHU ... BRN)
+  mapped with tblChurchLeads
+- Members spread unevenly over the branches, with join/exit history in tblMemberBranch
+  (transfers, relocations, members who left), clergy and inactive members
+- Users (one admin per church, one super admin per head church) with their roles
+- Reference data: dfCodeTable, dfRole, dfHierarchy/tblHierarchy
+- Deterministic: the same --seed and sizes always give the same rows
+- Written with multi-row INSERTs (--method insert), or as tab-separated files loaded
+  with LOAD DATA LOCAL INFILE (--method load), or as files only (--method files)
+
+Usage:
+    python seed_data.py --members 1000000                      # 1 head church, .env database
+    python seed_data.py --heads 2 --depth 10 --fanout 3 --members 2000000 --seed 7
+    python seed_data.py --members 1000000 --method load        # needs local_infile=ON on the server
+    python seed_data.py --members 100000 --method files --out seed_out   # no database
+    python seed_data.py --reset ...                            # delete the seeded head churches first
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from bisect import bisect
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import accumulate, islice
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# hierarchy levels, top to bottom: (Code, Name, Level_No); --depth keeps the first depth-1 and BRN
+LEVELS = [
+    ("CHU", "Head Church", 10),
+    ("PRV", "Province", 9),
+    ("DIO", "Diocese", 8),
+    ("ARC", "Archdeaconry", 7),
+    ("DEA", "Deanery", 6),
+    ("ZON", "Zone", 5),
+    ("DIS", "District", 4),
+    ("PAR", "Parish", 3),
+    ("SEC", "Section", 2),
+    ("BRN", "Branch", 1),
+]
+
+# dfCodeTable: Category -> [(Code, Name)]
+CODE_TABLE = {
+    "Gender": [("M", "Male"), ("F", "Female")],
+    "Marital Status": [("SIG", "Single"), ("MAR", "Married"), ("WID", "Widowed"), ("DIV", "Divorced")],
+    "Employment Status": [
+        ("EMPD", "Employed"),
+        ("SEMP", "Self Employed"),
+        ("UEMP", "Unemployed"),
+        ("STUD", "Student"),
+        ("RETD", "Retired"),
+    ],
+    "Member Type": [("MBR", "Member"), ("WKR", "Worker"), ("VIS", "Visitor")],
+    "Exit/Join Reason": [
+        ("NEW", "New Member"),
+        ("BAP", "Baptism"),
+        ("TRF", "Transfer"),
+        ("REL", "Relocation"),
+        ("MAR", "Marriage"),
+        ("LFT", "Left the Church"),
+        ("DEC", "Deceased"),
+    ],
+    "Status": [("PND", "Pending"), ("APR", "Approved"), ("REJ", "Rejected"), ("INA", "Inactive")],
+}
+
+ROLES = [("SAD", "Super Administrator"), ("ADM", "Administrator"), ("MBR", "Member")]
+
+FIRST_NAMES = [
+    "John", "Mary", "David", "Grace", "Samuel", "Esther", "Daniel", "Ruth", "Joseph", "Sarah",
+    "Emmanuel", "Blessing", "Peter", "Joy", "Paul", "Faith", "James", "Mercy", "Michael", "Deborah",
+    "Chinedu", "Ngozi", "Tunde", "Funmilayo", "Ibrahim", "Aisha", "Osagie", "Efosa", "Uche", "Amaka",
+]
+LAST_NAMES = [
+    "Okafor", "Adeyemi", "Okonkwo", "Bello", "Eze", "Balogun", "Nwosu", "Ogunleye", "Osagie", "Ibe",
+    "Adebayo", "Obi", "Afolabi", "Uzor", "Igbinedion", "Ojo", "Chukwu", "Aigbe", "Lawal", "Onyeka",
+]
+TOWNS = [("BEN", "EDO", "SOUT"), ("LAG", "LAG", "WEST"), ("ABJ", "FCT", "NCEN"), ("ENU", "ENU", "EAST")]
+OCCUPATIONS = ["Teacher", "Trader", "Engineer", "Nurse", "Farmer", "Doctor", "Banker", "Artisan", None]
+
+SEED_USER = "SEED"
+# members' join dates are spread over this period
+HISTORY_START = date(2000, 1, 1)
+HISTORY_DAYS = 8_000
+
+
+@dataclass
+class Church:
+    code: str
+    name: str
+    level: str
+    lead: "Church | None"
+    # index range of the church's branches in Plan.branches
+    first_branch: int = 0
+    last_branch: int = 0
+
+
+@dataclass
+class Plan:
+    """What is generated for one head church, decided before any row is written."""
+
+    head_code: str
+    levels: list
+    churches: list = field(default_factory=list)
+    branches: list = field(default_factory=list)
+    # member index -> index of its current branch (-1: left the church)
+    member_branch: list = field(default_factory=list)
+    # member index -> (role, Church) of the member's user account
+    users: dict = field(default_factory=dict)
+
+
+def member_code(head_code: str, index: int) -> str:
+    return f"{head_code}M{index:07d}"
+
+
+def build_tree(rnd: random.Random, head_code: str, levels: list, fanout: int) -> Plan:
+    """Churches depth-first, so the branches of every church are a contiguous range."""
+    plan = Plan(head_code, levels)
+    counters = {level[0]: 0 for level in levels}
+
+    def add(level_index: int, lead):
+        level_code, level_name, _ = levels[level_index]
+        counters[level_code] += 1
+        church = Church(
+            code=f"{head_code}{level_code}{counters[level_code]:05d}",
+            name=f"{head_code} {level_name} {counters[level_code]}",
+            level=level_code,
+            lead=lead,
+            first_branch=len(plan.branches),
+        )
+        plan.churches.append(church)
+        if level_index == len(levels) - 1:
+            plan.branches.append(church)
+        else:
+            children = 1 if level_index == 0 and len(levels) > 2 else max(1, fanout + rnd.randint(-1, 1))
+            for _ in range(children):
+                add(level_index + 1, church)
+        church.last_branch = len(plan.branches)
+
+    add(0, None)
+    return plan
+
+
+def assign_members(rnd: random.Random, plan: Plan, members: int, left_ratio: float):
+    # uneven branch sizes (a few large urban branches, many small rural ones)
+    weights = [rnd.paretovariate(1.2) for _ in plan.branches]
+    cum_weights = list(accumulate(weights))
+    total = cum_weights[-1]
+    plan.member_branch = [
+        -1 if rnd.random() < left_ratio else bisect(cum_weights, rnd.random() * total)
+        for _ in range(members)
+    ]
+
+
+def assign_users(rnd: random.Random, plan: Plan, admins_per_church: int):
+    """One super admin for the head church and admins per church, drawn from the churches' current members."""
+    members_by_branch: dict[int, list[int]] = {}
+    for index, branch in enumerate(plan.member_branch):
+        if branch >= 0:
+            members_by_branch.setdefault(branch, []).append(index)
+    for church in plan.churches:
+        role = "SAD" if church.lead is None else "ADM"
+        count = 1 if church.lead is None else admins_per_church
+        for _ in range(count):
+            for _attempt in range(10):
+                branch = rnd.randrange(church.first_branch, church.last_branch)
+                candidates = members_by_branch.get(branch)
+                if candidates:
+                    index = rnd.choice(candidates)
+                    if index not in plan.users:
+                        plan.users[index] = (role, church)
+                        break
+
+
+def get_levels(depth: int) -> list:
+    return LEVELS[: depth - 1] + LEVELS[-1:]
+
+
+def make_plan(args, head_code: str):
+    """
+    Returns the generator and the plan of a head church (args: the seed_data options).
+    One generator per head church: adding head churches does not change the earlier ones.
+    The plan (churches, members' branches, users) can be rebuilt without the database, e.g. by load_test.py.
+    """
+    rnd = random.Random(f"{args.seed}:{head_code}")
+    plan = build_tree(rnd, head_code, get_levels(args.depth), args.fanout)
+    assign_members(rnd, plan, args.members, args.left_ratio)
+    assign_users(rnd, plan, args.admins_per_church)
+    return rnd, plan
+
+
+def head_codes(args) -> list:
+    return [f"{args.head_prefix}{index:03d}" for index in range(1, args.heads + 1)]
+
+
+def random_date(rnd: random.Random, start: date, days: int) -> date:
+    return start + timedelta(days=rnd.randrange(max(days, 1)))
+
+
+def phone(rnd: random.Random) -> str:
+    return f"+234{rnd.choice(['80', '81', '70', '90'])}{rnd.randint(10_000_000, 99_999_999)}"
+
+
+# ---- rows ------------------------------------------------------------------------------------
+
+HIERARCHY_COLUMNS = ["Code", "Level_No"]
+CODE_TABLE_COLUMNS = ["Code", "Name", "Category", "Is_Active"]
+ROLE_COLUMNS = ["Code", "Role"]
+HEAD_COLUMNS = [
+    "Code", "Name", "Address", "Founding_Date", "Contact_No", "Contact_Email",
+    "Town_Code", "State_Code", "Region_Code", "Country_Code", "Is_Active", "Status", "Created_By",
+]
+HEAD_LEVEL_COLUMNS = ["Level_Code", "ChurchLevel_Code", "Church_Level", "Head_Code", "Is_Active", "Created_By"]
+CHURCH_LEVEL_COLUMNS = ["Code", "Hierarchy_Code", "Level_Name", "Head_Code", "Is_Active", "Created_By"]
+CHURCH_COLUMNS = [
+    "Code", "Name", "Address", "Founding_Date", "Contact_No", "Contact_Email",
+    "Town_Code", "State_Code", "Region_Code", "Country_Code", "Level_Code", "Head_Code",
+    "Is_Active", "Status", "Created_By",
+]
+CHURCH_LEAD_COLUMNS = [
+    "Church_Code", "Level_Code", "LeadChurch_Code", "LeadChurch_Level", "Start_Date",
+    "Head_Code", "Is_Active", "Status", "Created_By",
+]
+MEMBER_COLUMNS = [
+    "Code", "First_Name", "Middle_Name", "Last_Name", "Title", "Family_Name", "Is_FamilyHead",
+    "Home_Address", "Date_of_Birth", "Gender", "Marital_Status", "Employ_Status", "Occupation",
+    "State_of_Origin", "Country_of_Origin", "Personal_Contact_No", "Contact_No", "Personal_Email",
+    "Contact_Email", "Town_Code", "State_Code", "Region_Code", "Country_Code", "Type", "Is_Clergy",
+    "Is_User", "Is_Active", "Status", "Head_Code", "Created_By",
+]
+MEMBER_BRANCH_COLUMNS = [
+    "Member_Code", "Branch_Code", "Join_Date", "Join_Code", "Join_Note",
+    "Exit_Date", "Exit_Code", "Exit_Note", "Is_Active", "Head_Code", "Created_By",
+]
+USER_COLUMNS = ["Usercode", "Email", "Password", "Is_Member", "Is_Active", "Head_Code", "Created_By"]
+USER_ROLE_COLUMNS = [
+    "Usercode", "Role_Code", "Level_Code", "Church_Code", "Head_Code", "Is_Active", "Status", "Created_By",
+]
+
+
+def head_rows(rnd: random.Random, plan: Plan):
+    town, state, region = rnd.choice(TOWNS)
+    yield (
+        plan.head_code, f"Seed Church {plan.head_code}", f"1 Cathedral Road, {town}",
+        random_date(rnd, date(1900, 1, 1), 30_000), phone(rnd), f"info@{plan.head_code.lower()}.example.com",
+        town, state, region, "NIG", 1, "APR", SEED_USER,
+    )
+
+
+def head_level_rows(plan: Plan):
+    for level_code, level_name, _ in plan.levels:
+        yield (level_code, f"{plan.head_code}{level_code}", level_name, plan.head_code, 1, SEED_USER)
+
+
+def church_level_rows(plan: Plan):
+    for level_code, level_name, _ in plan.levels:
+        yield (level_code, level_code, level_name, plan.head_code, 1, SEED_USER)
+
+
+def church_rows(rnd: random.Random, plan: Plan):
+    for church in plan.churches:
+        town, state, region = rnd.choice(TOWNS)
+        yield (
+            church.code, church.name, f"{rnd.randint(1, 200)} Church Street, {town}",
+            random_date(rnd, date(1950, 1, 1), 25_000), phone(rnd), f"{church.code.lower()}@example.com",
+            town, state, region, "NIG", church.level, plan.head_code, 1, "APR", SEED_USER,
+        )
+
+
+def church_lead_rows(rnd: random.Random, plan: Plan):
+    for church in plan.churches:
+        if church.lead is not None:
+            yield (
+                church.code, church.level, church.lead.code, church.lead.level,
+                datetime.combine(random_date(rnd, date(1990, 1, 1), 3_000), datetime.min.time()),
+                plan.head_code, 1, "APR", SEED_USER,
+            )
+
+
+def member_and_branch_rows(rnd: random.Random, plan: Plan, clergy_ratio: float, moved_ratio: float):
+    """Yields ("member", row) and ("branch", row) items: the history is drawn with the member."""
+    codes = {category: [code for code, _ in codes] for category, codes in CODE_TABLE.items()}
+    for index, branch in enumerate(plan.member_branch):
+        code = member_code(plan.head_code, index)
+        first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+        town, state, region = rnd.choice(TOWNS)
+        left = branch < 0
+        # history: previous branches (transfers/relocations), then the current one
+        moves = 0 if rnd.random() >= moved_ratio else rnd.choice((1, 1, 1, 2))
+        joined = random_date(rnd, HISTORY_START, HISTORY_DAYS)
+        stays = []
+        for _ in range(moves + 1):
+            stays.append(joined)
+            joined = joined + timedelta(days=rnd.randint(180, 2_500))
+        current = branch if not left else rnd.randrange(len(plan.branches))
+        for stay, join_date in enumerate(stays):
+            last_stay = stay == len(stays) - 1
+            branch_code = (
+                plan.branches[current].code
+                if last_stay
+                else plan.branches[rnd.randrange(len(plan.branches))].code
+            )
+            exit_date = None if last_stay else stays[stay + 1]
+            exit_code = None if last_stay else rnd.choice(("TRF", "REL", "MAR"))
+            if last_stay and left:
+                exit_date = join_date + timedelta(days=rnd.randint(30, 2_000))
+                exit_code = rnd.choice(("LFT", "LFT", "REL", "DEC"))
+            yield "branch", (
+                code, branch_code,
+                datetime.combine(join_date, datetime.min.time()),
+                "NEW" if stay == 0 else "TRF", None,
+                datetime.combine(exit_date, datetime.min.time()) if exit_date else None,
+                exit_code, None, 0 if exit_date else 1, plan.head_code, SEED_USER,
+            )
+        yield "member", (
+            code, first, rnd.choice(FIRST_NAMES) if rnd.random() < 0.5 else None, last,
+            rnd.choice(("Mr", "Mrs", "Miss", "Dr", None)), last, int(rnd.random() < 0.3),
+            f"{rnd.randint(1, 300)} {rnd.choice(LAST_NAMES)} Street, {town}",
+            random_date(rnd, date(1940, 1, 1), 25_000), rnd.choice(codes["Gender"]),
+            rnd.choice(codes["Marital Status"]), rnd.choice(codes["Employment Status"]),
+            rnd.choice(OCCUPATIONS), state, "NIG",
+            phone(rnd) if rnd.random() < 0.6 else None, phone(rnd),
+            f"{first.lower()}.{last.lower()}.{index}@example.com" if rnd.random() < 0.7 else None,
+            f"{code.lower()}@example.com", town, state, region, "NIG",
+            rnd.choice(codes["Member Type"]), int(rnd.random() < clergy_ratio),
+            int(index in plan.users), 0 if left else 1, "INA" if left else "APR",
+            plan.head_code, SEED_USER,
+        )
+
+
+def user_rows(plan: Plan, password_hash: str):
+    for index in sorted(plan.users):
+        code = member_code(plan.head_code, index)
+        yield (code, f"{code.lower()}@example.com", password_hash, 1, 1, plan.head_code, SEED_USER)
+
+
+def user_role_rows(plan: Plan):
+    for index, (role, church) in sorted(plan.users.items()):
+        yield (
+            member_code(plan.head_code, index), role, church.level, church.code,
+            plan.head_code, 1, "APR", SEED_USER,
+        )
+
+
+# ---- writers ---------------------------------------------------------------------------------
+
+
+def chunks(rows, size: int):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+class InsertWriter:
+    """Multi-row INSERTs (mysql-connector turns executemany of an INSERT into one statement per chunk)."""
+
+    def __init__(self, connection, batch_size: int):
+        self.connection = connection
+        self.batch_size = batch_size
+
+    def write(self, table: str, columns: list, rows, ignore: bool = False) -> int:
+        sql = (
+            f"INSERT {'IGNORE ' if ignore else ''}INTO {table} "
+            f"({', '.join(f'`{column}`' for column in columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})"
+        )
+        count = 0
+        cursor = self.connection.cursor()
+        try:
+            for chunk in chunks(rows, self.batch_size):
+                cursor.executemany(sql, chunk)
+                self.connection.commit()
+                count += len(chunk)
+        finally:
+            cursor.close()
+        return count
+
+    def close(self):
+        pass
+
+
+def _tsv_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+    )
+
+
+class FileWriter:
+    """Tab-separated files (LOAD DATA default format) and a load.sql script to load them."""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.statements: list[str] = []
+        self.files: dict[str, str] = {}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def load_statement(self, table: str, columns: list, path: str, ignore: bool) -> str:
+        return (
+            f"LOAD DATA LOCAL INFILE '{os.path.abspath(path)}' {'IGNORE ' if ignore else ''}"
+            f"INTO TABLE {table} ({', '.join(f'`{column}`' for column in columns)});"
+        )
+
+    def write(self, table: str, columns: list, rows, ignore: bool = False) -> int:
+        name = table.split(".")[-1]
+        path = os.path.join(self.out_dir, f"{name}.tsv")
+        # the head churches are written one after the other: append to the table's file
+        mode = "a" if path in self.files else "w"
+        count = 0
+        with open(path, mode, encoding="utf-8", newline="\n") as file:
+            for row in rows:
+                file.write("\t".join(_tsv_value(value) for value in row) + "\n")
+                count += 1
+        if path not in self.files:
+            self.files[path] = table
+            self.statements.append(self.load_statement(table, columns, path, ignore))
+        return count
+
+    def close(self):
+        with open(os.path.join(self.out_dir, "load.sql"), "w", encoding="utf-8") as file:
+            file.write("\n".join(self.statements) + "\n")
+        print(f"Files and load.sql saved to {self.out_dir}")
+
+
+class LoadWriter(FileWriter):
+    """Writes the files, then loads them with LOAD DATA LOCAL INFILE once all are written."""
+
+    def __init__(self, connection, out_dir: str):
+        super().__init__(out_dir)
+        self.connection = connection
+
+    def close(self):
+        super().close()
+        cursor = self.connection.cursor()
+        try:
+            for statement in self.statements:
+                started = time.perf_counter()
+                cursor.execute(statement)
+                self.connection.commit()
+                print(f"  loaded {statement.split('INTO TABLE ')[1].split(' ')[0]} in {time.perf_counter() - started:.1f}s")
+        finally:
+            cursor.close()
+
+
+# ---- main ------------------------------------------------------------------------------------
+
+
+def get_connection(local_infile: bool = False):
+    import mysql.connector  # type: ignore
+
+    try:
+        from dotenv import load_dotenv  # type: ignore
+
+        load_dotenv(os.path.join(BASE_DIR, ".env"))
+    except ImportError:
+        pass
+    env = os.environ
+    return mysql.connector.connect(
+        host=env.get("HOST"),
+        port=int(env.get("PORT") or 3306),
+        user=env.get("USER"),
+        password=env.get("PASSWORD"),
+        database=env.get("DB_SCHEMA_HEADCHU") or env.get("DATABASE"),
+        allow_local_infile=local_infile,
+    )
+
+
+def get_password_hash(password: str) -> str:
+    from passlib.context import CryptContext  # type: ignore
+
+    # one hash for all seeded users: hashing per user would dominate the run
+    return CryptContext(schemes=["bcrypt"], deprecated="auto").hash(password)
+
+
+def add_plan_arguments(parser):
+    """The options deciding the plans (also used by load_test.py to find the seeded users)."""
+    parser.add_argument("--heads", type=int, default=1, help="number of head churches")
+    parser.add_argument("--depth", type=int, default=10, help="church levels, 2 to 10 (CHU ... BRN)")
+    parser.add_argument("--fanout", type=int, default=3, help="average child churches per church")
+    parser.add_argument("--members", type=int, default=100_000, help="members per head church")
+    parser.add_argument("--admins-per-church", type=int, default=1)
+    parser.add_argument("--left-ratio", type=float, default=0.03, help="members who left the church")
+    parser.add_argument("--password", default="ChangeMe123!", help="password of the seeded users")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--head-prefix", default="S", help="head church codes: <prefix>001, ...")
+
+
+def reset(connection, tables: dict, head_codes: list):
+    cursor = connection.cursor()
+    placeholders = ", ".join(["%s"] * len(head_codes))
+    try:
+        for key, column in (
+            ("user_roles", "Head_Code"),
+            ("users", "Head_Code"),
+            ("member_branches", "Head_Code"),
+            ("members", "Head_Code"),
+            ("church_leads", "Head_Code"),
+            ("churches", "Head_Code"),
+            ("church_levels", "Head_Code"),
+            ("head_levels", "Head_Code"),
+            ("heads", "Code"),
+        ):
+            cursor.execute(
+                f"DELETE FROM {tables[key]} WHERE {column} IN ({placeholders})", head_codes
+            )
+            print(f"  {tables[key]}: {cursor.rowcount} rows deleted")
+            connection.commit()
+    finally:
+        cursor.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_plan_arguments(parser)
+    parser.add_argument("--clergy-ratio", type=float, default=0.02)
+    parser.add_argument("--moved-ratio", type=float, default=0.2, help="members with previous branches")
+    parser.add_argument("--method", choices=("insert", "load", "files"), default="insert")
+    parser.add_argument("--out", default="seed_out", help="folder of the files (load/files methods)")
+    parser.add_argument("--batch-size", type=int, default=5_000, help="rows per multi-row INSERT")
+    parser.add_argument("--reset", action="store_true", help="delete the seeded head churches' rows first")
+    parser.add_argument(
+        "--skip-derived",
+        action="store_true",
+        help="do not rebuild tblBranchAncestry/tblChurchStats after seeding",
+    )
+    args = parser.parse_args(argv)
+    if not 2 <= args.depth <= len(LEVELS):
+        parser.error(f"--depth must be between 2 and {len(LEVELS)}")
+
+    schema_headchu = os.environ.get("DB_SCHEMA_HEADCHU", "")
+    schema_generic = os.environ.get("DB_SCHEMA_GENERIC", "")
+    head = (lambda table: f"{schema_headchu}.{table}") if schema_headchu else (lambda table: table)
+    generic = (lambda table: f"{schema_generic}.{table}") if schema_generic else (lambda table: table)
+    tables = dict(
+        hierarchy=head("dfHierarchy"),
+        generic_hierarchy=generic("tblHierarchy"),
+        code_table=head("dfCodeTable"),
+        roles=head("dfRole"),
+        heads=generic("tblChurchHeads"),
+        head_levels=head("tblHeadChurchLevels"),
+        church_levels=head("tblChurchLevels"),
+        churches=head("tblChurches"),
+        church_leads=head("tblChurchLeads"),
+        members=head("tblMember"),
+        member_branches=head("tblMemberBranch"),
+        users=head("tblUsers"),
+        user_roles=head("tblUserRole"),
+    )
+
+    seeded_heads = head_codes(args)
+    password_hash = get_password_hash(args.password)
+
+    connection = None
+    if args.method != "files":
+        connection = get_connection(local_infile=args.method == "load")
+        cursor = connection.cursor()
+        # Created_By of the insert triggers; no unique checks while loading
+        cursor.execute(f"SET @current_user = '{SEED_USER}', unique_checks = 0, foreign_key_checks = 0")
+        cursor.close()
+        if args.reset:
+            print("Deleting the seeded head churches' rows")
+            reset(connection, tables, seeded_heads)
+    writer = (
+        InsertWriter(connection, args.batch_size)
+        if args.method == "insert"
+        else LoadWriter(connection, args.out)
+        if args.method == "load"
+        else FileWriter(args.out)
+    )
+
+    started = time.perf_counter()
+
+    def write(key: str, columns: list, rows, ignore: bool = False):
+        step = time.perf_counter()
+        count = writer.write(tables[key], columns, rows, ignore)
+        print(f"  {tables[key]}: {count} rows ({time.perf_counter() - step:.1f}s)")
+
+    print("Reference data")
+    write("hierarchy", HIERARCHY_COLUMNS, [(code, level_no) for code, _, level_no in LEVELS], ignore=True)
+    write("generic_hierarchy", HIERARCHY_COLUMNS, [(code, level_no) for code, _, level_no in LEVELS], ignore=True)
+    write(
+        "code_table",
+        CODE_TABLE_COLUMNS,
+        [(code, name, category, 1) for category, codes in CODE_TABLE.items() for code, name in codes],
+        ignore=True,
+    )
+    write("roles", ROLE_COLUMNS, ROLES, ignore=True)
+
+    for head_code in seeded_heads:
+        rnd, plan = make_plan(args, head_code)
+        print(
+            f"Head church {head_code}: {len(plan.churches)} churches, {len(plan.branches)} branches, "
+            f"{len(plan.member_branch)} members, {len(plan.users)} users"
+        )
+        write("heads", HEAD_COLUMNS, head_rows(rnd, plan))
+        write("head_levels", HEAD_LEVEL_COLUMNS, head_level_rows(plan))
+        write("church_levels", CHURCH_LEVEL_COLUMNS, church_level_rows(plan))
+        write("churches", CHURCH_COLUMNS, church_rows(rnd, plan))
+        write("church_leads", CHURCH_LEAD_COLUMNS, church_lead_rows(rnd, plan))
+        # members and their branch history are drawn together, written as two streams
+        step = time.perf_counter()
+        rows = dict(member=[], branch=[])
+        counts = dict(member=0, branch=0)
+
+        def flush():
+            counts["member"] += writer.write(tables["members"], MEMBER_COLUMNS, rows["member"])
+            counts["branch"] += writer.write(
+                tables["member_branches"], MEMBER_BRANCH_COLUMNS, rows["branch"]
+            )
+            rows["member"], rows["branch"] = [], []
+
+        for kind, row in member_and_branch_rows(rnd, plan, args.clergy_ratio, args.moved_ratio):
+            rows[kind].append(row)
+            if len(rows["member"]) >= args.batch_size * 10:
+                flush()
+        flush()
+        print(
+            f"  {tables['members']}: {counts['member']} rows, {tables['member_branches']}: "
+            f"{counts['branch']} rows ({time.perf_counter() - step:.1f}s)"
+        )
+        write("users", USER_COLUMNS, user_rows(plan, password_hash))
+        write("user_roles", USER_ROLE_COLUMNS, user_role_rows(plan))
+
+    writer.close()
+
+    if connection is not None and not args.skip_derived:
+        print("Rebuilding tblBranchAncestry and tblChurchStats")
+        from api.church_admin.services.church_stats import refresh_church_rollups
+        from api.common.database import SessionLocal1
+
+        db = SessionLocal1()
+        try:
+            for head_code in seeded_heads:
+                refresh_church_rollups(db, head_code)
+            db.commit()
+        finally:
+            db.close()
+    if connection is not None:
+        connection.close()
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
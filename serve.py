@@ -0,0 +1,226 @@
+"""
+Production server
+- Preloads the app once in the master process (routes, OpenAPI schema, endpoints sync),
+  then forks SERVER_WORKERS uvicorn workers sharing one listening socket
+- Event loop / HTTP parser: SERVER_LOOP (auto, uvloop, asyncio) and SERVER_HTTP (auto, httptools, h11)
+- Workers are recycled after SERVER_MAX_REQUESTS (+ random jitter) requests, and re-forked if they die
+- SIGTERM/SIGINT: the workers stop accepting, finish their in-flight requests
+  (up to SERVER_GRACEFUL_TIMEOUT seconds) and run the shutdown handlers (mail queue, jobs)
+
+Usage:
+    python serve.py                  # settings from .env (SERVER_*)
+    SERVER_WORKERS=4 python serve.py
+
+Without os.fork (Windows), uvicorn's own multi-process mode is used, without preloading.
+For development, use runserver.py (auto reload).
+"""
+
+import os
+import random
+import signal
+import sys
+import time
+
+import uvicorn  # type: ignore
+
+from api.common.config import settings
+
+# a worker exiting sooner than this after its start is considered crashed
+MIN_WORKER_LIFETIME = 1.0
+# the master waits this long on top of SERVER_GRACEFUL_TIMEOUT before killing the workers
+KILL_GRACE = 5
+
+
+def get_workers() -> int:
+    return settings.server_workers or os.cpu_count() or 1
+
+
+def check_response_cache(workers: int):
+    """The response cache invalidations only reach the other workers through RESPONSE_CACHE_DIR."""
+    if workers > 1 and settings.response_cache_enabled and not settings.response_cache_dir:
+        print("RESPONSE_CACHE_DIR is not set: the response cache is disabled with several workers")
+        settings.response_cache_enabled = False
+        # also for the workers importing the app themselves (no fork)
+        os.environ["RESPONSE_CACHE_ENABLED"] = "False"
+
+
+def check_metrics(workers: int):
+    """/metrics only sums the workers' metrics through METRICS_DIR, and its labels list the head churches."""
+    if not settings.metrics_enabled:
+        return
+    if workers > 1 and not settings.metrics_dir:
+        print("METRICS_DIR is not set: /metrics reports only the worker answering the scrape")
+    if not settings.metrics_token:
+        print("METRICS_TOKEN is not set: /metrics (labelled by head church) is served without a token")
+
+
+def get_loop() -> str:
+    if settings.server_loop != "auto":
+        return settings.server_loop
+    try:
+        import uvloop  # type: ignore # noqa: F401
+
+        return "uvloop"
+    except ImportError:
+        return "asyncio"
+
+
+def get_http() -> str:
+    if settings.server_http != "auto":
+        return settings.server_http
+    try:
+        import httptools  # type: ignore # noqa: F401
+
+        return "httptools"
+    except ImportError:
+        return "h11"
+
+
+def get_config(app) -> uvicorn.Config:
+    return uvicorn.Config(
+        app,
+        host=settings.server_host,
+        port=settings.server_port,
+        loop=get_loop(),
+        http=get_http(),
+        log_level=settings.server_log_level,
+        access_log=settings.server_access_log,
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keep_alive,
+        timeout_graceful_shutdown=settings.server_graceful_timeout,
+        proxy_headers=True,
+        server_header=False,
+    )
+
+
+def preload():
+    """Builds the app and its shared state before forking, so the workers inherit it."""
+    from api import app
+    from api.common.database import engine, engine1
+    from api.common.metrics import clear_metrics_dir
+
+    # OpenAPI schema (also used by the docs): built once, not per worker
+    app.openapi()
+    # the workers write their metrics files afresh
+    clear_metrics_dir()
+    # no DB connection may be shared with the forked workers
+    engine.dispose()
+    engine1.dispose()
+    return app
+
+
+def run_worker(config: uvicorn.Config, sockets):
+    """Worker process: serves on the inherited socket until stopped or recycled."""
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    random.seed()
+    if settings.server_max_requests:
+        # jitter, so the workers are not all recycled at the same time
+        config.limit_max_requests = settings.server_max_requests + random.randint(
+            0, settings.server_max_requests_jitter
+        )
+    status = 0
+    try:
+        uvicorn.Server(config).run(sockets=sockets)
+    except BaseException as err:
+        print(f"Worker {os.getpid()} failed: {err}")
+        status = 1
+    finally:
+        sys.stdout.flush()
+        os._exit(status)
+
+
+class Master:
+    """Forks the workers, re-forks recycled/crashed ones and stops them on SIGTERM/SIGINT."""
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.sockets = [config.bind_socket()]
+        # pid -> start time
+        self.children: dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.config, self.sockets)
+        self.children[pid] = time.monotonic()
+
+    def stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        print(f"Stopping {len(self.children)} workers (graceful)")
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        # kill the workers still draining after the graceful timeout
+        signal.signal(signal.SIGALRM, self.kill_all)
+        signal.alarm(settings.server_graceful_timeout + KILL_GRACE)
+
+    def kill_all(self, signum, frame):
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        print(
+            f"Serving on {settings.server_host}:{settings.server_port} with {self.workers} workers "
+            f"({self.config.loop}/{self.config.http}), master pid {os.getpid()}"
+        )
+        for _ in range(self.workers):
+            self.spawn()
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+            if self.stopping:
+                continue
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                # crashing on start: do not fork in a tight loop
+                print(f"Worker {pid} exited on start (status {status}), restarting in 1s")
+                time.sleep(1)
+            self.spawn()
+        for sock in self.sockets:
+            sock.close()
+        print("Server stopped")
+
+
+def main():
+    workers = get_workers()
+    check_response_cache(workers)
+    check_metrics(workers)
+    if not hasattr(os, "fork"):
+        uvicorn.run(
+            "api:app",
+            host=settings.server_host,
+            port=settings.server_port,
+            workers=workers,
+            loop=get_loop(),
+            http=get_http(),
+            log_level=settings.server_log_level,
+            access_log=settings.server_access_log,
+            backlog=settings.server_backlog,
+            timeout_keep_alive=settings.server_keep_alive,
+            timeout_graceful_shutdown=settings.server_graceful_timeout,
+            limit_max_requests=settings.server_max_requests or None,
+            proxy_headers=True,
+            server_header=False,
+        )
+        return
+    Master(get_config(preload()), workers).run()
+
+
+if __name__ == "__main__":
+    main()